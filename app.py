@@ -1,4 +1,5 @@
 import calendar
+import csv
 import os
 from datetime import date as dt_date, datetime, time as dt_time, timedelta
 from typing import Optional, Tuple
@@ -16,6 +17,9 @@ from sqlalchemy.exc import OperationalError, ProgrammingError
 from config import Config, current_database_url
 from extensions import db, migrate, jwt, mail
 from exsol_storage import init_exsol_storage
+import background_jobs
+import oee
+import production_history
 from models import (
     Company,
     Customer,
@@ -832,6 +836,111 @@ def seed_idle_demo(period):
         )
 
 
+# ---- CLI: archive closed production months ----
+@app.cli.command("archive-production")
+@click.option("--before", help="Archive months before this YYYY-MM (defaults to PRODUCTION_ARCHIVE_AFTER_MONTHS ago)")
+def archive_production(before):
+    """Compact hourly production of closed months into the daily archive."""
+
+    with app.app_context():
+        if before:
+            try:
+                cutoff = datetime.strptime(f"{before}-01", "%Y-%m-%d").date()
+            except ValueError as exc:
+                raise click.BadParameter("Before must use YYYY-MM format.") from exc
+        else:
+            months_back = max(int(app.config.get("PRODUCTION_ARCHIVE_AFTER_MONTHS", 3)), 1)
+            today = dt_date.today()
+            month_index = today.year * 12 + today.month - 1 - months_back
+            cutoff = dt_date(month_index // 12, month_index % 12 + 1, 1)
+
+        results = production_history.archive_closed_months(cutoff)
+        for result in results:
+            click.echo(
+                f"✅ Archived {result['period']}: {result['hour_rows']} hourly rows into {result['days']} days."
+            )
+        if not results:
+            click.echo(f"ℹ️ No live production before {cutoff:%Y-%m} to archive.")
+
+
+# ---- CLI: purge expired background jobs ----
+@app.cli.command("purge-background-jobs")
+@click.option("--hours", type=float, help="Remove finished jobs older than this (defaults to BACKGROUND_JOB_TTL_HOURS)")
+def purge_background_jobs(hours):
+    """Delete finished background job state and export files past their TTL."""
+
+    with app.app_context():
+        max_age = timedelta(hours=hours) if hours is not None else None
+        removed = background_jobs.purge_expired(app, max_age)
+        click.echo(f"✅ Removed {removed} expired background jobs.")
+
+
+@app.cli.command("oee-report")
+@click.option("--period", help="Month in YYYY-MM format (defaults to last month)")
+@click.option("--machine-codes", default="MCH-0001,MCH-0002,MCH-0003", show_default=True)
+@click.option("--csv", "csv_path", type=click.Path(dir_okay=False), help="Write day and shift rows to this CSV file")
+def oee_report(period, machine_codes, csv_path):
+    """Print month OEE per machine for month-end reporting."""
+
+    with app.app_context():
+        if period:
+            try:
+                month_start = datetime.strptime(f"{period}-01", "%Y-%m-%d").date()
+            except ValueError as exc:
+                raise click.BadParameter("Period must use YYYY-MM format.") from exc
+        else:
+            month_start = (dt_date.today().replace(day=1) - timedelta(days=1)).replace(day=1)
+        month_end = month_start.replace(day=calendar.monthrange(month_start.year, month_start.month)[1])
+
+        codes = [code.strip().upper() for code in machine_codes.split(",") if code.strip()]
+        assets_by_code = {
+            asset.code.upper(): asset
+            for asset in MachineAsset.query.filter(func.upper(MachineAsset.code).in_(codes)).all()
+        }
+        assets = [assets_by_code[code] for code in codes if code in assets_by_code]
+        results = oee.machine_oee(
+            [asset.id for asset in assets], month_start, month_end, today=dt_date.today()
+        )
+
+        def _percent(value):
+            return "—" if value is None else f"{value * 100:.1f}%"
+
+        click.echo(f"OEE {month_start:%B %Y}")
+        for asset in assets:
+            totals = results[asset.id]["totals"]
+            click.echo(
+                f"{asset.code}: OEE {_percent(totals['oee'])} "
+                f"(availability {_percent(totals['availability'])}, "
+                f"performance {_percent(totals['performance'])}, "
+                f"quality {_percent(totals['quality'])}) — "
+                f"{totals['actual_tons']:.3f} t in {totals['run_hours']:.1f} of {totals['planned_hours']:.1f} planned hours"
+            )
+        if not assets:
+            click.echo("ℹ️ No matching machines.")
+
+        if csv_path:
+            fields = [
+                "planned_hours",
+                "run_hours",
+                "idle_hours",
+                "actual_tons",
+                "ideal_tons",
+                "availability",
+                "performance",
+                "quality",
+                "oee",
+            ]
+            with open(csv_path, "w", newline="", encoding="utf-8") as handle:
+                writer = csv.writer(handle)
+                writer.writerow(["machine_code", "date", "shift", *fields])
+                for asset in assets:
+                    for day in results[asset.id]["days"]:
+                        writer.writerow([asset.code, day["date"], "all", *(day[field] for field in fields)])
+                        for shift, values in day["shifts"].items():
+                            writer.writerow([asset.code, day["date"], shift, *(values[field] for field in fields)])
+            click.echo(f"✅ Wrote {csv_path}")
+
+
 # ---- CLI: seed or reset admin ----
 @app.cli.command("seed-admin")
 @click.option("--email", default="admin@samprox.lk", help="Admin email")
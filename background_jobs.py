@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from flask import Flask, current_app
+
+_STATUS_QUEUED = "queued"
+_STATUS_RUNNING = "running"
+_STATUS_COMPLETED = "completed"
+_STATUS_FAILED = "failed"
+_ACTIVE_STATUSES = {_STATUS_QUEUED, _STATUS_RUNNING}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_write_lock = threading.Lock()
+
+
+def _jobs_dir(app: Flask) -> Path:
+    target = Path(app.instance_path or ".") / "background_jobs"
+    target.mkdir(parents=True, exist_ok=True)
+    return target
+
+
+def _safe_token(token: str) -> str:
+    return "".join(ch for ch in str(token) if ch.isalnum())
+
+
+def _get_executor(app: Flask) -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(int(app.config.get("BACKGROUND_JOB_WORKERS", 2)), 1),
+                thread_name_prefix="background-job",
+            )
+        return _executor
+
+
+class BackgroundJob:
+    """Handle passed to background job targets for reporting progress.
+
+    State is persisted as JSON under ``instance/background_jobs`` so any
+    request thread can poll it.
+    """
+
+    def __init__(self, app: Flask, token: str, kind: str) -> None:
+        self.app = app
+        self.token = token
+        self.kind = kind
+
+    @property
+    def status_path(self) -> Path:
+        return _jobs_dir(self.app) / f"{self.token}.json"
+
+    def artifact_path(self, suffix: str) -> Path:
+        return _jobs_dir(self.app) / f"{self.token}{suffix}"
+
+    def read(self) -> dict[str, Any]:
+        try:
+            with self.status_path.open("r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def update(self, **changes: Any) -> dict[str, Any]:
+        with _write_lock:
+            state = self.read()
+            state.update(changes)
+            state["updated_at"] = datetime.utcnow().isoformat()
+            tmp_path = self.status_path.with_suffix(".tmp")
+            with tmp_path.open("w", encoding="utf-8") as handle:
+                json.dump(state, handle, default=str)
+            os.replace(tmp_path, self.status_path)
+            return state
+
+    def progress(self, done: int, total: Optional[int] = None) -> None:
+        payload: dict[str, Any] = {"done": done}
+        if total is not None:
+            payload["total"] = total
+        self.update(progress=payload)
+
+
+def start_job(
+    kind: str,
+    target: Callable[..., Optional[dict[str, Any]]],
+    *args: Any,
+    base_url: Optional[str] = None,
+    owner_id: Any = None,
+    **kwargs: Any,
+) -> str:
+    """Queue ``target(job, *args, **kwargs)`` on a worker thread and return its token.
+
+    The target runs inside a request context built from ``base_url`` so it
+    can use ``render_template``/``url_for`` and the scoped database session.
+    Its return value is stored as the job ``result``. ``owner_id`` is kept
+    with the job so :func:`get_job` can refuse other users; expired jobs are
+    purged before the new one is queued.
+    """
+
+    app = current_app._get_current_object()
+    purge_expired(app)
+    token = uuid.uuid4().hex
+    job = BackgroundJob(app, token, kind)
+    job.update(
+        token=token,
+        kind=kind,
+        status=_STATUS_QUEUED,
+        progress={"done": 0},
+        result=None,
+        error=None,
+        owner_id=None if owner_id is None else str(owner_id),
+        created_at=datetime.utcnow().isoformat(),
+    )
+
+    def _run() -> None:
+        with app.test_request_context(base_url=base_url or "http://localhost/"):
+            job.update(status=_STATUS_RUNNING, started_at=datetime.utcnow().isoformat())
+            try:
+                result = target(job, *args, **kwargs)
+            except Exception as exc:  # pragma: no cover - defensive
+                app.logger.error(
+                    "Background job %s (%s) failed: %s\n%s",
+                    token,
+                    kind,
+                    exc,
+                    traceback.format_exc(),
+                )
+                job.update(status=_STATUS_FAILED, error=str(exc) or exc.__class__.__name__)
+                return
+            job.update(
+                status=_STATUS_COMPLETED,
+                result=result,
+                finished_at=datetime.utcnow().isoformat(),
+            )
+
+    _get_executor(app).submit(_run)
+    return token
+
+
+def get_job(token: str, kind: Optional[str] = None, owner_id: Any = None) -> Optional[BackgroundJob]:
+    """Return the job handle for ``token`` if it exists (and matches ``kind``).
+
+    When ``owner_id`` is given, jobs started by anyone else are treated as
+    missing so their tokens cannot be probed.
+    """
+
+    safe_token = _safe_token(token)
+    if not safe_token:
+        return None
+    job = BackgroundJob(current_app._get_current_object(), safe_token, kind or "")
+    state = job.read()
+    if not state:
+        return None
+    if kind and state.get("kind") != kind:
+        return None
+    if owner_id is not None and state.get("owner_id") != str(owner_id):
+        return None
+    job.kind = state.get("kind") or ""
+    return job
+
+
+def purge_expired(app: Optional[Flask] = None, max_age: Optional[timedelta] = None) -> int:
+    """Delete finished jobs (state and artifacts) untouched for ``max_age``.
+
+    ``max_age`` defaults to ``BACKGROUND_JOB_TTL_HOURS``. Queued or running
+    jobs are kept. Returns the number of jobs removed.
+    """
+
+    app = app or current_app._get_current_object()
+    if max_age is None:
+        max_age = timedelta(hours=float(app.config.get("BACKGROUND_JOB_TTL_HOURS", 24)))
+    cutoff = (datetime.utcnow() - max_age).timestamp()
+    jobs_dir = _jobs_dir(app)
+    removed = 0
+    with _write_lock:
+        for status_path in jobs_dir.glob("*.json"):
+            try:
+                if status_path.stat().st_mtime > cutoff:
+                    continue
+            except OSError:
+                continue
+            job = BackgroundJob(app, status_path.stem, "")
+            if job.read().get("status") in _ACTIVE_STATUSES:
+                continue
+            for path in jobs_dir.glob(f"{status_path.stem}.*"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            removed += 1
+    return removed
@@ -222,6 +222,22 @@ class Config:
     COMPANY_CONTACT = _env_str("COMPANY_CONTACT")
     COMPANY_TAGLINE = _env_str("COMPANY_TAGLINE", "The Shape of Tomorrow")
     COMPANY_LOGO_PATH = _env_str("COMPANY_LOGO_PATH", "static/profile_images/GRNLOGO.png")
+    MAINTENANCE_PDF_WORKERS = int(os.getenv("MAINTENANCE_PDF_WORKERS", "2"))
+    MAINTENANCE_PDF_CACHE_SIZE = int(os.getenv("MAINTENANCE_PDF_CACHE_SIZE", "64"))
+    MAINTENANCE_PDF_TIMEOUT = _env_float("MAINTENANCE_PDF_TIMEOUT", 120.0)
+    MAINTENANCE_EXPORT_SYNC_LIMIT = int(os.getenv("MAINTENANCE_EXPORT_SYNC_LIMIT", "100"))
+    BACKGROUND_JOB_WORKERS = int(os.getenv("BACKGROUND_JOB_WORKERS", "2"))
+    BACKGROUND_JOB_TTL_HOURS = _env_float("BACKGROUND_JOB_TTL_HOURS", 24.0)
+    PRODUCTION_STREAM_MAX_SUBSCRIBERS = int(os.getenv("PRODUCTION_STREAM_MAX_SUBSCRIBERS", "4"))
+    PRODUCTION_STREAM_HEARTBEAT_SECONDS = _env_float("PRODUCTION_STREAM_HEARTBEAT_SECONDS", 15.0)
+    PRODUCTION_STREAM_MAX_SECONDS = _env_float("PRODUCTION_STREAM_MAX_SECONDS", 300.0)
+    PRODUCTION_VARIANCE_CACHE_SIZE = int(os.getenv("PRODUCTION_VARIANCE_CACHE_SIZE", "256"))
+    PRODUCTION_OEE_CACHE_SIZE = int(os.getenv("PRODUCTION_OEE_CACHE_SIZE", "256"))
+    CUSTOMER_CODE_BLOCK_SIZE = int(os.getenv("CUSTOMER_CODE_BLOCK_SIZE", "20"))
+    DEALER_IMPORT_SYNC_LIMIT = int(os.getenv("DEALER_IMPORT_SYNC_LIMIT", "500"))
+    DEALER_IMPORT_CHUNK_SIZE = int(os.getenv("DEALER_IMPORT_CHUNK_SIZE", "500"))
+    PRODUCTION_ARCHIVE_AFTER_MONTHS = int(os.getenv("PRODUCTION_ARCHIVE_AFTER_MONTHS", "3"))
+    SYSTEM_STATUS_CACHE_SECONDS = _env_float("SYSTEM_STATUS_CACHE_SECONDS", 60.0)
     RESEND_API_KEY = _env_password("RESEND_API_KEY")
     RESEND_DEFAULT_SENDER = _env_str(
         "RESEND_DEFAULT_SENDER",
@@ -0,0 +1,137 @@
+"""Geohash bucketing and radius lookups over customer locations.
+
+Locations store a full-precision geohash. A radius query covers its
+bounding box with a few coarser cells, turns each cell into a prefix
+match on the indexed ``geohash`` column, prunes by the bounding box and
+only then runs the exact haversine check.
+"""
+
+from __future__ import annotations
+
+from math import ceil, cos, radians
+from typing import Optional
+
+from sqlalchemy import or_
+
+from models import CustomerLocation, haversine_distance_meters
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_METERS_PER_DEGREE_LAT = 111_320.0
+
+STORED_PRECISION = 9
+MAX_QUERY_CELLS = 16
+
+
+def encode(lat: float, lng: float, precision: int = STORED_PRECISION) -> str:
+    """Return the geohash of a point."""
+
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        target, value = (lng_range, lng) if even else (lat_range, lat)
+        middle = (target[0] + target[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            target[0] = middle
+        else:
+            target[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def set_position(location: CustomerLocation, lat: float, lng: float) -> None:
+    """Move ``location`` to a point and refresh its geohash bucket."""
+
+    location.latitude = lat
+    location.longitude = lng
+    location.geohash = encode(lat, lng)
+
+
+def _cell_size(precision: int) -> tuple[float, float]:
+    """Return ``(lat_degrees, lng_degrees)`` covered by one cell."""
+
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def bounding_box(lat: float, lng: float, radius_m: float) -> tuple[float, float, float, float]:
+    """Return ``(min_lat, min_lng, max_lat, max_lng)`` enclosing the circle."""
+
+    lat_delta = radius_m / _METERS_PER_DEGREE_LAT
+    lng_delta = radius_m / (_METERS_PER_DEGREE_LAT * max(cos(radians(lat)), 1e-6))
+    return (
+        max(lat - lat_delta, -90.0),
+        max(lng - lng_delta, -180.0),
+        min(lat + lat_delta, 90.0),
+        min(lng + lng_delta, 180.0),
+    )
+
+
+def covering_cells(box: tuple[float, float, float, float], max_cells: int = MAX_QUERY_CELLS) -> list[str]:
+    """Return the finest set of at most ``max_cells`` geohash cells covering ``box``."""
+
+    min_lat, min_lng, max_lat, max_lng = box
+    for precision in range(STORED_PRECISION, 0, -1):
+        cell_lat, cell_lng = _cell_size(precision)
+        rows = ceil((max_lat - min_lat) / cell_lat) + 1
+        columns = ceil((max_lng - min_lng) / cell_lng) + 1
+        if rows * columns > max_cells:
+            continue
+        cells = set()
+        for row in range(rows):
+            sample_lat = min(min_lat + row * cell_lat, max_lat)
+            for column in range(columns):
+                sample_lng = min(min_lng + column * cell_lng, max_lng)
+                cells.add(encode(sample_lat, sample_lng, precision))
+        return sorted(cells)
+    return [""]
+
+
+def nearby(
+    lat: float,
+    lng: float,
+    radius_m: float,
+    *,
+    query=None,
+    limit: Optional[int] = None,
+) -> list[tuple[CustomerLocation, int]]:
+    """Return ``(location, distance_m)`` pairs within ``radius_m``, nearest first.
+
+    ``query`` can narrow the candidate locations (for example by owner)
+    before the spatial filters are added.
+    """
+
+    box = bounding_box(lat, lng, radius_m)
+    min_lat, min_lng, max_lat, max_lng = box
+    # LIKE keeps the prefix match independent of the column collation; base32
+    # has no wildcard characters to escape.
+    prefixes = [CustomerLocation.geohash.like(f"{cell}%") for cell in covering_cells(box)]
+    candidates = (
+        (query if query is not None else CustomerLocation.query)
+        .filter(or_(*prefixes))
+        .filter(CustomerLocation.latitude.between(min_lat, max_lat))
+        .filter(CustomerLocation.longitude.between(min_lng, max_lng))
+        .all()
+    )
+
+    matches = []
+    for location in candidates:
+        distance = haversine_distance_meters(
+            lat, lng, float(location.latitude), float(location.longitude)
+        )
+        if distance <= radius_m:
+            matches.append((location, distance))
+    matches.sort(key=lambda match: match[1])
+    return matches[:limit] if limit else matches
@@ -0,0 +1,43 @@
+"""Weak ETag helpers for JSON list endpoints.
+
+Tags are built from a cheap fingerprint of the rows behind a response (row
+count plus the newest ``updated_at``) so an unchanged list can be answered
+with ``304 Not Modified`` before anything is loaded or serialized.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Optional
+
+from flask import Response, current_app, request
+from sqlalchemy import func
+
+
+def fingerprint(query, updated_column) -> tuple:
+    """Return ``(row count, newest updated_at)`` for ``query``."""
+
+    count, newest = query.order_by(None).with_entities(func.count(), func.max(updated_column)).one()
+    return int(count or 0), str(newest) if newest is not None else None
+
+
+def etag_for(*parts: object) -> str:
+    """Hash ``parts`` (fingerprints, scope, query string) into an opaque tag."""
+
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def not_modified(etag: str) -> Optional[Response]:
+    """Return a ``304`` response when the client already holds ``etag``."""
+
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return tag(current_app.response_class(status=304), etag)
+
+
+def tag(response: Response, etag: str) -> Response:
+    """Attach ``etag`` and ask clients to revalidate before reusing it."""
+
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,100 @@
+"""Interval arithmetic for idle events against production time windows.
+
+Windows are given as a sorted list of boundaries, so ``boundaries[i]`` to
+``boundaries[i + 1]`` is window ``i``. Each interval is located with a binary
+search and then walks only the windows it touches; for disjoint intervals the
+whole pass is O((intervals + windows) log windows).
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, Optional, Sequence
+
+
+def hourly_boundaries(start_date: date, days: int) -> list[datetime]:
+    """Return the ``days * 24 + 1`` hour boundaries starting at ``start_date`` midnight."""
+
+    origin = datetime.combine(start_date, time.min)
+    return [origin + timedelta(hours=index) for index in range(days * 24 + 1)]
+
+
+def merge(
+    intervals: Iterable[tuple[datetime, Optional[datetime]]],
+    *,
+    open_end: Optional[datetime] = None,
+) -> list[tuple[datetime, datetime]]:
+    """Sort intervals and merge overlapping ones.
+
+    Intervals without an end are closed at ``open_end`` (or dropped when it
+    is ``None``); empty intervals are dropped.
+    """
+
+    closed = []
+    for start, end in intervals:
+        if end is None:
+            end = open_end
+        if start is None or end is None or end <= start:
+            continue
+        closed.append((start, end))
+    closed.sort()
+
+    merged: list[tuple[datetime, datetime]] = []
+    for start, end in closed:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def overlap_minutes(
+    intervals: Iterable[tuple[datetime, datetime]],
+    boundaries: Sequence[datetime],
+) -> list[float]:
+    """Return the minutes of ``intervals`` falling in each window.
+
+    Overlapping intervals are counted once each; pass them through
+    :func:`merge` first to count covered time instead.
+    """
+
+    window_count = max(len(boundaries) - 1, 0)
+    totals = [0.0] * window_count
+    if not window_count:
+        return totals
+
+    for start, end in intervals:
+        if end <= start or end <= boundaries[0] or start >= boundaries[-1]:
+            continue
+        index = max(bisect_right(boundaries, start) - 1, 0)
+        while index < window_count and boundaries[index] < end:
+            overlap = min(end, boundaries[index + 1]) - max(start, boundaries[index])
+            if overlap > timedelta(0):
+                totals[index] += overlap.total_seconds() / 60
+            index += 1
+    return totals
+
+
+def window_hits(
+    intervals: Sequence[tuple[datetime, Optional[datetime]]],
+    boundaries: Sequence[datetime],
+) -> Iterator[tuple[int, int]]:
+    """Yield ``(window_index, interval_index)`` for every interval touching a window.
+
+    An interval touches a window when it starts before the window ends and
+    ends (or is still open) after the window starts.
+    """
+
+    window_count = len(boundaries) - 1
+    for interval_index, (start, end) in enumerate(intervals):
+        if start is None or start >= boundaries[-1]:
+            continue
+        if end is not None and end <= boundaries[0]:
+            continue
+        index = max(bisect_right(boundaries, start) - 1, 0)
+        while index < window_count and boundaries[index] < (end or boundaries[-1]):
+            if end is None or end > boundaries[index]:
+                yield index, interval_index
+            index += 1
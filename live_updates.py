@@ -0,0 +1,130 @@
+"""In-process publish/subscribe hub backing the server-sent event streams.
+
+The app runs as a single gunicorn worker with threads, so subscribers and
+publishers share this process; each stream holds one ``queue.Queue``.
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+_OVERFLOW_EVENT = "resync"
+
+
+def format_sse(event: str, data: Any, *, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    payload = json.dumps(data, default=str, separators=(",", ":"))
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    def __init__(self, hub: "EventHub", channel: str, max_queue: int) -> None:
+        self.hub = hub
+        self.channel = channel
+        self.queue: "queue.Queue[str]" = queue.Queue(maxsize=max_queue)
+
+    def deliver(self, message: str) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            # A stalled client missed updates; tell it to reload instead of
+            # letting the backlog grow.
+            self._drain()
+            self.queue.put_nowait(format_sse(_OVERFLOW_EVENT, {"channel": self.channel}))
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def get(self, timeout: float) -> Optional[str]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    """Fan published events out to every subscriber of a channel."""
+
+    def __init__(self, max_queue: int = 256) -> None:
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._next_id = 0
+
+    def subscriber_count(self, channel: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+    def subscribe(self, channel: str, *, limit: Optional[int] = None) -> Optional[Subscription]:
+        """Register a subscriber, or return ``None`` when ``limit`` is reached."""
+
+        with self._lock:
+            subscribers = self._subscribers.setdefault(channel, set())
+            if limit is not None and len(subscribers) >= limit:
+                return None
+            subscription = Subscription(self, channel, self.max_queue)
+            subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+
+    def publish(self, channel: str, event: str, data: Any) -> int:
+        """Send ``data`` to current subscribers and return how many received it."""
+
+        with self._lock:
+            self._next_id += 1
+            message = format_sse(event, data, event_id=self._next_id)
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+        return len(subscribers)
+
+    def stream(
+        self,
+        subscription: Subscription,
+        *,
+        heartbeat_seconds: float,
+        max_seconds: float,
+        retry_ms: int = 3000,
+    ) -> Iterator[str]:
+        """Yield SSE frames for ``subscription`` until ``max_seconds`` elapse.
+
+        Closing the connection periodically frees the worker thread; the
+        browser's ``EventSource`` reconnects after ``retry_ms``.
+        """
+
+        deadline = time.monotonic() + max_seconds
+        try:
+            yield f"retry: {retry_ms}\n\n"
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                message = subscription.get(timeout=min(heartbeat_seconds, remaining))
+                yield message if message is not None else ": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+
+PRODUCTION_CHANNEL = "production"
+
+hub = EventHub()
@@ -0,0 +1,205 @@
+"""Read helpers for the pre-split machine idle minute rollups."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import func, or_, select
+
+import intervals
+from extensions import db
+from models import MachineIdleEvent, MachineIdleRollup
+
+
+def _open_event_minutes(
+    asset_ids: list[int],
+    start_date: date,
+    end_date: date,
+    shift: str,
+    now: datetime,
+) -> Iterator[tuple[int, date, str, str, float]]:
+    """Split still-open idle events up to ``now`` (they are not rolled up yet)."""
+
+    events = db.session.execute(
+        select(
+            MachineIdleEvent.asset_id,
+            MachineIdleEvent.started_at,
+            MachineIdleEvent.reason,
+            MachineIdleEvent.secondary_reason,
+        )
+        .where(MachineIdleEvent.asset_id.in_(asset_ids))
+        .where(MachineIdleEvent.ended_at.is_(None))
+        .where(MachineIdleEvent.started_at <= datetime.combine(end_date, time.max))
+    ).all()
+
+    for asset_id, started_at, reason, secondary_reason in events:
+        buckets = MachineIdleRollup.split_minutes(started_at, now)
+        for (day, bucket_shift), minutes in buckets.items():
+            if bucket_shift != shift or not (start_date <= day <= end_date):
+                continue
+            yield (
+                asset_id,
+                day,
+                (reason or "").strip(),
+                (secondary_reason or "").strip(),
+                minutes,
+            )
+
+
+def idle_minutes_by_day(
+    asset_ids: Iterable[int],
+    start_date: date,
+    end_date: date,
+    *,
+    shift: str = MachineIdleRollup.SHIFT_DAY,
+    now: Optional[datetime] = None,
+) -> dict[tuple[int, date], float]:
+    """Return idle minutes keyed by ``(asset_id, day)`` for one shift."""
+
+    asset_ids = list(asset_ids)
+    if not asset_ids:
+        return {}
+
+    rows = db.session.execute(
+        select(
+            MachineIdleRollup.asset_id,
+            MachineIdleRollup.day,
+            func.sum(MachineIdleRollup.idle_minutes),
+        )
+        .where(MachineIdleRollup.asset_id.in_(asset_ids))
+        .where(MachineIdleRollup.shift == shift)
+        .where(MachineIdleRollup.day >= start_date, MachineIdleRollup.day <= end_date)
+        .group_by(MachineIdleRollup.asset_id, MachineIdleRollup.day)
+    ).all()
+    minutes_by_day = {(asset_id, day): float(minutes or 0.0) for asset_id, day, minutes in rows}
+
+    for asset_id, day, _, _, minutes in _open_event_minutes(
+        asset_ids, start_date, end_date, shift, now or datetime.utcnow()
+    ):
+        key = (asset_id, day)
+        minutes_by_day[key] = minutes_by_day.get(key, 0.0) + minutes
+    return minutes_by_day
+
+
+def idle_minutes_by_reason(
+    asset_ids: Iterable[int],
+    start_date: date,
+    end_date: date,
+    *,
+    shift: str = MachineIdleRollup.SHIFT_DAY,
+    now: Optional[datetime] = None,
+) -> dict[tuple[int, str, str], float]:
+    """Return idle minutes keyed by ``(asset_id, reason, secondary_reason)`` for one shift."""
+
+    asset_ids = list(asset_ids)
+    if not asset_ids:
+        return {}
+
+    rows = db.session.execute(
+        select(
+            MachineIdleRollup.asset_id,
+            MachineIdleRollup.reason,
+            MachineIdleRollup.secondary_reason,
+            func.sum(MachineIdleRollup.idle_minutes),
+        )
+        .where(MachineIdleRollup.asset_id.in_(asset_ids))
+        .where(MachineIdleRollup.shift == shift)
+        .where(MachineIdleRollup.day >= start_date, MachineIdleRollup.day <= end_date)
+        .group_by(
+            MachineIdleRollup.asset_id,
+            MachineIdleRollup.reason,
+            MachineIdleRollup.secondary_reason,
+        )
+    ).all()
+    minutes_by_reason = {
+        (asset_id, reason, secondary_reason): float(minutes or 0.0)
+        for asset_id, reason, secondary_reason, minutes in rows
+    }
+
+    for asset_id, _, reason, secondary_reason, minutes in _open_event_minutes(
+        asset_ids, start_date, end_date, shift, now or datetime.utcnow()
+    ):
+        key = (asset_id, reason, secondary_reason)
+        minutes_by_reason[key] = minutes_by_reason.get(key, 0.0) + minutes
+    return minutes_by_reason
+
+
+def idle_minutes_by_hour(
+    asset_ids: Iterable[int],
+    start_date: date,
+    end_date: date,
+    *,
+    now: Optional[datetime] = None,
+) -> dict[int, list[float]]:
+    """Return idle minutes per hour slot of the period, keyed by asset.
+
+    Each list holds ``days * 24`` values aligned with production hour slots.
+    Overlapping events on one machine are merged so no minute counts twice.
+    """
+
+    asset_ids = list(asset_ids)
+    if not asset_ids:
+        return {}
+
+    boundaries = intervals.hourly_boundaries(start_date, (end_date - start_date).days + 1)
+    rows = db.session.execute(
+        select(MachineIdleEvent.asset_id, MachineIdleEvent.started_at, MachineIdleEvent.ended_at)
+        .where(MachineIdleEvent.asset_id.in_(asset_ids))
+        .where(MachineIdleEvent.started_at < boundaries[-1])
+        .where(
+            or_(
+                MachineIdleEvent.ended_at.is_(None),
+                MachineIdleEvent.ended_at > boundaries[0],
+            )
+        )
+    ).all()
+
+    windows_by_asset: dict[int, list[tuple[datetime, Optional[datetime]]]] = {}
+    for asset_id, started_at, ended_at in rows:
+        windows_by_asset.setdefault(asset_id, []).append((started_at, ended_at))
+
+    open_end = now or datetime.utcnow()
+    return {
+        asset_id: intervals.overlap_minutes(intervals.merge(windows, open_end=open_end), boundaries)
+        for asset_id, windows in windows_by_asset.items()
+    }
+
+
+def rollup_fingerprint(asset_ids: Iterable[int], start_date: date, end_date: date) -> dict[int, tuple]:
+    """Return ``{asset_id: (rollup rows, rolled-up minutes, open events, earliest open start)}``."""
+
+    asset_ids = list(asset_ids)
+    if not asset_ids:
+        return {}
+
+    fingerprints: dict[int, list] = {asset_id: [0, 0.0, 0, None] for asset_id in asset_ids}
+    rows = db.session.execute(
+        select(
+            MachineIdleRollup.asset_id,
+            func.count(MachineIdleRollup.id),
+            func.sum(MachineIdleRollup.idle_minutes),
+        )
+        .where(MachineIdleRollup.asset_id.in_(asset_ids))
+        .where(MachineIdleRollup.day >= start_date, MachineIdleRollup.day <= end_date)
+        .group_by(MachineIdleRollup.asset_id)
+    ).all()
+    for asset_id, count, minutes in rows:
+        fingerprints[asset_id][0] = count
+        fingerprints[asset_id][1] = round(float(minutes or 0.0), 3)
+
+    open_rows = db.session.execute(
+        select(
+            MachineIdleEvent.asset_id,
+            func.count(MachineIdleEvent.id),
+            func.min(MachineIdleEvent.started_at),
+        )
+        .where(MachineIdleEvent.asset_id.in_(asset_ids))
+        .where(MachineIdleEvent.ended_at.is_(None))
+        .where(MachineIdleEvent.started_at <= datetime.combine(end_date, time.max))
+        .group_by(MachineIdleEvent.asset_id)
+    ).all()
+    for asset_id, count, earliest in open_rows:
+        fingerprints[asset_id][2] = count
+        fingerprints[asset_id][3] = str(earliest)
+    return {asset_id: tuple(value) for asset_id, value in fingerprints.items()}
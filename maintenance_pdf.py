@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import atexit
+import base64
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from io import BytesIO
+from typing import Hashable, Iterable, Iterator, Optional
+
+_LOGO_MIME_TYPES = {
+    "ico": "image/x-icon",
+    "icon": "image/x-icon",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "svg": "image/svg+xml",
+}
+
+
+def render_pdf_bytes(html: str) -> Optional[bytes]:
+    """Render ``html`` with xhtml2pdf and return the PDF bytes.
+
+    Runs inside the renderer worker processes, so it must stay importable
+    without the Flask application or database models.
+    """
+
+    from xhtml2pdf import pisa
+
+    buffer = BytesIO()
+    status = pisa.CreatePDF(html, dest=buffer)
+    if status.err:
+        return None
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=32)
+def _encode_logo(path: str, _mtime: float) -> Optional[str]:
+    try:
+        with open(path, "rb") as logo_file:
+            encoded = base64.b64encode(logo_file.read()).decode("utf-8")
+    except OSError:
+        return None
+    ext = os.path.splitext(path)[1].lstrip(".").lower() or "png"
+    mime = _LOGO_MIME_TYPES.get(ext, "image/png")
+    return f"data:{mime};base64,{encoded}"
+
+
+def logo_data_uri(path: Optional[str]) -> Optional[str]:
+    """Return a base64 data URI for ``path``, memoized per file modification time."""
+
+    if not path:
+        return None
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    return _encode_logo(path, mtime)
+
+
+class PdfRenderCache:
+    """Thread-safe LRU cache of rendered PDF documents."""
+
+    def __init__(self, max_entries: int = 64) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def set(self, key: Hashable, data: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class PdfRenderer:
+    """Render PDFs in a lazily started pool of worker processes.
+
+    ``max_workers`` of zero (or a pool that failed to start) renders in the
+    calling thread instead, which keeps tests and single-process tools simple.
+    """
+
+    def __init__(self) -> None:
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_workers = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self, max_workers: int) -> Optional[ProcessPoolExecutor]:
+        if max_workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is not None and self._executor_workers == max_workers:
+                return self._executor
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            # ``spawn`` avoids forking a multi-threaded gunicorn worker.
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+            self._executor_workers = max_workers
+            return self._executor
+
+    def _reset(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._executor_workers = 0
+
+    def submit(self, html: str, *, max_workers: int) -> Future:
+        executor = self._get_executor(max_workers)
+        if executor is not None:
+            try:
+                return executor.submit(render_pdf_bytes, html)
+            except (BrokenProcessPool, RuntimeError):
+                self._reset()
+
+        future: Future = Future()
+        try:
+            future.set_result(render_pdf_bytes(html))
+        except Exception as exc:  # pragma: no cover - defensive
+            future.set_exception(exc)
+        return future
+
+    def render(self, html: str, *, max_workers: int, timeout: Optional[float] = None) -> Optional[bytes]:
+        future = self.submit(html, max_workers=max_workers)
+        try:
+            return future.result(timeout=timeout)
+        except BrokenProcessPool:
+            self._reset()
+            return render_pdf_bytes(html)
+
+    def render_many(
+        self,
+        documents: Iterable[tuple[Hashable, str]],
+        *,
+        max_workers: int,
+        timeout: Optional[float] = None,
+    ) -> Iterator[tuple[Hashable, Optional[bytes]]]:
+        """Yield ``(key, pdf_bytes)`` in input order while keeping the pool busy.
+
+        At most ``2 * max_workers`` documents are in flight at once so large
+        batches never hold every rendered HTML string in memory.
+        """
+
+        window = max(max_workers * 2, 1)
+        pending: "deque[tuple[Hashable, str, Future]]" = deque()
+        for key, html in documents:
+            pending.append((key, html, self.submit(html, max_workers=max_workers)))
+            if len(pending) >= window:
+                yield self._collect(pending.popleft(), timeout)
+        while pending:
+            yield self._collect(pending.popleft(), timeout)
+
+    def _collect(
+        self, item: tuple[Hashable, str, Future], timeout: Optional[float]
+    ) -> tuple[Hashable, Optional[bytes]]:
+        key, html, future = item
+        try:
+            return key, future.result(timeout=timeout)
+        except BrokenProcessPool:
+            self._reset()
+            return key, render_pdf_bytes(html)
+        except TimeoutError:
+            return key, None
+
+    def shutdown(self) -> None:
+        self._reset()
+
+
+renderer = PdfRenderer()
+atexit.register(renderer.shutdown)
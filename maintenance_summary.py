@@ -0,0 +1,292 @@
+"""SQL-side aggregates backing the maintenance jobs dashboard."""
+
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.sql import Select
+
+from extensions import db
+from models import (
+    MaintenanceInternalStaffCost,
+    MaintenanceJob,
+    MaintenanceJobStatus,
+    MaintenanceMaterial,
+    MaintenanceOutsourcedService,
+    ServiceSupplier,
+    TeamMember,
+)
+
+COST_DETAIL_KINDS = ("material", "outsourced", "internal")
+
+COMPLETED_STATUS_VALUES = {MaintenanceJobStatus.COMPLETED_VERIFIED.value}
+PENDING_STATUS_VALUES = {
+    MaintenanceJobStatus.SUBMITTED.value,
+    MaintenanceJobStatus.FORWARDED_TO_MAINTENANCE.value,
+    MaintenanceJobStatus.NOT_YET_STARTED.value,
+    MaintenanceJobStatus.IN_PROGRESS.value,
+    MaintenanceJobStatus.AWAITING_PARTS.value,
+    MaintenanceJobStatus.ON_HOLD.value,
+    MaintenanceJobStatus.TESTING.value,
+    MaintenanceJobStatus.COMPLETED_MAINTENANCE.value,
+    MaintenanceJobStatus.RETURNED_TO_PRODUCTION.value,
+    MaintenanceJobStatus.REOPENED.value,
+}
+
+_HIGHLIGHTED_EMPLOYEE_CODE = "E023"
+
+
+def _as_decimal(value) -> Decimal:
+    if value is None:
+        return Decimal("0")
+    if isinstance(value, Decimal):
+        return value
+    try:
+        return Decimal(str(value))
+    except Exception:  # pragma: no cover - defensive
+        return Decimal("0")
+
+
+def currency_number(value) -> float:
+    return float(_as_decimal(value).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+
+def hours_number(value) -> float:
+    return float(_as_decimal(value).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+
+def _service_date_in_range(service_date_column, start_date: date, end_date: date):
+    """Match lines on their service date, falling back to the job date when unset."""
+
+    return or_(
+        and_(
+            service_date_column.isnot(None),
+            service_date_column >= start_date,
+            service_date_column <= end_date,
+        ),
+        and_(
+            service_date_column.is_(None),
+            MaintenanceJob.job_date >= start_date,
+            MaintenanceJob.job_date <= end_date,
+        ),
+    )
+
+
+def _internal_cost_expression():
+    return func.coalesce(
+        MaintenanceInternalStaffCost.cost,
+        func.coalesce(MaintenanceInternalStaffCost.hourly_rate, 0)
+        * func.coalesce(MaintenanceInternalStaffCost.engaged_hours, 0),
+    )
+
+
+def job_date_bounds() -> tuple[Optional[date], Optional[date]]:
+    row = db.session.execute(
+        select(func.min(MaintenanceJob.job_date), func.max(MaintenanceJob.job_date))
+    ).first()
+    return (row[0], row[1]) if row else (None, None)
+
+
+def job_status_counts(start_date: date, end_date: date, today: date) -> dict[str, int]:
+    """Count initiated, pending, completed and overdue jobs with one grouped query."""
+
+    status_column = func.upper(MaintenanceJob.status)
+    overdue_case = case(
+        (
+            and_(
+                MaintenanceJob.expected_completion.isnot(None),
+                MaintenanceJob.expected_completion < today,
+                status_column.notin_(COMPLETED_STATUS_VALUES),
+            ),
+            1,
+        ),
+        else_=0,
+    )
+    rows = db.session.execute(
+        select(
+            status_column.label("status"),
+            func.count(MaintenanceJob.id).label("job_count"),
+            func.sum(overdue_case).label("overdue_count"),
+        )
+        .where(MaintenanceJob.job_date >= start_date, MaintenanceJob.job_date <= end_date)
+        .group_by(status_column)
+    ).all()
+
+    counts = {"initiated": 0, "pending": 0, "completed": 0, "overdue": 0}
+    for row in rows:
+        job_count = int(row.job_count or 0)
+        counts["initiated"] += job_count
+        counts["overdue"] += int(row.overdue_count or 0)
+        if row.status in COMPLETED_STATUS_VALUES:
+            counts["completed"] += job_count
+        if row.status in PENDING_STATUS_VALUES:
+            counts["pending"] += job_count
+    return counts
+
+
+def cost_totals(start_date: date, end_date: date) -> dict[str, Decimal]:
+    """Return material/outsourced/internal costs and internal hours for the period."""
+
+    material_total = db.session.execute(
+        select(func.coalesce(func.sum(MaintenanceMaterial.cost), 0))
+        .join(MaintenanceJob, MaintenanceMaterial.maintenance_job_id == MaintenanceJob.id)
+        .where(MaintenanceJob.job_date >= start_date, MaintenanceJob.job_date <= end_date)
+    ).scalar()
+
+    outsourced_total = db.session.execute(
+        select(func.coalesce(func.sum(MaintenanceOutsourcedService.cost), 0))
+        .join(MaintenanceJob, MaintenanceOutsourcedService.maintenance_job_id == MaintenanceJob.id)
+        .where(_service_date_in_range(MaintenanceOutsourcedService.service_date, start_date, end_date))
+    ).scalar()
+
+    hours = func.coalesce(MaintenanceInternalStaffCost.engaged_hours, 0)
+    highlighted = func.upper(func.trim(func.coalesce(TeamMember.reg_number, ""))) == _HIGHLIGHTED_EMPLOYEE_CODE
+    internal_row = db.session.execute(
+        select(
+            func.coalesce(func.sum(_internal_cost_expression()), 0).label("cost"),
+            func.coalesce(func.sum(hours), 0).label("hours"),
+            func.coalesce(func.sum(case((highlighted, hours), else_=0)), 0).label("highlighted_hours"),
+        )
+        .join(MaintenanceJob, MaintenanceInternalStaffCost.maintenance_job_id == MaintenanceJob.id)
+        .outerjoin(TeamMember, MaintenanceInternalStaffCost.employee_id == TeamMember.id)
+        .where(_service_date_in_range(MaintenanceInternalStaffCost.service_date, start_date, end_date))
+    ).one()
+
+    internal_hours = _as_decimal(internal_row.hours)
+    highlighted_hours = _as_decimal(internal_row.highlighted_hours)
+    return {
+        "material": _as_decimal(material_total),
+        "outsourced": _as_decimal(outsourced_total),
+        "internal": _as_decimal(internal_row.cost),
+        "hours_total": internal_hours,
+        "hours_e023": highlighted_hours,
+        "hours_other": internal_hours - highlighted_hours,
+    }
+
+
+def cost_detail_query(kind: str, start_date: date, end_date: date) -> Select:
+    """Return the ordered line-item query for one cost breakdown."""
+
+    if kind == "material":
+        return (
+            select(
+                MaintenanceMaterial.id.label("id"),
+                MaintenanceMaterial.material_name.label("material_name"),
+                MaintenanceMaterial.units.label("units"),
+                MaintenanceMaterial.cost.label("cost"),
+                MaintenanceJob.job_code.label("job_code"),
+                MaintenanceJob.job_date.label("job_date"),
+            )
+            .join(MaintenanceJob, MaintenanceMaterial.maintenance_job_id == MaintenanceJob.id)
+            .where(MaintenanceJob.job_date >= start_date, MaintenanceJob.job_date <= end_date)
+            .order_by(MaintenanceJob.job_date.asc(), MaintenanceMaterial.id.asc())
+        )
+
+    if kind == "outsourced":
+        return (
+            select(
+                MaintenanceOutsourcedService.id.label("id"),
+                MaintenanceOutsourcedService.cost.label("cost"),
+                MaintenanceOutsourcedService.service_date.label("service_date"),
+                MaintenanceJob.job_date.label("job_date"),
+                MaintenanceJob.job_code.label("job_code"),
+                MaintenanceOutsourcedService.service_description.label("service_description"),
+                MaintenanceOutsourcedService.engaged_hours.label("engaged_hours"),
+                ServiceSupplier.name.label("supplier_name"),
+            )
+            .join(MaintenanceJob, MaintenanceOutsourcedService.maintenance_job_id == MaintenanceJob.id)
+            .outerjoin(ServiceSupplier, MaintenanceOutsourcedService.supplier_id == ServiceSupplier.id)
+            .where(_service_date_in_range(MaintenanceOutsourcedService.service_date, start_date, end_date))
+            .order_by(
+                func.coalesce(MaintenanceOutsourcedService.service_date, MaintenanceJob.job_date).asc(),
+                MaintenanceOutsourcedService.id.asc(),
+            )
+        )
+
+    if kind == "internal":
+        return (
+            select(
+                MaintenanceInternalStaffCost.id.label("id"),
+                _internal_cost_expression().label("cost"),
+                MaintenanceInternalStaffCost.hourly_rate.label("hourly_rate"),
+                MaintenanceInternalStaffCost.engaged_hours.label("engaged_hours"),
+                MaintenanceInternalStaffCost.service_date.label("service_date"),
+                MaintenanceJob.job_date.label("job_date"),
+                MaintenanceJob.job_code.label("job_code"),
+                TeamMember.reg_number.label("employee_code"),
+                TeamMember.name.label("employee_name"),
+                TeamMember.position.label("employee_role"),
+            )
+            .join(MaintenanceJob, MaintenanceInternalStaffCost.maintenance_job_id == MaintenanceJob.id)
+            .outerjoin(TeamMember, MaintenanceInternalStaffCost.employee_id == TeamMember.id)
+            .where(_service_date_in_range(MaintenanceInternalStaffCost.service_date, start_date, end_date))
+            .order_by(
+                func.coalesce(MaintenanceInternalStaffCost.service_date, MaintenanceJob.job_date).asc(),
+                MaintenanceInternalStaffCost.id.asc(),
+            )
+        )
+
+    raise ValueError(f"Unknown cost detail type: {kind}")
+
+
+def serialize_cost_detail(kind: str, row) -> dict:
+    job_date = row.job_date.isoformat() if row.job_date else None
+    if kind == "material":
+        return {
+            "id": row.id,
+            "job_code": row.job_code,
+            "job_date": job_date,
+            "item": row.material_name,
+            "units": row.units,
+            "cost": currency_number(row.cost),
+        }
+
+    service_date = row.service_date or row.job_date
+    if kind == "outsourced":
+        return {
+            "id": row.id,
+            "job_code": row.job_code,
+            "job_date": job_date,
+            "service_date": service_date.isoformat() if service_date else None,
+            "supplier": row.supplier_name,
+            "description": row.service_description,
+            "engaged_hours": hours_number(row.engaged_hours) if row.engaged_hours is not None else None,
+            "cost": currency_number(row.cost),
+        }
+
+    return {
+        "id": row.id,
+        "job_code": row.job_code,
+        "job_date": job_date,
+        "service_date": service_date.isoformat() if service_date else None,
+        "employee": row.employee_name,
+        "employee_code": row.employee_code,
+        "role": row.employee_role,
+        "engaged_hours": hours_number(row.engaged_hours),
+        "hourly_rate": currency_number(row.hourly_rate) if row.hourly_rate is not None else None,
+        "cost": currency_number(row.cost),
+    }
+
+
+def cost_detail_page(
+    kind: str, start_date: date, end_date: date, *, page: int, page_size: int
+) -> dict:
+    query = cost_detail_query(kind, start_date, end_date)
+    total_rows = db.session.execute(
+        select(func.count()).select_from(query.order_by(None).subquery())
+    ).scalar() or 0
+    total_pages = max((total_rows + page_size - 1) // page_size, 1)
+    page = min(max(page, 1), total_pages)
+    rows = db.session.execute(query.limit(page_size).offset((page - 1) * page_size)).all()
+    return {
+        "rows": [serialize_cost_detail(kind, row) for row in rows],
+        "pagination": {
+            "page": page,
+            "page_size": page_size,
+            "total_rows": total_rows,
+            "total_pages": total_pages,
+        },
+    }
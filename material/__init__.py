@@ -22,6 +22,7 @@ from .briquette import (
     calculate_stock_status,
     get_briquette_mix_detail,
     list_briquette_production_entries,
+    refresh_costs_for_production_dates,
     update_briquette_mix,
 )
 
@@ -45,5 +46,6 @@ __all__ = [
     "calculate_stock_status",
     "get_briquette_mix_detail",
     "list_briquette_production_entries",
+    "refresh_costs_for_production_dates",
     "update_briquette_mix",
 ]
@@ -8,12 +8,12 @@ from datetime import date, datetime
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from typing import Deque, Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy import and_, case, func
+from sqlalchemy import case, func
 
+import production_history
 from extensions import db
 from models import (
     BriquetteMixEntry,
-    DailyProductionEntry,
     MachineAsset,
     MaterialItem,
     MRNHeader,
@@ -190,13 +190,14 @@ def _load_production_for_dates(dates: Iterable[date]) -> Dict[date, Dict[str, De
     if not dates:
         return {}
 
+    production_days = production_history.production_days(min(dates), max(dates))
     rows = (
         db.session.query(
-            DailyProductionEntry.date.label("prod_date"),
+            production_days.c.date.label("prod_date"),
             func.coalesce(
                 func.sum(
                     case(
-                        (func.lower(MachineAsset.code).in_(BRIQUETTE_MACHINE_CODES_LOWER), DailyProductionEntry.quantity_tons),
+                        (func.lower(MachineAsset.code).in_(BRIQUETTE_MACHINE_CODES_LOWER), production_days.c.quantity_tons),
                         else_=0.0,
                     )
                 ),
@@ -205,7 +206,7 @@ def _load_production_for_dates(dates: Iterable[date]) -> Dict[date, Dict[str, De
             func.coalesce(
                 func.sum(
                     case(
-                        (func.lower(MachineAsset.code) == DRYER_MACHINE_CODE_LOWER, DailyProductionEntry.quantity_tons),
+                        (func.lower(MachineAsset.code) == DRYER_MACHINE_CODE_LOWER, production_days.c.quantity_tons),
                         else_=0.0,
                     )
                 ),
@@ -215,11 +216,8 @@ def _load_production_for_dates(dates: Iterable[date]) -> Dict[date, Dict[str, De
                 func.sum(
                     case(
                         (
-                            and_(
-                                func.lower(MachineAsset.code) == DRYER_MACHINE_CODE_LOWER,
-                                DailyProductionEntry.quantity_tons > 0.0,
-                            ),
-                            1.0,
+                            func.lower(MachineAsset.code) == DRYER_MACHINE_CODE_LOWER,
+                            production_days.c.productive_hours,
                         ),
                         else_=0.0,
                     )
@@ -227,9 +225,9 @@ def _load_production_for_dates(dates: Iterable[date]) -> Dict[date, Dict[str, De
                 0.0,
             ).label("dryer_hours"),
         )
-        .join(MachineAsset, DailyProductionEntry.asset_id == MachineAsset.id)
-        .filter(DailyProductionEntry.date.in_(dates))
-        .group_by(DailyProductionEntry.date)
+        .join(MachineAsset, production_days.c.asset_id == MachineAsset.id)
+        .filter(production_days.c.date.in_(dates))
+        .group_by(production_days.c.date)
         .all()
     )
 
@@ -477,15 +475,16 @@ def calculate_stock_status(as_of: date) -> Dict[str, object]:
 
         briquette_receipts_by_date: Dict[date, List[TonInventoryLayer]] = defaultdict(list)
 
+        production_days = production_history.production_days(end=normalized_date)
         production_rows = (
             db.session.query(
-                DailyProductionEntry.date.label("prod_date"),
+                production_days.c.date.label("prod_date"),
                 func.coalesce(
                     func.sum(
                         case(
                             (
                                 func.lower(MachineAsset.code).in_(BRIQUETTE_MACHINE_CODES_LOWER),
-                                DailyProductionEntry.quantity_tons,
+                                production_days.c.quantity_tons,
                             ),
                             else_=0.0,
                         )
@@ -493,13 +492,10 @@ def calculate_stock_status(as_of: date) -> Dict[str, object]:
                     0.0,
                 ).label("briquette_tons"),
             )
-            .join(MachineAsset, DailyProductionEntry.asset_id == MachineAsset.id)
-            .filter(
-                DailyProductionEntry.date > STOCK_BASE_DATE,
-                DailyProductionEntry.date <= normalized_date,
-            )
-            .group_by(DailyProductionEntry.date)
-            .order_by(DailyProductionEntry.date.asc())
+            .join(MachineAsset, production_days.c.asset_id == MachineAsset.id)
+            .filter(production_days.c.date > STOCK_BASE_DATE)
+            .group_by(production_days.c.date)
+            .order_by(production_days.c.date.asc())
             .all()
         )
 
@@ -785,6 +781,27 @@ def _recalculate_fifo_costs(production_map: Optional[Dict[date, Dict[str, Decima
     db.session.flush()
 
 
+def refresh_costs_for_production_dates(dates: Iterable[date]) -> bool:
+    """Re-run FIFO costing if production changed on a day that has a mix entry.
+
+    Mix entries derive their output and unit cost from the day's production,
+    so callers that write production in bulk trigger this once afterwards.
+    """
+
+    target_dates = set(dates)
+    if not target_dates:
+        return False
+    has_mix_entry = (
+        db.session.query(BriquetteMixEntry.id)
+        .filter(BriquetteMixEntry.date.in_(target_dates))
+        .first()
+    )
+    if has_mix_entry is None:
+        return False
+    _recalculate_fifo_costs()
+    return True
+
+
 def list_briquette_production_entries(
     *, limit: int = DEFAULT_BRIQUETTE_ENTRY_LIMIT
 ) -> Dict[str, object]:
@@ -793,13 +810,14 @@ def list_briquette_production_entries(
     except (TypeError, ValueError):
         normalized_limit = DEFAULT_BRIQUETTE_ENTRY_LIMIT
 
+    production_days = production_history.production_days()
     rows = (
         db.session.query(
-            DailyProductionEntry.date.label("prod_date"),
+            production_days.c.date.label("prod_date"),
             func.coalesce(
                 func.sum(
                     case(
-                        (func.lower(MachineAsset.code).in_(BRIQUETTE_MACHINE_CODES_LOWER), DailyProductionEntry.quantity_tons),
+                        (func.lower(MachineAsset.code).in_(BRIQUETTE_MACHINE_CODES_LOWER), production_days.c.quantity_tons),
                         else_=0.0,
                     )
                 ),
@@ -808,16 +826,16 @@ def list_briquette_production_entries(
             func.coalesce(
                 func.sum(
                     case(
-                        (func.lower(MachineAsset.code) == DRYER_MACHINE_CODE_LOWER, DailyProductionEntry.quantity_tons),
+                        (func.lower(MachineAsset.code) == DRYER_MACHINE_CODE_LOWER, production_days.c.quantity_tons),
                         else_=0.0,
                     )
                 ),
                 0.0,
             ).label("dryer_tons"),
         )
-        .join(MachineAsset, DailyProductionEntry.asset_id == MachineAsset.id)
-        .group_by(DailyProductionEntry.date)
-        .order_by(DailyProductionEntry.date.desc())
+        .join(MachineAsset, production_days.c.asset_id == MachineAsset.id)
+        .group_by(production_days.c.date)
+        .order_by(production_days.c.date.desc())
         .limit(normalized_limit)
         .all()
     )
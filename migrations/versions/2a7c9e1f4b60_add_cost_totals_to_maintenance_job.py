@@ -0,0 +1,66 @@
+"""Add denormalized cost totals to maintenance jobs
+
+Revision ID: 2a7c9e1f4b60
+Revises: 9c4f1a7b2d33
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "2a7c9e1f4b60"
+down_revision = "9c4f1a7b2d33"
+branch_labels = None
+depends_on = None
+
+_COST_COLUMNS = {
+    "materials_cost": "maintenance_material",
+    "outsourced_cost": "maintenance_outsourced_service",
+    "internal_cost": "maintenance_internal_staff_cost",
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    existing_columns = {col["name"] for col in inspector.get_columns("maintenance_job")}
+
+    with op.batch_alter_table("maintenance_job") as batch_op:
+        for column_name in _COST_COLUMNS:
+            if column_name not in existing_columns:
+                batch_op.add_column(
+                    sa.Column(
+                        column_name,
+                        sa.Numeric(12, 2),
+                        nullable=False,
+                        server_default="0",
+                    )
+                )
+
+    for column_name, child_table in _COST_COLUMNS.items():
+        op.execute(
+            f"""
+            UPDATE maintenance_job
+            SET {column_name} = COALESCE(
+                (
+                    SELECT SUM(child.cost)
+                    FROM {child_table} AS child
+                    WHERE child.maintenance_job_id = maintenance_job.id
+                ),
+                0
+            )
+            """
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    existing_columns = {col["name"] for col in inspector.get_columns("maintenance_job")}
+
+    with op.batch_alter_table("maintenance_job") as batch_op:
+        for column_name in reversed(list(_COST_COLUMNS)):
+            if column_name in existing_columns:
+                batch_op.drop_column(column_name)
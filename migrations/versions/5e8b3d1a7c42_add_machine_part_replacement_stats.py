@@ -0,0 +1,137 @@
+"""Add machine part replacement stats table
+
+Revision ID: 5e8b3d1a7c42
+Revises: 2a7c9e1f4b60
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "5e8b3d1a7c42"
+down_revision = "2a7c9e1f4b60"
+branch_labels = None
+depends_on = None
+
+_TABLE = "machine_part_replacement_stats"
+
+
+def _backfill(bind) -> None:
+    rows = bind.execute(
+        sa.text(
+            """
+            SELECT p.id AS part_id,
+                   p.asset_id AS asset_id,
+                   COUNT(r.id) AS replacement_count,
+                   MIN(r.replaced_on) AS first_replaced_on,
+                   MAX(r.replaced_on) AS last_replaced_on
+            FROM machine_part AS p
+            JOIN machine_part_replacement AS r ON r.part_id = p.id
+            GROUP BY p.id, p.asset_id
+            """
+        )
+    ).mappings().all()
+    if not rows:
+        return
+
+    stats_table = sa.table(
+        _TABLE,
+        sa.column("part_id", sa.Integer),
+        sa.column("asset_id", sa.Integer),
+        sa.column("replacement_count", sa.Integer),
+        sa.column("first_replaced_on", sa.Date),
+        sa.column("last_replaced_on", sa.Date),
+        sa.column("mean_interval_days", sa.Numeric(10, 2)),
+        sa.column("projected_next_on", sa.Date),
+        sa.column("updated_at", sa.DateTime),
+    )
+
+    now = datetime.utcnow()
+    payload = []
+    for row in rows:
+        first, last = row["first_replaced_on"], row["last_replaced_on"]
+        if isinstance(first, str):
+            first = datetime.strptime(first[:10], "%Y-%m-%d").date()
+        if isinstance(last, str):
+            last = datetime.strptime(last[:10], "%Y-%m-%d").date()
+        count = int(row["replacement_count"] or 0)
+        mean_days = None
+        projected = None
+        if count > 1:
+            mean_days = Decimal((last - first).days) / Decimal(count - 1)
+            projected = last + timedelta(
+                days=int(mean_days.to_integral_value(rounding=ROUND_HALF_UP))
+            )
+            mean_days = mean_days.quantize(Decimal("0.01"))
+        payload.append(
+            {
+                "part_id": row["part_id"],
+                "asset_id": row["asset_id"],
+                "replacement_count": count,
+                "first_replaced_on": first,
+                "last_replaced_on": last,
+                "mean_interval_days": mean_days,
+                "projected_next_on": projected,
+                "updated_at": now,
+            }
+        )
+    op.bulk_insert(stats_table, payload)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE in inspector.get_table_names():
+        return
+
+    op.create_table(
+        _TABLE,
+        sa.Column("part_id", sa.Integer(), nullable=False),
+        sa.Column("asset_id", sa.Integer(), nullable=False),
+        sa.Column("replacement_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("first_replaced_on", sa.Date(), nullable=True),
+        sa.Column("last_replaced_on", sa.Date(), nullable=True),
+        sa.Column("mean_interval_days", sa.Numeric(10, 2), nullable=True),
+        sa.Column("projected_next_on", sa.Date(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["part_id"],
+            ["machine_part.id"],
+            name="fk_machine_part_replacement_stats_part",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["asset_id"],
+            ["machine_asset.id"],
+            name="fk_machine_part_replacement_stats_asset",
+        ),
+        sa.PrimaryKeyConstraint("part_id"),
+    )
+    op.create_index(
+        "ix_machine_part_replacement_stats_asset_id",
+        _TABLE,
+        ["asset_id"],
+    )
+    op.create_index(
+        "ix_machine_part_replacement_stats_projected_next_on",
+        _TABLE,
+        ["projected_next_on"],
+    )
+
+    _backfill(bind)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names():
+        return
+
+    op.drop_index("ix_machine_part_replacement_stats_projected_next_on", table_name=_TABLE)
+    op.drop_index("ix_machine_part_replacement_stats_asset_id", table_name=_TABLE)
+    op.drop_table(_TABLE)
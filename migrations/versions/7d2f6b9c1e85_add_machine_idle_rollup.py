@@ -0,0 +1,144 @@
+"""Add machine idle rollup table
+
+Revision ID: 7d2f6b9c1e85
+Revises: 5e8b3d1a7c42
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "7d2f6b9c1e85"
+down_revision = "5e8b3d1a7c42"
+branch_labels = None
+depends_on = None
+
+_TABLE = "machine_idle_rollup"
+_DAY_SHIFT_START_HOUR = 7
+_DAY_SHIFT_END_HOUR = 19
+
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _split_minutes(started_at, ended_at):
+    buckets = {}
+    if not started_at or not ended_at or ended_at <= started_at:
+        return buckets
+    current_day = started_at.date()
+    while current_day <= ended_at.date():
+        day_start = datetime.combine(current_day, datetime.min.time())
+        shift_start = day_start + timedelta(hours=_DAY_SHIFT_START_HOUR)
+        shift_end = day_start + timedelta(hours=_DAY_SHIFT_END_HOUR)
+        windows = (
+            ("off", day_start, shift_start),
+            ("day", shift_start, shift_end),
+            ("off", shift_end, day_start + timedelta(days=1)),
+        )
+        for shift, window_start, window_end in windows:
+            overlap_start = max(started_at, window_start)
+            overlap_end = min(ended_at, window_end)
+            if overlap_end > overlap_start:
+                key = (current_day, shift)
+                minutes = (overlap_end - overlap_start).total_seconds() / 60
+                buckets[key] = buckets.get(key, 0.0) + minutes
+        current_day += timedelta(days=1)
+    return buckets
+
+
+def _backfill(bind) -> None:
+    events = bind.execute(
+        sa.text(
+            """
+            SELECT asset_id, started_at, ended_at, reason, secondary_reason
+            FROM machine_idle_event
+            WHERE ended_at IS NOT NULL
+            """
+        )
+    ).all()
+
+    totals = {}
+    for asset_id, started_at, ended_at, reason, secondary_reason in events:
+        buckets = _split_minutes(_as_datetime(started_at), _as_datetime(ended_at))
+        for (day, shift), minutes in buckets.items():
+            key = (asset_id, day, shift, (reason or "").strip(), (secondary_reason or "").strip())
+            totals[key] = totals.get(key, 0.0) + minutes
+    if not totals:
+        return
+
+    rollup_table = sa.table(
+        _TABLE,
+        sa.column("asset_id", sa.Integer),
+        sa.column("day", sa.Date),
+        sa.column("shift", sa.String),
+        sa.column("reason", sa.String),
+        sa.column("secondary_reason", sa.String),
+        sa.column("idle_minutes", sa.Float),
+    )
+    op.bulk_insert(
+        rollup_table,
+        [
+            {
+                "asset_id": asset_id,
+                "day": day,
+                "shift": shift,
+                "reason": reason,
+                "secondary_reason": secondary_reason,
+                "idle_minutes": minutes,
+            }
+            for (asset_id, day, shift, reason, secondary_reason), minutes in totals.items()
+        ],
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE in inspector.get_table_names():
+        return
+
+    op.create_table(
+        _TABLE,
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("asset_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("shift", sa.String(length=10), nullable=False),
+        sa.Column("reason", sa.String(length=255), nullable=False, server_default=""),
+        sa.Column("secondary_reason", sa.String(length=255), nullable=False, server_default=""),
+        sa.Column("idle_minutes", sa.Float(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(
+            ["asset_id"],
+            ["machine_asset.id"],
+            name="fk_machine_idle_rollup_asset",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "asset_id",
+            "day",
+            "shift",
+            "reason",
+            "secondary_reason",
+            name="uq_machine_idle_rollup_bucket",
+        ),
+    )
+    op.create_index("ix_machine_idle_rollup_day_asset", _TABLE, ["day", "asset_id"])
+
+    _backfill(bind)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names():
+        return
+
+    op.drop_index("ix_machine_idle_rollup_day_asset", table_name=_TABLE)
+    op.drop_table(_TABLE)
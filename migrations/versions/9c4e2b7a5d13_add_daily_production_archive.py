@@ -0,0 +1,56 @@
+"""Add daily production archive table
+
+Revision ID: 9c4e2b7a5d13
+Revises: 7d2f6b9c1e85
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "9c4e2b7a5d13"
+down_revision = "7d2f6b9c1e85"
+branch_labels = None
+depends_on = None
+
+_TABLE = "daily_production_archive"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE in inspector.get_table_names():
+        return
+
+    op.create_table(
+        _TABLE,
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("asset_id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("hour_tons", sa.JSON(), nullable=False),
+        sa.Column("total_tons", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("productive_hours", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(
+            ["asset_id"],
+            ["machine_asset.id"],
+            name="fk_daily_production_archive_asset",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("asset_id", "date", name="uq_daily_production_archive_asset_date"),
+    )
+    op.create_index("ix_daily_production_archive_date_asset", _TABLE, ["date", "asset_id"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names():
+        return
+
+    op.drop_index("ix_daily_production_archive_date_asset", table_name=_TABLE)
+    op.drop_table(_TABLE)
@@ -0,0 +1,40 @@
+"""Index sales visits by rep and update time for delta sync
+
+Revision ID: a3d5e8f1c246
+Revises: f7c2a9d4b813
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "a3d5e8f1c246"
+down_revision = "f7c2a9d4b813"
+branch_labels = None
+depends_on = None
+
+_TABLE = "sales_visits"
+_INDEX = "ix_sales_visits_sales_user_updated"
+
+
+def _has_index(inspector) -> bool:
+    return any(index["name"] == _INDEX for index in inspector.get_indexes(_TABLE))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names() or _has_index(inspector):
+        return
+
+    op.create_index(_INDEX, _TABLE, ["sales_user_id", "updated_at"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names() or not _has_index(inspector):
+        return
+
+    op.drop_index(_INDEX, table_name=_TABLE)
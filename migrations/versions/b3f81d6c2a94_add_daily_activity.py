@@ -0,0 +1,131 @@
+"""Add daily activity ledger
+
+Revision ID: b3f81d6c2a94
+Revises: 9c4e2b7a5d13
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+import json
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "b3f81d6c2a94"
+down_revision = "9c4e2b7a5d13"
+branch_labels = None
+depends_on = None
+
+_TABLE = "daily_activity"
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _as_json(value):
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _backfill(bind, table_names) -> None:
+    totals = {}
+
+    def add(day, source, count=1):
+        day = _as_date(day)
+        if day is not None and count:
+            totals[(day, source)] = totals.get((day, source), 0) + int(count)
+
+    grouped_sources = (
+        ("production", "daily_production_entry"),
+        ("sales", "sales_actual_entry"),
+        ("mrn", "mrn_headers"),
+        ("mix", "briquette_mix_entries"),
+    )
+    for source, table in grouped_sources:
+        if table not in table_names:
+            continue
+        for day, count in bind.execute(sa.text(f"SELECT date, COUNT(*) FROM {table} GROUP BY date")):
+            add(day, source, count)
+
+    if "daily_production_archive" in table_names:
+        for day, hour_tons in bind.execute(sa.text("SELECT date, hour_tons FROM daily_production_archive")):
+            add(day, "production", sum(1 for value in _as_json(hour_tons) or [] if value is not None))
+
+    if "machine_idle_event" in table_names:
+        for started_at, ended_at in bind.execute(
+            sa.text("SELECT started_at, ended_at FROM machine_idle_event")
+        ):
+            for day in {_as_date(started_at), _as_date(ended_at)}:
+                add(day, "idle")
+
+    if "team_attendance_record" in table_names:
+        for (entries,) in bind.execute(sa.text("SELECT entries FROM team_attendance_record")):
+            entries = _as_json(entries)
+            if isinstance(entries, dict):
+                for key in entries:
+                    add(key, "attendance")
+
+    if not totals:
+        return
+
+    activity_table = sa.table(
+        _TABLE,
+        sa.column("day", sa.Date),
+        sa.column("source", sa.String),
+        sa.column("row_count", sa.Integer),
+        sa.column("updated_at", sa.DateTime),
+    )
+    now = datetime.utcnow()
+    op.bulk_insert(
+        activity_table,
+        [
+            {"day": day, "source": source, "row_count": count, "updated_at": now}
+            for (day, source), count in sorted(totals.items())
+        ],
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    table_names = set(inspector.get_table_names())
+    if _TABLE in table_names:
+        return
+
+    op.create_table(
+        _TABLE,
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("source", sa.String(length=20), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("day", "source", name="uq_daily_activity_day_source"),
+    )
+
+    _backfill(bind, table_names)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names():
+        return
+
+    op.drop_table(_TABLE)
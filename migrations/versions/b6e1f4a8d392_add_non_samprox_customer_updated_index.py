@@ -0,0 +1,40 @@
+"""Index dealers by manager and update time for the change feed
+
+Revision ID: b6e1f4a8d392
+Revises: a3d5e8f1c246
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "b6e1f4a8d392"
+down_revision = "a3d5e8f1c246"
+branch_labels = None
+depends_on = None
+
+_TABLE = "non_samprox_customers"
+_INDEX = "ix_non_samprox_customers_managed_by_updated"
+
+
+def _has_index(inspector) -> bool:
+    return any(index["name"] == _INDEX for index in inspector.get_indexes(_TABLE))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names() or _has_index(inspector):
+        return
+
+    op.create_index(_INDEX, _TABLE, ["managed_by_user_id", "updated_at"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names() or not _has_index(inspector):
+        return
+
+    op.drop_index(_INDEX, table_name=_TABLE)
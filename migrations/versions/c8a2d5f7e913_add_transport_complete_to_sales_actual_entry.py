@@ -0,0 +1,100 @@
+"""Flag sales with complete transport details and index the pending ones
+
+Revision ID: c8a2d5f7e913
+Revises: b6e1f4a8d392
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "c8a2d5f7e913"
+down_revision = "b6e1f4a8d392"
+branch_labels = None
+depends_on = None
+
+_TABLE = "sales_actual_entry"
+_COLUMN = "transport_complete"
+_INDEX = "ix_sales_actual_entry_transport_pending"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names():
+        return
+
+    columns = {column["name"] for column in inspector.get_columns(_TABLE)}
+    if _COLUMN not in columns:
+        op.add_column(
+            _TABLE,
+            sa.Column(_COLUMN, sa.Boolean(), nullable=False, server_default=sa.false()),
+        )
+
+    entries = sa.table(
+        _TABLE,
+        sa.column(_COLUMN, sa.Boolean),
+        sa.column("customer_id", sa.Integer),
+        sa.column("transport_mode_used", sa.Text),
+        sa.column("vehicle_number", sa.String),
+        sa.column("driver_id", sa.Integer),
+        sa.column("helper1_id", sa.Integer),
+        sa.column("mileage_km", sa.Float),
+    )
+    customers = sa.table(
+        "customer",
+        sa.column("id", sa.Integer),
+        sa.column("transport_mode", sa.String),
+    )
+    mode_used = sa.func.trim(sa.func.coalesce(entries.c.transport_mode_used, ""))
+    # Only Samprox lorry deliveries need transport details; rows without a
+    # recorded mode fall back to the customer's transport mode.
+    lorry_delivery = sa.or_(
+        mode_used == "samprox_lorry",
+        sa.and_(
+            mode_used == "",
+            entries.c.customer_id.in_(
+                sa.select(customers.c.id).where(customers.c.transport_mode == "samprox_lorry")
+            ),
+        ),
+    )
+    details_complete = sa.and_(
+        sa.func.trim(sa.func.coalesce(entries.c.vehicle_number, "")) != "",
+        entries.c.driver_id.isnot(None),
+        entries.c.helper1_id.isnot(None),
+        entries.c.mileage_km.isnot(None),
+    )
+    bind.execute(
+        entries.update()
+        .where(sa.or_(sa.not_(lorry_delivery), details_complete))
+        .values({_COLUMN: sa.true()})
+    )
+
+    if any(index["name"] == _INDEX for index in inspector.get_indexes(_TABLE)):
+        return
+
+    pending = sa.column(_COLUMN).is_(sa.false())
+    op.create_index(
+        _INDEX,
+        _TABLE,
+        ["date", "customer_id"],
+        postgresql_where=pending,
+        sqlite_where=pending,
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names():
+        return
+
+    if any(index["name"] == _INDEX for index in inspector.get_indexes(_TABLE)):
+        op.drop_index(_INDEX, table_name=_TABLE)
+
+    columns = {column["name"] for column in inspector.get_columns(_TABLE)}
+    if _COLUMN in columns:
+        with op.batch_alter_table(_TABLE) as batch_op:
+            batch_op.drop_column(_COLUMN)
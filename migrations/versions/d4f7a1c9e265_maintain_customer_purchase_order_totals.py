@@ -0,0 +1,87 @@
+"""Store PO line counts and balances and index the PO list
+
+Revision ID: d4f7a1c9e265
+Revises: c8a2d5f7e913
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "d4f7a1c9e265"
+down_revision = "c8a2d5f7e913"
+branch_labels = None
+depends_on = None
+
+_TABLE = "customer_purchase_orders"
+_ITEMS_TABLE = "customer_purchase_order_items"
+_INDEX = "ix_customer_purchase_orders_deleted_date"
+
+
+def _backfill(bind) -> None:
+    orders = sa.table(
+        _TABLE,
+        sa.column("id", sa.Integer),
+        sa.column("line_count", sa.Integer),
+        sa.column("qty_balance_total", sa.Numeric(14, 3)),
+    )
+    items = sa.table(
+        _ITEMS_TABLE,
+        sa.column("customer_po_id", sa.Integer),
+        sa.column("qty_balance", sa.Numeric(14, 3)),
+    )
+    bind.execute(
+        orders.update().values(
+            line_count=sa.select(sa.func.count())
+            .where(items.c.customer_po_id == orders.c.id)
+            .scalar_subquery(),
+            qty_balance_total=sa.select(sa.func.coalesce(sa.func.sum(items.c.qty_balance), 0))
+            .where(items.c.customer_po_id == orders.c.id)
+            .scalar_subquery(),
+        )
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    table_names = set(inspector.get_table_names())
+    if _TABLE not in table_names:
+        return
+
+    columns = {column["name"] for column in inspector.get_columns(_TABLE)}
+    if "line_count" not in columns:
+        op.add_column(
+            _TABLE,
+            sa.Column("line_count", sa.Integer(), nullable=False, server_default="0"),
+        )
+    if "qty_balance_total" not in columns:
+        op.add_column(
+            _TABLE,
+            sa.Column("qty_balance_total", sa.Numeric(14, 3), nullable=False, server_default="0"),
+        )
+
+    if _ITEMS_TABLE in table_names:
+        _backfill(bind)
+
+    if not any(index["name"] == _INDEX for index in inspector.get_indexes(_TABLE)):
+        op.create_index(_INDEX, _TABLE, ["is_deleted", "po_date", "id"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names():
+        return
+
+    if any(index["name"] == _INDEX for index in inspector.get_indexes(_TABLE)):
+        op.drop_index(_INDEX, table_name=_TABLE)
+
+    columns = {column["name"] for column in inspector.get_columns(_TABLE)}
+    with op.batch_alter_table(_TABLE) as batch_op:
+        if "qty_balance_total" in columns:
+            batch_op.drop_column("qty_balance_total")
+        if "line_count" in columns:
+            batch_op.drop_column("line_count")
@@ -0,0 +1,42 @@
+"""Rebuild the customer location geohash index with pattern ops
+
+Revision ID: e2b9c4d7f318
+Revises: d4f7a1c9e265
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "e2b9c4d7f318"
+down_revision = "d4f7a1c9e265"
+branch_labels = None
+depends_on = None
+
+_TABLE = "customer_locations"
+_INDEX = "ix_customer_locations_geohash"
+
+
+def _rebuild(postgresql_ops) -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names():
+        return
+
+    if any(index["name"] == _INDEX for index in inspector.get_indexes(_TABLE)):
+        op.drop_index(_INDEX, table_name=_TABLE)
+    op.create_index(_INDEX, _TABLE, ["geohash"], postgresql_ops=postgresql_ops)
+
+
+def upgrade() -> None:
+    # Geohash lookups use LIKE 'prefix%', which PostgreSQL can only serve from
+    # a btree index under the C collation or with pattern ops.
+    _rebuild({"geohash": "varchar_pattern_ops"})
+
+
+def downgrade() -> None:
+    _rebuild({})
@@ -0,0 +1,122 @@
+"""Add daily and monthly sales rollup
+
+Revision ID: e4a19c7b2d56
+Revises: b3f81d6c2a94
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "e4a19c7b2d56"
+down_revision = "b3f81d6c2a94"
+branch_labels = None
+depends_on = None
+
+_TABLE = "sales_rollup"
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _backfill(bind) -> None:
+    totals = {}
+    rows = bind.execute(
+        sa.text(
+            "SELECT customer_id, date, SUM(amount), SUM(quantity_tons), COUNT(*) "
+            "FROM sales_actual_entry GROUP BY customer_id, date"
+        )
+    )
+    for customer_id, day, amount, quantity_tons, count in rows:
+        day = _as_date(day)
+        if customer_id is None or day is None:
+            continue
+        for key in (("day", day, customer_id), ("month", day.replace(day=1), customer_id)):
+            bucket = totals.setdefault(key, [0.0, 0.0, 0])
+            bucket[0] += float(amount or 0.0)
+            bucket[1] += float(quantity_tons or 0.0)
+            bucket[2] += int(count or 0)
+
+    if not totals:
+        return
+
+    rollup_table = sa.table(
+        _TABLE,
+        sa.column("grain", sa.String),
+        sa.column("period_start", sa.Date),
+        sa.column("customer_id", sa.Integer),
+        sa.column("amount", sa.Float),
+        sa.column("quantity_tons", sa.Float),
+        sa.column("entry_count", sa.Integer),
+    )
+    op.bulk_insert(
+        rollup_table,
+        [
+            {
+                "grain": grain,
+                "period_start": period_start,
+                "customer_id": customer_id,
+                "amount": amount,
+                "quantity_tons": quantity_tons,
+                "entry_count": count,
+            }
+            for (grain, period_start, customer_id), (amount, quantity_tons, count) in sorted(
+                totals.items()
+            )
+        ],
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    table_names = set(inspector.get_table_names())
+    if _TABLE in table_names:
+        return
+
+    op.create_table(
+        _TABLE,
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("grain", sa.String(length=10), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("customer_id", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("quantity_tons", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("entry_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(
+            ["customer_id"],
+            ["customer.id"],
+            name="fk_sales_rollup_customer",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("grain", "period_start", "customer_id", name="uq_sales_rollup_bucket"),
+    )
+    op.create_index("ix_sales_rollup_grain_period", _TABLE, ["grain", "period_start"])
+
+    if "sales_actual_entry" in table_names:
+        _backfill(bind)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names():
+        return
+
+    op.drop_index("ix_sales_rollup_grain_period", table_name=_TABLE)
+    op.drop_table(_TABLE)
@@ -0,0 +1,53 @@
+"""Add an update stamp to customers
+
+Revision ID: f4a8c2e6d193
+Revises: e2b9c4d7f318
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "f4a8c2e6d193"
+down_revision = "e2b9c4d7f318"
+branch_labels = None
+depends_on = None
+
+_TABLE = "customer"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names():
+        return
+
+    columns = {column["name"] for column in inspector.get_columns(_TABLE)}
+    if "updated_at" in columns:
+        return
+
+    op.add_column(_TABLE, sa.Column("updated_at", sa.DateTime(), nullable=True))
+    customers = sa.table(
+        _TABLE,
+        sa.column("created_at", sa.DateTime),
+        sa.column("updated_at", sa.DateTime),
+    )
+    bind.execute(
+        customers.update().values(
+            updated_at=sa.func.coalesce(customers.c.created_at, sa.func.current_timestamp())
+        )
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names():
+        return
+
+    columns = {column["name"] for column in inspector.get_columns(_TABLE)}
+    if "updated_at" in columns:
+        with op.batch_alter_table(_TABLE) as batch_op:
+            batch_op.drop_column("updated_at")
@@ -0,0 +1,69 @@
+"""Add geohash-indexed customer locations
+
+Revision ID: f7c2a9d4b813
+Revises: e4a19c7b2d56
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine import reflection
+
+# revision identifiers, used by Alembic.
+revision = "f7c2a9d4b813"
+down_revision = "e4a19c7b2d56"
+branch_labels = None
+depends_on = None
+
+_TABLE = "customer_locations"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE in inspector.get_table_names():
+        return
+
+    op.create_table(
+        _TABLE,
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("customer_id", sa.Integer(), nullable=True),
+        sa.Column("non_samprox_customer_id", sa.String(length=36), nullable=True),
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        sa.Column("geohash", sa.String(length=12), nullable=False),
+        sa.Column("source", sa.String(length=20), nullable=False, server_default="manual"),
+        sa.Column("updated_by", sa.Integer(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(
+            ["customer_id"],
+            ["customer.id"],
+            name="fk_customer_locations_customer",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["non_samprox_customer_id"],
+            ["non_samprox_customers.id"],
+            name="fk_customer_locations_non_samprox_customer",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(["updated_by"], ["user.id"], name="fk_customer_locations_updated_by"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("customer_id", name="uq_customer_locations_customer"),
+        sa.UniqueConstraint("non_samprox_customer_id", name="uq_customer_locations_non_samprox_customer"),
+        sa.CheckConstraint(
+            "(customer_id IS NULL) <> (non_samprox_customer_id IS NULL)",
+            name="ck_customer_locations_one_owner",
+        ),
+    )
+    op.create_index("ix_customer_locations_geohash", _TABLE, ["geohash"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = reflection.Inspector.from_engine(bind)
+    if _TABLE not in inspector.get_table_names():
+        return
+
+    op.drop_index("ix_customer_locations_geohash", table_name=_TABLE)
+    op.drop_table(_TABLE)
@@ -1,21 +1,36 @@
 import re
 import uuid
 from datetime import datetime, date, timedelta
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 from enum import Enum
 from typing import Iterable, Optional
 from zoneinfo import ZoneInfo
 from math import radians, sin, cos, sqrt, atan2
 
 from sqlalchemy import CheckConstraint, Index, UniqueConstraint, event, func, select
-from sqlalchemy.orm import validates
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, validates
 from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.types import CHAR, TypeDecorator
 
+import intervals
 from extensions import db
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
+def _upsert_insert(connection, table):
+    """Return an ``INSERT`` for ``table`` that supports ``ON CONFLICT``, if the dialect has one."""
+
+    dialect_name = connection.dialect.name
+    if dialect_name == "postgresql":
+        return postgresql_insert(table)
+    if dialect_name == "sqlite":
+        return sqlite_insert(table)
+    return None
+
+
 class GUID(TypeDecorator):
     """Platform-independent GUID type."""
 
@@ -334,6 +349,15 @@ class MaintenanceJob(db.Model):
     job_started_date = db.Column(db.Date)
     job_finished_date = db.Column(db.Date)
     total_cost = db.Column(db.Numeric(12, 2), default=Decimal("0.00"))
+    materials_cost = db.Column(
+        db.Numeric(12, 2), nullable=False, default=Decimal("0.00"), server_default="0"
+    )
+    outsourced_cost = db.Column(
+        db.Numeric(12, 2), nullable=False, default=Decimal("0.00"), server_default="0"
+    )
+    internal_cost = db.Column(
+        db.Numeric(12, 2), nullable=False, default=Decimal("0.00"), server_default="0"
+    )
     maintenance_notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -374,33 +398,27 @@ class MaintenanceJob(db.Model):
         passive_deletes=True,
     )
 
-    def recalculate_total_cost(self) -> None:
-        total = Decimal("0")
-        for material in self.materials:
-            cost = material.cost or Decimal("0")
-            if not isinstance(cost, Decimal):
-                try:
-                    cost = Decimal(str(cost))
-                except Exception:
-                    cost = Decimal("0")
-            total += cost
-        for service in self.outsourced_services:
-            cost = service.cost or Decimal("0")
-            if not isinstance(cost, Decimal):
-                try:
-                    cost = Decimal(str(cost))
-                except Exception:
-                    cost = Decimal("0")
-            total += cost
-        for staff_cost in self.internal_staff_costs:
-            cost = staff_cost.cost or Decimal("0")
-            if not isinstance(cost, Decimal):
-                try:
-                    cost = Decimal(str(cost))
-                except Exception:
-                    cost = Decimal("0")
-            total += cost
-        self.total_cost = total
+    def recalculate_total_cost(self, *, exclude: Iterable[object] = ()) -> None:
+        excluded = {id(item) for item in exclude}
+
+        def _line_total(lines) -> Decimal:
+            total = Decimal("0")
+            for line in lines:
+                if id(line) in excluded:
+                    continue
+                cost = line.cost or Decimal("0")
+                if not isinstance(cost, Decimal):
+                    try:
+                        cost = Decimal(str(cost))
+                    except Exception:
+                        cost = Decimal("0")
+                total += cost
+            return total
+
+        self.materials_cost = _line_total(self.materials)
+        self.outsourced_cost = _line_total(self.outsourced_services)
+        self.internal_cost = _line_total(self.internal_staff_costs)
+        self.total_cost = self.materials_cost + self.outsourced_cost + self.internal_cost
 
 
 class ResponsibilityRecurrence(str, Enum):
@@ -824,6 +842,57 @@ class MaintenanceInternalStaffCost(db.Model):
     job = db.relationship("MaintenanceJob", back_populates="internal_staff_costs")
     employee = db.relationship("TeamMember")
 
+
+_MAINTENANCE_COST_LINE_TYPES = (
+    MaintenanceMaterial,
+    MaintenanceOutsourcedService,
+    MaintenanceInternalStaffCost,
+)
+
+
+_MAINTENANCE_COST_COLLECTIONS = ("materials", "outsourced_services", "internal_staff_costs")
+
+
+@event.listens_for(Session, "before_flush")
+def _sync_maintenance_jobs(session, _flush_context, _instances):
+    """Keep job cost totals and ``updated_at`` in step with the job's cost lines.
+
+    Collection-only changes never emit an UPDATE for the job row, so the
+    ``onupdate`` hook alone would leave ``updated_at`` stale for callers that
+    use it as a version stamp (e.g. the job card PDF cache).
+    """
+
+    touched: dict[int, MaintenanceJob] = {}
+    repriced: dict[int, MaintenanceJob] = {}
+    for obj in session.new:
+        if isinstance(obj, MaintenanceJob):
+            repriced[id(obj)] = obj
+    for obj in session.dirty:
+        if isinstance(obj, MaintenanceJob) and session.is_modified(obj):
+            touched[id(obj)] = obj
+            state = sa_inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in _MAINTENANCE_COST_COLLECTIONS):
+                repriced[id(obj)] = obj
+
+    with session.no_autoflush:
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, _MAINTENANCE_COST_LINE_TYPES):
+                job = obj.job
+                if job is None and obj.maintenance_job_id is not None:
+                    job = session.get(MaintenanceJob, obj.maintenance_job_id)
+                if job is not None and job not in session.deleted:
+                    touched[id(job)] = job
+                    repriced[id(job)] = job
+
+        for job in repriced.values():
+            job.recalculate_total_cost(exclude=session.deleted)
+
+    now = datetime.utcnow()
+    for job in touched.values():
+        if job not in session.new:
+            job.updated_at = now
+
+
 class Quotation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(db.Integer, db.ForeignKey("job.id"), unique=True, nullable=False)
@@ -1388,6 +1457,60 @@ class MachinePartReplacement(db.Model):
     )
 
 
+class MachinePartReplacementStats(db.Model):
+    """Running replacement interval summary maintained per machine part."""
+
+    __tablename__ = "machine_part_replacement_stats"
+
+    part_id = db.Column(
+        db.Integer,
+        db.ForeignKey("machine_part.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    asset_id = db.Column(db.Integer, db.ForeignKey("machine_asset.id"), nullable=False, index=True)
+    replacement_count = db.Column(db.Integer, nullable=False, default=0)
+    first_replaced_on = db.Column(db.Date)
+    last_replaced_on = db.Column(db.Date)
+    mean_interval_days = db.Column(db.Numeric(10, 2))
+    projected_next_on = db.Column(db.Date, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    part = db.relationship(
+        "MachinePart",
+        backref=db.backref("replacement_stats", uselist=False, cascade="all,delete-orphan"),
+    )
+
+    def record(self, replaced_on: date) -> None:
+        """Fold one replacement date into the running summary.
+
+        The mean interval only depends on the first and last dates and the
+        number of replacements, so back-dated entries are handled exactly.
+        """
+
+        self.replacement_count = (self.replacement_count or 0) + 1
+        if self.first_replaced_on is None or replaced_on < self.first_replaced_on:
+            self.first_replaced_on = replaced_on
+        if self.last_replaced_on is None or replaced_on > self.last_replaced_on:
+            self.last_replaced_on = replaced_on
+        self.mean_interval_days, self.projected_next_on = self.projection(
+            self.replacement_count, self.first_replaced_on, self.last_replaced_on
+        )
+
+    @staticmethod
+    def projection(
+        replacement_count: int, first_replaced_on: date | None, last_replaced_on: date | None
+    ) -> tuple[Decimal | None, date | None]:
+        """Return ``(mean_interval_days, projected_next_on)`` for a summary."""
+
+        if replacement_count < 2 or first_replaced_on is None or last_replaced_on is None:
+            return None, None
+        span_days = (last_replaced_on - first_replaced_on).days
+        mean_days = Decimal(span_days) / Decimal(replacement_count - 1)
+        projected = last_replaced_on + timedelta(
+            days=int(mean_days.to_integral_value(rounding=ROUND_HALF_UP))
+        )
+        return mean_days.quantize(Decimal("0.01")), projected
+
+
 class MachineIdleEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     asset_id = db.Column(db.Integer, db.ForeignKey("machine_asset.id"), nullable=False, index=True)
@@ -1407,6 +1530,312 @@ class MachineIdleEvent(db.Model):
         return int(delta.total_seconds() // 60)
 
 
+class MachineIdleRollup(db.Model):
+    """Idle minutes per asset, day, shift and reason built from closed idle events.
+
+    Rows are maintained by the session flush hooks below; events that are
+    still open are left out and folded in by readers at query time.
+    """
+
+    __tablename__ = "machine_idle_rollup"
+    __table_args__ = (
+        UniqueConstraint(
+            "asset_id",
+            "day",
+            "shift",
+            "reason",
+            "secondary_reason",
+            name="uq_machine_idle_rollup_bucket",
+        ),
+        Index("ix_machine_idle_rollup_day_asset", "day", "asset_id"),
+    )
+
+    SHIFT_DAY = "day"
+    SHIFT_OFF = "off"
+    DAY_SHIFT_START_HOUR = 7
+    DAY_SHIFT_END_HOUR = 19
+
+    id = db.Column(db.Integer, primary_key=True)
+    asset_id = db.Column(
+        db.Integer,
+        db.ForeignKey("machine_asset.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    day = db.Column(db.Date, nullable=False)
+    shift = db.Column(db.String(10), nullable=False)
+    reason = db.Column(db.String(255), nullable=False, default="")
+    secondary_reason = db.Column(db.String(255), nullable=False, default="")
+    idle_minutes = db.Column(db.Float, nullable=False, default=0.0)
+    asset = db.relationship(
+        "MachineAsset",
+        backref=db.backref("idle_rollups", cascade="all,delete-orphan", passive_deletes=True),
+    )
+
+    @classmethod
+    def split_minutes(cls, started_at, ended_at) -> dict[tuple[date, str], float]:
+        """Split an idle window into minutes per (day, shift)."""
+
+        buckets: dict[tuple[date, str], float] = {}
+        if not isinstance(started_at, datetime) or not isinstance(ended_at, datetime):
+            return buckets
+        if ended_at <= started_at:
+            return buckets
+
+        first_day = started_at.date()
+        day_count = (ended_at.date() - first_day).days + 1
+        boundaries = []
+        for offset in range(day_count):
+            day_start = datetime.combine(first_day + timedelta(days=offset), datetime.min.time())
+            boundaries.extend(
+                (
+                    day_start,
+                    day_start + timedelta(hours=cls.DAY_SHIFT_START_HOUR),
+                    day_start + timedelta(hours=cls.DAY_SHIFT_END_HOUR),
+                )
+            )
+        boundaries.append(datetime.combine(first_day + timedelta(days=day_count), datetime.min.time()))
+
+        shifts = (cls.SHIFT_OFF, cls.SHIFT_DAY, cls.SHIFT_OFF)
+        for index, minutes in enumerate(intervals.overlap_minutes([(started_at, ended_at)], boundaries)):
+            if minutes > 0:
+                key = (first_day + timedelta(days=index // 3), shifts[index % 3])
+                buckets[key] = buckets.get(key, 0.0) + minutes
+        return buckets
+
+
+_IDLE_ROLLUP_INFO_KEY = "_machine_idle_rollup_previous"
+
+
+def _idle_rollup_contributions(
+    asset_id, started_at, ended_at, reason, secondary_reason, sign: float
+) -> dict[tuple, float]:
+    if asset_id is None or ended_at is None:
+        return {}
+    reason_key = (reason or "").strip()
+    secondary_key = (secondary_reason or "").strip()
+    return {
+        (asset_id, day, shift, reason_key, secondary_key): sign * minutes
+        for (day, shift), minutes in MachineIdleRollup.split_minutes(started_at, ended_at).items()
+    }
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_idle_events_before_flush(session, _flush_context, _instances):
+    """Read the stored state of idle events that are about to change or go away."""
+
+    session.info.pop(_IDLE_ROLLUP_INFO_KEY, None)
+    changed_ids = [
+        obj.id
+        for obj in (*session.dirty, *session.deleted)
+        if isinstance(obj, MachineIdleEvent)
+        and obj.id is not None
+        and (obj in session.deleted or session.is_modified(obj))
+    ]
+    if not changed_ids:
+        return
+
+    rows = session.connection().execute(
+        select(
+            MachineIdleEvent.asset_id,
+            MachineIdleEvent.started_at,
+            MachineIdleEvent.ended_at,
+            MachineIdleEvent.reason,
+            MachineIdleEvent.secondary_reason,
+        ).where(MachineIdleEvent.id.in_(changed_ids))
+    ).all()
+    session.info[_IDLE_ROLLUP_INFO_KEY] = [tuple(row) for row in rows]
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_machine_idle_rollups(session, _flush_context):
+    """Apply idle event inserts, edits and deletes to ``machine_idle_rollup``.
+
+    Runs after the flush so new events and assets have primary keys; the
+    previous state captured in ``before_flush`` is subtracted first.
+    """
+
+    deltas: dict[tuple, float] = {}
+
+    def merge(contributions):
+        for key, minutes in contributions.items():
+            deltas[key] = deltas.get(key, 0.0) + minutes
+
+    for previous in session.info.pop(_IDLE_ROLLUP_INFO_KEY, []):
+        merge(_idle_rollup_contributions(*previous, sign=-1.0))
+
+    for obj in (*session.new, *session.dirty):
+        if not isinstance(obj, MachineIdleEvent) or obj in session.deleted:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        merge(
+            _idle_rollup_contributions(
+                obj.asset_id,
+                obj.started_at,
+                obj.ended_at,
+                obj.reason,
+                obj.secondary_reason,
+                sign=1.0,
+            )
+        )
+
+    deltas = {key: minutes for key, minutes in deltas.items() if abs(minutes) > 1e-9}
+    if not deltas:
+        return
+
+    table = MachineIdleRollup.__table__
+    connection = session.connection()
+    for (asset_id, day, shift, reason, secondary_reason), minutes in deltas.items():
+        statement = _upsert_insert(connection, table) if minutes > 0 else None
+        if statement is not None:
+            # One statement, so concurrent events opening the same bucket
+            # cannot both insert it.
+            statement = statement.values(
+                asset_id=asset_id,
+                day=day,
+                shift=shift,
+                reason=reason,
+                secondary_reason=secondary_reason,
+                idle_minutes=minutes,
+            )
+            connection.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["asset_id", "day", "shift", "reason", "secondary_reason"],
+                    set_={"idle_minutes": table.c.idle_minutes + statement.excluded.idle_minutes},
+                )
+            )
+            continue
+        bucket = (
+            (table.c.asset_id == asset_id)
+            & (table.c.day == day)
+            & (table.c.shift == shift)
+            & (table.c.reason == reason)
+            & (table.c.secondary_reason == secondary_reason)
+        )
+        result = connection.execute(
+            table.update().where(bucket).values(idle_minutes=table.c.idle_minutes + minutes)
+        )
+        if result.rowcount == 0 and minutes > 0:
+            connection.execute(
+                table.insert().values(
+                    asset_id=asset_id,
+                    day=day,
+                    shift=shift,
+                    reason=reason,
+                    secondary_reason=secondary_reason,
+                    idle_minutes=minutes,
+                )
+            )
+
+    connection.execute(
+        table.delete().where(
+            table.c.asset_id.in_({key[0] for key in deltas}),
+            table.c.idle_minutes <= 1e-6,
+        )
+    )
+
+
+_DAILY_ACTIVITY_INFO_KEY = "_daily_activity_previous"
+
+
+def _daily_activity_sources() -> dict:
+    """Map each tracked model to its ledger source and the columns holding its days."""
+
+    return {
+        DailyProductionEntry: (DailyActivity.SOURCE_PRODUCTION, ("date",)),
+        SalesActualEntry: (DailyActivity.SOURCE_SALES, ("date",)),
+        MRNHeader: (DailyActivity.SOURCE_MRN, ("date",)),
+        BriquetteMixEntry: (DailyActivity.SOURCE_MIX, ("date",)),
+        MachineIdleEvent: (DailyActivity.SOURCE_IDLE, ("started_at", "ended_at")),
+        # Attendance entries are keyed by ISO day inside a monthly JSON record.
+        TeamAttendanceRecord: (DailyActivity.SOURCE_ATTENDANCE, ("entries",)),
+    }
+
+
+def _activity_day(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _activity_contributions(source: str, values, sign: int) -> dict[tuple[date, str], int]:
+    days = set()
+    for value in values:
+        if isinstance(value, dict):
+            days.update(day for day in map(_activity_day, value) if day is not None)
+        else:
+            day = _activity_day(value)
+            if day is not None:
+                days.add(day)
+    return {(day, source): sign for day in days}
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_daily_activity_before_flush(session, _flush_context, _instances):
+    """Read the stored days of tracked rows that are about to change or go away."""
+
+    session.info.pop(_DAILY_ACTIVITY_INFO_KEY, None)
+    changed: dict[type, list] = {}
+    sources = _daily_activity_sources()
+    for obj in (*session.dirty, *session.deleted):
+        model = type(obj)
+        if model not in sources or getattr(obj, "id", None) is None:
+            continue
+        if obj in session.deleted or session.is_modified(obj):
+            changed.setdefault(model, []).append(obj.id)
+    if not changed:
+        return
+
+    previous = []
+    connection = session.connection()
+    for model, ids in changed.items():
+        source, columns = sources[model]
+        rows = connection.execute(
+            select(*(getattr(model, column) for column in columns)).where(model.id.in_(ids))
+        ).all()
+        previous.extend((source, tuple(row)) for row in rows)
+    session.info[_DAILY_ACTIVITY_INFO_KEY] = previous
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_daily_activity(session, _flush_context):
+    """Apply inserts, edits and deletes of tracked rows to ``daily_activity``."""
+
+    deltas: dict[tuple[date, str], int] = {}
+
+    def merge(contributions):
+        for key, delta in contributions.items():
+            deltas[key] = deltas.get(key, 0) + delta
+
+    for source, values in session.info.pop(_DAILY_ACTIVITY_INFO_KEY, []):
+        merge(_activity_contributions(source, values, -1))
+
+    sources = _daily_activity_sources()
+    for obj in (*session.new, *session.dirty):
+        model = type(obj)
+        if model not in sources or obj in session.deleted:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        source, columns = sources[model]
+        merge(
+            _activity_contributions(
+                source, [getattr(obj, column) for column in columns], 1
+            )
+        )
+
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if deltas:
+        DailyActivity.apply(session.connection(), deltas)
+
+
 class ServiceSupplier(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -1665,6 +2094,135 @@ class DailyProductionEntry(db.Model):
         )
 
 
+class DailyProductionArchive(db.Model):
+    """Hourly production of a closed month compacted to one row per machine and day.
+
+    ``hour_tons`` has one slot per hour (hour 1 first); ``None`` marks an hour
+    that had no :class:`DailyProductionEntry` row.
+    """
+
+    __tablename__ = "daily_production_archive"
+    __table_args__ = (
+        db.UniqueConstraint("asset_id", "date", name="uq_daily_production_archive_asset_date"),
+        db.Index("ix_daily_production_archive_date_asset", "date", "asset_id"),
+    )
+
+    HOURS_PER_DAY = 24
+
+    id = db.Column(db.Integer, primary_key=True)
+    asset_id = db.Column(
+        db.Integer,
+        db.ForeignKey("machine_asset.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    date = db.Column(db.Date, nullable=False)
+    hour_tons = db.Column(db.JSON, nullable=False, default=list)
+    total_tons = db.Column(db.Float, nullable=False, default=0)
+    productive_hours = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    asset = db.relationship(
+        "MachineAsset",
+        backref=db.backref("daily_production_archives", cascade="all,delete-orphan"),
+    )
+
+    def set_hours(self, quantities: dict[int, float]) -> None:
+        """Store ``{hour_no: quantity_tons}`` and refresh the day totals."""
+
+        slots = [None] * self.HOURS_PER_DAY
+        for hour_no, quantity in quantities.items():
+            if 1 <= hour_no <= self.HOURS_PER_DAY and quantity is not None:
+                slots[hour_no - 1] = float(quantity)
+        self.hour_tons = slots
+        self.total_tons = sum(value for value in slots if value is not None)
+        self.productive_hours = sum(1 for value in slots if value is not None and value > 0)
+
+    def hours(self) -> dict[int, float]:
+        return {
+            index: float(value)
+            for index, value in enumerate(self.hour_tons or [], start=1)
+            if value is not None
+        }
+
+    def __repr__(self):
+        return (
+            f"<DailyProductionArchive date={self.date} asset_id={self.asset_id} "
+            f"total={self.total_tons}>"
+        )
+
+
+class DailyActivity(db.Model):
+    """Number of rows entered per day and data-entry source.
+
+    Kept current by session flush hooks, so completeness checks read one
+    indexed range instead of counting each source table.
+    """
+
+    __tablename__ = "daily_activity"
+    __table_args__ = (
+        db.UniqueConstraint("day", "source", name="uq_daily_activity_day_source"),
+    )
+
+    SOURCE_PRODUCTION = "production"
+    SOURCE_SALES = "sales"
+    SOURCE_MRN = "mrn"
+    SOURCE_MIX = "mix"
+    SOURCE_IDLE = "idle"
+    SOURCE_ATTENDANCE = "attendance"
+    SOURCES = (
+        SOURCE_PRODUCTION,
+        SOURCE_SALES,
+        SOURCE_MRN,
+        SOURCE_MIX,
+        SOURCE_IDLE,
+        SOURCE_ATTENDANCE,
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    source = db.Column(db.String(20), nullable=False)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    @classmethod
+    def apply(cls, connection, deltas: dict[tuple[date, str], int]) -> None:
+        """Add ``{(day, source): delta}`` to the ledger on ``connection``.
+
+        Increments are upserted so two transactions opening the same bucket
+        do not collide on ``uq_daily_activity_day_source``.
+        """
+
+        table = cls.__table__
+        now = datetime.utcnow()
+        for (day, source), delta in deltas.items():
+            if not delta:
+                continue
+            statement = _upsert_insert(connection, table) if delta > 0 else None
+            if statement is not None:
+                statement = statement.values(day=day, source=source, row_count=delta, updated_at=now)
+                connection.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=["day", "source"],
+                        set_={
+                            "row_count": table.c.row_count + statement.excluded.row_count,
+                            "updated_at": statement.excluded.updated_at,
+                        },
+                    )
+                )
+                continue
+            bucket = (table.c.day == day) & (table.c.source == source)
+            result = connection.execute(
+                table.update()
+                .where(bucket)
+                .values(row_count=table.c.row_count + delta, updated_at=now)
+            )
+            if result.rowcount == 0 and delta > 0:
+                connection.execute(
+                    table.insert().values(day=day, source=source, row_count=delta, updated_at=now)
+                )
+
+
 class BriquetteMixEntry(db.Model):
     """Store per-day briquette material mix and cost calculations."""
 
@@ -1788,6 +2346,7 @@ class Customer(db.Model):
     payment_coordinator_phone = db.Column(db.String(50), nullable=False)
     special_note = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     @property
     def allowed_modes(self):
@@ -1853,6 +2412,7 @@ class SalesActualEntry(db.Model):
     helper2_id = db.Column(db.Integer, db.ForeignKey("team_member.id"))
     mileage_km = db.Column(db.Float)
     transport_mode_used = db.Column(db.Text)
+    transport_complete = db.Column(db.Boolean, nullable=False, default=False, server_default="0")
     loader1 = db.relationship("TeamMember", foreign_keys=[loader1_id])
     loader2 = db.relationship("TeamMember", foreign_keys=[loader2_id])
     loader3 = db.relationship("TeamMember", foreign_keys=[loader3_id])
@@ -1861,9 +2421,230 @@ class SalesActualEntry(db.Model):
     helper2 = db.relationship("TeamMember", foreign_keys=[helper2_id])
     customer = db.relationship("Customer", backref=db.backref("sales_actuals", cascade="all,delete-orphan"))
 
+    def is_samprox_lorry_delivery(self, customer_mode=None) -> bool:
+        """Return whether this sale went out on a Samprox lorry.
+
+        ``transport_mode_used`` decides; older rows without it fall back to
+        the customer's transport mode.
+        """
+
+        mode = (self.transport_mode_used or "").strip()
+        if mode:
+            return mode == CustomerTransportMode.samprox_lorry.value
+        return customer_mode == CustomerTransportMode.samprox_lorry
+
+    def missing_transport_fields(self) -> list[str]:
+        """Return the transport details a lorry delivery still needs."""
+
+        missing: list[str] = []
+        if not (self.vehicle_number or "").strip():
+            missing.append("vehicle_number")
+        if self.driver_id is None:
+            missing.append("driver_id")
+        if self.helper1_id is None:
+            missing.append("helper1_id")
+        if self.mileage_km is None:
+            missing.append("mileage_km")
+        return missing
+
+
+# Only Samprox lorry deliveries still waiting for transport details are
+# indexed, so the dispatch worklist stays small however long the sales
+# history grows.
+Index(
+    "ix_sales_actual_entry_transport_pending",
+    SalesActualEntry.date,
+    SalesActualEntry.customer_id,
+    postgresql_where=SalesActualEntry.transport_complete.is_(False),
+    sqlite_where=SalesActualEntry.transport_complete.is_(False),
+)
+
+
+@event.listens_for(SalesActualEntry, "before_insert")
+@event.listens_for(SalesActualEntry, "before_update")
+def _refresh_transport_complete(_mapper, connection, target):
+    """Keep ``transport_complete`` in step with the transport columns.
+
+    Deliveries that did not use a Samprox lorry never get transport details,
+    so they count as complete.
+    """
+
+    customer_mode = None
+    if not (target.transport_mode_used or "").strip():
+        customer_mode = connection.execute(
+            select(Customer.transport_mode).where(Customer.id == target.customer_id)
+        ).scalar()
+    target.transport_complete = not (
+        target.is_samprox_lorry_delivery(customer_mode) and target.missing_transport_fields()
+    )
+
+
+class SalesRollup(db.Model):
+    """Sales value and tonnage per customer and day, and per customer and month.
+
+    Rows are maintained by the session flush hooks below so dashboards read a
+    handful of grouped rows instead of every sale of the year.
+    """
+
+    __tablename__ = "sales_rollup"
+    __table_args__ = (
+        UniqueConstraint("grain", "period_start", "customer_id", name="uq_sales_rollup_bucket"),
+        Index("ix_sales_rollup_grain_period", "grain", "period_start"),
+    )
+
+    GRAIN_DAY = "day"
+    GRAIN_MONTH = "month"
+
+    id = db.Column(db.Integer, primary_key=True)
+    grain = db.Column(db.String(10), nullable=False)
+    period_start = db.Column(db.Date, nullable=False)
+    customer_id = db.Column(
+        db.Integer,
+        db.ForeignKey("customer.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    amount = db.Column(db.Float, nullable=False, default=0.0)
+    quantity_tons = db.Column(db.Float, nullable=False, default=0.0)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def buckets(cls, customer_id, day) -> list[tuple[str, date, int]]:
+        """Return the day and month buckets a sale on ``day`` belongs to."""
+
+        if customer_id is None or not isinstance(day, date):
+            return []
+        return [
+            (cls.GRAIN_DAY, day, customer_id),
+            (cls.GRAIN_MONTH, day.replace(day=1), customer_id),
+        ]
+
+
+_SALES_ROLLUP_INFO_KEY = "_sales_rollup_previous"
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_sales_before_flush(session, _flush_context, _instances):
+    """Read the stored state of sales entries that are about to change or go away."""
+
+    session.info.pop(_SALES_ROLLUP_INFO_KEY, None)
+    changed_ids = [
+        obj.id
+        for obj in (*session.dirty, *session.deleted)
+        if isinstance(obj, SalesActualEntry)
+        and obj.id is not None
+        and (obj in session.deleted or session.is_modified(obj))
+    ]
+    if not changed_ids:
+        return
+
+    rows = session.connection().execute(
+        select(
+            SalesActualEntry.customer_id,
+            SalesActualEntry.date,
+            SalesActualEntry.amount,
+            SalesActualEntry.quantity_tons,
+        ).where(SalesActualEntry.id.in_(changed_ids))
+    ).all()
+    session.info[_SALES_ROLLUP_INFO_KEY] = [tuple(row) for row in rows]
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_sales_rollup(session, _flush_context):
+    """Apply sales entry inserts, edits and deletes to ``sales_rollup``."""
+
+    deltas: dict[tuple[str, date, int], list] = {}
+
+    def merge(customer_id, day, amount, quantity_tons, sign: int):
+        for bucket in SalesRollup.buckets(customer_id, day):
+            totals = deltas.setdefault(bucket, [0.0, 0.0, 0])
+            totals[0] += sign * float(amount or 0.0)
+            totals[1] += sign * float(quantity_tons or 0.0)
+            totals[2] += sign
+
+    for previous in session.info.pop(_SALES_ROLLUP_INFO_KEY, []):
+        merge(*previous, sign=-1)
+
+    for obj in (*session.new, *session.dirty):
+        if not isinstance(obj, SalesActualEntry) or obj in session.deleted:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        merge(obj.customer_id, obj.date, obj.amount, obj.quantity_tons, sign=1)
+
+    deltas = {
+        bucket: totals
+        for bucket, totals in deltas.items()
+        if totals[2] or abs(totals[0]) > 1e-9 or abs(totals[1]) > 1e-9
+    }
+    if not deltas:
+        return
+
+    table = SalesRollup.__table__
+    connection = session.connection()
+    for (grain, period_start, customer_id), (amount, quantity_tons, count) in deltas.items():
+        statement = _upsert_insert(connection, table) if count > 0 else None
+        if statement is not None:
+            # One statement, so concurrent first sales in a bucket cannot
+            # both insert it.
+            statement = statement.values(
+                grain=grain,
+                period_start=period_start,
+                customer_id=customer_id,
+                amount=amount,
+                quantity_tons=quantity_tons,
+                entry_count=count,
+            )
+            excluded = statement.excluded
+            connection.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["grain", "period_start", "customer_id"],
+                    set_={
+                        "amount": table.c.amount + excluded.amount,
+                        "quantity_tons": table.c.quantity_tons + excluded.quantity_tons,
+                        "entry_count": table.c.entry_count + excluded.entry_count,
+                    },
+                )
+            )
+            continue
+        bucket = (
+            (table.c.grain == grain)
+            & (table.c.period_start == period_start)
+            & (table.c.customer_id == customer_id)
+        )
+        result = connection.execute(
+            table.update()
+            .where(bucket)
+            .values(
+                amount=table.c.amount + amount,
+                quantity_tons=table.c.quantity_tons + quantity_tons,
+                entry_count=table.c.entry_count + count,
+            )
+        )
+        if result.rowcount == 0 and count > 0:
+            connection.execute(
+                table.insert().values(
+                    grain=grain,
+                    period_start=period_start,
+                    customer_id=customer_id,
+                    amount=amount,
+                    quantity_tons=quantity_tons,
+                    entry_count=count,
+                )
+            )
+
+    connection.execute(
+        table.delete().where(
+            table.c.customer_id.in_({key[2] for key in deltas}),
+            table.c.entry_count <= 0,
+        )
+    )
+
 
 class CustomerPurchaseOrder(db.Model):
     __tablename__ = "customer_purchase_orders"
+    __table_args__ = (
+        Index("ix_customer_purchase_orders_deleted_date", "is_deleted", "po_date", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     po_number = db.Column(db.String(40), unique=True, nullable=False)
@@ -1900,6 +2681,8 @@ class CustomerPurchaseOrder(db.Model):
     updated_by_id = db.Column(db.Integer, db.ForeignKey("user.id"))
     updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     is_deleted = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    line_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    qty_balance_total = db.Column(db.Numeric(14, 3), nullable=False, default=Decimal("0.000"), server_default="0")
 
     customer = db.relationship("Customer", backref=db.backref("customer_purchase_orders", cascade="all, delete-orphan"))
     sales_rep = db.relationship("TeamMember")
@@ -1939,6 +2722,64 @@ class CustomerPurchaseOrderItem(db.Model):
     purchase_order = db.relationship("CustomerPurchaseOrder", back_populates="items")
     item = db.relationship("MaterialItem")
 
+    def refresh_line_total(self) -> Decimal:
+        """Recompute ``line_total`` from quantity, price and discount."""
+
+        qty = Decimal(self.qty_ordered or 0)
+        price = Decimal(self.unit_price or 0)
+        discount_pct = Decimal(self.discount_percent or 0)
+        self.line_total = ((qty * price) * (Decimal("1") - discount_pct / Decimal("100"))).quantize(
+            Decimal("0.01"), rounding=ROUND_HALF_UP
+        )
+        return self.line_total
+
+
+def _refresh_purchase_order_totals(po: CustomerPurchaseOrder, items) -> None:
+    subtotal = Decimal("0")
+    qty_balance = Decimal("0")
+    count = 0
+    for item in items:
+        subtotal += item.refresh_line_total()
+        qty_balance += Decimal(item.qty_balance or 0)
+        count += 1
+
+    po.line_count = count
+    po.qty_balance_total = qty_balance
+    po.subtotal_amount = subtotal
+    po.grand_total = (
+        subtotal
+        + Decimal(po.vat_amount or 0)
+        + Decimal(po.other_charges or 0)
+        - Decimal(po.discount_amount or 0)
+    )
+    po.outstanding_amount = po.grand_total - Decimal(po.advance_amount or 0)
+
+
+@event.listens_for(Session, "before_flush")
+def _maintain_purchase_order_totals(session, _flush_context, _instances):
+    """Keep PO line totals and header amounts in step with their lines.
+
+    The list page reads the stored header figures, so nothing there needs to
+    load the lines of every order.
+    """
+
+    orders = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, CustomerPurchaseOrderItem):
+            if obj.purchase_order is not None:
+                orders.add(obj.purchase_order)
+        elif isinstance(obj, CustomerPurchaseOrder) and (
+            obj in session.new or session.is_modified(obj)
+        ):
+            orders.add(obj)
+
+    for po in orders:
+        if po in session.deleted:
+            continue
+        _refresh_purchase_order_totals(
+            po, [item for item in po.items if item not in session.deleted]
+        )
+
 
 class PettyCashWeeklyClaim(db.Model):
     __tablename__ = "petty_cash_weekly_claims"
@@ -2093,6 +2934,63 @@ class NonSamproxCustomer(db.Model):
     __table_args__ = (
         db.Index("ix_non_samprox_customers_city_district", "city", "district"),
         db.Index("ix_non_samprox_customers_company_name", "company_id", "customer_name"),
+        db.Index("ix_non_samprox_customers_managed_by_updated", "managed_by_user_id", "updated_at"),
+    )
+
+
+class CustomerLocation(db.Model):
+    """GPS position of a Samprox or non-Samprox customer for visit matching.
+
+    ``geohash`` is kept at full precision by ``geo_index.set_position`` so
+    radius lookups can prune by indexed prefix matches.
+    """
+
+    __tablename__ = "customer_locations"
+
+    SOURCE_MANUAL = "manual"
+    SOURCE_CHECK_IN = "check_in"
+
+    id = db.Column(GUID(), primary_key=True, default=uuid.uuid4)
+    customer_id = db.Column(
+        db.Integer,
+        db.ForeignKey("customer.id", ondelete="CASCADE"),
+        nullable=True,
+        unique=True,
+    )
+    non_samprox_customer_id = db.Column(
+        GUID(),
+        db.ForeignKey("non_samprox_customers.id", ondelete="CASCADE"),
+        nullable=True,
+        unique=True,
+    )
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    geohash = db.Column(db.String(12), nullable=False)
+    source = db.Column(db.String(20), nullable=False, default=SOURCE_MANUAL)
+    updated_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    customer = db.relationship(
+        "Customer",
+        backref=db.backref("location", uselist=False, cascade="all, delete-orphan", passive_deletes=True),
+    )
+    non_samprox_customer = db.relationship(
+        "NonSamproxCustomer",
+        backref=db.backref("location", uselist=False, cascade="all, delete-orphan", passive_deletes=True),
+    )
+
+    __table_args__ = (
+        CheckConstraint(
+            "(customer_id IS NULL) <> (non_samprox_customer_id IS NULL)",
+            name="ck_customer_locations_one_owner",
+        ),
+        # Pattern ops let PostgreSQL serve ``LIKE 'prefix%'`` from the index
+        # whatever the database collation is.
+        Index(
+            "ix_customer_locations_geohash",
+            "geohash",
+            postgresql_ops={"geohash": "varchar_pattern_ops"},
+        ),
     )
 
 
@@ -2171,6 +3069,7 @@ class SalesVisit(db.Model):
     __table_args__ = (
         UniqueConstraint("visit_no", name="uq_sales_visit_visit_no"),
         db.Index("ix_sales_visits_sales_user_date", "sales_user_id", "visit_date"),
+        db.Index("ix_sales_visits_sales_user_updated", "sales_user_id", "updated_at"),
     )
 
     @classmethod
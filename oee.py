@@ -0,0 +1,230 @@
+"""Overall equipment effectiveness per machine, day and shift.
+
+Planned time comes from the daily production forecast (filled into the day
+shift first), downtime from the idle rollups and output from the production
+history. Availability is run time over planned time, performance is actual
+output over the forecast hourly rate times run time. No rejects are recorded
+yet, so quality is reported as 1.0.
+"""
+
+from __future__ import annotations
+
+import calendar
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import select
+
+import machine_idle_rollups
+import production_history
+from extensions import db
+from models import MachineIdleRollup, ProductionForecastEntry
+from production_variance import VarianceCache, forecast_fingerprints
+
+SHIFTS = (MachineIdleRollup.SHIFT_DAY, MachineIdleRollup.SHIFT_OFF)
+DAY_SHIFT_MINUTES = (
+    MachineIdleRollup.DAY_SHIFT_END_HOUR - MachineIdleRollup.DAY_SHIFT_START_HOUR
+) * 60
+QUALITY = 1.0
+
+
+def _hour_shift(hour_no: int) -> str:
+    start_hour = hour_no - 1
+    if MachineIdleRollup.DAY_SHIFT_START_HOUR <= start_hour < MachineIdleRollup.DAY_SHIFT_END_HOUR:
+        return MachineIdleRollup.SHIFT_DAY
+    return MachineIdleRollup.SHIFT_OFF
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    if not denominator:
+        return None
+    return round(numerator / denominator, 4)
+
+
+def summarise(parts: Iterable[dict]) -> dict:
+    """Combine raw shift buckets into hours, tons and the OEE factors."""
+
+    planned = run = tons = ideal = 0.0
+    rated = False
+    for part in parts:
+        planned += part["planned_minutes"]
+        run += part["run_minutes"]
+        tons += part["actual_tons"]
+        if part["ideal_tons"] is not None:
+            ideal += part["ideal_tons"]
+            rated = True
+
+    availability = _ratio(run, planned)
+    performance = _ratio(tons, ideal) if rated else None
+    oee = None
+    if availability is not None and performance is not None:
+        oee = round(availability * performance * QUALITY, 4)
+    return {
+        "planned_hours": round(planned / 60, 3),
+        "run_hours": round(run / 60, 3),
+        "idle_hours": round((planned - run) / 60, 3),
+        "actual_tons": round(tons, 3),
+        "ideal_tons": round(ideal, 3) if rated else None,
+        "availability": availability,
+        "performance": performance,
+        "quality": QUALITY,
+        "oee": oee,
+    }
+
+
+def _compute(
+    asset_ids: list[int], start: date, end: date, now: datetime
+) -> dict[int, dict[str, dict[str, dict]]]:
+    """Return raw ``{asset_id: {iso_day: {shift: bucket}}}`` for the range."""
+
+    forecasts = {
+        (asset_id, day): (float(hours or 0.0), float(tons or 0.0), float(rate or 0.0))
+        for asset_id, day, hours, tons, rate in db.session.execute(
+            select(
+                ProductionForecastEntry.asset_id,
+                ProductionForecastEntry.date,
+                ProductionForecastEntry.forecast_hours,
+                ProductionForecastEntry.forecast_tons,
+                ProductionForecastEntry.average_hourly_production,
+            )
+            .where(ProductionForecastEntry.asset_id.in_(asset_ids))
+            .where(ProductionForecastEntry.date >= start, ProductionForecastEntry.date <= end)
+        )
+    }
+    idle = {
+        shift: machine_idle_rollups.idle_minutes_by_day(asset_ids, start, end, shift=shift, now=now)
+        for shift in SHIFTS
+    }
+    output: dict[tuple[int, date, str], float] = {}
+    for asset_id, day, hour_no, quantity in production_history.hourly_quantities(start, end, asset_ids):
+        key = (asset_id, day, _hour_shift(hour_no))
+        output[key] = output.get(key, 0.0) + quantity
+
+    results: dict[int, dict[str, dict[str, dict]]] = {}
+    for asset_id in asset_ids:
+        days = results.setdefault(asset_id, {})
+        current = start
+        while current <= end:
+            hours, tons, rate = forecasts.get((asset_id, current), (0.0, 0.0, 0.0))
+            if rate <= 0 and hours > 0:
+                rate = tons / hours
+            planned_day = min(max(hours, 0.0), 24.0) * 60
+            planned = {
+                MachineIdleRollup.SHIFT_DAY: min(planned_day, DAY_SHIFT_MINUTES),
+                MachineIdleRollup.SHIFT_OFF: max(planned_day - DAY_SHIFT_MINUTES, 0.0),
+            }
+            buckets = {}
+            for shift in SHIFTS:
+                idle_minutes = min(idle[shift].get((asset_id, current), 0.0), planned[shift])
+                run_minutes = planned[shift] - idle_minutes
+                buckets[shift] = {
+                    "planned_minutes": planned[shift],
+                    "run_minutes": run_minutes,
+                    "actual_tons": output.get((asset_id, current, shift), 0.0),
+                    "ideal_tons": rate * run_minutes / 60 if rate > 0 else None,
+                }
+            days[current.isoformat()] = buckets
+            current += timedelta(days=1)
+    return results
+
+
+def _closed_months(start: date, end: date, today: date) -> Iterator[tuple[date, date]]:
+    """Yield ``(month_start, month_end)`` for whole months in range that ended before ``today``."""
+
+    month_start = start.replace(day=1)
+    while month_start <= end:
+        month_end = month_start.replace(day=calendar.monthrange(month_start.year, month_start.month)[1])
+        if month_end >= today:
+            break
+        yield month_start, month_end
+        month_start = month_end + timedelta(days=1)
+
+
+def _raw_buckets(
+    asset_ids: list[int],
+    start: date,
+    end: date,
+    *,
+    today: date,
+    now: datetime,
+    cache: Optional[VarianceCache],
+) -> dict[int, dict[str, dict[str, dict]]]:
+    """Serve closed months from the cache and compute the open month live.
+
+    Entries are keyed by ``(asset_id, month_start)`` and always cover the
+    whole month, so any range inside closed months reuses them.
+    """
+
+    results: dict[int, dict[str, dict[str, dict]]] = {asset_id: {} for asset_id in asset_ids}
+    first_day, last_day = start.isoformat(), end.isoformat()
+    live_start = start
+
+    for month_start, month_end in _closed_months(start, end, today):
+        live_start = month_end + timedelta(days=1)
+        production = production_history.history_fingerprint(asset_ids, month_start, month_end)
+        forecast = forecast_fingerprints(asset_ids, month_start, month_end)
+        idle = machine_idle_rollups.rollup_fingerprint(asset_ids, month_start, month_end)
+        fingerprints = {}
+        months = {}
+        stale = []
+        for asset_id in asset_ids:
+            fingerprint = (production.get(asset_id), forecast.get(asset_id), idle.get(asset_id))
+            fingerprints[asset_id] = fingerprint
+            cached = cache.get((asset_id, month_start), fingerprint) if cache is not None else None
+            if cached is not None:
+                months[asset_id] = cached
+            else:
+                stale.append(asset_id)
+        if stale:
+            for asset_id, days in _compute(stale, month_start, month_end, now).items():
+                if cache is not None:
+                    cache.set((asset_id, month_start), fingerprints[asset_id], days)
+                months[asset_id] = days
+        for asset_id, days in months.items():
+            results[asset_id].update(
+                (day, buckets) for day, buckets in days.items() if first_day <= day <= last_day
+            )
+
+    live_start = max(live_start, start)
+    if live_start <= end:
+        for asset_id, days in _compute(asset_ids, live_start, end, now).items():
+            results[asset_id].update(days)
+    return results
+
+
+def machine_oee(
+    asset_ids: Iterable[int],
+    start: date,
+    end: date,
+    *,
+    today: date,
+    now: Optional[datetime] = None,
+    cache: Optional[VarianceCache] = None,
+) -> dict[int, dict]:
+    """Return ``{asset_id: {"days": [...], "totals": {...}}}`` for the range.
+
+    Each day carries its own factors plus a ``shifts`` breakdown. Months that
+    ended before ``today`` are closed and served from ``cache`` while their
+    source rows are unchanged.
+    """
+
+    asset_ids = list(dict.fromkeys(asset_ids))
+    if not asset_ids:
+        return {}
+
+    raw = _raw_buckets(asset_ids, start, end, today=today, now=now or datetime.utcnow(), cache=cache)
+    results = {}
+    for asset_id in asset_ids:
+        days = []
+        for day, buckets in sorted(raw[asset_id].items()):
+            payload = {"date": day}
+            payload.update(summarise(buckets.values()))
+            payload["shifts"] = {shift: summarise([buckets[shift]]) for shift in SHIFTS}
+            days.append(payload)
+        results[asset_id] = {
+            "days": days,
+            "totals": summarise(
+                bucket for buckets in raw[asset_id].values() for bucket in buckets.values()
+            ),
+        }
+    return results
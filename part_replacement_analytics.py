@@ -0,0 +1,177 @@
+"""Replacement interval analytics for machine parts."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from extensions import db
+from models import MachineAsset, MachinePart, MachinePartReplacementStats
+
+
+def record_part_replacement(part: MachinePart, replaced_on: date) -> None:
+    """Fold a newly logged replacement into the part's stored summary.
+
+    The count and date span are bumped by a single upsert, so concurrent
+    replacements of one part neither collide on the primary key nor lose a
+    count. The derived interval is then recomputed from the returned row,
+    which stays locked by this transaction until it commits.
+    """
+
+    db.session.flush()
+    table = MachinePartReplacementStats.__table__
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        statement = postgresql_insert(table)
+    elif dialect_name == "sqlite":
+        statement = sqlite_insert(table)
+    else:  # pragma: no cover - other backends fall back to a locked read
+        stats = (
+            MachinePartReplacementStats.query.filter_by(part_id=part.id).with_for_update().first()
+        )
+        if stats is None:
+            stats = MachinePartReplacementStats(part=part, replacement_count=0)
+            db.session.add(stats)
+        stats.asset_id = part.asset_id
+        stats.record(replaced_on)
+        db.session.flush()
+        return
+
+    now = datetime.utcnow()
+    statement = statement.values(
+        part_id=part.id,
+        asset_id=part.asset_id,
+        replacement_count=1,
+        first_replaced_on=replaced_on,
+        last_replaced_on=replaced_on,
+        updated_at=now,
+    )
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=["part_id"],
+        set_={
+            "asset_id": excluded.asset_id,
+            "replacement_count": table.c.replacement_count + 1,
+            "first_replaced_on": case(
+                (
+                    table.c.first_replaced_on.is_(None)
+                    | (excluded.first_replaced_on < table.c.first_replaced_on),
+                    excluded.first_replaced_on,
+                ),
+                else_=table.c.first_replaced_on,
+            ),
+            "last_replaced_on": case(
+                (
+                    table.c.last_replaced_on.is_(None)
+                    | (excluded.last_replaced_on > table.c.last_replaced_on),
+                    excluded.last_replaced_on,
+                ),
+                else_=table.c.last_replaced_on,
+            ),
+            "updated_at": excluded.updated_at,
+        },
+    ).returning(table.c.replacement_count, table.c.first_replaced_on, table.c.last_replaced_on)
+    count, first_replaced_on, last_replaced_on = db.session.execute(statement).one()
+
+    mean_interval_days, projected_next_on = MachinePartReplacementStats.projection(
+        count, first_replaced_on, last_replaced_on
+    )
+    db.session.execute(
+        table.update()
+        .where(table.c.part_id == part.id)
+        .values(mean_interval_days=mean_interval_days, projected_next_on=projected_next_on)
+    )
+    # The ORM copy, if one was loaded, no longer matches the row.
+    stats = db.session.identity_map.get(
+        db.session.identity_key(MachinePartReplacementStats, part.id)
+    )
+    if stats is not None:
+        db.session.expire(stats)
+
+
+def _serialize_row(row, today: date) -> dict:
+    days_until_due = (row.projected_next_on - today).days if row.projected_next_on else None
+    return {
+        "part_id": row.part_id,
+        "part_number": row.part_number,
+        "part_name": row.part_name,
+        "asset_id": row.asset_id,
+        "asset_code": row.asset_code,
+        "asset_name": row.asset_name,
+        "replacement_count": row.replacement_count,
+        "first_replaced_on": row.first_replaced_on.isoformat() if row.first_replaced_on else None,
+        "last_replaced_on": row.last_replaced_on.isoformat() if row.last_replaced_on else None,
+        "mean_interval_days": (
+            float(row.mean_interval_days) if row.mean_interval_days is not None else None
+        ),
+        "projected_next_on": row.projected_next_on.isoformat() if row.projected_next_on else None,
+        "days_until_due": days_until_due,
+        "overdue": days_until_due is not None and days_until_due < 0,
+    }
+
+
+def at_risk_parts_page(
+    today: date,
+    *,
+    asset_id: Optional[int] = None,
+    horizon_days: Optional[int] = None,
+    page: int,
+    page_size: int,
+) -> dict:
+    """Rank parts by projected next replacement, soonest (or most overdue) first."""
+
+    query = (
+        select(
+            MachinePartReplacementStats.part_id.label("part_id"),
+            MachinePartReplacementStats.replacement_count.label("replacement_count"),
+            MachinePartReplacementStats.first_replaced_on.label("first_replaced_on"),
+            MachinePartReplacementStats.last_replaced_on.label("last_replaced_on"),
+            MachinePartReplacementStats.mean_interval_days.label("mean_interval_days"),
+            MachinePartReplacementStats.projected_next_on.label("projected_next_on"),
+            MachinePart.part_number.label("part_number"),
+            MachinePart.name.label("part_name"),
+            MachineAsset.id.label("asset_id"),
+            MachineAsset.code.label("asset_code"),
+            MachineAsset.name.label("asset_name"),
+        )
+        .join(MachinePart, MachinePartReplacementStats.part_id == MachinePart.id)
+        .join(MachineAsset, MachinePart.asset_id == MachineAsset.id)
+        .where(MachinePartReplacementStats.projected_next_on.isnot(None))
+    )
+    if asset_id is not None:
+        query = query.where(MachinePartReplacementStats.asset_id == asset_id)
+    if horizon_days is not None:
+        query = query.where(
+            MachinePartReplacementStats.projected_next_on <= today + timedelta(days=horizon_days)
+        )
+
+    total_rows = db.session.execute(
+        select(func.count()).select_from(query.subquery())
+    ).scalar() or 0
+    total_pages = max((total_rows + page_size - 1) // page_size, 1)
+    page = min(max(page, 1), total_pages)
+    rows = db.session.execute(
+        query.order_by(
+            MachinePartReplacementStats.projected_next_on.asc(),
+            MachinePartReplacementStats.mean_interval_days.asc(),
+            MachinePartReplacementStats.part_id.asc(),
+        )
+        .limit(page_size)
+        .offset((page - 1) * page_size)
+    ).all()
+
+    return {
+        "as_of": today.isoformat(),
+        "horizon_days": horizon_days,
+        "rows": [_serialize_row(row, today) for row in rows],
+        "pagination": {
+            "page": page,
+            "page_size": page_size,
+            "total_rows": total_rows,
+            "total_pages": total_pages,
+        },
+    }
@@ -0,0 +1,273 @@
+"""Hourly production history across the live table and the closed-month archive.
+
+Closed months are compacted from :class:`DailyProductionEntry` (one row per
+machine and hour) into :class:`DailyProductionArchive` (one row per machine
+and day). Readers go through :func:`production_days` or
+:func:`hourly_entries` so they see both stores without knowing which months
+have been archived.
+"""
+
+from __future__ import annotations
+
+import calendar
+from datetime import date, datetime
+from types import SimpleNamespace
+from typing import Iterable, Optional
+
+from sqlalchemy import case, delete, func, insert, select, tuple_, union_all
+from sqlalchemy.orm import joinedload
+
+from extensions import db
+from models import DailyProductionArchive, DailyProductionEntry
+
+
+def production_days(start: Optional[date] = None, end: Optional[date] = None):
+    """Return a subquery of daily totals per machine from both stores.
+
+    Columns: ``asset_id``, ``date``, ``quantity_tons`` (day total) and
+    ``productive_hours`` (hours with output above zero).
+    """
+
+    live = select(
+        DailyProductionEntry.asset_id.label("asset_id"),
+        DailyProductionEntry.date.label("date"),
+        func.sum(DailyProductionEntry.quantity_tons).label("quantity_tons"),
+        func.sum(case((DailyProductionEntry.quantity_tons > 0.0, 1), else_=0)).label(
+            "productive_hours"
+        ),
+    ).group_by(DailyProductionEntry.asset_id, DailyProductionEntry.date)
+    archived = select(
+        DailyProductionArchive.asset_id.label("asset_id"),
+        DailyProductionArchive.date.label("date"),
+        DailyProductionArchive.total_tons.label("quantity_tons"),
+        DailyProductionArchive.productive_hours.label("productive_hours"),
+    )
+    if start is not None:
+        live = live.where(DailyProductionEntry.date >= start)
+        archived = archived.where(DailyProductionArchive.date >= start)
+    if end is not None:
+        live = live.where(DailyProductionEntry.date <= end)
+        archived = archived.where(DailyProductionArchive.date <= end)
+    return union_all(live, archived).subquery("production_days")
+
+
+def hourly_entries(
+    start: date,
+    end: date,
+    *,
+    asset_ids: Optional[Iterable[int]] = None,
+) -> list:
+    """Return hourly rows for ``start``..``end`` from both stores.
+
+    Live rows are :class:`DailyProductionEntry` instances; archived hours are
+    read-only stand-ins with the same attributes and ``id`` set to ``None``.
+    """
+
+    if asset_ids is not None:
+        asset_ids = list(asset_ids)
+        if not asset_ids:
+            return []
+
+    live_query = DailyProductionEntry.query.options(joinedload(DailyProductionEntry.asset)).filter(
+        DailyProductionEntry.date >= start, DailyProductionEntry.date <= end
+    )
+    archive_query = DailyProductionArchive.query.options(
+        joinedload(DailyProductionArchive.asset)
+    ).filter(DailyProductionArchive.date >= start, DailyProductionArchive.date <= end)
+    if asset_ids is not None:
+        live_query = live_query.filter(DailyProductionEntry.asset_id.in_(asset_ids))
+        archive_query = archive_query.filter(DailyProductionArchive.asset_id.in_(asset_ids))
+
+    entries = list(live_query.all())
+    for archive in archive_query.all():
+        for hour_no, quantity in archive.hours().items():
+            entries.append(
+                SimpleNamespace(
+                    id=None,
+                    date=archive.date,
+                    hour_no=hour_no,
+                    quantity_tons=quantity,
+                    asset_id=archive.asset_id,
+                    asset=archive.asset,
+                    created_at=archive.updated_at,
+                    updated_at=archive.updated_at,
+                )
+            )
+    entries.sort(key=lambda entry: (entry.date, entry.asset_id, entry.hour_no))
+    return entries
+
+
+def hourly_quantities(
+    start: date, end: date, asset_ids: Iterable[int]
+) -> list[tuple[int, date, int, float]]:
+    """Return ``(asset_id, date, hour_no, quantity_tons)`` tuples from both stores."""
+
+    asset_ids = list(asset_ids)
+    if not asset_ids:
+        return []
+
+    rows = [
+        (asset_id, day, hour_no, float(quantity or 0.0))
+        for asset_id, day, hour_no, quantity in db.session.execute(
+            select(
+                DailyProductionEntry.asset_id,
+                DailyProductionEntry.date,
+                DailyProductionEntry.hour_no,
+                DailyProductionEntry.quantity_tons,
+            )
+            .where(DailyProductionEntry.asset_id.in_(asset_ids))
+            .where(DailyProductionEntry.date >= start, DailyProductionEntry.date <= end)
+        )
+    ]
+    archived = db.session.execute(
+        select(
+            DailyProductionArchive.asset_id,
+            DailyProductionArchive.date,
+            DailyProductionArchive.hour_tons,
+        )
+        .where(DailyProductionArchive.asset_id.in_(asset_ids))
+        .where(DailyProductionArchive.date >= start, DailyProductionArchive.date <= end)
+    ).all()
+    for asset_id, day, hour_tons in archived:
+        for hour_no, quantity in enumerate(hour_tons or [], start=1):
+            if quantity is not None:
+                rows.append((asset_id, day, hour_no, float(quantity)))
+    return rows
+
+
+def history_fingerprint(asset_ids: list[int], start: date, end: date) -> dict[int, tuple]:
+    """Return ``{asset_id: (live rows, latest update, archived days, latest archive)}``."""
+
+    fingerprints: dict[int, list] = {}
+    for model, timestamp in (
+        (DailyProductionEntry, DailyProductionEntry.updated_at),
+        (DailyProductionArchive, DailyProductionArchive.archived_at),
+    ):
+        rows = db.session.execute(
+            select(model.asset_id, func.count(model.id), func.max(timestamp))
+            .where(model.asset_id.in_(asset_ids))
+            .where(model.date >= start, model.date <= end)
+            .group_by(model.asset_id)
+        ).all()
+        offset = 0 if model is DailyProductionEntry else 2
+        for asset_id, count, latest in rows:
+            fingerprint = fingerprints.setdefault(asset_id, [0, None, 0, None])
+            fingerprint[offset] = count
+            fingerprint[offset + 1] = str(latest)
+    return {asset_id: tuple(value) for asset_id, value in fingerprints.items()}
+
+
+def restore_archived_days(days: Iterable[tuple[int, date]]) -> int:
+    """Move archived ``(asset_id, date)`` days back into the live hourly table.
+
+    Writers call this before editing a day of a closed month; the month is
+    compacted again by the next archive run. The caller commits.
+    """
+
+    keys = list(set(days))
+    if not keys:
+        return 0
+    archives = DailyProductionArchive.query.filter(
+        tuple_(DailyProductionArchive.asset_id, DailyProductionArchive.date).in_(keys)
+    ).all()
+    rows = [
+        {
+            "asset_id": archive.asset_id,
+            "date": archive.date,
+            "hour_no": hour_no,
+            "quantity_tons": quantity,
+            "created_at": archive.updated_at,
+            "updated_at": archive.updated_at,
+        }
+        for archive in archives
+        for hour_no, quantity in archive.hours().items()
+    ]
+    # Core statements keep the rows out of the activity ledger hooks: the
+    # hours were already booked when first entered.
+    if rows:
+        db.session.execute(insert(DailyProductionEntry), rows)
+    if archives:
+        db.session.execute(
+            delete(DailyProductionArchive).where(
+                DailyProductionArchive.id.in_([archive.id for archive in archives])
+            )
+        )
+    return len(archives)
+
+
+def archive_month(month_start: date, *, today: Optional[date] = None) -> dict:
+    """Compact a closed month's hourly rows into the archive. The caller commits.
+
+    Raises ``ValueError`` for the current or a future month.
+    """
+
+    today = today or date.today()
+    month_start = month_start.replace(day=1)
+    month_end = month_start.replace(day=calendar.monthrange(month_start.year, month_start.month)[1])
+    if month_end >= today.replace(day=1):
+        raise ValueError(f"{month_start:%Y-%m} is not closed yet.")
+
+    rows = db.session.execute(
+        select(
+            DailyProductionEntry.asset_id,
+            DailyProductionEntry.date,
+            DailyProductionEntry.hour_no,
+            DailyProductionEntry.quantity_tons,
+            func.coalesce(DailyProductionEntry.updated_at, DailyProductionEntry.created_at),
+        ).where(DailyProductionEntry.date >= month_start, DailyProductionEntry.date <= month_end)
+    ).all()
+
+    days: dict[tuple[int, date], dict] = {}
+    for asset_id, day, hour_no, quantity, updated_at in rows:
+        bucket = days.setdefault((asset_id, day), {"hours": {}, "updated_at": None})
+        bucket["hours"][hour_no] = float(quantity or 0.0)
+        if updated_at is not None and (bucket["updated_at"] is None or updated_at > bucket["updated_at"]):
+            bucket["updated_at"] = updated_at
+
+    if days:
+        existing = {
+            (archive.asset_id, archive.date): archive
+            for archive in DailyProductionArchive.query.filter(
+                DailyProductionArchive.date >= month_start,
+                DailyProductionArchive.date <= month_end,
+            ).all()
+        }
+        archived_at = datetime.utcnow()
+        for key, bucket in days.items():
+            archive = existing.get(key)
+            hours = bucket["hours"]
+            if archive is None:
+                archive = DailyProductionArchive(asset_id=key[0], date=key[1])
+                db.session.add(archive)
+            else:
+                hours = {**archive.hours(), **hours}
+            archive.set_hours(hours)
+            archive.updated_at = bucket["updated_at"]
+            archive.archived_at = archived_at
+
+        db.session.execute(
+            delete(DailyProductionEntry).where(
+                DailyProductionEntry.date >= month_start, DailyProductionEntry.date <= month_end
+            )
+        )
+        db.session.flush()
+
+    return {"period": f"{month_start:%Y-%m}", "days": len(days), "hour_rows": len(rows)}
+
+
+def archive_closed_months(before: date, *, today: Optional[date] = None) -> list[dict]:
+    """Archive every month with live rows that starts before ``before``, committing each."""
+
+    today = today or date.today()
+    before = min(before.replace(day=1), today.replace(day=1))
+    results = []
+    while True:
+        oldest = db.session.execute(
+            select(func.min(DailyProductionEntry.date)).where(DailyProductionEntry.date < before)
+        ).scalar()
+        if oldest is None:
+            return results
+        if isinstance(oldest, str):
+            oldest = date.fromisoformat(oldest[:10])
+        results.append(archive_month(oldest.replace(day=1), today=today))
+        db.session.commit()
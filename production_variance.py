@@ -0,0 +1,271 @@
+"""Forecast versus actual production variance per machine and month."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Hashable, Iterable, Mapping, Optional
+
+from sqlalchemy import func, select
+
+import production_history
+from extensions import db
+from models import ProductionForecastEntry, TeamWorkCalendarDay
+
+
+class VarianceCache:
+    """Thread-safe LRU of computed month variances keyed by ``(asset_id, month)``.
+
+    Each entry remembers the fingerprint of the rows it was computed from and
+    is only served while that fingerprint still matches.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple[Hashable, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, fingerprint: Hashable) -> Optional[dict]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None or cached[0] != fingerprint:
+                return None
+            self._entries.move_to_end(key)
+            return cached[1]
+
+    def set(self, key: Hashable, fingerprint: Hashable, value: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (fingerprint, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def forecast_fingerprints(
+    asset_ids: list[int], month_start: date, month_end: date
+) -> dict[int, tuple]:
+    """Return ``{asset_id: (forecast rows, latest update)}`` for the range."""
+
+    rows = db.session.execute(
+        select(
+            ProductionForecastEntry.asset_id,
+            func.count(ProductionForecastEntry.id),
+            func.max(ProductionForecastEntry.updated_at),
+        )
+        .where(ProductionForecastEntry.asset_id.in_(asset_ids))
+        .where(
+            ProductionForecastEntry.date >= month_start,
+            ProductionForecastEntry.date <= month_end,
+        )
+        .group_by(ProductionForecastEntry.asset_id)
+    ).all()
+    return {asset_id: (count, str(updated_at)) for asset_id, count, updated_at in rows}
+
+
+def _work_calendar(
+    month_start: date, month_end: date, holidays: Mapping[date, str]
+) -> tuple[dict[date, tuple[bool, Optional[str]]], tuple]:
+    """Return ``{date: (is_work_day, holiday_name)}`` and a fingerprint of the overrides.
+
+    Calendar overrides win; otherwise public holidays are non-working days.
+    """
+
+    overrides = db.session.execute(
+        select(
+            TeamWorkCalendarDay.date,
+            TeamWorkCalendarDay.is_work_day,
+            TeamWorkCalendarDay.holiday_name,
+            TeamWorkCalendarDay.updated_at,
+        ).where(TeamWorkCalendarDay.date >= month_start, TeamWorkCalendarDay.date <= month_end)
+    ).all()
+    override_map = {
+        day: (is_work_day is not False, holiday_name) for day, is_work_day, holiday_name, _ in overrides
+    }
+
+    calendar_days = {}
+    current = month_start
+    while current <= month_end:
+        if current in override_map:
+            calendar_days[current] = override_map[current]
+        elif current in holidays:
+            calendar_days[current] = (False, holidays[current])
+        else:
+            calendar_days[current] = (True, None)
+        current += timedelta(days=1)
+
+    fingerprint = (
+        len(overrides),
+        max((str(updated_at) for *_, updated_at in overrides), default=None),
+        tuple(sorted(holidays.items())),
+    )
+    return calendar_days, fingerprint
+
+
+def _compute(
+    asset_ids: list[int],
+    month_start: date,
+    month_end: date,
+    today: date,
+    calendar_days: dict[date, tuple[bool, Optional[str]]],
+) -> dict[int, dict]:
+    production_days = production_history.production_days(month_start, month_end)
+    actual_rows = db.session.execute(
+        select(
+            production_days.c.asset_id,
+            production_days.c.date,
+            func.sum(production_days.c.quantity_tons),
+        )
+        .where(production_days.c.asset_id.in_(asset_ids))
+        .group_by(production_days.c.asset_id, production_days.c.date)
+    ).all()
+    forecast_rows = db.session.execute(
+        select(
+            ProductionForecastEntry.asset_id,
+            ProductionForecastEntry.date,
+            ProductionForecastEntry.forecast_tons,
+        )
+        .where(ProductionForecastEntry.asset_id.in_(asset_ids))
+        .where(
+            ProductionForecastEntry.date >= month_start,
+            ProductionForecastEntry.date <= month_end,
+        )
+    ).all()
+
+    actuals = {(asset_id, day): float(tons or 0.0) for asset_id, day, tons in actual_rows}
+    forecasts = {(asset_id, day): float(tons or 0.0) for asset_id, day, tons in forecast_rows}
+
+    results = {}
+    for asset_id in asset_ids:
+        days = []
+        cumulative_forecast = cumulative_actual = 0.0
+        forecast_month = forecast_to_date = forecast_off_days = 0.0
+        actual_completed = 0.0
+        work_days = work_days_completed = work_days_remaining = 0
+
+        for day, (is_work_day, holiday_name) in calendar_days.items():
+            forecast_tons = forecasts.get((asset_id, day), 0.0)
+            actual_tons = actuals.get((asset_id, day), 0.0)
+            completed = day < today
+            cumulative_forecast += forecast_tons
+            cumulative_actual += actual_tons
+            forecast_month += forecast_tons
+            if not is_work_day:
+                forecast_off_days += forecast_tons
+            if day <= today:
+                forecast_to_date += forecast_tons
+            if completed:
+                actual_completed += actual_tons
+            if is_work_day:
+                work_days += 1
+                if completed:
+                    work_days_completed += 1
+                else:
+                    work_days_remaining += 1
+
+            days.append(
+                {
+                    "date": day.isoformat(),
+                    "is_work_day": is_work_day,
+                    "holiday_name": holiday_name,
+                    "forecast_tons": round(forecast_tons, 3),
+                    "actual_tons": round(actual_tons, 3),
+                    "variance_tons": round(actual_tons - forecast_tons, 3),
+                    "cumulative_forecast_tons": round(cumulative_forecast, 3),
+                    "cumulative_actual_tons": round(cumulative_actual, 3),
+                    "cumulative_variance_tons": round(cumulative_actual - cumulative_forecast, 3),
+                }
+            )
+
+        # The run rate only uses completed working days so today's partial
+        # output does not drag the projection down.
+        run_rate = actual_completed / work_days_completed if work_days_completed else None
+        projected = (
+            actual_completed + run_rate * work_days_remaining if run_rate is not None else None
+        )
+        adjusted_forecast = forecast_month - forecast_off_days
+        results[asset_id] = {
+            "days": days,
+            "summary": {
+                "forecast_month_tons": round(forecast_month, 3),
+                "forecast_non_work_day_tons": round(forecast_off_days, 3),
+                "adjusted_forecast_tons": round(adjusted_forecast, 3),
+                "forecast_to_date_tons": round(forecast_to_date, 3),
+                "actual_to_date_tons": round(cumulative_actual, 3),
+                "variance_to_date_tons": round(cumulative_actual - forecast_to_date, 3),
+                "attainment_pct": (
+                    round(cumulative_actual / forecast_to_date * 100, 2) if forecast_to_date else None
+                ),
+                "work_days": work_days,
+                "work_days_completed": work_days_completed,
+                "work_days_remaining": work_days_remaining,
+                "run_rate_tons_per_work_day": round(run_rate, 3) if run_rate is not None else None,
+                "projected_month_end_tons": round(projected, 3) if projected is not None else None,
+                "projected_variance_tons": (
+                    round(projected - adjusted_forecast, 3) if projected is not None else None
+                ),
+            },
+        }
+    return results
+
+
+def monthly_variance(
+    asset_ids: Iterable[int],
+    month_start: date,
+    month_end: date,
+    *,
+    today: date,
+    holidays: Mapping[date, str],
+    cache: Optional[VarianceCache] = None,
+) -> dict[int, dict]:
+    """Return ``{asset_id: {"days": [...], "summary": {...}}}`` for one month.
+
+    Variance is ``actual - forecast``. The month-end projection extends the
+    run rate over completed working days across the remaining working days
+    and compares it with the forecast excluding non-working days.
+    """
+
+    asset_ids = list(dict.fromkeys(asset_ids))
+    if not asset_ids:
+        return {}
+
+    calendar_days, calendar_fingerprint = _work_calendar(month_start, month_end, holidays)
+    production_fingerprints = production_history.history_fingerprint(asset_ids, month_start, month_end)
+    forecast_versions = forecast_fingerprints(asset_ids, month_start, month_end)
+    # Past months stop depending on ``today`` once every day has completed.
+    as_of = min(max(today, month_start), month_end + timedelta(days=1))
+
+    results: dict[int, dict] = {}
+    fingerprints = {}
+    stale = []
+    for asset_id in asset_ids:
+        fingerprint = (
+            production_fingerprints.get(asset_id),
+            forecast_versions.get(asset_id),
+            calendar_fingerprint,
+            as_of,
+        )
+        fingerprints[asset_id] = fingerprint
+        cached = cache.get((asset_id, month_start), fingerprint) if cache is not None else None
+        if cached is not None:
+            results[asset_id] = cached
+        else:
+            stale.append(asset_id)
+
+    if stale:
+        computed = _compute(stale, month_start, month_end, as_of, calendar_days)
+        for asset_id, value in computed.items():
+            if cache is not None:
+                cache.set((asset_id, month_start), fingerprints[asset_id], value)
+            results[asset_id] = value
+    return results
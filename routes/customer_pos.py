@@ -4,11 +4,12 @@ from datetime import date, datetime
 from decimal import Decimal
 from typing import Iterable
 
-from flask import Blueprint, redirect, render_template, request, url_for
+from flask import Blueprint, jsonify, redirect, render_template, request, url_for
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, select
 from sqlalchemy.orm import joinedload
 
+import http_cache
 from extensions import db
 from material import seed_material_defaults
 from models import (
@@ -24,6 +25,9 @@ from models import (
 
 bp = Blueprint("customer_pos", __name__, url_prefix="/customer-pos")
 
+PO_PAGE_SIZE = 50
+PO_MAX_PAGE_SIZE = 200
+
 
 def _current_user() -> User | None:
     try:
@@ -43,10 +47,16 @@ def _current_user() -> User | None:
     return User.query.get(user_id)
 
 
-def _load_dropdowns() -> dict[str, Iterable]:
+def _load_dropdowns(po: CustomerPurchaseOrder | None = None) -> dict[str, Iterable]:
+    """Return the form's dropdowns.
+
+    Only the PO's own customer is rendered; the page fills the full customer
+    list from the ETag-cached ``/options`` payload.
+    """
+
     seed_material_defaults()
     return {
-        "customers": Customer.query.order_by(Customer.name.asc()).all(),
+        "customers": [po.customer] if po is not None and po.customer is not None else [],
         "item_options": MaterialItem.query.filter_by(is_active=True).order_by(MaterialItem.name.asc()).all(),
         "team_members": TeamMember.query.order_by(TeamMember.name.asc()).all(),
         "statuses": list(CustomerPurchaseOrderStatus),
@@ -101,7 +111,6 @@ def _build_items_from_form(po: CustomerPurchaseOrder | None) -> list[CustomerPur
         if qty <= 0 or price <= 0:
             continue
 
-        line_total = (qty * price) * (Decimal("1") - (discount_pct / Decimal("100")))
         item = CustomerPurchaseOrderItem(
             purchase_order=po,
             item=material_item,
@@ -112,7 +121,6 @@ def _build_items_from_form(po: CustomerPurchaseOrder | None) -> list[CustomerPur
             unit=units[idx] if idx < len(units) else "",
             unit_price=price,
             discount_percent=discount_pct,
-            line_total=line_total,
             qty_delivered=Decimal("0"),
             qty_balance=qty,
         )
@@ -166,57 +174,135 @@ def _bind_header_from_form(po: CustomerPurchaseOrder) -> None:
     po.status = desired_status
 
 
-def _recalculate_totals(po: CustomerPurchaseOrder, items: list[CustomerPurchaseOrderItem]) -> None:
-    subtotal = sum((item.line_total for item in items), Decimal("0"))
-    po.subtotal_amount = subtotal
-    po.grand_total = subtotal + po.vat_amount + po.other_charges - po.discount_amount
-    po.outstanding_amount = po.grand_total - po.advance_amount
+def _parse_list_filters() -> tuple[list, CustomerPurchaseOrderStatus | None, list[str]]:
+    """Return ``(filters, status, errors)`` for the PO list query string.
 
+    ``filters`` excludes the status so the per-status counts can share it.
+    """
 
-@bp.get("")
-def list_purchase_orders():
     filters = []
+    errors: list[str] = []
     date_from_raw = request.args.get("date_from")
     date_to_raw = request.args.get("date_to")
     customer_id = request.args.get("customer_id")
-    status = request.args.get("status")
+    status_raw = request.args.get("status")
 
     if date_from_raw:
         try:
             date_from = datetime.strptime(date_from_raw, "%Y-%m-%d").date()
             filters.append(CustomerPurchaseOrder.po_date >= date_from)
         except ValueError:
-            pass
+            errors.append("Date from must be in YYYY-MM-DD format.")
 
     if date_to_raw:
         try:
             date_to = datetime.strptime(date_to_raw, "%Y-%m-%d").date()
             filters.append(CustomerPurchaseOrder.po_date <= date_to)
         except ValueError:
-            pass
+            errors.append("Date to must be in YYYY-MM-DD format.")
 
     if customer_id:
         try:
             filters.append(CustomerPurchaseOrder.customer_id == int(customer_id))
         except ValueError:
-            pass
+            errors.append("Customer must be a valid customer.")
 
-    if status:
+    status = None
+    if status_raw:
         try:
-            status_enum = CustomerPurchaseOrderStatus(status)
-            filters.append(CustomerPurchaseOrder.status == status_enum)
+            status = CustomerPurchaseOrderStatus(status_raw)
         except ValueError:
-            pass
+            errors.append(f"Unknown status '{status_raw}'.")
 
-    query = CustomerPurchaseOrder.query.options(joinedload(CustomerPurchaseOrder.customer)).filter(
-        CustomerPurchaseOrder.is_deleted.is_(False)
+    return filters, status, errors
+
+
+@bp.get("")
+def list_purchase_orders():
+    filters, status, errors = _parse_list_filters()
+    page = max(request.args.get("page", type=int) or 1, 1)
+    per_page = request.args.get("per_page", type=int) or PO_PAGE_SIZE
+    per_page = min(max(per_page, 1), PO_MAX_PAGE_SIZE)
+
+    customers = db.session.execute(
+        select(Customer.id, Customer.name).order_by(Customer.name.asc())
+    ).all()
+    context = {
+        "customers": customers,
+        "statuses": list(CustomerPurchaseOrderStatus),
+        "errors": errors,
+        "status_counts": {},
+        "total_orders": 0,
+        "page": page,
+        "per_page": per_page,
+        "page_count": 1,
+    }
+    if errors:
+        return render_template("customer_pos/list.html", orders=[], **context), 400
+
+    base_filter = and_(CustomerPurchaseOrder.is_deleted.is_(False), *filters)
+    status_counts = {
+        row_status: count
+        for row_status, count in db.session.execute(
+            select(CustomerPurchaseOrder.status, func.count(CustomerPurchaseOrder.id))
+            .where(base_filter)
+            .group_by(CustomerPurchaseOrder.status)
+        )
+    }
+    total = status_counts.get(status, 0) if status else sum(status_counts.values())
+    page_count = max((total + per_page - 1) // per_page, 1)
+    page = min(page, page_count)
+
+    query = CustomerPurchaseOrder.query.options(joinedload(CustomerPurchaseOrder.customer)).filter(base_filter)
+    if status:
+        query = query.filter(CustomerPurchaseOrder.status == status)
+
+    orders = (
+        query.order_by(CustomerPurchaseOrder.po_date.desc(), CustomerPurchaseOrder.id.desc())
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    context.update(
+        status_counts=status_counts,
+        total_orders=total,
+        page=page,
+        page_count=page_count,
     )
+    return render_template("customer_pos/list.html", orders=orders, **context)
 
-    if filters:
-        query = query.filter(and_(*filters))
 
-    orders = query.order_by(CustomerPurchaseOrder.po_date.desc(), CustomerPurchaseOrder.id.desc()).all()
-    return render_template("customer_pos/list.html", orders=orders, **_load_dropdowns())
+@bp.get("/options")
+def purchase_order_options():
+    """Customers and active items for the PO form, revalidated by ETag.
+
+    The tag is built from the ``updated_at`` fingerprints of both lists
+    before any rows are loaded.
+    """
+
+    items_query = MaterialItem.query.filter(MaterialItem.is_active.is_(True))
+    etag = http_cache.etag_for(
+        http_cache.fingerprint(Customer.query, Customer.updated_at),
+        http_cache.fingerprint(items_query, MaterialItem.updated_at),
+    )
+    cached = http_cache.not_modified(etag)
+    if cached is not None:
+        return cached
+
+    customers = [
+        {"id": customer_id, "name": name}
+        for customer_id, name in db.session.execute(
+            select(Customer.id, Customer.name).order_by(Customer.name.asc())
+        )
+    ]
+    items = [
+        {"id": str(item.id), "name": item.name}
+        for item in items_query.order_by(MaterialItem.name.asc()).all()
+    ]
+    statuses = [status.value for status in CustomerPurchaseOrderStatus]
+    return http_cache.tag(
+        jsonify({"customers": customers, "items": items, "statuses": statuses}), etag
+    )
 
 
 @bp.get("/new")
@@ -243,7 +329,6 @@ def create_purchase_order():
     if not po.customer_id or not order_items:
         return redirect(url_for("customer_pos.new_purchase_order"))
 
-    _recalculate_totals(po, order_items)
     current_user = _current_user()
     if current_user:
         po.created_by = current_user
@@ -267,7 +352,7 @@ def edit_purchase_order(po_id: int):
         po=po,
         po_items=po.items,
         is_edit_mode=True,
-        **_load_dropdowns(),
+        **_load_dropdowns(po),
     )
 
 
@@ -286,7 +371,6 @@ def update_purchase_order(po_id: int):
         return redirect(url_for("customer_pos.edit_purchase_order", po_id=po.id))
 
     po.items[:] = order_items
-    _recalculate_totals(po, order_items)
     current_user = _current_user()
     if current_user:
         po.updated_by = current_user
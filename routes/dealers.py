@@ -8,12 +8,14 @@ import os
 import uuid
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Iterable, Optional
+from typing import Any, Callable, Iterable, Optional
 
 from flask import Blueprint, Response, current_app, jsonify, request, send_file
 from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+from sqlalchemy import insert
 from sqlalchemy.exc import IntegrityError
 
+from background_jobs import get_job, start_job
 from extensions import db
 from models import Company, NonSamproxCustomer, RoleEnum, User
 from routes import non_samprox_customers as nsc
@@ -24,6 +26,9 @@ ALLOWED_BULK_ROLES = {RoleEnum.admin, RoleEnum.finance_manager, RoleEnum.product
 REQUIRED_COLUMNS = ["customer_name", "area_code", "city", "district", "province", "managed_by"]
 OPTIONAL_COLUMNS = ["customer_code"]
 TEMPLATE_COLUMNS = OPTIONAL_COLUMNS + REQUIRED_COLUMNS
+_IMPORT_JOB_KIND = "dealer_bulk_import"
+_JOB_FAILED_ROWS_LIMIT = 100
+_GENERATED_CODE_ATTEMPTS = 3
 
 
 def _current_role() -> Optional[RoleEnum]:
@@ -113,34 +118,49 @@ def _read_csv(file_storage) -> tuple[list[ParsedRow], list[str]]:
     return rows, []
 
 
-def _resolve_managed_by(value: str, users: list[User]) -> Optional[User]:
+def _index_users(users: list[User]) -> dict[object, User]:
+    """Map ids, lower-cased names and emails to users; the first user wins a clash."""
+
+    index: dict[object, User] = {}
+    for user in users:
+        index.setdefault(user.id, user)
+    for user in users:
+        if user.name:
+            index.setdefault(user.name.lower(), user)
+        if user.email:
+            index.setdefault(user.email.lower(), user)
+    return index
+
+
+def _resolve_managed_by(value: str, users_by_key: dict[object, User]) -> Optional[User]:
     if not value:
         return None
     try:
         candidate_id = int(value)
     except (TypeError, ValueError):
         candidate_id = None
-
-    lower_value = value.lower()
-
-    for user in users:
-        if candidate_id is not None and user.id == candidate_id:
-            return user
-        if user.name and user.name.lower() == lower_value:
-            return user
-        if user.email and user.email.lower() == lower_value:
-            return user
-    return None
+    if candidate_id is not None and candidate_id in users_by_key:
+        return users_by_key[candidate_id]
+    return users_by_key.get(value.lower())
+
+
+def _existing_codes(codes: set[str]) -> set[str]:
+    existing: set[str] = set()
+    ordered = sorted(codes)
+    for offset in range(0, len(ordered), 500):
+        chunk = ordered[offset : offset + 500]
+        existing.update(
+            code
+            for (code,) in db.session.query(NonSamproxCustomer.customer_code).filter(
+                NonSamproxCustomer.customer_code.in_(chunk)
+            )
+        )
+    return existing
 
 
 def _validate_rows(company: Company, parsed_rows: list[ParsedRow]) -> tuple[list[ParsedRow], list[ParsedRow]]:
-    active_users = User.query.filter(User.active.is_(True)).all()
-    existing_codes = {
-        c[0]
-        for c in db.session.query(NonSamproxCustomer.customer_code)
-        .filter(NonSamproxCustomer.customer_code != None)  # noqa: E711
-        .all()
-    }
+    users_by_key = _index_users(User.query.filter(User.active.is_(True)).all())
+    existing_codes = _existing_codes({row.data["customer_code"] for row in parsed_rows if row.data.get("customer_code")})
     seen_codes: set[str] = set()
 
     for row in parsed_rows:
@@ -151,7 +171,7 @@ def _validate_rows(company: Company, parsed_rows: list[ParsedRow]) -> tuple[list
             continue
 
         managed_by_value = data.get("managed_by") or ""
-        manager = _resolve_managed_by(managed_by_value, active_users)
+        manager = _resolve_managed_by(managed_by_value, users_by_key)
         if not manager:
             row.error = "managed_by does not match any active user (id, name, or email)"
             continue
@@ -188,27 +208,212 @@ def _serialize_rows(rows: Iterable[ParsedRow]) -> list[dict[str, Any]]:
     return serialized
 
 
-def _generate_error_report(rows: Iterable[ParsedRow]) -> tuple[Optional[str], Optional[str]]:
-    rows_list = list(rows)
-    if not rows_list:
-        return None, None
+class _ErrorReportWriter:
+    """Append failed rows to the downloadable error CSV as they are found.
+
+    The file is only created for the first failure, so clean imports leave
+    nothing behind and ``token`` stays ``None``.
+    """
+
+    def __init__(self) -> None:
+        self.token: Optional[str] = None
+        self.count = 0
+        self._handle = None
+        self._writer: Optional[csv.DictWriter] = None
+
+    def write(self, row: ParsedRow) -> None:
+        if self._writer is None:
+            self.token = uuid.uuid4().hex
+            target_dir = Path(current_app.instance_path or ".") / "dealer_error_reports"
+            target_dir.mkdir(parents=True, exist_ok=True)
+            self._handle = (target_dir / f"{self.token}.csv").open("w", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._handle, fieldnames=TEMPLATE_COLUMNS + ["error", "row_number"])
+            self._writer.writeheader()
+        serialized = {key: row.data.get(key) for key in TEMPLATE_COLUMNS}
+        serialized["error"] = row.error
+        serialized["row_number"] = row.row_number
+        self._writer.writerow(serialized)
+        self.count += 1
+
+    def close(self) -> Optional[str]:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        return self.token
+
+
+class _StrictImportError(Exception):
+    pass
+
+
+def _dealer_values(row: ParsedRow, customer_code: str, company: Company, user_id: int) -> dict[str, Any]:
+    return {
+        "customer_code": customer_code,
+        "customer_name": row.data.get("customer_name"),
+        "area_code": row.data.get("area_code"),
+        "city": row.data.get("city"),
+        "district": row.data.get("district"),
+        "province": row.data.get("province"),
+        "managed_by_user_id": row.managed_by_user_id,
+        "company_id": company.id,
+        "managed_by_label": row.managed_by_name,
+        "company_label": company.name,
+        "created_by": user_id,
+        "source": "bulk_import",
+    }
+
 
-    token = uuid.uuid4().hex
-    instance_dir = Path(current_app.instance_path or ".")
-    target_dir = instance_dir / "dealer_error_reports"
-    target_dir.mkdir(parents=True, exist_ok=True)
-    file_path = target_dir / f"{token}.csv"
+def _insert_chunk_row_by_row(
+    company: Company,
+    values: list[dict[str, Any]],
+    rows: list[ParsedRow],
+    report: _ErrorReportWriter,
+    failed_rows: list[ParsedRow],
+) -> int:
+    """Fallback for a chunk that hit a constraint: isolate the offending rows.
+
+    A generated code can be taken by a customer created while the import
+    runs, so rows without a provided code get a fresh one and are retried
+    instead of being reported.
+    """
+
+    inserted = 0
+    for row_values, row in zip(values, rows):
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(NonSamproxCustomer), [row_values])
+                inserted += 1
+                break
+            except IntegrityError:
+                if not row.provided_code and attempts < _GENERATED_CODE_ATTEMPTS:
+                    row_values["customer_code"] = nsc._reserve_customer_codes(company, 1)[0]
+                    continue
+                row.error = "customer_code already exists"
+                report.write(row)
+                failed_rows.append(row)
+                break
+    db.session.commit()
+    return inserted
+
+
+def _import_dealers(
+    company: Company,
+    user_id: int,
+    rows: list[ParsedRow],
+    strict_mode: bool,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> tuple[bool, dict[str, Any]]:
+    """Validate and insert parsed rows; return ``(ok, payload)``.
+
+    Codes for rows without one are allocated up front in one block, rows
+    are inserted with executemany in chunks of ``DEALER_IMPORT_CHUNK_SIZE``
+    and failures stream into the error CSV. Strict mode inserts everything
+    in one transaction and rolls back on the first problem; otherwise each
+    chunk is committed on its own.
+    """
+
+    chunk_size = max(int(current_app.config.get("DEALER_IMPORT_CHUNK_SIZE", 500)), 1)
+    report = _ErrorReportWriter()
+    valid_rows, failed_rows = _validate_rows(company, rows)
+    for row in failed_rows:
+        report.write(row)
+
+    if strict_mode and failed_rows:
+        return False, {
+            "error": "Validation failed",
+            "failed_count": len(failed_rows),
+            "failed_rows": _serialize_rows(failed_rows),
+            "error_report_token": report.close(),
+        }
+
+    generated = iter(nsc._reserve_customer_codes(company, sum(1 for row in valid_rows if not row.provided_code)))
+    generated_codes_count = 0
+    assigned_codes: set[str] = set()
+    pending: list[tuple[dict[str, Any], ParsedRow]] = []
+    for row in valid_rows:
+        customer_code = row.provided_code
+        if not customer_code:
+            customer_code = next(generated)
+            generated_codes_count += 1
+        if customer_code in assigned_codes:
+            row.error = "Duplicate customer_code within import batch"
+            report.write(row)
+            failed_rows.append(row)
+            continue
+        assigned_codes.add(customer_code)
+        pending.append((_dealer_values(row, customer_code, company, user_id), row))
+
+    if strict_mode and failed_rows:
+        return False, {
+            "error": "Validation failed in strict mode",
+            "failed_count": len(failed_rows),
+            "failed_rows": _serialize_rows(failed_rows),
+            "error_report_token": report.close(),
+        }
+
+    inserted_count = 0
+    total = len(pending)
+    if on_progress:
+        on_progress(0, total)
+    try:
+        for offset in range(0, total, chunk_size):
+            chunk = pending[offset : offset + chunk_size]
+            values = [row_values for row_values, _ in chunk]
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(NonSamproxCustomer), values)
+                inserted_count += len(chunk)
+                if not strict_mode:
+                    db.session.commit()
+            except IntegrityError as exc:
+                if strict_mode:
+                    raise _StrictImportError(str(exc.orig)) from exc
+                inserted_count += _insert_chunk_row_by_row(
+                    company, values, [row for _, row in chunk], report, failed_rows
+                )
+            if on_progress:
+                on_progress(min(offset + chunk_size, total), total)
+        db.session.commit()
+    except _StrictImportError as exc:
+        db.session.rollback()
+        return False, {"error": "Unable to import dealers", "details": str(exc), "error_report_token": report.close()}
+
+    return True, {
+        "inserted_count": inserted_count,
+        "failed_count": len(failed_rows),
+        "generated_codes_count": generated_codes_count,
+        "failed_rows": _serialize_rows(failed_rows),
+        "error_report_token": report.close(),
+    }
 
-    with file_path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=TEMPLATE_COLUMNS + ["error", "row_number"])
-        writer.writeheader()
-        for row in rows_list:
-            serialized = {key: row.data.get(key) for key in TEMPLATE_COLUMNS}
-            serialized["error"] = row.error
-            serialized["row_number"] = row.row_number
-            writer.writerow(serialized)
 
-    return token, str(file_path)
+def _run_bulk_import(task, company_id: int, user_id: int, rows: list[ParsedRow], strict_mode: bool) -> dict[str, Any]:
+    company = Company.query.get(company_id)
+    ok, payload = _import_dealers(company, user_id, rows, strict_mode, on_progress=task.progress)
+    failed_rows = payload.get("failed_rows") or []
+    payload["failed_rows"] = failed_rows[:_JOB_FAILED_ROWS_LIMIT]
+    payload["ok"] = ok
+    return payload
+
+
+def _import_status_payload(task) -> dict[str, Any]:
+    state = task.read()
+    payload = {
+        "token": task.token,
+        "status": state.get("status"),
+        "progress": state.get("progress"),
+        "result": state.get("result"),
+        "error": state.get("error"),
+        "created_at": state.get("created_at"),
+        "updated_at": state.get("updated_at"),
+    }
+    token = (state.get("result") or {}).get("error_report_token")
+    if token:
+        payload["error_report_url"] = f"{bp.url_prefix}/bulk-error-report/{token}"
+    return payload
 
 
 @bp.get("")
@@ -324,89 +529,47 @@ def bulk_import():
     if read_errors:
         return jsonify({"ok": False, "errors": read_errors}), 400
 
-    valid_rows, failed_rows = _validate_rows(company, rows)
-
-    if strict_mode and failed_rows:
-        token, _ = _generate_error_report(failed_rows)
-        return (
-            jsonify(
-                {
-                    "ok": False,
-                    "error": "Validation failed",
-                    "failed_count": len(failed_rows),
-                    "failed_rows": _serialize_rows(failed_rows),
-                    "error_report_token": token,
-                }
-            ),
-            400,
+    background_requested = (request.form.get("background") or request.args.get("background") or "").lower() in {
+        "1",
+        "true",
+        "yes",
+    }
+    if background_requested or len(rows) > current_app.config.get("DEALER_IMPORT_SYNC_LIMIT", 500):
+        token = start_job(
+            _IMPORT_JOB_KIND,
+            _run_bulk_import,
+            company.id,
+            current_user.id,
+            rows,
+            strict_mode,
+            base_url=request.host_url,
+            owner_id=current_user.id,
         )
-
-    inserted_count = 0
-    generated_codes_count = 0
-    assigned_codes: set[str] = set()
+        payload = _import_status_payload(get_job(token, _IMPORT_JOB_KIND))
+        payload["row_count"] = len(rows)
+        return jsonify({"ok": True, "data": payload}), 202
 
     try:
-        for row in valid_rows:
-            customer_code = row.provided_code
-            if not customer_code:
-                customer_code = nsc._generate_customer_code_for_company(company, lock=True)
-                generated_codes_count += 1
-
-            if customer_code in assigned_codes:
-                row.error = "Duplicate customer_code within import batch"
-                failed_rows.append(row)
-                if strict_mode:
-                    raise ValueError("Duplicate code in batch")
-                continue
-
-            assigned_codes.add(customer_code)
-
-            dealer = NonSamproxCustomer(
-                customer_code=customer_code,
-                customer_name=row.data.get("customer_name"),
-                area_code=row.data.get("area_code"),
-                city=row.data.get("city"),
-                district=row.data.get("district"),
-                province=row.data.get("province"),
-                managed_by_user_id=row.managed_by_user_id,
-                company_id=company.id,
-                managed_by_label=row.managed_by_name,
-                company_label=company.name,
-                created_by=current_user.id,
-                source="bulk_import",
-            )
-            db.session.add(dealer)
-            inserted_count += 1
-
-        if strict_mode and failed_rows:
-            raise ValueError("Validation failed in strict mode")
-
-        db.session.commit()
-    except IntegrityError as exc:
-        db.session.rollback()
-        return (
-            jsonify({"ok": False, "error": "Unable to import dealers", "details": str(exc.orig)}),
-            400,
-        )
+        ok, payload = _import_dealers(company, current_user.id, rows, strict_mode)
     except Exception as exc:
         db.session.rollback()
         return jsonify({"ok": False, "error": str(exc) or "Import failed"}), 400
+    if not ok:
+        return jsonify({"ok": False, **payload}), 400
+    return jsonify({"ok": True, "data": payload})
 
-    token, _ = _generate_error_report(failed_rows)
-    serialized_failed = _serialize_rows(failed_rows)
 
-    return jsonify(
-        {
-            "ok": True,
-            "data": {
-                "inserted_count": inserted_count,
-                "failed_count": len(failed_rows),
-                "generated_codes_count": generated_codes_count,
-                "failed_rows": serialized_failed,
-                "error_report_token": token,
-            },
-        }
-    )
+@bp.get("/bulk-imports/<token>")
+@jwt_required()
+def bulk_import_status(token: str):
+    guard = _guard_bulk_roles()
+    if guard:
+        return guard
+
+    task = get_job(token, _IMPORT_JOB_KIND, owner_id=get_jwt_identity())
+    if task is None:
+        return jsonify({"ok": False, "error": "Import not found"}), 404
+    return jsonify({"ok": True, "data": _import_status_payload(task)})
 
 
 @bp.get("/bulk-error-report/<token>")
@@ -10,7 +10,9 @@ from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required, verify_jwt_in_request
 from sqlalchemy import case, func, or_
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import joinedload
 
+import http_cache
 from extensions import db
 from models import (
     Company,
@@ -671,15 +673,21 @@ def list_exsol_customers():
     if not company_id:
         return _build_error("Exsol company not configured.", 500)
 
+    query = NonSamproxCustomer.query.filter(
+        NonSamproxCustomer.company_id == company_id,
+        NonSamproxCustomer.is_active.is_(True),
+    )
+    etag = http_cache.etag_for(company_id, http_cache.fingerprint(query, NonSamproxCustomer.updated_at))
+    cached = http_cache.not_modified(etag)
+    if cached is not None:
+        return cached
+
     customers = (
-        NonSamproxCustomer.query.filter(
-            NonSamproxCustomer.company_id == company_id,
-            NonSamproxCustomer.is_active.is_(True),
-        )
+        query.options(joinedload(NonSamproxCustomer.managed_by))
         .order_by(NonSamproxCustomer.customer_name.asc())
         .all()
     )
-    return jsonify([_serialize_exsol_customer(customer) for customer in customers])
+    return http_cache.tag(jsonify([_serialize_exsol_customer(customer) for customer in customers]), etag)
 
 
 @invoices_bp.get("/serials/available")
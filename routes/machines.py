@@ -7,13 +7,15 @@ from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 
+import live_updates
+import part_replacement_analytics
+import production_history
 from extensions import db
 from models import (
     MachineAsset,
     MachinePart,
     MachinePartReplacement,
     MachineIdleEvent,
-    DailyProductionEntry,
     RoleEnum,
     ServiceSupplier,
 )
@@ -368,10 +370,47 @@ def log_replacement(part_id: int):
         notes=(payload.get("notes") or None),
     )
     db.session.add(replacement)
+    part_replacement_analytics.record_part_replacement(part, replaced_on)
     db.session.commit()
     return jsonify(replacement_schema.dump(replacement)), 201
 
 
+@bp.get("/parts/replacement-analytics")
+@jwt_required()
+def part_replacement_analytics_view():
+    """Rank parts by projected next replacement from the stored interval summary."""
+
+    asset_id = None
+    raw_asset_id = request.args.get("asset_id")
+    if raw_asset_id not in (None, ""):
+        try:
+            asset_id = int(str(raw_asset_id).strip())
+        except (TypeError, ValueError):
+            return jsonify({"msg": "Invalid asset_id."}), 400
+
+    horizon_days = None
+    raw_horizon = request.args.get("horizon_days")
+    if raw_horizon not in (None, ""):
+        try:
+            horizon_days = int(str(raw_horizon).strip())
+        except (TypeError, ValueError):
+            return jsonify({"msg": "horizon_days must be a whole number."}), 400
+        if horizon_days < 0:
+            return jsonify({"msg": "horizon_days cannot be negative."}), 400
+
+    page = request.args.get("page", type=int) or 1
+    page_size = min(max(request.args.get("page_size", type=int) or 50, 1), 500)
+    return jsonify(
+        part_replacement_analytics.at_risk_parts_page(
+            date.today(),
+            asset_id=asset_id,
+            horizon_days=horizon_days,
+            page=page,
+            page_size=page_size,
+        )
+    )
+
+
 @bp.get("/parts/<int:part_id>/replacements")
 @jwt_required()
 def list_replacements(part_id: int):
@@ -570,10 +609,12 @@ def create_idle_event():
 
     conflicting_entry = None
     if comparison_date and isinstance(started_at, datetime) and idle_window_end:
-        entries = DailyProductionEntry.query.filter_by(
-            date=comparison_date,
-            asset_id=asset.id,
-        ).all()
+        # Archived days keep their hours in the archive, so read both stores.
+        entries = production_history.hourly_entries(
+            comparison_date,
+            comparison_date,
+            asset_ids=[asset.id],
+        )
 
         for candidate in entries:
             hour_start, hour_end = _production_hour_window(
@@ -629,7 +670,9 @@ def create_idle_event():
 
     db.session.add(event)
     db.session.commit()
-    return jsonify(idle_event_schema.dump(event)), 201
+    event_payload = idle_event_schema.dump(event)
+    live_updates.hub.publish(live_updates.PRODUCTION_CHANNEL, "idle", event_payload)
+    return jsonify(event_payload), 201
 
 
 @bp.get("/service-suppliers")
@@ -1,19 +1,31 @@
 from __future__ import annotations
 
-import base64
+import io
 import os
 import re
-from datetime import datetime
+import zipfile
+from datetime import date, timezone
 from decimal import Decimal, InvalidOperation
 from io import BytesIO
+from typing import Callable, Iterable, Iterator, Optional
 from zoneinfo import ZoneInfo
 
-from flask import Blueprint, current_app, jsonify, render_template, request, send_file
-from flask_jwt_extended import get_jwt, jwt_required
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    render_template,
+    request,
+    send_file,
+    stream_with_context,
+)
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
 from sqlalchemy.orm import joinedload
-from xhtml2pdf import pisa
 
+from background_jobs import get_job, start_job
 from company_profiles import resolve_company_profile, select_company_key
+from maintenance_pdf import PdfRenderCache, logo_data_uri, renderer
 from models import (
     MaintenanceInternalStaffCost,
     MaintenanceJob,
@@ -29,6 +41,7 @@ bp = Blueprint(
 _CURRENCY_QUANT = Decimal("0.01")
 _QUANTITY_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)")
 _COLOMBO_TZ = ZoneInfo("Asia/Colombo")
+_EXPORT_JOB_KIND = "maintenance_job_card_export"
 
 
 def _as_decimal(value) -> Decimal:
@@ -85,22 +98,7 @@ def _load_logo_data_uri(logo_path: str | None = None) -> str | None:
     if not candidate or not os.path.exists(candidate):
         return None
 
-    try:
-        with open(candidate, "rb") as logo_file:
-            encoded = base64.b64encode(logo_file.read()).decode("utf-8")
-        ext = os.path.splitext(candidate)[1].lstrip(".").lower() or "png"
-        mime = "image/png"
-        if ext in {"ico", "icon"}:
-            mime = "image/x-icon"
-        elif ext == "jpg":
-            mime = "image/jpeg"
-        elif ext == "svg":
-            mime = "image/svg+xml"
-        elif ext == "jpeg":
-            mime = "image/jpeg"
-        return f"data:{mime};base64,{encoded}"
-    except OSError:
-        return None
+    return logo_data_uri(candidate)
 
 
 def _materials_context(job: MaintenanceJob) -> tuple[list[dict], Decimal]:
@@ -181,51 +179,32 @@ def _internal_staff_context(job: MaintenanceJob) -> tuple[list[dict], Decimal]:
     return lines, total
 
 
-@bp.get("/<int:job_id>/download-pdf")
-@jwt_required()
-def download_job_card(job_id: int):
-    job = (
-        MaintenanceJob.query.options(
-            joinedload(MaintenanceJob.asset),
-            joinedload(MaintenanceJob.part),
-            joinedload(MaintenanceJob.assigned_to),
-            joinedload(MaintenanceJob.created_by),
-            joinedload(MaintenanceJob.materials),
-            joinedload(MaintenanceJob.outsourced_services).joinedload(
-                MaintenanceOutsourcedService.supplier
-            ),
-            joinedload(MaintenanceJob.internal_staff_costs).joinedload(
-                MaintenanceInternalStaffCost.employee
-            ),
-        )
-        .filter(MaintenanceJob.id == job_id)
-        .first()
+def _job_card_query():
+    return MaintenanceJob.query.options(
+        joinedload(MaintenanceJob.asset),
+        joinedload(MaintenanceJob.part),
+        joinedload(MaintenanceJob.assigned_to),
+        joinedload(MaintenanceJob.created_by),
+        joinedload(MaintenanceJob.materials),
+        joinedload(MaintenanceJob.outsourced_services).joinedload(
+            MaintenanceOutsourcedService.supplier
+        ),
+        joinedload(MaintenanceJob.internal_staff_costs).joinedload(
+            MaintenanceInternalStaffCost.employee
+        ),
     )
 
-    if not job:
-        return jsonify({"msg": "Maintenance job not found."}), 404
 
+def _render_job_card_html(job: MaintenanceJob, company_profile: dict) -> str:
     materials, materials_total = _materials_context(job)
     outsourced, outsourced_total = _outsourced_context(job)
     internal, internal_total = _internal_staff_context(job)
     overall_total = _quantize_currency(materials_total + outsourced_total + internal_total)
 
-    claims = get_jwt()
-    requested_company = request.args.get("company")
-    company_key = select_company_key(current_app.config, requested_company, claims)
-    company_profile = resolve_company_profile(current_app.config, company_key)
-    company_name = company_profile.get("name", "SAMPROX ERP")
-    company_address = company_profile.get("address_lines")
-    company_contact = company_profile.get("contact")
-    company_tagline = company_profile.get("tagline")
-    logo_data = _load_logo_data_uri(company_profile.get("logo_path"))
-
-    generated_at = datetime.now(_COLOMBO_TZ)
-
     status = job.status
     status_label = getattr(status, "value", status) if status else ""
 
-    html = render_template(
+    return render_template(
         "maintenance/job_card.html",
         job=job,
         materials=materials,
@@ -238,23 +217,102 @@ def download_job_card(job_id: int):
             "overall": overall_total,
         },
         company={
-            "name": company_name,
-            "address": company_address,
-            "contact": company_contact,
-            "tagline": company_tagline,
-            "logo": logo_data,
+            "name": company_profile.get("name", "SAMPROX ERP"),
+            "address": company_profile.get("address_lines"),
+            "contact": company_profile.get("contact"),
+            "tagline": company_profile.get("tagline"),
+            "logo": _load_logo_data_uri(company_profile.get("logo_path")),
         },
-        generated_at=generated_at,
+        records_as_of=(
+            job.updated_at.replace(tzinfo=timezone.utc).astimezone(_COLOMBO_TZ) if job.updated_at else None
+        ),
         format_currency=_format_currency,
         format_date=_format_date,
         format_hours=_format_hours,
         status_label=status_label,
     )
 
-    pdf_buffer = BytesIO()
-    pdf_status = pisa.CreatePDF(html, dest=pdf_buffer)
 
-    if pdf_status.err:
+def _job_card_filename(job: MaintenanceJob) -> str:
+    job_code = str(job.job_code or job.id).strip()
+    if job_code.upper().startswith("JOB-"):
+        filename = f"{job_code}.pdf"
+    else:
+        filename = f"JOB-{job_code}.pdf"
+    return re.sub(r"[^A-Za-z0-9._-]", "_", filename)
+
+
+def _job_card_cache() -> PdfRenderCache:
+    cache = current_app.extensions.get("maintenance_pdf_cache")
+    if cache is None:
+        cache = PdfRenderCache(current_app.config.get("MAINTENANCE_PDF_CACHE_SIZE", 64))
+        current_app.extensions["maintenance_pdf_cache"] = cache
+    return cache
+
+
+def _row_version(row, *fields: str) -> tuple | None:
+    if row is None:
+        return None
+    updated_at = getattr(row, "updated_at", None)
+    stamp = updated_at.isoformat() if updated_at else None
+    return (row.id, stamp, *(getattr(row, field, None) for field in fields))
+
+
+def _job_card_cache_key(job: MaintenanceJob, company_key: str | None) -> tuple:
+    # ``updated_at`` is bumped whenever the job or any of its cost lines change.
+    # Related rows are edited on their own, so their versions (or the fields
+    # shown on the card when they carry no ``updated_at``) join the key.
+    updated_at = job.updated_at.isoformat() if job.updated_at else None
+    return (
+        job.id,
+        updated_at,
+        company_key,
+        _row_version(job.asset),
+        _row_version(job.assigned_to, "name"),
+        tuple(_row_version(service.supplier, "name") for service in job.outsourced_services or []),
+        tuple(
+            _row_version(entry.employee, "reg_number", "name") for entry in job.internal_staff_costs or []
+        ),
+    )
+
+
+def _render_job_card_pdf(job: MaintenanceJob, company_key: str | None) -> bytes | None:
+    cache = _job_card_cache()
+    cache_key = _job_card_cache_key(job, company_key)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    company_profile = resolve_company_profile(current_app.config, company_key)
+    html = _render_job_card_html(job, company_profile)
+    pdf_bytes = renderer.render(
+        html,
+        max_workers=current_app.config.get("MAINTENANCE_PDF_WORKERS", 0),
+        timeout=current_app.config.get("MAINTENANCE_PDF_TIMEOUT"),
+    )
+    if pdf_bytes is not None:
+        cache.set(cache_key, pdf_bytes)
+    return pdf_bytes
+
+
+@bp.get("/<int:job_id>/download-pdf")
+@jwt_required()
+def download_job_card(job_id: int):
+    job = _job_card_query().filter(MaintenanceJob.id == job_id).first()
+
+    if not job:
+        return jsonify({"msg": "Maintenance job not found."}), 404
+
+    claims = get_jwt()
+    requested_company = request.args.get("company")
+    company_key = select_company_key(current_app.config, requested_company, claims)
+
+    try:
+        pdf_bytes = _render_job_card_pdf(job, company_key)
+    except TimeoutError:
+        pdf_bytes = None
+
+    if pdf_bytes is None:
         current_app.logger.error(
             "Failed to generate maintenance job card PDF for job %s", job_id
         )
@@ -263,16 +321,246 @@ def download_job_card(job_id: int):
             500,
         )
 
-    pdf_buffer.seek(0)
-    job_code = str(job.job_code or job.id).strip()
-    if job_code.upper().startswith("JOB-"):
-        filename = f"{job_code}.pdf"
-    else:
-        filename = f"JOB-{job_code}.pdf"
-    filename = re.sub(r"[^A-Za-z0-9._-]", "_", filename)
     return send_file(
-        pdf_buffer,
+        BytesIO(pdf_bytes),
         mimetype="application/pdf",
         as_attachment=True,
+        download_name=_job_card_filename(job),
+    )
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """Write-only sink that lets ``zipfile`` stream into a generator."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parse_export_date(value, field_name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError as exc:
+        raise ValueError(f"Invalid date for {field_name}") from exc
+
+
+def _parse_export_filters(args) -> dict:
+    start_date = _parse_export_date(args.get("start_date"), "start_date")
+    end_date = _parse_export_date(args.get("end_date"), "end_date")
+    if start_date and end_date and start_date > end_date:
+        start_date, end_date = end_date, start_date
+
+    statuses = [
+        item.strip().upper()
+        for item in str(args.get("status") or "").split(",")
+        if item.strip()
+    ]
+
+    asset_id = None
+    asset_raw = args.get("asset_id")
+    if asset_raw not in (None, ""):
+        try:
+            asset_id = int(asset_raw)
+        except (TypeError, ValueError) as exc:
+            raise ValueError("Invalid asset_id") from exc
+
+    return {
+        "start_date": start_date.isoformat() if start_date else None,
+        "end_date": end_date.isoformat() if end_date else None,
+        "statuses": statuses,
+        "asset_id": asset_id,
+    }
+
+
+def _export_criteria(filters: dict) -> list:
+    criteria = []
+    if filters.get("start_date"):
+        criteria.append(MaintenanceJob.job_date >= date.fromisoformat(filters["start_date"]))
+    if filters.get("end_date"):
+        criteria.append(MaintenanceJob.job_date <= date.fromisoformat(filters["end_date"]))
+    if filters.get("statuses"):
+        criteria.append(MaintenanceJob.status.in_(filters["statuses"]))
+    if filters.get("asset_id") is not None:
+        criteria.append(MaintenanceJob.asset_id == filters["asset_id"])
+    return criteria
+
+
+def _export_filename(filters: dict) -> str:
+    parts = ["job-cards"]
+    if filters.get("start_date"):
+        parts.append(filters["start_date"])
+    if filters.get("end_date") and filters.get("end_date") != filters.get("start_date"):
+        parts.append(filters["end_date"])
+    return "_".join(parts) + ".zip"
+
+
+def _iter_job_card_pdfs(
+    jobs: Iterable[MaintenanceJob], company_key: str | None
+) -> Iterator[tuple[MaintenanceJob, Optional[bytes]]]:
+    """Yield each job with its PDF, serving cached cards before rendering the rest."""
+
+    cache = _job_card_cache()
+    company_profile = resolve_company_profile(current_app.config, company_key)
+    uncached: list[MaintenanceJob] = []
+    for job in jobs:
+        cached = cache.get(_job_card_cache_key(job, company_key))
+        if cached is not None:
+            yield job, cached
+        else:
+            uncached.append(job)
+
+    documents = ((job, _render_job_card_html(job, company_profile)) for job in uncached)
+    for job, pdf_bytes in renderer.render_many(
+        documents,
+        max_workers=current_app.config.get("MAINTENANCE_PDF_WORKERS", 0),
+        timeout=current_app.config.get("MAINTENANCE_PDF_TIMEOUT"),
+    ):
+        if pdf_bytes is not None:
+            cache.set(_job_card_cache_key(job, company_key), pdf_bytes)
+        yield job, pdf_bytes
+
+
+def _iter_job_card_zip(
+    jobs: list[MaintenanceJob],
+    company_key: str | None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Iterator[bytes]:
+    sink = _ZipStreamBuffer()
+    failed: list[str] = []
+    total = len(jobs)
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for index, (job, pdf_bytes) in enumerate(_iter_job_card_pdfs(jobs, company_key), start=1):
+            if pdf_bytes is None:
+                failed.append(str(job.job_code or job.id))
+            else:
+                archive.writestr(_job_card_filename(job), pdf_bytes)
+            if on_progress:
+                on_progress(index, total)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        if failed:
+            archive.writestr(
+                "errors.txt",
+                "Unable to generate job cards for:\n" + "\n".join(failed) + "\n",
+            )
+    yield sink.drain()
+
+
+def _run_job_card_export(task, filters: dict, company_key: str | None) -> dict:
+    jobs = (
+        _job_card_query()
+        .filter(*_export_criteria(filters))
+        .order_by(MaintenanceJob.job_date.asc(), MaintenanceJob.id.asc())
+        .all()
+    )
+    task.progress(0, len(jobs))
+    target = task.artifact_path(".zip")
+    tmp_target = target.with_suffix(".part")
+    with tmp_target.open("wb") as handle:
+        for chunk in _iter_job_card_zip(jobs, company_key, on_progress=task.progress):
+            handle.write(chunk)
+    os.replace(tmp_target, target)
+    return {"job_count": len(jobs), "filename": _export_filename(filters)}
+
+
+def _export_status_payload(task) -> dict:
+    state = task.read()
+    payload = {
+        "token": task.token,
+        "status": state.get("status"),
+        "progress": state.get("progress"),
+        "result": state.get("result"),
+        "error": state.get("error"),
+        "created_at": state.get("created_at"),
+        "updated_at": state.get("updated_at"),
+    }
+    if state.get("status") == "completed":
+        payload["download_url"] = f"{bp.url_prefix}/exports/{task.token}/download"
+    return payload
+
+
+@bp.get("/export")
+@jwt_required()
+def export_job_cards():
+    try:
+        filters = _parse_export_filters(request.args)
+    except ValueError as exc:
+        return jsonify({"msg": str(exc)}), 400
+
+    claims = get_jwt()
+    company_key = select_company_key(current_app.config, request.args.get("company"), claims)
+    criteria = _export_criteria(filters)
+
+    job_count = MaintenanceJob.query.filter(*criteria).count()
+    background_requested = (request.args.get("background") or "").lower() in {"1", "true", "yes"}
+    sync_limit = current_app.config.get("MAINTENANCE_EXPORT_SYNC_LIMIT", 100)
+    if background_requested or job_count > sync_limit:
+        token = start_job(
+            _EXPORT_JOB_KIND,
+            _run_job_card_export,
+            filters,
+            company_key,
+            base_url=request.host_url,
+            owner_id=get_jwt_identity(),
+        )
+        payload = _export_status_payload(get_job(token, _EXPORT_JOB_KIND))
+        payload["job_count"] = job_count
+        return jsonify(payload), 202
+
+    jobs = (
+        _job_card_query()
+        .filter(*criteria)
+        .order_by(MaintenanceJob.job_date.asc(), MaintenanceJob.id.asc())
+        .all()
+    )
+    return Response(
+        stream_with_context(_iter_job_card_zip(jobs, company_key)),
+        mimetype="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename={_export_filename(filters)}",
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+@bp.get("/exports/<token>")
+@jwt_required()
+def export_job_cards_status(token: str):
+    task = get_job(token, _EXPORT_JOB_KIND, owner_id=get_jwt_identity())
+    if task is None:
+        return jsonify({"msg": "Export not found."}), 404
+    return jsonify(_export_status_payload(task))
+
+
+@bp.get("/exports/<token>/download")
+@jwt_required()
+def download_job_card_export(token: str):
+    task = get_job(token, _EXPORT_JOB_KIND, owner_id=get_jwt_identity())
+    if task is None:
+        return jsonify({"msg": "Export not found."}), 404
+    state = task.read()
+    archive_path = task.artifact_path(".zip")
+    if state.get("status") != "completed" or not archive_path.exists():
+        return jsonify({"msg": "Export is not ready yet."}), 409
+    filename = (state.get("result") or {}).get("filename") or "job-cards.zip"
+    return send_file(
+        archive_path,
+        mimetype="application/zip",
+        as_attachment=True,
         download_name=filename,
     )
@@ -12,9 +12,10 @@ import requests
 from requests import exceptions as requests_exceptions
 from flask import Blueprint, jsonify, request, url_for, current_app
 from flask_jwt_extended import get_jwt, jwt_required
-from sqlalchemy import and_, asc, desc, func, or_, select
-from sqlalchemy.orm import aliased, joinedload
+from sqlalchemy import asc, desc, func, or_, select
+from sqlalchemy.orm import aliased, contains_eager, joinedload, selectinload
 
+import maintenance_summary
 from extensions import db
 from maintenance_status import (
     get_status_badge_class,
@@ -35,11 +36,11 @@ from models import (
     TeamMember,
     User,
 )
-from schemas import MaintenanceJobSchema
+from schemas import MaintenanceJobListSchema, MaintenanceJobSchema
 
 bp = Blueprint("maintenance_jobs", __name__, url_prefix="/api/maintenance-jobs")
 job_schema = MaintenanceJobSchema()
-jobs_schema = MaintenanceJobSchema(many=True)
+job_rows_schema = MaintenanceJobListSchema(many=True)
 
 RESEND_ENDPOINT = "https://api.resend.com/emails"
 RESEND_DEFAULT_SENDER = "Samprox ERP <no-reply@samprox.lk>"
@@ -47,19 +48,6 @@ RESEND_DEFAULT_SENDER = "Samprox ERP <no-reply@samprox.lk>"
 _CODE_PATTERN = re.compile(r"(\d+)$")
 _ALLOWED_PRIORITIES = {"Normal", "Urgent", "Critical"}
 _COLOMBO_TZ = ZoneInfo("Asia/Colombo")
-_PENDING_STATUS_VALUES = {
-    MaintenanceJobStatus.SUBMITTED.value,
-    MaintenanceJobStatus.FORWARDED_TO_MAINTENANCE.value,
-    MaintenanceJobStatus.NOT_YET_STARTED.value,
-    MaintenanceJobStatus.IN_PROGRESS.value,
-    MaintenanceJobStatus.AWAITING_PARTS.value,
-    MaintenanceJobStatus.ON_HOLD.value,
-    MaintenanceJobStatus.TESTING.value,
-    MaintenanceJobStatus.COMPLETED_MAINTENANCE.value,
-    MaintenanceJobStatus.RETURNED_TO_PRODUCTION.value,
-    MaintenanceJobStatus.REOPENED.value,
-}
-_COMPLETED_STATUS_VALUES = {MaintenanceJobStatus.COMPLETED_VERIFIED.value}
 _MAINTENANCE_EDITABLE_STATUSES = {
     MaintenanceJobStatus.NOT_YET_STARTED,
     MaintenanceJobStatus.IN_PROGRESS,
@@ -420,25 +408,6 @@ def get_next_code():
 @bp.get("")
 @jwt_required()
 def list_jobs():
-    materials_cost = (
-        select(func.coalesce(func.sum(MaintenanceMaterial.cost), 0))
-        .where(MaintenanceMaterial.maintenance_job_id == MaintenanceJob.id)
-        .correlate(MaintenanceJob)
-        .scalar_subquery()
-    )
-    outsourced_cost = (
-        select(func.coalesce(func.sum(MaintenanceOutsourcedService.cost), 0))
-        .where(MaintenanceOutsourcedService.maintenance_job_id == MaintenanceJob.id)
-        .correlate(MaintenanceJob)
-        .scalar_subquery()
-    )
-    internal_cost = (
-        select(func.coalesce(func.sum(MaintenanceInternalStaffCost.cost), 0))
-        .where(MaintenanceInternalStaffCost.maintenance_job_id == MaintenanceJob.id)
-        .correlate(MaintenanceJob)
-        .scalar_subquery()
-    )
-
     assigned_alias = aliased(User)
     asset_alias = aliased(MachineAsset)
     part_alias = aliased(MachinePart)
@@ -447,22 +416,6 @@ def list_jobs():
         MaintenanceJob.query.outerjoin(assigned_alias, MaintenanceJob.assigned_to)
         .outerjoin(asset_alias, MaintenanceJob.asset)
         .outerjoin(part_alias, MaintenanceJob.part)
-        .options(joinedload(MaintenanceJob.created_by))
-        .options(joinedload(MaintenanceJob.assigned_to))
-        .options(joinedload(MaintenanceJob.asset))
-        .options(joinedload(MaintenanceJob.part))
-        .options(joinedload(MaintenanceJob.parts))
-        .options(joinedload(MaintenanceJob.materials))
-        .options(
-            joinedload(MaintenanceJob.outsourced_services).joinedload(
-                MaintenanceOutsourcedService.supplier
-            )
-        )
-        .options(
-            joinedload(MaintenanceJob.internal_staff_costs).joinedload(
-                MaintenanceInternalStaffCost.employee
-            )
-        )
     )
 
     try:
@@ -540,53 +493,83 @@ def list_jobs():
         "expected_completion": MaintenanceJob.expected_completion,
         "job_started_date": MaintenanceJob.job_started_date,
         "job_finished_date": MaintenanceJob.job_finished_date,
-        "materials_cost": materials_cost,
-        "outsourced_cost": outsourced_cost,
-        "internal_cost": internal_cost,
+        "materials_cost": MaintenanceJob.materials_cost,
+        "outsourced_cost": MaintenanceJob.outsourced_cost,
+        "internal_cost": MaintenanceJob.internal_cost,
         "total_cost": MaintenanceJob.total_cost,
         "created_at": MaintenanceJob.created_at,
     }
     sort_column = sort_fields.get(sort_by, MaintenanceJob.created_at)
     sorter = asc if sort_dir == "asc" else desc
-    query = query.order_by(sorter(sort_column), MaintenanceJob.id.desc())
 
-    limit = request.args.get("limit", type=int)
-    offset = request.args.get("offset", type=int)
+    paginated = "page" in request.args
+    total_rows = 0
+    if paginated:
+        total_rows = query.with_entities(func.count(MaintenanceJob.id)).scalar() or 0
+
+    query = query.options(
+        contains_eager(MaintenanceJob.assigned_to.of_type(assigned_alias)),
+        contains_eager(MaintenanceJob.asset.of_type(asset_alias)),
+        contains_eager(MaintenanceJob.part.of_type(part_alias)),
+        joinedload(MaintenanceJob.created_by),
+        selectinload(MaintenanceJob.parts),
+    ).order_by(sorter(sort_column), MaintenanceJob.id.desc())
+
+    if paginated:
+        page = max(request.args.get("page", type=int) or 1, 1)
+        page_size = min(max(request.args.get("page_size", type=int) or 25, 1), 200)
+        total_pages = max((total_rows + page_size - 1) // page_size, 1)
+        page = min(page, total_pages)
+        query = query.limit(page_size).offset((page - 1) * page_size)
+    else:
+        limit = request.args.get("limit", type=int)
+        offset = request.args.get("offset", type=int)
 
-    if offset is not None and offset > 0:
-        query = query.offset(offset)
-    if limit is not None and limit > 0:
-        query = query.limit(limit)
+        if offset is not None and offset > 0:
+            query = query.offset(offset)
+        if limit is not None and limit > 0:
+            query = query.limit(limit)
 
     jobs = query.all()
     role = _current_role()
     for job in jobs:
         _maybe_forward_to_maintenance(job, role=role)
-    return jsonify(jobs_schema.dump(jobs))
+    rows = job_rows_schema.dump(jobs)
+
+    if not paginated:
+        return jsonify(rows)
+
+    return jsonify(
+        {
+            "rows": rows,
+            "pagination": {
+                "page": page,
+                "page_size": page_size,
+                "total_rows": total_rows,
+                "total_pages": total_pages,
+            },
+        }
+    )
 
 
-@bp.get("/summary")
-@jwt_required()
-def jobs_summary():
+def _truthy(value) -> bool:
+    return str(value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _resolve_summary_period():
+    """Return ``((start, end, min_job_date, max_job_date), None)`` or ``(None, error_response)``."""
+
     try:
         requested_start = _parse_date(request.args.get("start_date"), "start_date")
     except ValueError as exc:
-        return jsonify({"msg": str(exc)}), 400
+        return None, (jsonify({"msg": str(exc)}), 400)
 
     try:
         requested_end = _parse_date(request.args.get("end_date"), "end_date")
     except ValueError as exc:
-        return jsonify({"msg": str(exc)}), 400
-
-    min_max_row = db.session.execute(
-        select(
-            func.min(MaintenanceJob.job_date),
-            func.max(MaintenanceJob.job_date),
-        )
-    ).first()
-
-    min_job_date, max_job_date = min_max_row if min_max_row else (None, None)
+        return None, (jsonify({"msg": str(exc)}), 400)
 
+    min_job_date, max_job_date = maintenance_summary.job_date_bounds()
     today_local = datetime.now(_COLOMBO_TZ).date()
 
     start_date = requested_start or min_job_date or max_job_date or today_local
@@ -595,208 +578,23 @@ def jobs_summary():
     if start_date > end_date:
         start_date, end_date = end_date, start_date
 
-    jobs_query = select(
-        MaintenanceJob.id.label("id"),
-        MaintenanceJob.status.label("status"),
-        MaintenanceJob.expected_completion.label("expected_completion"),
-    ).where(
-        MaintenanceJob.job_date >= start_date,
-        MaintenanceJob.job_date <= end_date,
-    )
+    return (start_date, end_date, min_job_date, max_job_date), None
 
-    jobs_rows = db.session.execute(jobs_query).all()
-    jobs_initiated = len(jobs_rows)
-    pending_count = 0
-    completed_count = 0
-    overdue_count = 0
-
-    for row in jobs_rows:
-        status_label = _status_value(row.status).upper()
-        if status_label in _COMPLETED_STATUS_VALUES:
-            completed_count += 1
-        if status_label in _PENDING_STATUS_VALUES:
-            pending_count += 1
-        expected_completion = row.expected_completion
-        if (
-            expected_completion
-            and expected_completion < today_local
-            and status_label not in _COMPLETED_STATUS_VALUES
-        ):
-            overdue_count += 1
-
-    materials_rows = db.session.execute(
-        select(
-            MaintenanceMaterial.id.label("id"),
-            MaintenanceMaterial.material_name.label("material_name"),
-            MaintenanceMaterial.units.label("units"),
-            MaintenanceMaterial.cost.label("cost"),
-            MaintenanceJob.job_code.label("job_code"),
-            MaintenanceJob.job_date.label("job_date"),
-        )
-        .join(
-            MaintenanceJob,
-            MaintenanceMaterial.maintenance_job_id == MaintenanceJob.id,
-        )
-        .where(MaintenanceJob.job_date >= start_date)
-        .where(MaintenanceJob.job_date <= end_date)
-    ).all()
-
-    materials_total = Decimal("0")
-    material_details: list[dict] = []
-
-    for row in materials_rows:
-        cost = _as_decimal(row.cost)
-        materials_total += cost
-        material_details.append(
-            {
-                "id": row.id,
-                "job_code": row.job_code,
-                "job_date": row.job_date.isoformat() if row.job_date else None,
-                "item": row.material_name,
-                "units": row.units,
-                "cost": _currency_number(cost),
-            }
-        )
-
-    outsourced_rows = db.session.execute(
-        select(
-            MaintenanceOutsourcedService.id.label("id"),
-            MaintenanceOutsourcedService.cost.label("cost"),
-            MaintenanceOutsourcedService.service_date.label("service_date"),
-            MaintenanceJob.job_date.label("job_date"),
-            MaintenanceJob.job_code.label("job_code"),
-            MaintenanceOutsourcedService.service_description.label("service_description"),
-            MaintenanceOutsourcedService.engaged_hours.label("engaged_hours"),
-            ServiceSupplier.name.label("supplier_name"),
-        )
-        .join(
-            MaintenanceJob,
-            MaintenanceOutsourcedService.maintenance_job_id == MaintenanceJob.id,
-        )
-        .join(
-            ServiceSupplier,
-            MaintenanceOutsourcedService.supplier_id == ServiceSupplier.id,
-            isouter=True,
-        )
-        .where(
-            or_(
-                and_(
-                    MaintenanceOutsourcedService.service_date.isnot(None),
-                    MaintenanceOutsourcedService.service_date >= start_date,
-                    MaintenanceOutsourcedService.service_date <= end_date,
-                ),
-                and_(
-                    MaintenanceOutsourcedService.service_date.is_(None),
-                    MaintenanceJob.job_date >= start_date,
-                    MaintenanceJob.job_date <= end_date,
-                ),
-            )
-        )
-    ).all()
-
-    outsourced_total = Decimal("0")
-    outsourced_details: list[dict] = []
-    for row in outsourced_rows:
-        service_date = row.service_date or row.job_date
-        if not service_date:
-            continue
-        if service_date < start_date or service_date > end_date:
-            continue
-        outsourced_total += _as_decimal(row.cost)
-
-        outsourced_details.append(
-            {
-                "id": row.id,
-                "job_code": row.job_code,
-                "job_date": row.job_date.isoformat() if row.job_date else None,
-                "service_date": service_date.isoformat() if service_date else None,
-                "supplier": row.supplier_name,
-                "description": row.service_description,
-                "engaged_hours": _hours_number(_as_decimal(row.engaged_hours))
-                if row.engaged_hours is not None
-                else None,
-                "cost": _currency_number(_as_decimal(row.cost)),
-            }
-        )
-
-    internal_rows = db.session.execute(
-        select(
-            MaintenanceInternalStaffCost.id.label("id"),
-            MaintenanceInternalStaffCost.cost.label("cost"),
-            MaintenanceInternalStaffCost.hourly_rate.label("hourly_rate"),
-            MaintenanceInternalStaffCost.engaged_hours.label("engaged_hours"),
-            MaintenanceInternalStaffCost.service_date.label("service_date"),
-            MaintenanceJob.job_date.label("job_date"),
-            MaintenanceJob.job_code.label("job_code"),
-            TeamMember.reg_number.label("employee_code"),
-            TeamMember.name.label("employee_name"),
-            TeamMember.position.label("employee_role"),
-        )
-        .join(
-            MaintenanceJob,
-            MaintenanceInternalStaffCost.maintenance_job_id == MaintenanceJob.id,
-        )
-        .join(
-            TeamMember,
-            MaintenanceInternalStaffCost.employee_id == TeamMember.id,
-            isouter=True,
-        )
-        .where(
-            or_(
-                and_(
-                    MaintenanceInternalStaffCost.service_date.isnot(None),
-                    MaintenanceInternalStaffCost.service_date >= start_date,
-                    MaintenanceInternalStaffCost.service_date <= end_date,
-                ),
-                and_(
-                    MaintenanceInternalStaffCost.service_date.is_(None),
-                    MaintenanceJob.job_date >= start_date,
-                    MaintenanceJob.job_date <= end_date,
-                ),
-            )
-        )
-    ).all()
 
-    internal_total = Decimal("0")
-    internal_hours_total = Decimal("0")
-    internal_hours_e023 = Decimal("0")
-    internal_hours_other = Decimal("0")
-    internal_details: list[dict] = []
-
-    for row in internal_rows:
-        service_date = row.service_date or row.job_date
-        if not service_date:
-            continue
-        if service_date < start_date or service_date > end_date:
-            continue
-        hours = _as_decimal(row.engaged_hours)
-        internal_hours_total += hours
-        employee_code = (row.employee_code or "").strip().upper()
-        if employee_code == "E023":
-            internal_hours_e023 += hours
-        else:
-            internal_hours_other += hours
-        raw_cost = row.cost
-        cost = _as_decimal(raw_cost)
-        if raw_cost is None:
-            cost = _as_decimal(row.hourly_rate) * hours
-        internal_total += cost
-
-        internal_details.append(
-            {
-                "id": row.id,
-                "job_code": row.job_code,
-                "job_date": row.job_date.isoformat() if row.job_date else None,
-                "service_date": service_date.isoformat() if service_date else None,
-                "employee": row.employee_name,
-                "employee_code": row.employee_code,
-                "role": row.employee_role,
-                "engaged_hours": _hours_number(hours),
-                "hourly_rate": _currency_number(row.hourly_rate) if row.hourly_rate is not None else None,
-                "cost": _currency_number(cost),
-            }
-        )
+@bp.get("/summary")
+@jwt_required()
+def jobs_summary():
+    period, error = _resolve_summary_period()
+    if error:
+        return error
+    start_date, end_date, min_job_date, max_job_date = period
+    today_local = datetime.now(_COLOMBO_TZ).date()
 
+    job_counts = maintenance_summary.job_status_counts(start_date, end_date, today_local)
+    totals = maintenance_summary.cost_totals(start_date, end_date)
+    materials_total = totals["material"]
+    outsourced_total = totals["outsourced"]
+    internal_total = totals["internal"]
     grand_total = materials_total + outsourced_total + internal_total
 
     available_start = min_job_date or start_date
@@ -817,24 +615,48 @@ def jobs_summary():
             "internal": _currency_number(internal_total),
             "grand": _currency_number(grand_total),
         },
-        "details": {
-            "material": material_details,
-            "outsourced": outsourced_details,
-            "internal": internal_details,
-        },
-        "jobs": {
-            "initiated": jobs_initiated,
-            "pending": pending_count,
-            "completed": completed_count,
-            "overdue": overdue_count,
-        },
+        "jobs": job_counts,
         "hours": {
-            "total": _hours_number(internal_hours_total),
-            "e023": _hours_number(internal_hours_e023),
-            "other": _hours_number(internal_hours_other),
+            "total": _hours_number(totals["hours_total"]),
+            "e023": _hours_number(totals["hours_e023"]),
+            "other": _hours_number(totals["hours_other"]),
         },
     }
 
+    if _truthy(request.args.get("include_details")):
+        payload["details"] = {
+            kind: [
+                maintenance_summary.serialize_cost_detail(kind, row)
+                for row in db.session.execute(
+                    maintenance_summary.cost_detail_query(kind, start_date, end_date)
+                ).all()
+            ]
+            for kind in maintenance_summary.COST_DETAIL_KINDS
+        }
+
+    return jsonify(payload)
+
+
+@bp.get("/summary/details/<kind>")
+@jwt_required()
+def jobs_summary_details(kind: str):
+    if kind not in maintenance_summary.COST_DETAIL_KINDS:
+        return jsonify({"msg": "Unknown cost breakdown."}), 404
+
+    period, error = _resolve_summary_period()
+    if error:
+        return error
+    start_date, end_date, _min_job_date, _max_job_date = period
+
+    page = request.args.get("page", type=int) or 1
+    page_size = min(max(request.args.get("page_size", type=int) or 50, 1), 500)
+    payload = maintenance_summary.cost_detail_page(
+        kind, start_date, end_date, page=page, page_size=page_size
+    )
+    payload["period"] = {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+    }
     return jsonify(payload)
 
 
@@ -1,8 +1,11 @@
-from datetime import datetime
+import base64
+import json
+from datetime import date, datetime
 
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import get_jwt, jwt_required
-from sqlalchemy import func, or_
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import contains_eager
 
 from extensions import db
 from models import (
@@ -19,6 +22,8 @@ from models import (
 
 
 INTERNAL_VEHICLE_NUMBERS = {"LI-1795", "LB-3237"}
+TRANSPORT_WORKLIST_PAGE_SIZE = 50
+TRANSPORT_WORKLIST_MAX_PAGE_SIZE = 200
 
 bp = Blueprint("market", __name__, url_prefix="/api/market")
 
@@ -663,6 +668,40 @@ def update_sale_entry(entry_id: int):
     return jsonify({"entry": _serialize_sale_entry(entry, sale_type)})
 
 
+def _pending_transport_query():
+    """Lorry deliveries still missing transport details, served by the partial index."""
+
+    return SalesActualEntry.query.join(Customer).filter(
+        SalesActualEntry.transport_complete.is_(False)
+    )
+
+
+def _serialize_pending_transport(entry: SalesActualEntry) -> dict:
+    customer = entry.customer
+    return {
+        "id": entry.id,
+        "date": entry.date.isoformat() if entry.date else None,
+        "customer_id": entry.customer_id,
+        "customer_name": customer.name if customer else None,
+        "transport_mode": customer.transport_mode.value if customer else None,
+        "missing_fields": entry.missing_transport_fields(),
+    }
+
+
+def _encode_worklist_cursor(entry: SalesActualEntry) -> str:
+    raw = json.dumps([entry.date.isoformat(), entry.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_worklist_cursor(value: str) -> tuple[date, int] | None:
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        entry_date, entry_id = json.loads(raw)
+        return date.fromisoformat(entry_date), int(entry_id)
+    except (ValueError, TypeError):
+        return None
+
+
 @bp.get("/sales/incomplete-transport")
 @jwt_required()
 def list_incomplete_transport_entries():
@@ -670,45 +709,92 @@ def list_incomplete_transport_entries():
         return jsonify({"msg": "You do not have permission to view this report."}), 403
 
     entries = (
-        SalesActualEntry.query.join(Customer)
-        .filter(Customer.transport_mode == CustomerTransportMode.samprox_lorry)
-        .filter(
-            or_(
-                SalesActualEntry.vehicle_number.is_(None),
-                func.trim(func.coalesce(SalesActualEntry.vehicle_number, "")) == "",
-                SalesActualEntry.driver_id.is_(None),
-                SalesActualEntry.helper1_id.is_(None),
-                SalesActualEntry.mileage_km.is_(None),
-            )
-        )
+        _pending_transport_query()
+        .options(contains_eager(SalesActualEntry.customer))
         .order_by(SalesActualEntry.date.asc(), SalesActualEntry.id.asc())
         .all()
     )
 
-    def _missing_fields(entry: SalesActualEntry) -> list[str]:
-        missing: list[str] = []
-        if not _has_transport_value(entry.vehicle_number):
-            missing.append("vehicle_number")
-        if entry.driver_id is None:
-            missing.append("driver_id")
-        if entry.helper1_id is None:
-            missing.append("helper1_id")
-        if entry.mileage_km is None:
-            missing.append("mileage_km")
-        return missing
-
-    rows = []
-    for entry in entries:
-        customer = entry.customer
-        rows.append(
-            {
-                "id": entry.id,
-                "date": entry.date.isoformat() if entry.date else None,
-                "customer_id": entry.customer_id,
-                "customer_name": customer.name if customer else None,
-                "transport_mode": customer.transport_mode.value if customer else None,
-                "missing_fields": _missing_fields(entry),
-            }
+    return jsonify({"entries": [_serialize_pending_transport(entry) for entry in entries]})
+
+
+@bp.get("/sales/transport-worklist")
+@jwt_required()
+def transport_worklist():
+    """Page through pending lorry deliveries with counts per customer and date.
+
+    ``customer_id`` and ``date`` narrow the page; the counts always cover the
+    whole worklist so the clerk can see where the backlog sits.
+    """
+
+    if not _require_role(RoleEnum.admin):
+        return jsonify({"msg": "You do not have permission to view this report."}), 403
+
+    base_query = _pending_transport_query()
+
+    customer_counts = (
+        base_query.with_entities(
+            SalesActualEntry.customer_id, Customer.name, func.count(SalesActualEntry.id)
         )
+        .group_by(SalesActualEntry.customer_id, Customer.name)
+        .order_by(func.count(SalesActualEntry.id).desc(), Customer.name.asc())
+        .all()
+    )
+    date_counts = (
+        base_query.with_entities(SalesActualEntry.date, func.count(SalesActualEntry.id))
+        .group_by(SalesActualEntry.date)
+        .order_by(SalesActualEntry.date.asc())
+        .all()
+    )
+
+    query = base_query.options(contains_eager(SalesActualEntry.customer))
 
-    return jsonify({"entries": rows})
+    customer_id = request.args.get("customer_id", type=int)
+    if customer_id:
+        query = query.filter(SalesActualEntry.customer_id == customer_id)
+
+    date_param = request.args.get("date")
+    if date_param:
+        try:
+            query = query.filter(SalesActualEntry.date == date.fromisoformat(date_param))
+        except ValueError:
+            return jsonify({"msg": "date must be in YYYY-MM-DD format."}), 400
+
+    cursor_param = request.args.get("cursor")
+    if cursor_param:
+        position = _decode_worklist_cursor(cursor_param)
+        if position is None:
+            return jsonify({"msg": "Invalid cursor."}), 400
+        cursor_date, cursor_id = position
+        query = query.filter(
+            or_(
+                SalesActualEntry.date > cursor_date,
+                and_(SalesActualEntry.date == cursor_date, SalesActualEntry.id > cursor_id),
+            )
+        )
+
+    limit = request.args.get("limit", type=int) or TRANSPORT_WORKLIST_PAGE_SIZE
+    limit = min(max(limit, 1), TRANSPORT_WORKLIST_MAX_PAGE_SIZE)
+    entries = (
+        query.order_by(SalesActualEntry.date.asc(), SalesActualEntry.id.asc())
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = _encode_worklist_cursor(entries[limit - 1]) if len(entries) > limit else None
+
+    return jsonify(
+        {
+            "entries": [_serialize_pending_transport(entry) for entry in entries[:limit]],
+            "next_cursor": next_cursor,
+            "total": sum(count for _, _, count in customer_counts),
+            "counts": {
+                "customers": [
+                    {"customer_id": cid, "customer_name": name, "count": count}
+                    for cid, name, count in customer_counts
+                ],
+                "dates": [
+                    {"date": day.isoformat(), "count": count} for day, count in date_counts
+                ],
+            },
+        }
+    )
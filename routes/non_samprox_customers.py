@@ -1,21 +1,31 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Any, Optional
+import base64
+from collections import deque
+from datetime import datetime, timezone
+import json
+import threading
+from typing import Any, Iterable, Optional
 from zoneinfo import ZoneInfo
 import uuid
 import re
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
-from sqlalchemy import or_
+from sqlalchemy import and_, or_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 
+import http_cache
 from extensions import db
 from models import Company, CustomerCodeSequence, NonSamproxCustomer, RoleEnum, SalesTeamMember, User
 
 bp = Blueprint("non_samprox_customers", __name__, url_prefix="/api/non-samprox-customers")
 COLOMBO_TZ = ZoneInfo("Asia/Colombo")
+CHANGES_PAGE_SIZE = 200
+CHANGES_MAX_PAGE_SIZE = 1000
 
 
 def _now_colombo() -> datetime:
@@ -67,54 +77,148 @@ def _current_year_suffix() -> str:
     return f"{_now_colombo().year % 100:02d}"
 
 
-def _get_or_create_sequence(company_id: int, year_yy: str, lock: bool = True) -> CustomerCodeSequence:
-    query = CustomerCodeSequence.query.filter_by(company_id=company_id, year_yy=year_yy)
-    try:
-        seq = query.with_for_update().first() if lock and hasattr(query, "with_for_update") else query.first()
-    except Exception:
-        seq = query.first()
+def _format_prefixed_code(prefix: str, year_suffix: str, number: int) -> str:
+    return f"{prefix}{year_suffix}{number:04d}"
 
-    if not seq:
-        seq = CustomerCodeSequence(company_id=company_id, year_yy=year_yy, last_number=0)
-        db.session.add(seq)
-        db.session.flush()
-    return seq
 
+class CustomerCodeBlocks:
+    """Sequence numbers reserved ahead of use, keyed by ``(company_id, year_yy)``.
+
+    Numbers still pooled when the process exits are never issued, which
+    leaves gaps in the codes but no duplicates.
+    """
+
+    def __init__(self, block_size: int):
+        self.block_size = max(int(block_size), 1)
+        self._pools: dict[tuple[int, str], deque[int]] = {}
+        self._lock = threading.Lock()
+
+    def peek(self, key: tuple[int, str]) -> Optional[int]:
+        with self._lock:
+            pool = self._pools.get(key)
+            return pool[0] if pool else None
+
+    def take(self, key: tuple[int, str]) -> Optional[int]:
+        with self._lock:
+            pool = self._pools.get(key)
+            return pool.popleft() if pool else None
+
+    def add(self, key: tuple[int, str], numbers: Iterable[int]) -> None:
+        with self._lock:
+            self._pools.setdefault(key, deque()).extend(numbers)
+
+
+def _code_blocks() -> CustomerCodeBlocks:
+    blocks = current_app.extensions.get("customer_code_blocks")
+    if blocks is None:
+        blocks = CustomerCodeBlocks(current_app.config.get("CUSTOMER_CODE_BLOCK_SIZE", 20))
+        current_app.extensions["customer_code_blocks"] = blocks
+    return blocks
+
+
+def _reserve_sequence_numbers(company: Company, year_suffix: str, count: int) -> range:
+    """Reserve ``count`` numbers in a transaction of their own.
+
+    The sequence row is bumped (or created) by one upsert on a separate
+    connection that commits straight away: the row lock is released, the
+    reservation survives a rollback of the caller's insert, and nothing
+    staged on the request session is committed with it.
+    """
+
+    table = CustomerCodeSequence.__table__
+    with db.engine.begin() as connection:
+        dialect_name = connection.dialect.name
+        if dialect_name == "postgresql":
+            statement = postgresql_insert(table)
+        elif dialect_name == "sqlite":
+            statement = sqlite_insert(table)
+        else:  # pragma: no cover - other backends bump the row, creating it on first use
+            return _reserve_sequence_numbers_fallback(connection, company.id, year_suffix, count)
+        statement = statement.values(company_id=company.id, year_yy=year_suffix, last_number=count)
+        last_number = connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=["company_id", "year_yy"],
+                set_={"last_number": table.c.last_number + statement.excluded.last_number},
+            ).returning(table.c.last_number)
+        ).scalar_one()
+    return range(last_number - count + 1, last_number + 1)
+
+
+def _reserve_sequence_numbers_fallback(connection, company_id: int, year_suffix: str, count: int) -> range:
+    table = CustomerCodeSequence.__table__
+    bump = (
+        update(table)
+        .where(table.c.company_id == company_id, table.c.year_yy == year_suffix)
+        .values(last_number=table.c.last_number + count)
+        .returning(table.c.last_number)
+    )
+    last_number = connection.execute(bump).scalar()
+    if last_number is None:
+        try:
+            with connection.begin_nested():
+                connection.execute(
+                    table.insert().values(company_id=company_id, year_yy=year_suffix, last_number=0)
+                )
+        except IntegrityError:
+            pass  # another first-of-year caller created the row
+        last_number = connection.execute(bump).scalar_one()
+    return range(last_number - count + 1, last_number + 1)
 
-def _format_prefixed_code(prefix: str, year_suffix: str, number: int) -> str:
-    return f"{prefix}{year_suffix}{number:04d}"
 
+def _reserve_customer_codes(company: Company, count: int) -> list[str]:
+    """Return ``count`` new codes for a batch insert.
 
-def _allocate_prefixed_code(company: Company, provided_code: object | None = None, *, lock: bool = True) -> str:
+    Prefixed companies reserve them from the sequence in one update.
+    Unprefixed codes have no sequence row, so they continue after the
+    latest existing code and rely on the unique constraint.
+    """
+
+    if count <= 0:
+        return []
     prefix = _company_prefix(company)
+    if not prefix:
+        first = generate_non_samprox_customer_code(lock=True)
+        start = int(first[2:])
+        return [f"{first[:2]}{number:04d}" for number in range(start, start + count)]
     year_suffix = _current_year_suffix()
-    seq = _get_or_create_sequence(company.id, year_suffix, lock=lock)
-    current = seq.last_number or 0
-    next_number = current + 1
-
-    expected_prefix = f"{prefix}{year_suffix}"
-    if provided_code:
-        code = str(provided_code).strip()
-        if code.startswith(expected_prefix) and len(code) == len(expected_prefix) + 4:
-            try:
-                parsed_number = int(code[-4:])
-            except ValueError:
-                parsed_number = None
-            else:
-                if parsed_number >= current:
-                    # Accept the provided number if it is current or the immediate next expected slot.
-                    if parsed_number in {current, current + 1}:
-                        next_number = parsed_number
+    return [
+        _format_prefixed_code(prefix, year_suffix, number)
+        for number in _reserve_sequence_numbers(company, year_suffix, count)
+    ]
 
-    seq.last_number = next_number
-    return _format_prefixed_code(prefix, year_suffix, next_number)
 
+def _allocate_prefixed_code(company: Company) -> str:
+    prefix = _company_prefix(company)
+    year_suffix = _current_year_suffix()
+    key = (company.id, year_suffix)
+    blocks = _code_blocks()
+    number = blocks.take(key)
+    if number is None:
+        reserved = _reserve_sequence_numbers(company, year_suffix, blocks.block_size)
+        number = reserved[0]
+        blocks.add(key, reserved[1:])
+    return _format_prefixed_code(prefix, year_suffix, number)
 
-def _generate_customer_code_for_company(company: Company, *, provided_code: object | None = None, lock: bool = True) -> str:
+
+def _generate_customer_code_for_company(company: Company, *, lock: bool = True) -> str:
     prefix = _company_prefix(company)
     if not prefix:
         return generate_non_samprox_customer_code(lock=lock)
-    return _allocate_prefixed_code(company, provided_code, lock=lock)
+    return _allocate_prefixed_code(company)
+
+
+def _preview_customer_code(company: Company) -> str:
+    """Return the code the next create in this process would get, without reserving it."""
+
+    prefix = _company_prefix(company)
+    if not prefix:
+        return generate_non_samprox_customer_code(lock=False)
+    year_suffix = _current_year_suffix()
+    number = _code_blocks().peek((company.id, year_suffix))
+    if number is None:
+        seq = CustomerCodeSequence.query.filter_by(company_id=company.id, year_yy=year_suffix).first()
+        number = (seq.last_number if seq else 0) + 1
+    return _format_prefixed_code(prefix, year_suffix, number)
 
 
 def _validate_customer_code(company: Company, code: str) -> bool:
@@ -278,8 +382,109 @@ def list_customers():
             )
         )
 
-    customers = query.order_by(NonSamproxCustomer.customer_code.asc()).all()
-    return jsonify({"ok": True, "data": [_serialize_customer(c) for c in customers]})
+    etag = http_cache.etag_for(
+        user.id, role.value, request.query_string, http_cache.fingerprint(query, NonSamproxCustomer.updated_at)
+    )
+    cached = http_cache.not_modified(etag)
+    if cached is not None:
+        return cached
+
+    customers = (
+        query.options(joinedload(NonSamproxCustomer.managed_by), joinedload(NonSamproxCustomer.company))
+        .order_by(NonSamproxCustomer.customer_code.asc())
+        .all()
+    )
+    return http_cache.tag(jsonify({"ok": True, "data": [_serialize_customer(c) for c in customers]}), etag)
+
+
+def _encode_change_cursor(customer: NonSamproxCustomer) -> str:
+    raw = json.dumps([customer.updated_at.isoformat(), str(customer.id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_change_cursor(value: str) -> Optional[tuple[datetime, str]]:
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        updated_at, customer_id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), str(uuid.UUID(customer_id))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+@bp.get("/changes")
+def list_customer_changes():
+    """Change feed for client-side dealer caches.
+
+    Returns scoped customers changed at or after ``updated_since`` (all of
+    them when omitted) in ``(updated_at, id)`` order. Active customers are
+    returned in ``data``; deactivated ones only as tombstones in ``deleted``.
+    Clients pass ``next_cursor`` back as ``cursor`` until it is null, then
+    use the first page's ``synced_at`` as the next ``updated_since``.
+    """
+
+    role = _current_role()
+    user = _current_user()
+    if not user or not role:
+        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+
+    synced_at = datetime.now(timezone.utc)
+    query = _scoped_query(user, role)
+
+    updated_since_param = request.args.get("updated_since")
+    if updated_since_param:
+        try:
+            updated_since = datetime.fromisoformat(updated_since_param)
+        except ValueError:
+            return jsonify({"ok": False, "error": "Invalid updated_since"}), 400
+        if updated_since.tzinfo is None:
+            updated_since = updated_since.replace(tzinfo=COLOMBO_TZ)
+        query = query.filter(NonSamproxCustomer.updated_at >= updated_since.astimezone(timezone.utc))
+
+    cursor_param = request.args.get("cursor")
+    if cursor_param:
+        position = _decode_change_cursor(cursor_param)
+        if position is None:
+            return jsonify({"ok": False, "error": "Invalid cursor"}), 400
+        cursor_updated_at, cursor_id = position
+        query = query.filter(
+            or_(
+                NonSamproxCustomer.updated_at > cursor_updated_at,
+                and_(NonSamproxCustomer.updated_at == cursor_updated_at, NonSamproxCustomer.id > cursor_id),
+            )
+        )
+
+    etag = http_cache.etag_for(
+        user.id, role.value, request.query_string, http_cache.fingerprint(query, NonSamproxCustomer.updated_at)
+    )
+    cached = http_cache.not_modified(etag)
+    if cached is not None:
+        return cached
+
+    limit = request.args.get("limit", type=int) or CHANGES_PAGE_SIZE
+    limit = min(max(limit, 1), CHANGES_MAX_PAGE_SIZE)
+    customers = (
+        query.options(joinedload(NonSamproxCustomer.managed_by), joinedload(NonSamproxCustomer.company))
+        .order_by(NonSamproxCustomer.updated_at.asc(), NonSamproxCustomer.id.asc())
+        .limit(limit + 1)
+        .all()
+    )
+    page = customers[:limit]
+    payload = {
+        "ok": True,
+        "data": [_serialize_customer(c) for c in page if c.is_active],
+        "deleted": [
+            {
+                "id": str(c.id),
+                "customer_code": c.customer_code,
+                "updated_at": c.updated_at.isoformat() if c.updated_at else None,
+            }
+            for c in page
+            if not c.is_active
+        ],
+        "next_cursor": _encode_change_cursor(page[-1]) if len(customers) > limit else None,
+        "synced_at": synced_at.isoformat(),
+    }
+    return http_cache.tag(jsonify(payload), etag)
 
 
 @bp.get("/<customer_id>")
@@ -308,15 +513,7 @@ def preview_next_code():
     if err:
         return err
 
-    try:
-        with db.session.begin_nested():
-            next_code = _generate_customer_code_for_company(company, lock=True)
-        db.session.commit()
-    except IntegrityError as exc:
-        db.session.rollback()
-        details = str(exc.orig) if hasattr(exc, "orig") else None
-        return jsonify({"ok": False, "error": "Unable to generate customer code", "details": details}), 400
-
+    next_code = _preview_customer_code(company)
     return jsonify({"ok": True, "data": {"next_code": next_code, "customer_code": next_code}, "next_code": next_code})
 
 
@@ -334,7 +531,6 @@ def create_customer():
     district = (payload.get("district") or "").strip() or None
     province = (payload.get("province") or "").strip() or None
     company_raw = payload.get("company_id")
-    requested_code = (payload.get("customer_code") or "").strip()
 
     if not customer_name:
         return jsonify({"ok": False, "error": "customer_name is required"}), 400
@@ -375,8 +571,9 @@ def create_customer():
     while attempts < 2:
         attempts += 1
         try:
+            # Reserved on its own connection, so a rollback below never reuses it.
+            customer_code = _generate_customer_code_for_company(company, lock=True)
             with db.session.begin_nested():
-                customer_code = _generate_customer_code_for_company(company, provided_code=requested_code, lock=True)
                 if not _validate_customer_code(company, customer_code):
                     raise ValueError("Invalid customer code format")
 
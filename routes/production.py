@@ -4,22 +4,34 @@ import calendar
 from datetime import date as dt_date, datetime, time as dt_time, timedelta
 from types import SimpleNamespace
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request
 from flask_jwt_extended import get_jwt, jwt_required
 
+import intervals
+import live_updates
+import machine_idle_rollups
+import oee
+import production_history
+import production_variance
 from extensions import db
+from material import refresh_costs_for_production_dates
 from models import (
+    DailyActivity,
     DailyProductionEntry,
     MachineAsset,
     MachineIdleEvent,
+    MachineIdleRollup,
     ProductionForecastEntry,
     RoleEnum,
 )
 from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import joinedload
 from schemas import (
     DailyProductionEntrySchema,
     ProductionForecastEntrySchema,
+    ensure_colombo_datetime,
     format_datetime_as_colombo_iso,
 )
 
@@ -36,8 +48,8 @@ PULSE_MACHINE_CODES = ("MCH-0001", "MCH-0002", "MCH-0003")
 EFFECTIVE_TON_THRESHOLD = 0.4
 
 IDLE_SUMMARY_MACHINE_CODES = ("MCH-0001", "MCH-0002", "MCH-0003")
-IDLE_SUMMARY_SHIFT_START_HOUR = 7
-IDLE_SUMMARY_SHIFT_END_HOUR = 19
+IDLE_SUMMARY_SHIFT_START_HOUR = MachineIdleRollup.DAY_SHIFT_START_HOUR
+IDLE_SUMMARY_SHIFT_END_HOUR = MachineIdleRollup.DAY_SHIFT_END_HOUR
 IDLE_SUMMARY_SCHEDULED_MINUTES = 11 * 60
 
 SRI_LANKA_FALLBACK_HOLIDAYS = {
@@ -187,16 +199,6 @@ def _month_range(anchor: dt_date):
     return start, end, month_days
 
 
-def _overlap_minutes(
-    a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime
-) -> int:
-    start = max(a_start, b_start)
-    end = min(a_end, b_end)
-    if end <= start:
-        return 0
-    return int((end - start).total_seconds() // 60)
-
-
 def _production_hour_window(production_date: dt_date, hour_no: int) -> tuple[datetime, datetime]:
     """Return the datetime window represented by ``hour_no`` for ``production_date``."""
 
@@ -291,6 +293,7 @@ def upsert_daily_production():
             409,
         )
 
+    production_history.restore_archived_days([(asset.id, production_date)])
     entry = DailyProductionEntry.query.filter_by(
         date=production_date,
         asset_id=asset.id,
@@ -311,10 +314,337 @@ def upsert_daily_production():
         status_code = 201
 
     db.session.commit()
+    publish_production_hours(production_date, [entry])
 
     return jsonify(entry_schema.dump(entry)), status_code
 
 
+def publish_production_hours(production_date: dt_date, entries) -> None:
+    """Push changed hourly values to live production board subscribers."""
+
+    machines: dict[int, dict] = {}
+    for entry in entries:
+        asset = entry.asset
+        machine = machines.setdefault(
+            entry.asset_id,
+            {
+                "asset_id": entry.asset_id,
+                "machine_code": getattr(asset, "code", None),
+                "hours": [],
+            },
+        )
+        machine["hours"].append(
+            {"hour_no": entry.hour_no, "quantity_tons": float(entry.quantity_tons or 0.0)}
+        )
+    if not machines:
+        return
+    live_updates.hub.publish(
+        live_updates.PRODUCTION_CHANNEL,
+        "production",
+        {"date": production_date.isoformat(), "machines": list(machines.values())},
+    )
+
+
+@bp.get("/stream")
+@jwt_required()
+def production_stream():
+    """Server-sent event stream of production hour and idle event changes.
+
+    Events: ``production`` (changed hourly quantities), ``idle`` (idle event
+    logged) and ``resync`` (the client fell behind and should reload).
+    """
+
+    if not require_role(
+        RoleEnum.production_manager,
+        RoleEnum.admin,
+        RoleEnum.maintenance_manager,
+        RoleEnum.finance_manager,
+    ):
+        return jsonify({"msg": "You do not have permission to view production."}), 403
+
+    subscription = live_updates.hub.subscribe(
+        live_updates.PRODUCTION_CHANNEL,
+        limit=current_app.config.get("PRODUCTION_STREAM_MAX_SUBSCRIBERS"),
+    )
+    if subscription is None:
+        response = jsonify({"msg": "Too many live production streams are open."})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+
+    stream = live_updates.hub.stream(
+        subscription,
+        heartbeat_seconds=float(current_app.config.get("PRODUCTION_STREAM_HEARTBEAT_SECONDS", 15.0)),
+        max_seconds=float(current_app.config.get("PRODUCTION_STREAM_MAX_SECONDS", 300.0)),
+    )
+    return Response(
+        stream,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _upsert_daily_production_rows(rows: list[dict], *, new_row_count: int) -> None:
+    """Write one day's hourly rows in one statement, updating existing rows.
+
+    ``new_row_count`` is how many of ``rows`` are inserts; the single-statement
+    path bypasses the flush hooks, so it books them on the activity ledger.
+    """
+
+    table = DailyProductionEntry.__table__
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        statement = postgresql_insert(table)
+    elif dialect_name == "sqlite":
+        statement = sqlite_insert(table)
+    else:  # pragma: no cover - other backends fall back to the ORM
+        for row in rows:
+            entry = DailyProductionEntry.query.filter_by(
+                date=row["date"], asset_id=row["asset_id"], hour_no=row["hour_no"]
+            ).first()
+            if entry is None:
+                db.session.add(DailyProductionEntry(**row))
+            else:
+                entry.quantity_tons = row["quantity_tons"]
+                entry.updated_at = row["updated_at"]
+        db.session.flush()
+        return
+
+    statement = statement.on_conflict_do_update(
+        index_elements=["date", "asset_id", "hour_no"],
+        set_={
+            "quantity_tons": statement.excluded.quantity_tons,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+    db.session.execute(statement, rows)
+    if new_row_count:
+        DailyActivity.apply(
+            db.session.connection(),
+            {(rows[0]["date"], DailyActivity.SOURCE_PRODUCTION): new_row_count},
+        )
+
+
+@bp.post("/daily/bulk")
+@jwt_required()
+def bulk_upsert_daily_production():
+    """Save a full day's hourly grid for one or more machines in one request.
+
+    Hours that are omitted are left untouched. Zero quantities only update
+    hours that already have a row, so empty grid cells do not create
+    placeholder entries that would block idle logging later.
+    """
+
+    if not require_role(RoleEnum.production_manager, RoleEnum.admin):
+        return jsonify({"msg": "You do not have permission to record production."}), 403
+
+    payload = request.get_json() or {}
+
+    try:
+        production_date = _parse_date(payload.get("date"), field_name="date") or dt_date.today()
+    except ValueError as exc:
+        return jsonify({"msg": str(exc)}), 400
+
+    machines_payload = payload.get("machines")
+    if not isinstance(machines_payload, list) or not machines_payload:
+        return jsonify({"msg": "machines must be a non-empty list."}), 400
+
+    asset_ids = set()
+    machine_codes = set()
+    for index, machine in enumerate(machines_payload, start=1):
+        if not isinstance(machine, dict):
+            return jsonify({"msg": f"Machine {index} must be an object."}), 400
+        if machine.get("asset_id") is not None:
+            try:
+                asset_ids.add(int(machine.get("asset_id")))
+            except (TypeError, ValueError):
+                return jsonify({"msg": f"Machine {index}: Invalid asset_id"}), 400
+        elif (machine.get("machine_code") or "").strip():
+            machine_codes.add(machine["machine_code"].strip().lower())
+        else:
+            return jsonify({"msg": f"Machine {index}: asset_id or machine_code is required."}), 400
+
+    assets = []
+    if asset_ids:
+        assets.extend(MachineAsset.query.filter(MachineAsset.id.in_(asset_ids)).all())
+    if machine_codes:
+        assets.extend(
+            MachineAsset.query.filter(func.lower(MachineAsset.code).in_(machine_codes)).all()
+        )
+    assets_by_id = {asset.id: asset for asset in assets}
+    assets_by_code = {(asset.code or "").strip().lower(): asset for asset in assets}
+
+    quantities: dict[tuple[int, int], float] = {}
+    grid_assets: dict[int, MachineAsset] = {}
+    for index, machine in enumerate(machines_payload, start=1):
+        if machine.get("asset_id") is not None:
+            asset = assets_by_id.get(int(machine["asset_id"]))
+        else:
+            asset = assets_by_code.get(machine["machine_code"].strip().lower())
+        if asset is None:
+            return jsonify({"msg": f"Machine {index}: Machine asset not found"}), 404
+        if asset.id in grid_assets:
+            return jsonify({"msg": f"Machine {asset.code} is listed more than once."}), 400
+        grid_assets[asset.id] = asset
+
+        hours = machine.get("hours")
+        if not isinstance(hours, list):
+            return jsonify({"msg": f"Machine {asset.code}: hours must be a list."}), 400
+        for cell in hours:
+            if not isinstance(cell, dict):
+                return jsonify({"msg": f"Machine {asset.code}: each hour must be an object."}), 400
+            try:
+                hour_no = int(cell.get("hour_no"))
+            except (TypeError, ValueError):
+                return (
+                    jsonify({"msg": f"Machine {asset.code}: hour_no must be an integer between 1 and 24."}),
+                    400,
+                )
+            if hour_no < 1 or hour_no > 24:
+                return jsonify({"msg": f"Machine {asset.code}: hour_no must be between 1 and 24."}), 400
+            if (asset.id, hour_no) in quantities:
+                return jsonify({"msg": f"Machine {asset.code}: hour {hour_no} is listed more than once."}), 400
+            try:
+                quantity_tons = float(cell.get("quantity_tons", 0) or 0)
+            except (TypeError, ValueError):
+                return jsonify({"msg": f"Machine {asset.code}: quantity_tons must be a number."}), 400
+            if quantity_tons < 0:
+                return jsonify({"msg": f"Machine {asset.code}: quantity_tons cannot be negative."}), 400
+            quantities[(asset.id, hour_no)] = quantity_tons
+
+    production_history.restore_archived_days(
+        (asset_id, production_date) for asset_id in grid_assets
+    )
+    existing_keys = {
+        (asset_id, hour_no)
+        for asset_id, hour_no in db.session.query(
+            DailyProductionEntry.asset_id, DailyProductionEntry.hour_no
+        ).filter(
+            DailyProductionEntry.date == production_date,
+            DailyProductionEntry.asset_id.in_(grid_assets.keys()),
+        )
+    }
+    to_write = {
+        key: quantity
+        for key, quantity in quantities.items()
+        if quantity > 0 or key in existing_keys
+    }
+
+    hour_boundaries = intervals.hourly_boundaries(production_date, 1)
+    idle_events = (
+        MachineIdleEvent.query.filter(
+            MachineIdleEvent.asset_id.in_(grid_assets.keys()),
+            MachineIdleEvent.started_at < hour_boundaries[-1],
+            or_(
+                MachineIdleEvent.ended_at.is_(None),
+                MachineIdleEvent.ended_at > hour_boundaries[0],
+            ),
+        )
+        .order_by(MachineIdleEvent.started_at.asc())
+        .all()
+    )
+    idle_by_asset: dict[int, list[MachineIdleEvent]] = {}
+    for idle_event in idle_events:
+        idle_by_asset.setdefault(idle_event.asset_id, []).append(idle_event)
+
+    # Events are sorted by start, so the first hit per hour is the earliest event.
+    first_idle_by_hour: dict[tuple[int, int], MachineIdleEvent] = {}
+    for asset_id, asset_events in idle_by_asset.items():
+        hits = intervals.window_hits(
+            [(idle_event.started_at, idle_event.ended_at) for idle_event in asset_events],
+            hour_boundaries,
+        )
+        for window_index, event_index in hits:
+            first_idle_by_hour.setdefault((asset_id, window_index + 1), asset_events[event_index])
+
+    conflicts = []
+    for (asset_id, hour_no), quantity_tons in sorted(to_write.items()):
+        idle_event = first_idle_by_hour.get((asset_id, hour_no))
+        if quantity_tons <= 0 or idle_event is None:
+            continue
+        hour_start, hour_end = _production_hour_window(production_date, hour_no)
+        asset = grid_assets[asset_id]
+        conflicts.append(
+            {
+                "type": "idle_event",
+                "machine": {"id": asset.id, "code": asset.code, "name": asset.name},
+                "hour": {
+                    "hour_no": hour_no,
+                    "start": format_datetime_as_colombo_iso(hour_start, assume_local=True),
+                    "end": format_datetime_as_colombo_iso(hour_end, assume_local=True),
+                },
+                "idle_event": {
+                    "id": idle_event.id,
+                    "start": format_datetime_as_colombo_iso(idle_event.started_at),
+                    "end": format_datetime_as_colombo_iso(idle_event.ended_at),
+                    "reason": idle_event.reason,
+                },
+            }
+        )
+
+    if conflicts:
+        return (
+            jsonify(
+                {
+                    "msg": "Idle windows are already logged for some machines and hours.",
+                    "conflicts": conflicts,
+                }
+            ),
+            409,
+        )
+
+    if to_write:
+        now = datetime.utcnow()
+        _upsert_daily_production_rows(
+            [
+                {
+                    "date": production_date,
+                    "asset_id": asset_id,
+                    "hour_no": hour_no,
+                    "quantity_tons": quantity_tons,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for (asset_id, hour_no), quantity_tons in sorted(to_write.items())
+            ],
+            new_row_count=len(to_write.keys() - existing_keys),
+        )
+        refresh_costs_for_production_dates([production_date])
+    db.session.commit()
+
+    entries_by_asset: dict[int, list[DailyProductionEntry]] = {}
+    for entry in (
+        DailyProductionEntry.query.filter(
+            DailyProductionEntry.date == production_date,
+            DailyProductionEntry.asset_id.in_(grid_assets.keys()),
+        )
+        .order_by(DailyProductionEntry.asset_id.asc(), DailyProductionEntry.hour_no.asc())
+        .populate_existing()
+        .all()
+    ):
+        entries_by_asset.setdefault(entry.asset_id, []).append(entry)
+
+    if to_write:
+        written_entries = [
+            entry
+            for entries in entries_by_asset.values()
+            for entry in entries
+            if (entry.asset_id, entry.hour_no) in to_write
+        ]
+        publish_production_hours(production_date, written_entries)
+
+    return jsonify(
+        {
+            "date": production_date.isoformat(),
+            "written": len(to_write),
+            "machines": [
+                _daily_grid_payload(asset, production_date, entries_by_asset.get(asset.id, []))
+                for asset in grid_assets.values()
+            ],
+        }
+    )
+
+
 @bp.get("/daily")
 @jwt_required()
 def get_daily_production():
@@ -338,11 +668,14 @@ def get_daily_production():
     except LookupError as exc:
         return jsonify({"msg": str(exc)}), 404
 
-    entries = (
-        DailyProductionEntry.query.filter_by(date=query_date, asset_id=asset.id)
-        .order_by(DailyProductionEntry.hour_no.asc())
-        .all()
-    )
+    entries = production_history.hourly_entries(query_date, query_date, asset_ids=[asset.id])
+
+    return jsonify(_daily_grid_payload(asset, query_date, entries))
+
+
+def _daily_grid_payload(asset: MachineAsset, query_date: dt_date, entries) -> dict:
+    """Return the 24-hour grid for one machine, filling missing hours with zero."""
+
     entries_by_hour = {entry.hour_no: entry for entry in entries}
 
     results = []
@@ -382,7 +715,7 @@ def get_daily_production():
         "total_quantity_tons": round(total_quantity, 3),
     }
 
-    return jsonify(response)
+    return response
 
 
 @bp.get("/daily/summary")
@@ -418,11 +751,7 @@ def get_daily_production_summary():
         if canonical_code:
             asset_by_code[canonical_code] = asset
 
-    entries = (
-        DailyProductionEntry.query.options(joinedload(DailyProductionEntry.asset))
-        .filter_by(date=query_date)
-        .all()
-    )
+    entries = production_history.hourly_entries(query_date, query_date)
 
     summary_by_hour = {hour: {} for hour in range(1, 25)}
 
@@ -538,17 +867,14 @@ def get_daily_production_summary():
     month_start = query_date.replace(day=1)
     mtd_totals_by_machine = {code: 0.0 for code in machine_codes}
 
+    production_days = production_history.production_days(month_start, query_date)
     mtd_entries = (
         db.session.query(
             MachineAsset.code,
-            func.coalesce(func.sum(DailyProductionEntry.quantity_tons), 0),
-        )
-        .join(DailyProductionEntry, DailyProductionEntry.asset_id == MachineAsset.id)
-        .filter(
-            DailyProductionEntry.date >= month_start,
-            DailyProductionEntry.date <= query_date,
-            func.lower(MachineAsset.code).in_(machine_filters),
+            func.coalesce(func.sum(production_days.c.quantity_tons), 0),
         )
+        .join(production_days, production_days.c.asset_id == MachineAsset.id)
+        .filter(func.lower(MachineAsset.code).in_(machine_filters))
         .group_by(MachineAsset.code)
         .all()
     )
@@ -810,19 +1136,198 @@ def get_production_forecast_holidays():
     if year < 1900 or year > 2100:
         return jsonify({"msg": "Year must be between 1900 and 2100."}), 400
 
-    fallback = SRI_LANKA_FALLBACK_HOLIDAYS.get(year, [])
-    holidays_payload = []
+    holidays_payload = [
+        {"date": holiday_date.isoformat(), "name": name}
+        for holiday_date, name in sorted(_fallback_holidays(year).items())
+    ]
+
+    return jsonify({"year": year, "holidays": holidays_payload})
+
 
-    for month, day, name in fallback:
+def _fallback_holidays(year: int) -> dict[dt_date, str]:
+    holidays = {}
+    for month, day, name in SRI_LANKA_FALLBACK_HOLIDAYS.get(year, []):
         try:
-            holiday_date = dt_date(year, month, day)
+            holidays[dt_date(year, month, day)] = name
         except ValueError:
             continue
-        holidays_payload.append({"date": holiday_date.isoformat(), "name": name})
+    return holidays
 
-    holidays_payload.sort(key=lambda item: item["date"])
 
-    return jsonify({"year": year, "holidays": holidays_payload})
+def _variance_cache() -> production_variance.VarianceCache:
+    cache = current_app.extensions.get("production_variance_cache")
+    if cache is None:
+        cache = production_variance.VarianceCache(
+            current_app.config.get("PRODUCTION_VARIANCE_CACHE_SIZE", 256)
+        )
+        current_app.extensions["production_variance_cache"] = cache
+    return cache
+
+
+@bp.get("/forecast/variance")
+@jwt_required()
+def get_production_forecast_variance():
+    """Daily and cumulative forecast vs actual with a run-rate month-end projection."""
+
+    if not require_role(
+        RoleEnum.production_manager,
+        RoleEnum.admin,
+        RoleEnum.maintenance_manager,
+        RoleEnum.finance_manager,
+    ):
+        return jsonify({"msg": "You do not have permission to view production."}), 403
+
+    try:
+        anchor = _parse_period_param(request.args.get("period"))
+    except ValueError as exc:
+        return jsonify({"msg": str(exc)}), 400
+
+    if request.args.get("asset_id") or request.args.get("machine_code"):
+        try:
+            assets = [
+                _get_asset(
+                    {
+                        "asset_id": request.args.get("asset_id"),
+                        "machine_code": request.args.get("machine_code"),
+                    }
+                )
+            ]
+        except ValueError as exc:
+            return jsonify({"msg": str(exc)}), 400
+        except LookupError as exc:
+            return jsonify({"msg": str(exc)}), 404
+    else:
+        machine_codes, _, machine_filters = _parse_machine_codes_param(
+            request.args.get("machine_codes")
+        )
+        assets_by_code = {
+            asset.code.lower(): asset
+            for asset in MachineAsset.query.filter(
+                func.lower(MachineAsset.code).in_(machine_filters)
+            ).all()
+        }
+        assets = [
+            assets_by_code[code.lower()] for code in machine_codes if code.lower() in assets_by_code
+        ]
+
+    month_start, month_end, month_days = _month_range(anchor)
+    today = dt_date.today()
+    variance_by_asset = production_variance.monthly_variance(
+        [asset.id for asset in assets],
+        month_start,
+        month_end,
+        today=today,
+        holidays=_fallback_holidays(anchor.year),
+        cache=_variance_cache(),
+    )
+
+    machines = []
+    totals = {"forecast_month_tons": 0.0, "actual_to_date_tons": 0.0, "projected_month_end_tons": 0.0}
+    for asset in assets:
+        variance = variance_by_asset.get(asset.id)
+        if variance is None:
+            continue
+        summary = variance["summary"]
+        if asset.code.upper() not in SUMMARY_TOTALS_EXCLUDED_CODES:
+            for key in totals:
+                totals[key] += summary[key] or 0.0
+        machines.append(
+            {
+                "machine": {"id": asset.id, "code": asset.code, "name": asset.name},
+                "summary": summary,
+                "days": variance["days"],
+            }
+        )
+
+    return jsonify(
+        {
+            "period": anchor.strftime("%Y-%m"),
+            "label": anchor.strftime("%B %Y"),
+            "start_date": month_start.isoformat(),
+            "end_date": month_end.isoformat(),
+            "days": month_days,
+            "as_of": today.isoformat(),
+            "machines": machines,
+            "totals": {key: round(value, 3) for key, value in totals.items()},
+        }
+    )
+
+
+def _oee_cache() -> production_variance.VarianceCache:
+    cache = current_app.extensions.get("production_oee_cache")
+    if cache is None:
+        cache = production_variance.VarianceCache(current_app.config.get("PRODUCTION_OEE_CACHE_SIZE", 256))
+        current_app.extensions["production_oee_cache"] = cache
+    return cache
+
+
+@bp.get("/oee")
+@jwt_required()
+def get_production_oee():
+    """Availability, performance, quality and OEE per machine, day and shift."""
+
+    if not require_role(
+        RoleEnum.production_manager,
+        RoleEnum.admin,
+        RoleEnum.maintenance_manager,
+        RoleEnum.finance_manager,
+    ):
+        return jsonify({"msg": "You do not have permission to view production."}), 403
+
+    start_param = request.args.get("start_date")
+    end_param = request.args.get("end_date")
+    if start_param or end_param:
+        try:
+            range_start = _parse_date(start_param, field_name="start_date")
+            range_end = _parse_date(end_param, field_name="end_date")
+        except ValueError as exc:
+            return jsonify({"msg": str(exc)}), 400
+        if range_start is None or range_end is None:
+            return jsonify({"msg": "Both start_date and end_date are required."}), 400
+        if range_end < range_start:
+            return jsonify({"msg": "end_date must be on or after start_date."}), 400
+        if (range_end - range_start).days > 366:
+            return jsonify({"msg": "Date range cannot exceed 366 days."}), 400
+    else:
+        try:
+            anchor = _parse_period_param(request.args.get("period"))
+        except ValueError as exc:
+            return jsonify({"msg": str(exc)}), 400
+        range_start, range_end, _ = _month_range(anchor)
+
+    machine_codes, _, machine_filters = _parse_machine_codes_param(
+        request.args.get("machine_codes"), default_codes=PULSE_MACHINE_CODES
+    )
+    assets_by_code = {
+        asset.code.lower(): asset
+        for asset in MachineAsset.query.filter(func.lower(MachineAsset.code).in_(machine_filters)).all()
+    }
+    assets = [assets_by_code[code.lower()] for code in machine_codes if code.lower() in assets_by_code]
+
+    today = dt_date.today()
+    oee_by_asset = oee.machine_oee(
+        [asset.id for asset in assets],
+        range_start,
+        range_end,
+        today=today,
+        cache=_oee_cache(),
+    )
+
+    return jsonify(
+        {
+            "start_date": range_start.isoformat(),
+            "end_date": range_end.isoformat(),
+            "as_of": today.isoformat(),
+            "machines": [
+                {
+                    "machine": {"id": asset.id, "code": asset.code, "name": asset.name},
+                    "totals": oee_by_asset[asset.id]["totals"],
+                    "days": oee_by_asset[asset.id]["days"],
+                }
+                for asset in assets
+            ],
+        }
+    )
 
 
 @bp.get("/monthly/summary")
@@ -847,20 +1352,17 @@ def get_monthly_production_summary():
 
     month_start, month_end, month_days = _month_range(anchor)
 
+    production_days = production_history.production_days(month_start, month_end)
     totals_query = (
         db.session.query(
-            DailyProductionEntry.date,
+            production_days.c.date,
             func.lower(MachineAsset.code),
-            func.coalesce(func.sum(DailyProductionEntry.quantity_tons), 0.0),
-        )
-        .join(MachineAsset, DailyProductionEntry.asset_id == MachineAsset.id)
-        .filter(
-            DailyProductionEntry.date >= month_start,
-            DailyProductionEntry.date <= month_end,
-            func.lower(MachineAsset.code).in_(machine_filters),
+            func.coalesce(func.sum(production_days.c.quantity_tons), 0.0),
         )
-        .group_by(DailyProductionEntry.date, func.lower(MachineAsset.code))
-        .order_by(DailyProductionEntry.date.asc())
+        .join(MachineAsset, production_days.c.asset_id == MachineAsset.id)
+        .filter(func.lower(MachineAsset.code).in_(machine_filters))
+        .group_by(production_days.c.date, func.lower(MachineAsset.code))
+        .order_by(production_days.c.date.asc())
     )
 
     totals_by_date = {}
@@ -934,6 +1436,10 @@ def get_monthly_production_summary():
     return jsonify(response)
 
 
+def _pulse_hour_label(hour_start: datetime) -> str:
+    return f"{hour_start.strftime('%b')} {hour_start.day:02d} – {hour_start.strftime('%H:%M')}"
+
+
 @bp.get("/monthly/hourly-pulse")
 @jwt_required()
 def get_monthly_hourly_pulse():
@@ -949,6 +1455,11 @@ def get_monthly_hourly_pulse():
     start_param = request.args.get("start_date")
     end_param = request.args.get("end_date")
 
+    response_format = (request.args.get("format") or "rows").strip().lower()
+    if response_format not in {"rows", "columnar"}:
+        return jsonify({"msg": "format must be 'rows' or 'columnar'."}), 400
+    columnar = response_format == "columnar"
+
     custom_range = False
 
     if start_param or end_param:
@@ -990,44 +1501,27 @@ def get_monthly_hourly_pulse():
         request.args.get("machine_codes"), default_codes=PULSE_MACHINE_CODES
     )
 
-    totals_query = (
-        db.session.query(
-            DailyProductionEntry.date,
-            DailyProductionEntry.hour_no,
-            func.lower(MachineAsset.code),
-            func.coalesce(func.sum(DailyProductionEntry.quantity_tons), 0.0),
-        )
-        .join(MachineAsset, DailyProductionEntry.asset_id == MachineAsset.id)
-        .filter(
-            DailyProductionEntry.date >= period_start,
-            DailyProductionEntry.date <= period_end,
-            func.lower(MachineAsset.code).in_(machine_filters),
-        )
-        .group_by(
-            DailyProductionEntry.date,
-            DailyProductionEntry.hour_no,
-            func.lower(MachineAsset.code),
+    pulse_codes = {
+        asset_id: (code or "").lower()
+        for asset_id, code in db.session.query(MachineAsset.id, MachineAsset.code).filter(
+            func.lower(MachineAsset.code).in_(machine_filters)
         )
-        .order_by(
-            DailyProductionEntry.date.asc(),
-            DailyProductionEntry.hour_no.asc(),
-        )
-    )
+    }
 
     totals_by_window = {}
-    for date_value, hour_value, code_value, total_value in totals_query.all():
-        if not isinstance(date_value, dt_date):
-            continue
-        try:
-            hour_no = int(hour_value)
-        except (TypeError, ValueError):
-            continue
-        key = (date_value, hour_no)
-        machine_totals = totals_by_window.setdefault(key, {})
-        try:
-            machine_totals[code_value] = float(total_value or 0.0)
-        except (TypeError, ValueError):
-            machine_totals[code_value] = 0.0
+    for asset_id, date_value, hour_no, quantity in production_history.hourly_quantities(
+        period_start, period_end, pulse_codes.keys()
+    ):
+        machine_totals = totals_by_window.setdefault((date_value, hour_no), {})
+        code_value = pulse_codes[asset_id]
+        machine_totals[code_value] = machine_totals.get(code_value, 0.0) + quantity
+
+    idle_by_slot = [0.0] * (day_count * 24)
+    for slot_minutes in machine_idle_rollups.idle_minutes_by_hour(
+        pulse_codes.keys(), period_start, period_end
+    ).values():
+        for slot, minutes in enumerate(slot_minutes):
+            idle_by_slot[slot] += minutes
 
     machine_field_map = {
         code: code.replace("MCH-000", "MCH") if code.startswith("MCH-000") else code.replace("-", "")
@@ -1035,8 +1529,12 @@ def get_monthly_hourly_pulse():
     }
 
     hourly_totals = []
+    machine_columns = {machine_field_map.get(code, code): [] for code in canonical_codes.values()}
+    total_column = []
+    idle_column = []
     total_production = 0.0
-    peak_payload = None
+    peak_window = None
+    peak_total = None
     effective_hours = {code: 0 for code in machine_codes}
 
     for offset in range(day_count):
@@ -1044,43 +1542,45 @@ def get_monthly_hourly_pulse():
         day_index = offset + 1
         for hour_no in range(1, 25):
             machine_values = totals_by_window.get((current_date, hour_no), {})
-            hour_start, _ = _production_hour_window(current_date, hour_no)
-            label = f"{hour_start.strftime('%b')} {hour_start.day:02d} – {hour_start.strftime('%H:%M')}"
-
-            payload = {
-                "index": len(hourly_totals) + 1,
-                "day": day_index,
-                "hour": hour_no,
-                "date": current_date.isoformat(),
-                "timestamp": format_datetime_as_colombo_iso(hour_start, assume_local=True),
-                "label": label,
-            }
 
             hour_total = 0.0
+            hour_values = {}
             for machine_filter, canonical_code in canonical_codes.items():
                 field_name = machine_field_map.get(canonical_code, canonical_code)
                 value = round(machine_values.get(machine_filter, 0.0), 3)
-                payload[field_name] = value
+                hour_values[field_name] = value
                 hour_total += value
 
                 if value >= EFFECTIVE_TON_THRESHOLD:
                     effective_hours[canonical_code] = effective_hours.get(canonical_code, 0) + 1
 
             hour_total = round(hour_total, 3)
-            payload["total_tons"] = hour_total
-
-            hourly_totals.append(payload)
             total_production += hour_total
+            idle_minutes = round(idle_by_slot[offset * 24 + hour_no - 1], 1)
 
-            if (peak_payload is None) or (hour_total > peak_payload["total_tons"]):
-                peak_payload = {
+            if columnar:
+                for field_name, value in hour_values.items():
+                    machine_columns[field_name].append(value)
+                total_column.append(hour_total)
+                idle_column.append(idle_minutes)
+            else:
+                hour_start, _ = _production_hour_window(current_date, hour_no)
+                payload = {
+                    "index": len(hourly_totals) + 1,
                     "day": day_index,
                     "hour": hour_no,
                     "date": current_date.isoformat(),
-                    "timestamp": payload["timestamp"],
-                    "label": label,
-                    "total_tons": hour_total,
+                    "timestamp": format_datetime_as_colombo_iso(hour_start, assume_local=True),
+                    "label": _pulse_hour_label(hour_start),
                 }
+                payload.update(hour_values)
+                payload["total_tons"] = hour_total
+                payload["idle_minutes"] = idle_minutes
+                hourly_totals.append(payload)
+
+            if (peak_total is None) or (hour_total > peak_total):
+                peak_total = hour_total
+                peak_window = (day_index, hour_no, current_date)
 
     total_production = round(total_production, 3)
     total_effective_hours = sum(
@@ -1093,7 +1593,7 @@ def get_monthly_hourly_pulse():
         3,
     )
 
-    if peak_payload is None:
+    if peak_window is None:
         peak = {
             "day": None,
             "hour": None,
@@ -1103,7 +1603,16 @@ def get_monthly_hourly_pulse():
             "total_tons": 0.0,
         }
     else:
-        peak = peak_payload
+        peak_day, peak_hour, peak_date = peak_window
+        peak_start, _ = _production_hour_window(peak_date, peak_hour)
+        peak = {
+            "day": peak_day,
+            "hour": peak_hour,
+            "date": peak_date.isoformat(),
+            "timestamp": format_datetime_as_colombo_iso(peak_start, assume_local=True),
+            "label": _pulse_hour_label(peak_start),
+            "total_tons": peak_total,
+        }
 
     if custom_range:
         if period_start == period_end:
@@ -1121,9 +1630,8 @@ def get_monthly_hourly_pulse():
         "start_date": period_start.isoformat(),
         "end_date": period_end.isoformat(),
         "days": day_count,
-        "hours": len(hourly_totals),
+        "hours": day_count * 24,
         "machine_codes": machine_codes,
-        "hourly_totals": hourly_totals,
         "total_production": total_production,
         "average_hour_production": average_hour_production,
         "effective_hours": effective_hours,
@@ -1131,6 +1639,24 @@ def get_monthly_hourly_pulse():
         "peak": peak,
     }
 
+    if columnar:
+        first_hour_start, _ = _production_hour_window(period_start, 1)
+        response["format"] = "columnar"
+        response["columns"] = {
+            "start_epoch": int(
+                ensure_colombo_datetime(first_hour_start, assume_local=True).timestamp()
+            ),
+            "step_seconds": 3600,
+            "machine_fields": {
+                code: machine_field_map.get(code, code) for code in canonical_codes.values()
+            },
+            "machines": machine_columns,
+            "total_tons": total_column,
+            "idle_minutes": idle_column,
+        }
+    else:
+        response["hourly_totals"] = hourly_totals
+
     return jsonify(response)
 
 
@@ -1150,11 +1676,6 @@ def _monthly_idle_summary_for_ui():
         allowed_codes=IDLE_SUMMARY_MACHINE_CODES,
     )
 
-    shift_start = dt_time(IDLE_SUMMARY_SHIFT_START_HOUR, 0)
-    shift_end = dt_time(IDLE_SUMMARY_SHIFT_END_HOUR, 0)
-    period_start_limit = datetime.combine(month_start, dt_time.min)
-    period_end_limit = datetime.combine(month_end, dt_time.max)
-
     assets = (
         MachineAsset.query.filter(func.lower(MachineAsset.code).in_(machine_filters))
         .order_by(MachineAsset.code.asc())
@@ -1176,33 +1697,11 @@ def _monthly_idle_summary_for_ui():
         machines_meta.append({"code": normalized_code, "name": display_name})
         summary_assets.append(asset or SimpleNamespace(code=normalized_code, name=display_name))
 
-    lowered_filters = [code.lower() for code in machine_codes]
-
-    q_events = (
-        MachineIdleEvent.query.options(joinedload(MachineIdleEvent.asset))
-        .join(MachineAsset)
-        .filter(MachineIdleEvent.started_at <= period_end_limit)
-        .filter(
-            func.coalesce(MachineIdleEvent.ended_at, datetime.utcnow())
-            >= period_start_limit
-        )
+    asset_ids = {code: asset.id for code, asset in asset_lookup.items()}
+    idle_by_day = machine_idle_rollups.idle_minutes_by_day(
+        asset_ids.values(), month_start, month_end
     )
 
-    if lowered_filters:
-        q_events = q_events.filter(func.lower(MachineAsset.code).in_(lowered_filters))
-
-    events = q_events.all()
-
-    events_by_code: dict[str, list[MachineIdleEvent]] = {}
-    for event in events:
-        asset = event.asset
-        if not asset or not asset.code:
-            continue
-        normalized_code = (asset.code or "").strip().upper()
-        if not normalized_code:
-            continue
-        events_by_code.setdefault(normalized_code, []).append(event)
-
     scheduled_minutes = IDLE_SUMMARY_SCHEDULED_MINUTES
     scheduled_hours = round(scheduled_minutes / 60.0, 3)
 
@@ -1212,9 +1711,6 @@ def _monthly_idle_summary_for_ui():
     current_date = month_start
     day_index = 1
     while current_date <= month_end:
-        shift_start_dt = datetime.combine(current_date, shift_start)
-        shift_end_dt = datetime.combine(current_date, shift_end)
-
         day_payload = {
             "day": day_index,
             "date": current_date.isoformat(),
@@ -1225,16 +1721,8 @@ def _monthly_idle_summary_for_ui():
             normalized_code = (getattr(asset, "code", "") or "").strip().upper()
             if not normalized_code:
                 continue
-            idle_minutes = 0
-            for event in events_by_code.get(normalized_code, []):
-                event_start = event.started_at
-                event_end = event.ended_at or datetime.utcnow()
-                idle_minutes += _overlap_minutes(
-                    event_start,
-                    event_end,
-                    shift_start_dt,
-                    shift_end_dt,
-                )
+            asset_id = asset_ids.get(normalized_code)
+            idle_minutes = idle_by_day.get((asset_id, current_date), 0.0)
 
             idle_minutes = max(0, min(idle_minutes, scheduled_minutes))
             runtime_minutes = max(0, scheduled_minutes - idle_minutes)
@@ -1280,12 +1768,12 @@ def _monthly_idle_summary_for_ui():
     return jsonify(response)
 
 
-def _get_secondary_reason_label(event: MachineIdleEvent) -> str:
-    secondary = (event.secondary_reason or "").strip()
+def _get_secondary_reason_label(reason, secondary_reason) -> str:
+    secondary = (secondary_reason or "").strip()
     if secondary:
         return secondary
 
-    primary = (event.reason or "").strip()
+    primary = (reason or "").strip()
     if primary:
         return f"{primary} — unspecified secondary"
 
@@ -1322,11 +1810,6 @@ def get_monthly_idle_secondary_pareto():
     )
 
     month_start, month_end, _ = _month_range(anchor)
-    shift_start = dt_time(IDLE_SUMMARY_SHIFT_START_HOUR, 0)
-    shift_end = dt_time(IDLE_SUMMARY_SHIFT_END_HOUR, 0)
-
-    period_start_limit = datetime.combine(month_start, dt_time.min)
-    period_end_limit = datetime.combine(month_end, dt_time.max)
 
     assets = (
         MachineAsset.query.filter(func.lower(MachineAsset.code).in_(machine_filters))
@@ -1338,52 +1821,29 @@ def get_monthly_idle_secondary_pareto():
         asset.code: asset for asset in assets if asset.code is not None
     }
 
-    events = (
-        MachineIdleEvent.query.options(joinedload(MachineIdleEvent.asset))
-        .join(MachineAsset)
-        .filter(func.lower(MachineAsset.code).in_(machine_filters))
-        .filter(MachineIdleEvent.started_at <= period_end_limit)
-        .filter(
-            func.coalesce(MachineIdleEvent.ended_at, datetime.utcnow())
-            >= period_start_limit
-        )
-        .order_by(MachineIdleEvent.started_at.asc())
-        .all()
+    code_by_asset_id: dict[int, str] = {}
+    for asset in assets:
+        normalized_code = canonical_codes.get(asset.code.lower()) if asset.code else None
+        if not normalized_code:
+            normalized_code = (asset.code or "").strip().upper()
+        if normalized_code and normalized_code in machine_codes:
+            code_by_asset_id[asset.id] = normalized_code
+
+    idle_by_reason = machine_idle_rollups.idle_minutes_by_reason(
+        code_by_asset_id.keys(), month_start, month_end
     )
 
     reasons_minutes: dict[str, dict[str, float]] = {}
     totals_minutes: dict[str, float] = {}
 
-    for event in events:
-        asset = event.asset
-        if not asset or not asset.code:
-            continue
-
-        normalized_key = asset.code.lower()
-        normalized_code = canonical_codes.get(normalized_key)
-        if not normalized_code:
-            normalized_code = (asset.code or "").strip().upper()
-        if not normalized_code or normalized_code not in machine_codes:
+    for (asset_id, reason, secondary_reason), minutes in idle_by_reason.items():
+        normalized_code = code_by_asset_id.get(asset_id)
+        if not normalized_code or minutes <= 0:
             continue
-        reason_label = _get_secondary_reason_label(event)
-
-        event_start = max(event.started_at, period_start_limit)
-        event_end = min(event.ended_at or datetime.utcnow(), period_end_limit)
-        if event_end <= event_start:
-            continue
-
-        current_date = max(event_start.date(), month_start)
-        last_date = min(event_end.date(), month_end)
-
-        while current_date <= last_date:
-            shift_start_dt = datetime.combine(current_date, shift_start)
-            shift_end_dt = datetime.combine(current_date, shift_end)
-            minutes = _overlap_minutes(event_start, event_end, shift_start_dt, shift_end_dt)
-            if minutes > 0:
-                reason_entry = reasons_minutes.setdefault(reason_label, {})
-                reason_entry[normalized_code] = reason_entry.get(normalized_code, 0.0) + minutes
-                totals_minutes[reason_label] = totals_minutes.get(reason_label, 0.0) + minutes
-            current_date += timedelta(days=1)
+        reason_label = _get_secondary_reason_label(reason, secondary_reason)
+        reason_entry = reasons_minutes.setdefault(reason_label, {})
+        reason_entry[normalized_code] = reason_entry.get(normalized_code, 0.0) + minutes
+        totals_minutes[reason_label] = totals_minutes.get(reason_label, 0.0) + minutes
 
     machine_totals_minutes = {code: 0.0 for code in machine_codes}
 
@@ -1476,13 +1936,6 @@ def get_monthly_idle_summary():
 
     month_start, month_end, month_days = _month_range(anchor)
 
-    shift_start = dt_time(IDLE_SUMMARY_SHIFT_START_HOUR, 0)
-    shift_end = dt_time(IDLE_SUMMARY_SHIFT_END_HOUR, 0)
-    period_start_limit = datetime.combine(month_start, dt_time.min)
-    period_end_limit = datetime.combine(month_end, dt_time.max)
-    month_shift_start = datetime.combine(month_start, shift_start)
-    month_shift_end = datetime.combine(month_end, shift_end)
-
     assets = (
         MachineAsset.query.filter(func.lower(MachineAsset.code).in_(machine_filters))
         .order_by(MachineAsset.code.asc())
@@ -1496,16 +1949,6 @@ def get_monthly_idle_summary():
         if canonical_code:
             asset_by_code[canonical_code] = asset
 
-    events = (
-        MachineIdleEvent.query.options(joinedload(MachineIdleEvent.asset))
-        .join(MachineAsset)
-        .filter(func.lower(MachineAsset.code).in_(machine_filters))
-        .filter(MachineIdleEvent.started_at <= period_end_limit)
-        .filter(func.coalesce(MachineIdleEvent.ended_at, datetime.utcnow()) >= period_start_limit)
-        .order_by(MachineIdleEvent.started_at.asc())
-        .all()
-    )
-
     forecast_entries = (
         ProductionForecastEntry.query.options(joinedload(ProductionForecastEntry.asset))
         .join(MachineAsset)
@@ -1546,48 +1989,14 @@ def get_monthly_idle_summary():
         if month_start <= entry_date <= month_end:
             forecast_runtime_minutes.setdefault(entry_date, {})[canonical_code] = runtime_minutes
 
-    for event in events:
-        asset = event.asset
-        if not asset or not asset.code:
-            continue
-
-        canonical_code = canonical_codes.get(asset.code.lower())
-        if not canonical_code:
-            continue
-
-        event_start = getattr(event, "started_at", None)
-        if not isinstance(event_start, datetime):
-            continue
-        event_end = getattr(event, "ended_at", None) or datetime.utcnow()
-        if not isinstance(event_end, datetime) or event_end <= event_start:
-            continue
-
-        clamped_start = max(event_start, month_shift_start)
-        clamped_end = min(event_end, month_shift_end)
-
-        if clamped_end <= clamped_start:
-            continue
-
-        current_day = clamped_start.date()
-        last_day = clamped_end.date()
-
-        while current_day <= last_day:
-            if current_day not in idle_minutes:
-                current_day += timedelta(days=1)
-                continue
-
-            day_start_dt = datetime.combine(current_day, shift_start)
-            day_end_dt = datetime.combine(current_day, shift_end)
-
-            overlap_start = max(clamped_start, day_start_dt)
-            overlap_end = min(clamped_end, day_end_dt)
-
-            if overlap_end > overlap_start:
-                minutes = (overlap_end - overlap_start).total_seconds() / 60
-                if minutes > 0:
-                    idle_minutes[current_day][canonical_code] += minutes
-
-            current_day += timedelta(days=1)
+    code_by_asset_id = {asset.id: code for code, asset in asset_by_code.items()}
+    idle_by_day = machine_idle_rollups.idle_minutes_by_day(
+        code_by_asset_id.keys(), month_start, month_end
+    )
+    for (asset_id, current_day), minutes in idle_by_day.items():
+        canonical_code = code_by_asset_id.get(asset_id)
+        if canonical_code and current_day in idle_minutes:
+            idle_minutes[current_day][canonical_code] += minutes
 
     day_payloads = []
 
@@ -4,13 +4,13 @@ from decimal import Decimal, ROUND_HALF_UP
 
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
-from sqlalchemy import func
+from sqlalchemy import func, or_
 
+import production_history
 from extensions import db
 from models import (
     BriquetteMixEntry,
     Customer,
-    DailyProductionEntry,
     Job,
     JobStatus,
     LaborEntry,
@@ -21,6 +21,7 @@ from models import (
     MRNLine,
     SalesActualEntry,
     SalesForecastEntry,
+    SalesRollup,
     PayCategory,
     TeamAttendanceRecord,
     TeamMember,
@@ -209,6 +210,7 @@ def customer_sales_report():
         return jsonify({"msg": "year and month query params are required"}), 400
 
     customer_id = request.args.get("customer_id", type=int)
+    include_empty = (request.args.get("include_empty") or "").strip().lower() in {"1", "true", "yes"}
 
     start_date = date(year, month, 1)
     if month == 12:
@@ -216,120 +218,137 @@ def customer_sales_report():
     else:
         end_date = date(year, month + 1, 1)
 
-    customer_query = Customer.query
-    if customer_id:
-        customer_query = customer_query.filter_by(id=customer_id)
-
-    customers = customer_query.order_by(Customer.name.asc()).all()
-    if not customers:
-        return jsonify({"year": year, "month": month, "customers": []})
-
-    customer_ids = [customer.id for customer in customers]
-    def _empty_day():
-        return {
-            "forecast_amount": 0.0,
-            "forecast_quantity_tons": 0.0,
-            "has_forecast_entry": False,
-            "actual_entries": [],
-        }
-
-    summary = {customer.id: {"customer": customer, "dates": {}} for customer in customers}
-
-    forecast_rows = (
+    forecast_totals = (
         db.session.query(
-            SalesForecastEntry.customer_id,
-            SalesForecastEntry.date,
+            SalesForecastEntry.customer_id.label("customer_id"),
             func.sum(SalesForecastEntry.amount).label("amount"),
             func.sum(SalesForecastEntry.quantity_tons).label("quantity"),
         )
         .filter(SalesForecastEntry.date >= start_date, SalesForecastEntry.date < end_date)
-        .filter(SalesForecastEntry.customer_id.in_(customer_ids))
-        .group_by(SalesForecastEntry.customer_id, SalesForecastEntry.date)
-        .all()
+        .group_by(SalesForecastEntry.customer_id)
+        .subquery()
     )
-
-    for row in forecast_rows:
-        bucket = summary.get(row.customer_id)
-        if not bucket:
-            continue
-        bucket["dates"].setdefault(row.date, _empty_day())
-        bucket["dates"][row.date]["forecast_amount"] = float(row.amount or 0.0)
-        bucket["dates"][row.date]["forecast_quantity_tons"] = float(row.quantity or 0.0)
-        bucket["dates"][row.date]["has_forecast_entry"] = True
-
-    actual_entries = (
-        SalesActualEntry.query.filter(
-            SalesActualEntry.date >= start_date, SalesActualEntry.date < end_date
+    actual_totals = (
+        db.session.query(
+            SalesRollup.customer_id.label("customer_id"),
+            SalesRollup.amount.label("amount"),
+            SalesRollup.quantity_tons.label("quantity"),
         )
-        .filter(SalesActualEntry.customer_id.in_(customer_ids))
-        .order_by(SalesActualEntry.date.asc(), SalesActualEntry.id.asc())
-        .all()
+        .filter(SalesRollup.grain == SalesRollup.GRAIN_MONTH, SalesRollup.period_start == start_date)
+        .subquery()
     )
 
-    for entry in actual_entries:
-        bucket = summary.get(entry.customer_id)
-        if not bucket:
-            continue
+    customer_query = (
+        db.session.query(
+            Customer.id,
+            Customer.name,
+            Customer.category,
+            forecast_totals.c.amount,
+            forecast_totals.c.quantity,
+            actual_totals.c.amount,
+            actual_totals.c.quantity,
+        )
+        .outerjoin(forecast_totals, forecast_totals.c.customer_id == Customer.id)
+        .outerjoin(actual_totals, actual_totals.c.customer_id == Customer.id)
+    )
+    if customer_id:
+        customer_query = customer_query.filter(Customer.id == customer_id)
+    if not include_empty:
+        customer_query = customer_query.filter(
+            or_(forecast_totals.c.customer_id.isnot(None), actual_totals.c.customer_id.isnot(None))
+        )
+    customer_query = customer_query.order_by(Customer.name.asc(), Customer.id.asc())
+
+    paginated = "page" in request.args
+    if paginated:
+        total_rows = customer_query.order_by(None).count()
+        page = max(request.args.get("page", type=int) or 1, 1)
+        page_size = min(max(request.args.get("page_size", type=int) or 25, 1), 200)
+        total_pages = max((total_rows + page_size - 1) // page_size, 1)
+        page = min(page, total_pages)
+        customer_query = customer_query.limit(page_size).offset((page - 1) * page_size)
+
+    customers = customer_query.all()
+    customer_ids = [row[0] for row in customers]
+
+    forecasts_by_customer: dict[int, dict[date, tuple[float, float]]] = {}
+    actuals_by_customer: dict[int, dict[date, list]] = {}
+    if customer_ids:
+        forecast_rows = (
+            db.session.query(
+                SalesForecastEntry.customer_id,
+                SalesForecastEntry.date,
+                func.sum(SalesForecastEntry.amount),
+                func.sum(SalesForecastEntry.quantity_tons),
+            )
+            .filter(SalesForecastEntry.date >= start_date, SalesForecastEntry.date < end_date)
+            .filter(SalesForecastEntry.customer_id.in_(customer_ids))
+            .group_by(SalesForecastEntry.customer_id, SalesForecastEntry.date)
+            .all()
+        )
+        for customer_id_value, day, amount, quantity in forecast_rows:
+            forecasts_by_customer.setdefault(customer_id_value, {})[day] = (
+                float(amount or 0.0),
+                float(quantity or 0.0),
+            )
 
-        day_bucket = bucket["dates"].setdefault(entry.date, _empty_day())
-        day_bucket["actual_entries"].append(
-            {
-                "id": entry.id,
-                "amount": float(entry.amount or 0.0),
-                "quantity_tons": float(entry.quantity_tons or 0.0),
-                "delivery_note_number": entry.delivery_note_number,
-            }
+        actual_rows = (
+            db.session.query(
+                SalesActualEntry.customer_id,
+                SalesActualEntry.date,
+                SalesActualEntry.id,
+                SalesActualEntry.amount,
+                SalesActualEntry.quantity_tons,
+                SalesActualEntry.delivery_note_number,
+            )
+            .filter(SalesActualEntry.date >= start_date, SalesActualEntry.date < end_date)
+            .filter(SalesActualEntry.customer_id.in_(customer_ids))
+            .order_by(
+                SalesActualEntry.date.asc(),
+                func.coalesce(SalesActualEntry.delivery_note_number, "").asc(),
+                SalesActualEntry.id.asc(),
+            )
+            .all()
         )
+        for customer_id_value, day, entry_id, amount, quantity, delivery_note_number in actual_rows:
+            actuals_by_customer.setdefault(customer_id_value, {}).setdefault(day, []).append(
+                (entry_id, float(amount or 0.0), float(quantity or 0.0), delivery_note_number)
+            )
 
     payload = []
-    for customer_id_value, bucket in summary.items():
+    for (
+        customer_id_value,
+        customer_name,
+        customer_category,
+        forecast_amount_total,
+        forecast_quantity_total,
+        actual_amount_total,
+        actual_quantity_total,
+    ) in customers:
+        forecasts = forecasts_by_customer.get(customer_id_value, {})
+        actuals = actuals_by_customer.get(customer_id_value, {})
         dates = []
-        monthly_forecast_total = 0.0
-        monthly_actual_total = 0.0
-        monthly_forecast_quantity = 0.0
-        monthly_actual_quantity = 0.0
-        for day in sorted(bucket["dates"].keys()):
-            entry = bucket["dates"][day]
-            monthly_forecast_total += entry["forecast_amount"]
-            monthly_forecast_quantity += entry["forecast_quantity_tons"]
-
-            actual_rows = sorted(
-                entry["actual_entries"],
-                key=lambda item: ((item["delivery_note_number"] or ""), item["id"]),
-            )
-
-            if actual_rows:
-                for actual in actual_rows:
-                    monthly_actual_total += actual["amount"]
-                    monthly_actual_quantity += actual["quantity_tons"]
-                    dates.append(
-                        {
-                            "date": day.isoformat(),
-                            "forecast_amount": entry["forecast_amount"],
-                            "actual_amount": actual["amount"],
-                            "forecast_quantity_tons": entry["forecast_quantity_tons"],
-                            "actual_quantity_tons": actual["quantity_tons"],
-                            "has_forecast_entry": entry["has_forecast_entry"],
-                            "has_actual_entry": True,
-                            "delivery_note_number": actual["delivery_note_number"],
-                            "actual_entry_id": actual["id"],
-                        }
-                    )
-            else:
+        for day in sorted(set(forecasts) | set(actuals)):
+            forecast_amount, forecast_quantity = forecasts.get(day, (0.0, 0.0))
+            # Forecast-only days still get one row without an actual entry.
+            day_actuals = actuals.get(day) or [(None, 0.0, 0.0, None)]
+            for entry_id, amount, quantity, delivery_note_number in day_actuals:
                 dates.append(
                     {
                         "date": day.isoformat(),
-                        "forecast_amount": entry["forecast_amount"],
-                        "actual_amount": 0.0,
-                        "forecast_quantity_tons": entry["forecast_quantity_tons"],
-                        "actual_quantity_tons": 0.0,
-                        "has_forecast_entry": entry["has_forecast_entry"],
-                        "has_actual_entry": False,
-                        "delivery_note_number": None,
-                        "actual_entry_id": None,
+                        "forecast_amount": forecast_amount,
+                        "actual_amount": amount,
+                        "forecast_quantity_tons": forecast_quantity,
+                        "actual_quantity_tons": quantity,
+                        "has_forecast_entry": day in forecasts,
+                        "has_actual_entry": entry_id is not None,
+                        "delivery_note_number": delivery_note_number,
+                        "actual_entry_id": entry_id,
                     }
                 )
 
+        monthly_actual_total = float(actual_amount_total or 0.0)
+        monthly_actual_quantity = float(actual_quantity_total or 0.0)
         if monthly_actual_quantity:
             monthly_average_unit_price = monthly_actual_total / monthly_actual_quantity
         else:
@@ -338,19 +357,27 @@ def customer_sales_report():
         payload.append(
             {
                 "customer_id": customer_id_value,
-                "customer_name": bucket["customer"].name,
-                "customer_category": bucket["customer"].category.value,
+                "customer_name": customer_name,
+                "customer_category": customer_category.value if customer_category else None,
                 "dates": dates,
-                "monthly_forecast_total": monthly_forecast_total,
+                "monthly_forecast_total": float(forecast_amount_total or 0.0),
                 "monthly_actual_total": monthly_actual_total,
-                "monthly_forecast_quantity_tons": monthly_forecast_quantity,
+                "monthly_forecast_quantity_tons": float(forecast_quantity_total or 0.0),
                 "monthly_actual_quantity_tons": monthly_actual_quantity,
                 "monthly_average_unit_price": monthly_average_unit_price,
                 "monthly_total_sales_amount": monthly_actual_total,
             }
         )
 
-    return jsonify({"year": year, "month": month, "customers": payload})
+    response = {"year": year, "month": month, "customers": payload}
+    if paginated:
+        response["pagination"] = {
+            "page": page,
+            "page_size": page_size,
+            "total_rows": total_rows,
+            "total_pages": total_pages,
+        }
+    return jsonify(response)
 
 
 @bp.get("/sales-summary")
@@ -369,69 +396,67 @@ def sales_summary():
     start_of_month = date(today.year, today.month, 1)
     days_in_month = monthrange(today.year, today.month)[1]
 
-    entries = (
-        db.session.query(
-            SalesActualEntry.date,
-            SalesActualEntry.amount,
-            SalesActualEntry.quantity_tons,
-            SalesActualEntry.customer_id,
-        )
-        .filter(SalesActualEntry.date >= start_of_year, SalesActualEntry.date <= today)
-        .all()
+    # Closed months come from the month buckets; the current month is read
+    # by day so entries dated after ``as_of`` stay out.
+    in_year_to_date = or_(
+        (SalesRollup.grain == SalesRollup.GRAIN_MONTH)
+        & (SalesRollup.period_start >= start_of_year)
+        & (SalesRollup.period_start < start_of_month),
+        (SalesRollup.grain == SalesRollup.GRAIN_DAY)
+        & (SalesRollup.period_start >= start_of_month)
+        & (SalesRollup.period_start <= today),
     )
 
     monthly_values = [0.0 for _ in range(12)]
     monthly_quantities = [0.0 for _ in range(12)]
     daily_values = [0.0 for _ in range(days_in_month)]
-
-    year_value = 0.0
-    year_quantity = 0.0
     month_value = 0.0
     month_quantity = 0.0
-    customer_totals = {}
-
-    for entry in entries:
-        if not entry.date:
-            continue
-
-        amount = float(entry.amount or 0.0)
-        quantity = float(entry.quantity_tons or 0.0)
-        month_index = entry.date.month - 1
-        if month_index < 0 or month_index >= 12:
-            continue
-
-        monthly_values[month_index] += amount
-        monthly_quantities[month_index] += quantity
-        year_value += amount
-        year_quantity += quantity
-
-        if entry.customer_id is not None:
-            bucket = customer_totals.setdefault(
-                entry.customer_id, {"value": 0.0, "quantity": 0.0}
-            )
-            bucket["value"] += amount
-            bucket["quantity"] += quantity
-
-        if entry.date >= start_of_month:
-            day_index = entry.date.day - 1
-            if 0 <= day_index < days_in_month:
-                month_value += amount
-                month_quantity += quantity
-                daily_values[day_index] += amount
 
+    period_rows = (
+        db.session.query(
+            SalesRollup.grain,
+            SalesRollup.period_start,
+            func.sum(SalesRollup.amount),
+            func.sum(SalesRollup.quantity_tons),
+        )
+        .filter(in_year_to_date)
+        .group_by(SalesRollup.grain, SalesRollup.period_start)
+        .all()
+    )
+    for grain, period_start, amount, quantity in period_rows:
+        amount = float(amount or 0.0)
+        quantity = float(quantity or 0.0)
+        monthly_values[period_start.month - 1] += amount
+        monthly_quantities[period_start.month - 1] += quantity
+        if grain == SalesRollup.GRAIN_DAY:
+            month_value += amount
+            month_quantity += quantity
+            daily_values[period_start.day - 1] += amount
+
+    year_value = sum(monthly_values)
+    year_quantity = sum(monthly_quantities)
     average_unit_price = month_value / month_quantity if month_quantity else 0.0
 
+    customer_value = func.sum(SalesRollup.amount)
+    customer_quantity = func.sum(SalesRollup.quantity_tons)
+    top_row = (
+        db.session.query(SalesRollup.customer_id, Customer.name, customer_value, customer_quantity)
+        .outerjoin(Customer, Customer.id == SalesRollup.customer_id)
+        .filter(in_year_to_date)
+        .group_by(SalesRollup.customer_id, Customer.name)
+        .order_by(customer_value.desc(), customer_quantity.desc(), SalesRollup.customer_id.asc())
+        .first()
+    )
+
     top_customer = None
-    if customer_totals:
-        top_customer_id, totals = max(
-            customer_totals.items(), key=lambda item: (item[1]["value"], item[1]["quantity"])
-        )
-        customer = Customer.query.get(top_customer_id)
+    if top_row is not None:
+        top_customer_id, customer_name, value, quantity = top_row
         top_customer = {
             "id": top_customer_id,
-            "name": customer.name if customer else str(top_customer_id),
-            "quantity_tons": round(totals["quantity"], 2),
-            "sales_value": round(totals["value"], 2),
+            "name": customer_name or str(top_customer_id),
+            "quantity_tons": round(float(quantity or 0.0), 2),
+            "sales_value": round(float(value or 0.0), 2),
         }
 
     def _round_list(values):
@@ -950,18 +975,15 @@ def production_unit_economics_daily_stack():
     last_30_start = end_date - timedelta(days=29)
     data_window_start = start_date if start_date <= last_30_start else last_30_start
 
+    production_days = production_history.production_days(data_window_start, end_date)
     production_rows = (
         db.session.query(
-            DailyProductionEntry.date.label("prod_date"),
-            func.coalesce(func.sum(DailyProductionEntry.quantity_tons), 0.0).label("briquette_tons"),
-        )
-        .join(MachineAsset, DailyProductionEntry.asset_id == MachineAsset.id)
-        .filter(
-            DailyProductionEntry.date >= data_window_start,
-            DailyProductionEntry.date <= end_date,
-            func.lower(MachineAsset.code).in_(BRIQUETTE_MACHINE_CODES_LOWER),
+            production_days.c.date.label("prod_date"),
+            func.coalesce(func.sum(production_days.c.quantity_tons), 0.0).label("briquette_tons"),
         )
-        .group_by(DailyProductionEntry.date)
+        .join(MachineAsset, production_days.c.asset_id == MachineAsset.id)
+        .filter(func.lower(MachineAsset.code).in_(BRIQUETTE_MACHINE_CODES_LOWER))
+        .group_by(production_days.c.date)
         .all()
     )
 
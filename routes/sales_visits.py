@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from datetime import datetime, date
+import base64
+from datetime import datetime, date, timezone
 from decimal import Decimal
+import json
 import uuid
 from typing import Any, Iterable, Optional
 from zoneinfo import ZoneInfo
@@ -10,10 +12,13 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
 from sqlalchemy import and_, or_
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 
+import geo_index
 from extensions import db
 from models import (
     Customer,
+    CustomerLocation,
     NonSamproxCustomer,
     SalesTeamMember,
     SalesVisit,
@@ -29,6 +34,14 @@ bp = Blueprint("sales_visits", __name__, url_prefix="/api/sales-visits")
 
 COLOMBO_TZ = ZoneInfo("Asia/Colombo")
 
+VISIT_PAGE_SIZE = 50
+VISIT_MAX_PAGE_SIZE = 200
+
+GPS_MATCH_RADIUS_M = 200
+NEARBY_MAX_RADIUS_M = 5000
+# Check-ins at least this accurate may pin a customer that has no location yet.
+CHECK_IN_PIN_MAX_ACCURACY_M = 50
+
 
 def _extract_user_id(identity: object) -> Optional[int]:
     if isinstance(identity, dict):
@@ -167,6 +180,20 @@ def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
         return None
 
 
+def _encode_visit_cursor(visit: SalesVisit) -> str:
+    raw = json.dumps([visit.visit_date.isoformat(), visit.visit_no]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_visit_cursor(value: str) -> Optional[tuple[date, str]]:
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        visit_date, visit_no = json.loads(raw)
+        return date.fromisoformat(visit_date), str(visit_no)
+    except (ValueError, TypeError):
+        return None
+
+
 @bp.before_request
 @jwt_required()
 def _guard_roles():
@@ -243,8 +270,50 @@ def list_visits():
     if date_to:
         query = query.filter(SalesVisit.visit_date <= date_to)
 
-    visits = query.order_by(SalesVisit.visit_date.desc(), SalesVisit.visit_no.desc()).all()
-    return jsonify({"ok": True, "data": [_serialize_visit(v) for v in visits]})
+    query = query.options(
+        joinedload(SalesVisit.user),
+        joinedload(SalesVisit.customer),
+        joinedload(SalesVisit.non_samprox_customer),
+        joinedload(SalesVisit.approver),
+        selectinload(SalesVisit.attachments),
+    ).order_by(SalesVisit.visit_date.desc(), SalesVisit.visit_no.desc())
+
+    if not any(key in request.args for key in ("limit", "cursor", "updated_since")):
+        return jsonify({"ok": True, "data": [_serialize_visit(v) for v in query.all()]})
+
+    synced_at = datetime.now(timezone.utc)
+    updated_since_param = request.args.get("updated_since")
+    if updated_since_param:
+        updated_since = _parse_timestamp(updated_since_param)
+        if updated_since is None:
+            return jsonify({"ok": False, "error": "Invalid updated_since"}), 400
+        query = query.filter(SalesVisit.updated_at >= updated_since.astimezone(timezone.utc))
+
+    cursor_param = request.args.get("cursor")
+    if cursor_param:
+        position = _decode_visit_cursor(cursor_param)
+        if position is None:
+            return jsonify({"ok": False, "error": "Invalid cursor"}), 400
+        cursor_date, cursor_no = position
+        query = query.filter(
+            or_(
+                SalesVisit.visit_date < cursor_date,
+                and_(SalesVisit.visit_date == cursor_date, SalesVisit.visit_no < cursor_no),
+            )
+        )
+
+    limit = request.args.get("limit", type=int) or VISIT_PAGE_SIZE
+    limit = min(max(limit, 1), VISIT_MAX_PAGE_SIZE)
+    visits = query.limit(limit + 1).all()
+    next_cursor = _encode_visit_cursor(visits[limit - 1]) if len(visits) > limit else None
+    return jsonify(
+        {
+            "ok": True,
+            "data": [_serialize_visit(v) for v in visits[:limit]],
+            "next_cursor": next_cursor,
+            "synced_at": synced_at.isoformat(),
+        }
+    )
 
 
 @bp.post("")
@@ -398,6 +467,120 @@ def update_visit(visit_id: str):
     return jsonify({"ok": True, "data": _serialize_visit(visit)})
 
 
+def _visit_location(visit: SalesVisit) -> Optional[CustomerLocation]:
+    owner = visit.non_samprox_customer or visit.customer
+    return owner.location if owner is not None else None
+
+
+def _scoped_locations(role: RoleEnum, user: User):
+    """Locations the caller may match against: Samprox customers and visible dealers."""
+
+    query = CustomerLocation.query.options(
+        joinedload(CustomerLocation.customer),
+        joinedload(CustomerLocation.non_samprox_customer),
+    )
+    if role == RoleEnum.sales:
+        managed_ids = {user.id}
+    elif role == RoleEnum.outside_manager:
+        managed_ids = _manager_sales_ids(user.id) | {user.id}
+    else:
+        return query
+    return query.outerjoin(
+        NonSamproxCustomer, CustomerLocation.non_samprox_customer_id == NonSamproxCustomer.id
+    ).filter(
+        or_(
+            CustomerLocation.customer_id.isnot(None),
+            NonSamproxCustomer.managed_by_user_id.in_(managed_ids),
+        )
+    )
+
+
+def _serialize_location(location: CustomerLocation, distance_m: Optional[int] = None) -> dict[str, Any]:
+    customer = location.customer
+    non_samprox_customer = location.non_samprox_customer
+    return {
+        "customer_id": location.customer_id,
+        "non_samprox_customer_id": str(location.non_samprox_customer_id) if location.non_samprox_customer_id else None,
+        "name": getattr(non_samprox_customer, "customer_name", None) or getattr(customer, "name", None),
+        "code": getattr(non_samprox_customer, "customer_code", None) or getattr(customer, "code", None),
+        "city": getattr(non_samprox_customer, "city", None),
+        "lat": location.latitude,
+        "lng": location.longitude,
+        "source": location.source,
+        "distance_m": distance_m,
+    }
+
+
+def _parse_coordinates(lat_raw: object, lng_raw: object) -> Optional[tuple[float, float]]:
+    try:
+        lat = float(lat_raw)
+        lng = float(lng_raw)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+@bp.get("/nearby")
+def nearby_customers():
+    role = _current_role()
+    user = _current_user()
+    if not user or not role:
+        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+
+    coordinates = _parse_coordinates(request.args.get("lat"), request.args.get("lng"))
+    if coordinates is None:
+        return jsonify({"ok": False, "error": "Valid lat and lng are required"}), 400
+
+    radius = request.args.get("radius", type=float)
+    if radius is None:
+        radius = GPS_MATCH_RADIUS_M
+    if not 0 < radius <= NEARBY_MAX_RADIUS_M:
+        return jsonify({"ok": False, "error": f"radius must be between 1 and {NEARBY_MAX_RADIUS_M} meters"}), 400
+    limit = min(max(request.args.get("limit", type=int) or 10, 1), 50)
+
+    matches = geo_index.nearby(*coordinates, radius, query=_scoped_locations(role, user), limit=limit)
+    return jsonify({"ok": True, "data": [_serialize_location(location, distance) for location, distance in matches]})
+
+
+@bp.put("/customer-locations")
+def set_customer_location():
+    role = _current_role()
+    user = _current_user()
+    if not user or not role:
+        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+
+    payload = request.get_json() or {}
+    coordinates = _parse_coordinates(payload.get("lat"), payload.get("lng"))
+    if coordinates is None:
+        return jsonify({"ok": False, "error": "Valid lat and lng are required"}), 400
+
+    if payload.get("non_samprox_customer_id"):
+        owner, error = _load_non_samprox_customer(payload["non_samprox_customer_id"], role, user)
+        if error:
+            return error
+    elif payload.get("customer_id"):
+        if not (_is_admin(role) or role == RoleEnum.outside_manager):
+            return jsonify({"ok": False, "error": "Not authorized to locate customers"}), 403
+        try:
+            owner = Customer.query.get(int(payload["customer_id"]))
+        except (TypeError, ValueError):
+            return jsonify({"ok": False, "error": "Invalid customer_id"}), 400
+        if not owner:
+            return jsonify({"ok": False, "error": "Customer not found"}), 404
+    else:
+        return jsonify({"ok": False, "error": "customer_id or non_samprox_customer_id is required"}), 400
+
+    location = owner.location or CustomerLocation()
+    geo_index.set_position(location, *coordinates)
+    location.source = CustomerLocation.SOURCE_MANUAL
+    location.updated_by = user.id
+    owner.location = location
+    db.session.commit()
+    return jsonify({"ok": True, "data": _serialize_location(location)})
+
+
 def _apply_check_in_metadata(
     visit: SalesVisit, lat: float, lng: float, ts: Optional[datetime] = None, accuracy_m: Optional[int] = None
 ) -> None:
@@ -406,19 +589,13 @@ def _apply_check_in_metadata(
     visit.check_in_lng = Decimal(str(lng))
     visit.check_in_accuracy_m = accuracy_m
     visit.gps_mismatch = False
-    if visit.customer and getattr(visit.customer, "latitude", None) is not None and getattr(visit.customer, "longitude", None) is not None:
-        try:
-            distance = haversine_distance_meters(
-                float(lat),
-                float(lng),
-                float(visit.customer.latitude),
-                float(visit.customer.longitude),
-            )
-            visit.distance_from_customer_m = distance
-            if distance > 200:
-                visit.gps_mismatch = True
-        except Exception:
-            visit.distance_from_customer_m = None
+    visit.distance_from_customer_m = None
+    location = _visit_location(visit)
+    if location is not None:
+        distance = haversine_distance_meters(float(lat), float(lng), location.latitude, location.longitude)
+        visit.distance_from_customer_m = distance
+        if distance > GPS_MATCH_RADIUS_M:
+            visit.gps_mismatch = True
     visit.approval_status = SalesVisitApprovalStatus.pending if _visit_requires_approval(visit) else SalesVisitApprovalStatus.not_required
 
 
@@ -462,8 +639,24 @@ def check_in(visit_id: str):
     ts = _parse_timestamp(payload.get("timestamp"))
     _apply_check_in_metadata(visit, lat, lng, ts, accuracy_m=accuracy)
     visit.updated_by = user.id
+
+    matches = geo_index.nearby(lat, lng, GPS_MATCH_RADIUS_M, query=_scoped_locations(role, user), limit=1)
+    owner = visit.non_samprox_customer or visit.customer
+    if (
+        owner is not None
+        and owner.location is None
+        and not matches
+        and accuracy is not None
+        and accuracy <= CHECK_IN_PIN_MAX_ACCURACY_M
+    ):
+        location = CustomerLocation(source=CustomerLocation.SOURCE_CHECK_IN, updated_by=user.id)
+        geo_index.set_position(location, lat, lng)
+        owner.location = location
+
     db.session.commit()
-    return jsonify({"ok": True, "data": _serialize_visit(visit)})
+    data = _serialize_visit(visit)
+    data["matched_customer"] = _serialize_location(*matches[0]) if matches else None
+    return jsonify({"ok": True, "data": data})
 
 
 def _apply_checkout_metadata(
@@ -602,6 +795,9 @@ def add_attachment(visit_id: str):
         uploaded_by=user.id,
     )
     db.session.add(attachment)
+    # Attachments are part of the visit payload, so bump it for delta sync.
+    visit.updated_by = user.id
+    visit.updated_at = datetime.utcnow()
     db.session.commit()
     db.session.refresh(visit)
     return jsonify({"ok": True, "data": [_serialize_attachment(att) for att in visit.attachments]}), 201
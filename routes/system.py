@@ -1,40 +1,95 @@
+import threading
 from datetime import date, datetime, time, timedelta
+from time import monotonic
 from zoneinfo import ZoneInfo
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import jwt_required
-from sqlalchemy import func, or_
+from sqlalchemy import select
 
 from extensions import db
-from models import (
-    BriquetteMixEntry,
-    DailyProductionEntry,
-    MachineIdleEvent,
-    MRNHeader,
-    MRNLine,
-    SalesActualEntry,
-    TeamAttendanceRecord,
-)
+from models import DailyActivity
 
 bp = Blueprint("system", __name__, url_prefix="/api/system")
 
+# Response key of each status check and the activity ledger source behind it.
+STATUS_CHECK_SOURCES = {
+    "daily_production_entry": DailyActivity.SOURCE_PRODUCTION,
+    "sales_actual_entry": DailyActivity.SOURCE_SALES,
+    "mrn_lines": DailyActivity.SOURCE_MRN,
+    "briquette_mix_entries": DailyActivity.SOURCE_MIX,
+    "machine_idle_event": DailyActivity.SOURCE_IDLE,
+    "team_attendance_record": DailyActivity.SOURCE_ATTENDANCE,
+}
+
+ACTIVITY_MAX_RANGE_DAYS = 366
+
+
+def _activity_counts(yesterday: date, today: date) -> dict[str, tuple[int, int]]:
+    """Return yesterday's and today's row counts per source from the activity ledger."""
+
+    counts: dict[str, tuple[int, int]] = {}
+    rows = db.session.execute(
+        select(DailyActivity.day, DailyActivity.source, DailyActivity.row_count).where(
+            DailyActivity.day.in_((yesterday, today))
+        )
+    )
+    for day, source, row_count in rows:
+        previous = counts.get(source, (0, 0))
+        if day == yesterday:
+            counts[source] = (int(row_count or 0), previous[1])
+        else:
+            counts[source] = (previous[0], int(row_count or 0))
+    return counts
+
+
+class StatusCache:
+    """Cache of the latest status payload shared by all requests."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._payload = None
+        self._expires_at = 0.0
+
+    def get(self):
+        with self._lock:
+            if self._payload is not None and monotonic() < self._expires_at:
+                return self._payload
+            return None
+
+    def set(self, payload, ttl_seconds: float) -> None:
+        with self._lock:
+            self._payload = payload
+            self._expires_at = monotonic() + ttl_seconds
+
+    def clear(self) -> None:
+        with self._lock:
+            self._payload = None
+            self._expires_at = 0.0
+
+
+def _status_cache() -> StatusCache:
+    cache = current_app.extensions.get("system_status_cache")
+    if cache is None:
+        cache = StatusCache()
+        current_app.extensions["system_status_cache"] = cache
+    return cache
+
 
 @bp.get("/status")
 @jwt_required()
 def get_system_status():
+    ttl_seconds = float(current_app.config.get("SYSTEM_STATUS_CACHE_SECONDS", 60.0))
+    cached = _status_cache().get() if ttl_seconds > 0 else None
+    if cached is not None:
+        return jsonify(cached)
+
     now = datetime.now(tz=ZoneInfo("Asia/Colombo"))
     today = now.date()
     yesterday = today - timedelta(days=1)
     deadline = time(10, 0, tzinfo=ZoneInfo("Asia/Colombo"))
     past_deadline = now.timetz() >= deadline
 
-    def count_records(query):
-        try:
-            return query.count()
-        except Exception:
-            db.session.rollback()
-            return 0
-
     def evaluate_status(yesterday_count: int, today_count: int):
         if yesterday_count > 0:
             return {"status": "OK", "is_missing": False}
@@ -47,71 +102,94 @@ def get_system_status():
 
         return {"status": "OK", "is_missing": False}
 
-    production_yesterday = count_records(DailyProductionEntry.query.filter_by(date=yesterday))
-    production_today = count_records(DailyProductionEntry.query.filter_by(date=today))
-    production_status = evaluate_status(production_yesterday, production_today)
+    try:
+        counts = _activity_counts(yesterday, today)
+    except Exception:
+        db.session.rollback()
+        counts = {}
 
-    sales_yesterday = count_records(SalesActualEntry.query.filter_by(date=yesterday))
-    sales_today = count_records(SalesActualEntry.query.filter_by(date=today))
-    sales_status = evaluate_status(sales_yesterday, sales_today)
+    checks = {
+        key: evaluate_status(*counts.get(source, (0, 0)))
+        for key, source in STATUS_CHECK_SOURCES.items()
+    }
 
-    mrn_yesterday = count_records(MRNLine.query.join(MRNHeader).filter(MRNHeader.date == yesterday))
-    mrn_today = count_records(MRNLine.query.join(MRNHeader).filter(MRNHeader.date == today))
-    mrn_status = evaluate_status(mrn_yesterday, mrn_today)
+    any_missing = any(value["is_missing"] for value in checks.values())
+    system_status = "OUT OF DATE" if any_missing else "UPDATED"
 
-    mix_yesterday = count_records(BriquetteMixEntry.query.filter_by(date=yesterday))
-    mix_today = count_records(BriquetteMixEntry.query.filter_by(date=today))
-    mix_status = evaluate_status(mix_yesterday, mix_today)
+    payload = {
+        "system_status": system_status,
+        **{key: value["status"] for key, value in checks.items()},
+        "deadline": "10:00 AM",
+        "last_checked": now.isoformat(),
+    }
+    if ttl_seconds > 0:
+        _status_cache().set(payload, ttl_seconds)
+    return jsonify(payload)
 
-    idle_yesterday = count_records(
-        MachineIdleEvent.query.filter(
-            or_(
-                func.date(MachineIdleEvent.started_at) == yesterday,
-                func.date(MachineIdleEvent.ended_at) == yesterday,
-            )
-        )
-    )
-    idle_today = count_records(
-        MachineIdleEvent.query.filter(
-            or_(
-                func.date(MachineIdleEvent.started_at) == today,
-                func.date(MachineIdleEvent.ended_at) == today,
-            )
-        )
-    )
-    idle_status = evaluate_status(idle_yesterday, idle_today)
-
-    def attendance_count_for_date(target_date: date) -> int:
-        month_key = f"{target_date.year}-{target_date.month:02d}"
-        day_key = target_date.isoformat()
-        records = TeamAttendanceRecord.query.filter_by(month=month_key).all()
-        return sum(
-            1
-            for record in records
-            if isinstance(record.entries, dict) and day_key in record.entries
-        )
 
-    attendance_yesterday = attendance_count_for_date(yesterday)
-    attendance_today = attendance_count_for_date(today)
-    attendance_status = evaluate_status(attendance_yesterday, attendance_today)
+def _parse_iso_date(value: str | None, field_name: str) -> date | None:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError as exc:
+        raise ValueError(f"Invalid {field_name}. Use YYYY-MM-DD.") from exc
 
-    checks = {
-        "daily_production_entry": production_status,
-        "sales_actual_entry": sales_status,
-        "mrn_lines": mrn_status,
-        "briquette_mix_entries": mix_status,
-        "machine_idle_event": idle_status,
-        "team_attendance_record": attendance_status,
-    }
 
-    any_missing = any(value["is_missing"] for value in checks.values())
-    system_status = "OUT OF DATE" if any_missing else "UPDATED"
+@bp.get("/activity")
+@jwt_required()
+def get_activity_completeness():
+    """Per-day entry counts and missing sources over a date range."""
+
+    today = datetime.now(tz=ZoneInfo("Asia/Colombo")).date()
+    try:
+        start_date = _parse_iso_date(request.args.get("start_date"), "start_date") or today.replace(day=1)
+        end_date = _parse_iso_date(request.args.get("end_date"), "end_date") or today
+    except ValueError as exc:
+        return jsonify({"msg": str(exc)}), 400
+
+    if start_date > end_date:
+        return jsonify({"msg": "start_date must be on or before end_date."}), 400
+    if (end_date - start_date).days + 1 > ACTIVITY_MAX_RANGE_DAYS:
+        return jsonify({"msg": f"Date range cannot exceed {ACTIVITY_MAX_RANGE_DAYS} days."}), 400
+
+    sources_param = request.args.get("sources")
+    if sources_param:
+        sources = [value.strip().lower() for value in sources_param.split(",") if value.strip()]
+        unknown = [value for value in sources if value not in DailyActivity.SOURCES]
+        if unknown:
+            return jsonify({"msg": f"Unknown sources: {', '.join(unknown)}."}), 400
+        sources = list(dict.fromkeys(sources))
+    else:
+        sources = list(DailyActivity.SOURCES)
+
+    counts: dict[date, dict[str, int]] = {}
+    for day, source, row_count in db.session.execute(
+        select(DailyActivity.day, DailyActivity.source, DailyActivity.row_count).where(
+            DailyActivity.day >= start_date,
+            DailyActivity.day <= end_date,
+            DailyActivity.source.in_(sources),
+        )
+    ):
+        counts.setdefault(day, {})[source] = int(row_count or 0)
+
+    days = []
+    missing_days = {source: 0 for source in sources}
+    current = start_date
+    while current <= end_date:
+        day_counts = {source: counts.get(current, {}).get(source, 0) for source in sources}
+        missing = [source for source, value in day_counts.items() if value <= 0]
+        for source in missing:
+            missing_days[source] += 1
+        days.append({"date": current.isoformat(), "counts": day_counts, "missing": missing})
+        current += timedelta(days=1)
 
     return jsonify(
         {
-            "system_status": system_status,
-            **{key: value["status"] for key, value in checks.items()},
-            "deadline": "10:00 AM",
-            "last_checked": now.isoformat(),
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "sources": sources,
+            "days": days,
+            "missing_days": missing_days,
         }
     )
@@ -1,19 +1,21 @@
 import calendar
 from collections import defaultdict
 from datetime import date, datetime
+import io
 import re
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from zoneinfo import ZoneInfo
 
-from flask import Blueprint, current_app, jsonify, request
+from flask import Blueprint, current_app, jsonify, request, send_file
 from flask_jwt_extended import jwt_required
-from sqlalchemy import func, inspect, text
+from openpyxl import Workbook
+from sqlalchemy import and_, case, func, inspect, or_, select, text, union_all
 from sqlalchemy import types as sqltypes
 from sqlalchemy.exc import DataError, IntegrityError, OperationalError, ProgrammingError
 
+import production_history
 from extensions import db
 from models import (
-    DailyProductionEntry,
     MachineAsset,
     PayCategory,
     RoleEnum,
@@ -1261,18 +1263,15 @@ def _compute_target_allowance_amounts(month: str) -> dict[int, Decimal]:
     if is_current_month:
         query_end = min(today, month_end)
 
+    daily_totals = production_history.production_days(month_start, query_end)
     totals_query = (
         db.session.query(
-            DailyProductionEntry.date,
-            func.coalesce(func.sum(DailyProductionEntry.quantity_tons), 0.0),
+            daily_totals.c.date,
+            func.coalesce(func.sum(daily_totals.c.quantity_tons), 0.0),
         )
-        .join(MachineAsset, DailyProductionEntry.asset_id == MachineAsset.id)
-        .filter(
-            DailyProductionEntry.date >= month_start,
-            DailyProductionEntry.date <= query_end,
-            MachineAsset.code.in_(_TARGET_ALLOWANCE_MACHINE_CODES),
-        )
-        .group_by(DailyProductionEntry.date)
+        .join(MachineAsset, daily_totals.c.asset_id == MachineAsset.id)
+        .filter(MachineAsset.code.in_(_TARGET_ALLOWANCE_MACHINE_CODES))
+        .group_by(daily_totals.c.date)
         .all()
     )
 
@@ -1649,12 +1648,41 @@ def _data_error_message(exc: DataError, *, fallback: str) -> str:
 
 
 # ---------------------------------------------------------------------------
-# Routes
+# Pay sheets
 # ---------------------------------------------------------------------------
 
-@bp.get("/loading-pay")
-@jwt_required()
-def loading_pay_sheet():
+_XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+_CENT = Decimal("0.01")
+# Quantities are summed as floats in SQL; rounding the totals to a gram keeps
+# float noise (25 t summing to 24.999999999999996 t) off the slab boundaries.
+_TON_PRECISION = Decimal("0.000001")
+
+_LOADING_PAY_COLUMNS = (
+    ("Reg No", "regNumber"),
+    ("Name", "name"),
+    ("Loading Quantity (t)", "loadingQuantityTons"),
+    ("Loading Quantity (kg)", "loadingQuantity"),
+    ("Loading Pay", "loadingPay"),
+)
+_TRANSPORT_PAY_COLUMNS = (
+    ("Reg No", "regNumber"),
+    ("Name", "name"),
+    ("Wood Shaving (t)", "woodShavingQuantity"),
+    ("Briquettes (t)", "briquetteQuantity"),
+    ("Driver Payment", "driverPayment"),
+    ("Helper Payment", "helperPayment"),
+    ("Extra Payment", "extraPayment"),
+    ("Total Payment", "totalPayment"),
+)
+
+
+def _pay_period_from_args() -> tuple[int, int, date, date]:
+    """Return ``(month, year, start, end)`` from the query string.
+
+    ``end`` is the first day of the following month. Raises ``ValueError``
+    with a client-facing message for invalid input.
+    """
+
     today = date.today()
     month_param = request.args.get("month")
     year_param = request.args.get("year")
@@ -1663,77 +1691,125 @@ def loading_pay_sheet():
         month = int(month_param) if month_param else today.month
         year = int(year_param) if year_param else today.year
     except (TypeError, ValueError):
-        return jsonify({"msg": "Month and year must be integers."}), 400
+        raise ValueError("Month and year must be integers.") from None
 
     if month < 1 or month > 12:
-        return jsonify({"msg": "Month must be between 1 and 12."}), 400
+        raise ValueError("Month must be between 1 and 12.")
 
     if year < 1:
-        return jsonify({"msg": "Year must be a positive integer."}), 400
+        raise ValueError("Year must be a positive integer.")
 
     if month == 12:
         period_end = date(year + 1, 1, 1)
     else:
         period_end = date(year, month + 1, 1)
-    period_start = date(year, month, 1)
+    return month, year, date(year, month, 1), period_end
 
-    entries = (
-        SalesActualEntry.query.filter(
-            SalesActualEntry.date >= period_start,
-            SalesActualEntry.date < period_end,
-        ).all()
-    )
 
-    loader_totals: dict[int, Decimal] = {}
+def _decimal_total(value) -> Decimal:
+    if value is None:
+        return Decimal("0")
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return Decimal("0")
 
-    for entry in entries:
-        quantity_value = Decimal(str(entry.quantity_tons or 0))
-        if quantity_value <= 0:
-            continue
 
-        raw_loader_ids = [entry.loader1_id, entry.loader2_id, entry.loader3_id]
-        loader_ids: list[int] = []
-        seen: set[int] = set()
-        for loader_id in raw_loader_ids:
-            if isinstance(loader_id, int) and loader_id not in seen:
-                loader_ids.append(loader_id)
-                seen.add(loader_id)
+def _distinct_member_conditions(columns) -> list:
+    """Return one condition per column that holds a member not named earlier in the row."""
 
-        if not loader_ids:
-            continue
+    conditions = []
+    for index, column in enumerate(columns):
+        earlier = [or_(prior.is_(None), prior != column) for prior in columns[:index]]
+        conditions.append(and_(column.isnot(None), *earlier))
+    return conditions
 
-        share = quantity_value / len(loader_ids)
 
-        for loader_id in loader_ids:
-            loader_totals[loader_id] = loader_totals.get(loader_id, Decimal("0")) + share
+def _distinct_member_count(columns):
+    """SQL expression counting the distinct members named in ``columns``."""
 
-    if loader_totals:
-        members = (
-            TeamMember.query.filter(TeamMember.id.in_(loader_totals.keys()))
-            .order_by(TeamMember.name.asc())
-            .all()
+    count = None
+    for condition in _distinct_member_conditions(columns):
+        term = case((condition, 1), else_=0)
+        count = term if count is None else count + term
+    return count
+
+
+def _unpivot_members(columns, values, criteria):
+    """Unpivot member columns into ``member_id`` rows with UNION ALL.
+
+    Every source row matching ``criteria`` yields one row per distinct member
+    it names, carrying the labelled ``values`` alongside.
+    """
+
+    return union_all(
+        *(
+            select(column.label("member_id"), *values).where(condition, *criteria)
+            for column, condition in zip(columns, _distinct_member_conditions(columns))
         )
-        member_lookup = {member.id: member for member in members}
-    else:
-        member_lookup = {}
+    ).subquery()
 
+
+def _sort_pay_records(totals: dict, member_lookup: dict) -> list[int]:
     def _sort_key(member_id: int) -> tuple[str, str, int]:
         member = member_lookup.get(member_id)
         if not member:
             return ("", "", member_id)
         name = (member.name or "").casefold()
-        reg = member.reg_number or ""
+        reg = (member.reg_number or "").strip()
         return (name, reg, member_id)
 
-    records = []
-    for member_id in sorted(loader_totals.keys(), key=_sort_key):
-        member = member_lookup.get(member_id)
-        if not member:
-            continue
+    return sorted((member_id for member_id in totals if member_id in member_lookup), key=_sort_key)
+
+
+def _load_pay_members(member_ids) -> dict[int, TeamMember]:
+    if not member_ids:
+        return {}
+    members = TeamMember.query.filter(TeamMember.id.in_(list(member_ids))).all()
+    return {member.id: member for member in members}
+
+
+def _loading_pay_records(period_start: date, period_end: date) -> list[dict]:
+    """Aggregate each loader's share of the month's sales into pay records.
 
-        base_quantity_tons = loader_totals[member_id]
+    Loader columns are unpivoted in SQL and summed per loader and crew size,
+    so only one row per (loader, crew size) reaches Python.
+    """
+
+    loaders = (
+        SalesActualEntry.loader1_id,
+        SalesActualEntry.loader2_id,
+        SalesActualEntry.loader3_id,
+    )
+    shares = _unpivot_members(
+        loaders,
+        (
+            _distinct_member_count(loaders).label("crew_size"),
+            SalesActualEntry.quantity_tons.label("quantity_tons"),
+        ),
+        (
+            SalesActualEntry.date >= period_start,
+            SalesActualEntry.date < period_end,
+            SalesActualEntry.quantity_tons > 0,
+        ),
+    )
+    rows = db.session.execute(
+        select(shares.c.member_id, shares.c.crew_size, func.sum(shares.c.quantity_tons))
+        .group_by(shares.c.member_id, shares.c.crew_size)
+    )
+
+    loader_totals: dict[int, Decimal] = defaultdict(Decimal)
+    for member_id, crew_size, quantity_tons in rows:
+        if crew_size:
+            quantity = _decimal_total(quantity_tons).quantize(_TON_PRECISION, rounding=ROUND_HALF_UP)
+            loader_totals[member_id] += quantity / crew_size
+
+    member_lookup = _load_pay_members(loader_totals.keys())
+    records = []
+    for member_id in _sort_pay_records(loader_totals, member_lookup):
+        member = member_lookup[member_id]
+        base_quantity_tons = loader_totals[member_id].quantize(_TON_PRECISION, rounding=ROUND_HALF_UP)
         quantity_kg_raw = base_quantity_tons * KG_PER_TON
-        quantity_kg = quantity_kg_raw.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
         pay: Decimal | None = None
         reg_number = (member.reg_number or "").strip().upper()
@@ -1741,115 +1817,140 @@ def loading_pay_sheet():
             pay = _calculate_slab_loading_pay(quantity_kg_raw)
 
         if pay is None:
-            pay = (quantity_kg_raw * LOADING_PAY_RATE).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-
-        quantity_display = base_quantity_tons.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            pay = (quantity_kg_raw * LOADING_PAY_RATE).quantize(_CENT, rounding=ROUND_HALF_UP)
 
         records.append(
             {
                 "teamMemberId": member.id,
                 "regNumber": member.reg_number,
                 "name": member.name,
-                "loadingQuantity": float(quantity_kg),
+                "loadingQuantity": float(quantity_kg_raw.quantize(_CENT, rounding=ROUND_HALF_UP)),
                 "loadingPay": float(pay),
-                "loadingQuantityTons": float(quantity_display),
+                "loadingQuantityTons": float(base_quantity_tons.quantize(_CENT, rounding=ROUND_HALF_UP)),
             }
         )
-
-    return jsonify(
-        {
-            "month": month,
-            "year": year,
-            "rate": float(LOADING_PAY_RATE),
-            "records": records,
-        }
-    )
+    return records
+
+
+def _sales_helper_rate(vehicle: str, helper_count: int) -> Decimal:
+    if vehicle == "LI-1795":
+        if helper_count >= 3:
+            return Decimal("1500")
+        if helper_count == 2:
+            return Decimal("2000")
+        if helper_count == 1:
+            return Decimal("3000")
+    elif vehicle == "LB-3237":
+        if helper_count >= 2:
+            return Decimal("1500")
+        if helper_count == 1:
+            return Decimal("3000")
+    return Decimal("0")
 
 
-@bp.get("/transport-pay")
-@jwt_required()
-def transport_pay_sheet():
-    today = date.today()
-    month_param = request.args.get("month")
-    year_param = request.args.get("year")
+def _mrn_helper_rate(vehicle: str, helper_count: int) -> Decimal:
+    if vehicle in {"LI-1795", "LB-3237"}:
+        if helper_count >= 2:
+            return Decimal("1500")
+        if helper_count == 1:
+            return Decimal("3000")
+    return Decimal("0")
 
-    try:
-        month = int(month_param) if month_param else today.month
-        year = int(year_param) if year_param else today.year
-    except (TypeError, ValueError):
-        return jsonify({"msg": "Month and year must be integers."}), 400
 
-    if month < 1 or month > 12:
-        return jsonify({"msg": "Month must be between 1 and 12."}), 400
+def _wood_extra_threshold(vehicle: str) -> Decimal | None:
+    if vehicle == "LI-1795":
+        return Decimal("3")
+    if vehicle == "LB-3237":
+        return Decimal("2")
+    return None
 
-    if year < 1:
-        return jsonify({"msg": "Year must be a positive integer."}), 400
 
-    if month == 12:
-        period_end = date(year + 1, 1, 1)
-    else:
-        period_end = date(year, month + 1, 1)
-    period_start = date(year, month, 1)
+def _new_transport_totals() -> dict[str, Decimal]:
+    return {
+        "wood_qty": Decimal("0"),
+        "briquette_qty": Decimal("0"),
+        "driver_pay": Decimal("0"),
+        "helper_pay": Decimal("0"),
+        "extra_pay": Decimal("0"),
+    }
 
-    allowed_vehicles = {value.strip().upper() for value in TRANSPORT_VEHICLE_NUMBERS}
 
-    def _normalize_vehicle(value: str | None) -> str:
-        return (value or "").strip().upper()
+def _accumulate_sales_transport(member_totals, allowed_vehicles, period_start, period_end):
+    """Add briquette quantities and helper pay from sales trips, grouped in SQL.
 
-    def _decimal_from(value) -> Decimal:
-        if isinstance(value, Decimal):
-            return value
-        if value is None:
-            return Decimal("0")
-        try:
-            return Decimal(str(value))
-        except (InvalidOperation, ValueError):
-            return Decimal("0")
+    Returns ``{(date, vehicle): [(driver_id, trips, first_trips), ...]}`` so
+    the caller can interleave the sales trips with MRN trips of the same day.
+    """
 
-    def _unique_members(*values) -> list[int]:
-        seen: set[int] = set()
-        result: list[int] = []
-        for value in values:
-            if isinstance(value, int) and value not in seen:
-                result.append(value)
-                seen.add(value)
-        return result
-
-    def _ensure_member(member_id: int):
-        if not isinstance(member_id, int):
-            return None
-        totals = member_totals.get(member_id)
-        if totals is None:
-            totals = {
-                "wood_qty": Decimal("0"),
-                "briquette_qty": Decimal("0"),
-                "driver_pay": Decimal("0"),
-                "helper_pay": Decimal("0"),
-                "extra_pay": Decimal("0"),
-            }
-            member_totals[member_id] = totals
-        return totals
-
-    def _wood_extra_threshold(vehicle: str) -> Decimal | None:
-        if vehicle == "LI-1795":
-            return Decimal("3")
-        if vehicle == "LB-3237":
-            return Decimal("2")
-        return None
+    vehicle = func.upper(SalesActualEntry.vehicle_number)
+    criteria = (
+        SalesActualEntry.date >= period_start,
+        SalesActualEntry.date < period_end,
+        SalesActualEntry.vehicle_number.isnot(None),
+        vehicle.in_(tuple(allowed_vehicles)),
+    )
 
-    member_totals: dict[int, dict[str, Decimal]] = {}
-    trips_by_vehicle_date: dict[tuple[date, str], list[dict[str, object]]] = defaultdict(list)
+    participants = _unpivot_members(
+        (SalesActualEntry.driver_id, SalesActualEntry.helper1_id, SalesActualEntry.helper2_id),
+        (SalesActualEntry.quantity_tons.label("quantity_tons"),),
+        criteria + (SalesActualEntry.quantity_tons > 0,),
+    )
+    for member_id, quantity_tons in db.session.execute(
+        select(participants.c.member_id, func.sum(participants.c.quantity_tons))
+        .group_by(participants.c.member_id)
+    ):
+        member_totals[member_id]["briquette_qty"] += _decimal_total(quantity_tons).quantize(
+            _TON_PRECISION, rounding=ROUND_HALF_UP
+        )
 
-    sales_entries = (
-        SalesActualEntry.query.filter(
-            SalesActualEntry.date >= period_start,
-            SalesActualEntry.date < period_end,
-            SalesActualEntry.vehicle_number.isnot(None),
-            func.upper(SalesActualEntry.vehicle_number).in_(tuple(allowed_vehicles)),
+    helper_columns = (SalesActualEntry.helper1_id, SalesActualEntry.helper2_id)
+    helpers = _unpivot_members(
+        helper_columns,
+        (
+            vehicle.label("vehicle"),
+            _distinct_member_count(helper_columns).label("helper_count"),
+        ),
+        criteria,
+    )
+    for member_id, helper_vehicle, helper_count, trips in db.session.execute(
+        select(helpers.c.member_id, helpers.c.vehicle, helpers.c.helper_count, func.count())
+        .group_by(helpers.c.member_id, helpers.c.vehicle, helpers.c.helper_count)
+    ):
+        helper_rate = _sales_helper_rate(helper_vehicle, int(helper_count or 0))
+        if helper_rate > 0:
+            member_totals[member_id]["helper_pay"] += helper_rate * trips
+
+    ranked = (
+        select(
+            SalesActualEntry.date.label("trip_date"),
+            vehicle.label("vehicle"),
+            SalesActualEntry.driver_id.label("driver_id"),
+            func.row_number()
+            .over(partition_by=(SalesActualEntry.date, vehicle), order_by=SalesActualEntry.id)
+            .label("trip_no"),
         )
-        .order_by(SalesActualEntry.date.asc(), SalesActualEntry.id.asc())
-        .all()
+        .where(*criteria)
+        .subquery()
     )
+    sales_trips: dict[tuple[date, str], list[tuple[int | None, int, int]]] = defaultdict(list)
+    for trip_date, trip_vehicle, driver_id, trips, first_trips in db.session.execute(
+        select(
+            ranked.c.trip_date,
+            ranked.c.vehicle,
+            ranked.c.driver_id,
+            func.count(),
+            func.sum(case((ranked.c.trip_no == 1, 1), else_=0)),
+        ).group_by(ranked.c.trip_date, ranked.c.vehicle, ranked.c.driver_id)
+    ):
+        sales_trips[(trip_date, trip_vehicle)].append((driver_id, int(trips), int(first_trips or 0)))
+    return sales_trips
+
+
+def _accumulate_mrn_transport(member_totals, allowed_vehicles, period_start, period_end):
+    """Add wood shaving quantities, helper pay and extras from MRN lines.
+
+    Returns ``{(date, vehicle): [trip, ...]}`` with one trip per MRN header.
+    """
 
     mrn_rows = (
         db.session.query(
@@ -1882,223 +1983,236 @@ def transport_pay_sheet():
         .all()
     )
 
+    def _unique_members(*values) -> list[int]:
+        seen: set[int] = set()
+        result: list[int] = []
+        for value in values:
+            if isinstance(value, int) and value not in seen:
+                result.append(value)
+                seen.add(value)
+        return result
+
     mrn_headers: dict[object, dict[str, object]] = {}
 
     for row in mrn_rows:
-        vehicle = _normalize_vehicle(getattr(row, "vehicle_no", None))
+        vehicle = (row.vehicle_no or "").strip().upper()
         if not vehicle or vehicle not in allowed_vehicles:
             continue
 
-        helpers = _unique_members(
-            getattr(row, "helper1_id", None),
-            getattr(row, "helper2_id", None),
-            getattr(row, "helper3_id", None),
-        )
-
-        mrn_id = getattr(row, "mrn_id", None)
-        header_info = mrn_headers.get(mrn_id)
+        helpers = _unique_members(row.helper1_id, row.helper2_id)
+        header_info = mrn_headers.get(row.mrn_id)
 
         if header_info is None:
-            header_created = getattr(row, "header_created_at", None)
-            if header_created is None:
-                header_created = datetime.combine(
-                    getattr(row, "mrn_date"),
-                    datetime.min.time(),
-                )
-            line_created = getattr(row, "line_created_at", None) or header_created
-
+            header_created = row.header_created_at or datetime.combine(row.mrn_date, datetime.min.time())
+            line_created = row.line_created_at or header_created
             header_info = {
-                "date": getattr(row, "mrn_date"),
+                "date": row.mrn_date,
                 "vehicle": vehicle,
-                "driver_id": getattr(row, "driver_id", None),
+                "driver_id": row.driver_id,
                 "helpers": list(helpers),
-                "order_key": (header_created, line_created, str(getattr(row, "line_id", ""))),
+                "order_key": (header_created, line_created, str(row.line_id or "")),
                 "extra_applied": False,
             }
-            mrn_headers[mrn_id] = header_info
+            mrn_headers[row.mrn_id] = header_info
         else:
             for helper_id in helpers:
                 if helper_id not in header_info["helpers"]:
                     header_info["helpers"].append(helper_id)
 
-        wood_quantity = Decimal("0")
-        item_name = (getattr(row, "item_name", "") or "").strip().casefold()
-        if item_name == "wood shaving":
-            wood_quantity = _decimal_from(getattr(row, "qty_ton", None))
-
-        if wood_quantity > 0:
-            participants = _unique_members(
-                getattr(row, "driver_id", None),
-                getattr(row, "helper1_id", None),
-                getattr(row, "helper2_id", None),
-                getattr(row, "helper3_id", None),
-            )
-            for participant_id in participants:
-                totals = _ensure_member(participant_id)
-                if totals is not None:
-                    totals["wood_qty"] += wood_quantity
-
-            threshold = _wood_extra_threshold(vehicle)
-            if threshold is not None and wood_quantity > threshold and not header_info["extra_applied"]:
-                for helper_id in header_info["helpers"]:
-                    totals = _ensure_member(helper_id)
-                    if totals is not None:
-                        totals["extra_pay"] += HELPER_EXTRA_RATE
-                header_info["extra_applied"] = True
+        item_name = (row.item_name or "").strip().casefold()
+        if item_name != "wood shaving":
+            continue
+        wood_quantity = _decimal_total(row.qty_ton)
+        if wood_quantity <= 0:
+            continue
+
+        for participant_id in _unique_members(row.driver_id, row.helper1_id, row.helper2_id):
+            member_totals[participant_id]["wood_qty"] += wood_quantity
 
+        threshold = _wood_extra_threshold(vehicle)
+        if threshold is not None and wood_quantity > threshold and not header_info["extra_applied"]:
+            for helper_id in header_info["helpers"]:
+                member_totals[helper_id]["extra_pay"] += HELPER_EXTRA_RATE
+            header_info["extra_applied"] = True
+
+    mrn_trips: dict[tuple[date, str], list[dict[str, object]]] = defaultdict(list)
     for header in mrn_headers.values():
-        driver_id = header.get("driver_id")
-        if isinstance(driver_id, int):
-            _ensure_member(driver_id)
-        header_date = header.get("date")
-        vehicle = header.get("vehicle")
-        if not isinstance(header_date, date) or not vehicle:
+        header_date = header["date"]
+        vehicle = header["vehicle"]
+        if not isinstance(header_date, date):
             continue
-        key = (header_date, vehicle)
-        trips_by_vehicle_date[key].append(
+        driver_id = header["driver_id"]
+        mrn_trips[(header_date, vehicle)].append(
             {
-                "order_key": header.get("order_key"),
+                "order_key": header["order_key"],
                 "driver_id": driver_id if isinstance(driver_id, int) else None,
             }
         )
 
-        helper_ids = list(header.get("helpers", []))
-        helper_count = len(helper_ids)
-        if not helper_count:
-            continue
-
-        helper_rate = Decimal("0")
-        if vehicle == "LI-1795":
-            if helper_count >= 2:
-                helper_rate = Decimal("1500")
-            elif helper_count == 1:
-                helper_rate = Decimal("3000")
-        elif vehicle == "LB-3237":
-            if helper_count >= 2:
-                helper_rate = Decimal("1500")
-            elif helper_count == 1:
-                helper_rate = Decimal("3000")
-
+        helper_ids = header["helpers"]
+        helper_rate = _mrn_helper_rate(vehicle, len(helper_ids))
         if helper_rate <= 0:
             continue
-
         for helper_id in helper_ids:
-            totals = _ensure_member(helper_id)
-            if totals is not None:
-                totals["helper_pay"] += helper_rate
+            member_totals[helper_id]["helper_pay"] += helper_rate
+    return mrn_trips
 
-    for entry in sales_entries:
-        vehicle = _normalize_vehicle(entry.vehicle_number)
-        if vehicle not in allowed_vehicles:
-            continue
 
-        driver_id = entry.driver_id if isinstance(entry.driver_id, int) else None
-        helper_ids = _unique_members(
-            getattr(entry, "helper1_id", None),
-            getattr(entry, "helper2_id", None),
-            getattr(entry, "helper3_id", None),
-        )
-        participants = _unique_members(driver_id, *helper_ids)
-
-        quantity = _decimal_from(entry.quantity_tons)
-        if quantity > 0:
-            for participant_id in participants:
-                totals = _ensure_member(participant_id)
-                if totals is not None:
-                    totals["briquette_qty"] += quantity
-
-        helper_count = len(helper_ids)
-        helper_rate = Decimal("0")
-        if vehicle == "LI-1795":
-            if helper_count >= 3:
-                helper_rate = Decimal("1500")
-            elif helper_count == 2:
-                helper_rate = Decimal("2000")
-            elif helper_count == 1:
-                helper_rate = Decimal("3000")
-        elif vehicle == "LB-3237":
-            if helper_count >= 2:
-                helper_rate = Decimal("1500")
-            elif helper_count == 1:
-                helper_rate = Decimal("3000")
+def _transport_pay_records(period_start: date, period_end: date) -> list[dict]:
+    """Build the transport pay sheet for vehicles in ``TRANSPORT_VEHICLE_NUMBERS``.
 
-        if helper_rate > 0:
-            for helper_id in helper_ids:
-                totals = _ensure_member(helper_id)
-                if totals is not None:
-                    totals["helper_pay"] += helper_rate
-
-        if driver_id is not None:
-            _ensure_member(driver_id)
-        trip_order = (
-            datetime.combine(entry.date, datetime.min.time()),
-            entry.id or 0,
-        )
-        trips_by_vehicle_date[(entry.date, vehicle)].append(
-            {"order_key": trip_order, "driver_id": driver_id}
-        )
-
-    for trips in trips_by_vehicle_date.values():
-        trips.sort(key=lambda trip: trip.get("order_key"))
-        for index, trip in enumerate(trips):
-            driver_id = trip.get("driver_id")
-            if not isinstance(driver_id, int):
-                continue
-            totals = _ensure_member(driver_id)
-            if totals is None:
-                continue
-            if index == 0:
-                totals["driver_pay"] += DRIVER_FIRST_TRIP_RATE
-            else:
-                totals["driver_pay"] += DRIVER_ADDITIONAL_TRIP_RATE
+    The first trip of a vehicle on a day pays the driver the first-trip rate
+    and every later trip the additional rate. Sales trips of a day are ordered
+    by entry id and come after any MRN recorded before that day started.
+    """
 
-    if not member_totals:
-        return jsonify({"month": month, "year": year, "records": []})
+    allowed_vehicles = {value.strip().upper() for value in TRANSPORT_VEHICLE_NUMBERS}
+    member_totals: dict[int, dict[str, Decimal]] = defaultdict(_new_transport_totals)
 
-    members = (
-        TeamMember.query.filter(TeamMember.id.in_(member_totals.keys()))
-        .order_by(TeamMember.name.asc())
-        .all()
-    )
-    member_lookup = {member.id: member for member in members}
+    sales_trips = _accumulate_sales_transport(member_totals, allowed_vehicles, period_start, period_end)
+    mrn_trips = _accumulate_mrn_transport(member_totals, allowed_vehicles, period_start, period_end)
 
-    def _sort_key(member_id: int) -> tuple[str, str, int]:
-        member = member_lookup.get(member_id)
-        if not member:
-            return ("", "", member_id)
-        name = (member.name or "").casefold()
-        reg = (member.reg_number or "").strip()
-        return (name, reg, member_id)
+    def _pay_driver(driver_id: int | None, first_trips: int, trips: int) -> None:
+        if driver_id is None or trips <= 0:
+            return
+        member_totals[driver_id]["driver_pay"] += (
+            DRIVER_FIRST_TRIP_RATE * first_trips + DRIVER_ADDITIONAL_TRIP_RATE * (trips - first_trips)
+        )
 
+    for key in set(sales_trips) | set(mrn_trips):
+        trip_date, _vehicle = key
+        headers = sorted(mrn_trips.get(key, []), key=lambda trip: trip["order_key"])
+        sales = sales_trips.get(key, [])
+
+        leading = headers
+        if sales:
+            day_start = datetime.combine(trip_date, datetime.min.time())
+            leading = [trip for trip in headers if trip["order_key"][0] < day_start]
+        trailing = headers[len(leading):]
+
+        for index, trip in enumerate(leading):
+            _pay_driver(trip["driver_id"], 1 if index == 0 else 0, 1)
+        for driver_id, trips, first_trips in sales:
+            _pay_driver(driver_id, 0 if leading else first_trips, trips)
+        for trip in trailing:
+            _pay_driver(trip["driver_id"], 0, 1)
+
+    member_lookup = _load_pay_members(member_totals.keys())
     records = []
-    for member_id in sorted(member_totals.keys(), key=_sort_key):
-        member = member_lookup.get(member_id)
-        if not member:
-            continue
-
+    for member_id in _sort_pay_records(member_totals, member_lookup):
+        member = member_lookup[member_id]
         totals = member_totals[member_id]
         total_payment = totals["driver_pay"] + totals["helper_pay"] + totals["extra_pay"]
         if total_payment <= 0:
             continue
 
-        def _quantize(value: Decimal) -> Decimal:
-            return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        def _quantize(value: Decimal) -> float:
+            return float(value.quantize(_CENT, rounding=ROUND_HALF_UP))
 
         records.append(
             {
                 "teamMemberId": member_id,
                 "regNumber": member.reg_number,
                 "name": member.name,
-                "woodShavingQuantity": float(_quantize(totals["wood_qty"])),
-                "briquetteQuantity": float(_quantize(totals["briquette_qty"])),
-                "driverPayment": float(_quantize(totals["driver_pay"])),
-                "helperPayment": float(_quantize(totals["helper_pay"])),
-                "extraPayment": float(_quantize(totals["extra_pay"])),
-                "totalPayment": float(_quantize(total_payment)),
+                "woodShavingQuantity": _quantize(totals["wood_qty"]),
+                "briquetteQuantity": _quantize(totals["briquette_qty"]),
+                "driverPayment": _quantize(totals["driver_pay"]),
+                "helperPayment": _quantize(totals["helper_pay"]),
+                "extraPayment": _quantize(totals["extra_pay"]),
+                "totalPayment": _quantize(total_payment),
             }
         )
+    return records
 
-    return jsonify({"month": month, "year": year, "records": records})
+
+def _pay_sheet_workbook(title: str, columns, records: list[dict], download_name: str):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = title
+    sheet.append([label for label, _ in columns])
+    for record in records:
+        sheet.append([record.get(key) for _, key in columns])
+
+    output = io.BytesIO()
+    workbook.save(output)
+    output.seek(0)
+    return send_file(
+        output,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype=_XLSX_MIMETYPE,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Routes
+# ---------------------------------------------------------------------------
+
+@bp.get("/loading-pay")
+@jwt_required()
+def loading_pay_sheet():
+    try:
+        month, year, period_start, period_end = _pay_period_from_args()
+    except ValueError as exc:
+        return jsonify({"msg": str(exc)}), 400
+
+    return jsonify(
+        {
+            "month": month,
+            "year": year,
+            "rate": float(LOADING_PAY_RATE),
+            "records": _loading_pay_records(period_start, period_end),
+        }
+    )
+
+
+@bp.get("/loading-pay/export")
+@jwt_required()
+def export_loading_pay_sheet():
+    try:
+        month, year, period_start, period_end = _pay_period_from_args()
+    except ValueError as exc:
+        return jsonify({"msg": str(exc)}), 400
+
+    return _pay_sheet_workbook(
+        "Loading Pay",
+        _LOADING_PAY_COLUMNS,
+        _loading_pay_records(period_start, period_end),
+        f"loading_pay_{year:04d}_{month:02d}.xlsx",
+    )
+
+
+@bp.get("/transport-pay")
+@jwt_required()
+def transport_pay_sheet():
+    try:
+        month, year, period_start, period_end = _pay_period_from_args()
+    except ValueError as exc:
+        return jsonify({"msg": str(exc)}), 400
+
+    return jsonify(
+        {
+            "month": month,
+            "year": year,
+            "records": _transport_pay_records(period_start, period_end),
+        }
+    )
+
+
+@bp.get("/transport-pay/export")
+@jwt_required()
+def export_transport_pay_sheet():
+    try:
+        month, year, period_start, period_end = _pay_period_from_args()
+    except ValueError as exc:
+        return jsonify({"msg": str(exc)}), 400
+
+    return _pay_sheet_workbook(
+        "Transport Pay",
+        _TRANSPORT_PAY_COLUMNS,
+        _transport_pay_records(period_start, period_end),
+        f"transport_pay_{year:04d}_{month:02d}.xlsx",
+    )
 
 
 @bp.get("/members")
@@ -420,6 +420,9 @@ class MaintenanceJobSchema(Schema):
     job_started_date = fields.Date(allow_none=True)
     job_finished_date = fields.Date(allow_none=True)
     total_cost = fields.Float()
+    materials_cost = fields.Float()
+    outsourced_cost = fields.Float()
+    internal_cost = fields.Float()
     maintenance_notes = fields.Str(allow_none=True)
     created_at = fields.DateTime()
     updated_at = fields.DateTime()
@@ -464,6 +467,19 @@ class MaintenanceJobSchema(Schema):
             return []
 
 
+class MaintenanceJobListSchema(MaintenanceJobSchema):
+    """Row projection for job lists; cost lines are only served by the detail view."""
+
+    class Meta:
+        exclude = (
+            "description",
+            "maintenance_notes",
+            "materials",
+            "outsourced_services",
+            "internal_staff_costs",
+        )
+
+
 class MachinePartReplacementSchema(Schema):
     id = fields.Int()
     part_id = fields.Int()
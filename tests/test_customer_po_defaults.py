@@ -2,6 +2,7 @@ import importlib
 import os
 import sys
 import unittest
+from decimal import Decimal
 
 
 class CustomerPODefaultItemsTestCase(unittest.TestCase):
@@ -20,6 +21,7 @@ class CustomerPODefaultItemsTestCase(unittest.TestCase):
 
         self.client = self.app.test_client()
         self.MaterialItem = self.app_module.MaterialItem
+        self.Customer = self.app_module.Customer
 
     def tearDown(self):
         self.app_module.db.session.remove()
@@ -39,6 +41,102 @@ class CustomerPODefaultItemsTestCase(unittest.TestCase):
         self.assertEqual(len(briquettes), 1)
         self.assertTrue(briquettes[0].is_active)
 
+    def _create_customer(self, name="PO Customer"):
+        customer = self.Customer(
+            name=name,
+            category=self.app_module.CustomerCategory.industrial,
+            credit_term=self.app_module.CustomerCreditTerm.days30,
+            transport_mode=self.app_module.CustomerTransportMode.customer_lorry,
+            customer_type=self.app_module.CustomerType.regular,
+            sales_coordinator_name="Alex",
+            sales_coordinator_phone="0710000000",
+            store_keeper_name="Sam",
+            store_keeper_phone="0711111111",
+            payment_coordinator_name="Chris",
+            payment_coordinator_phone="0712222222",
+            special_note="",
+        )
+        self.app_module.db.session.add(customer)
+        self.app_module.db.session.commit()
+        return customer
+
+    def _default_item_id(self):
+        self.client.get("/customer-pos/new")
+        return str(self.MaterialItem.query.filter_by(name="Briquettes").one().id)
+
+    def _post_po(self, customer, item_id, action="draft"):
+        response = self.client.post(
+            "/customer-pos",
+            data={
+                "customer_id": str(customer.id),
+                "po_date": "2024-05-01",
+                "vat_amount": "10",
+                "action": action,
+                "item_id": [item_id, item_id],
+                "qty_ordered": ["2", "1.5"],
+                "unit": ["t", "t"],
+                "unit_price": ["100", "33.33"],
+                "discount_percent": ["10", "0"],
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_options_are_revalidated_by_etag(self):
+        customer = self._create_customer()
+        item_id = self._default_item_id()
+        self.assertIn(b"/customer-pos/options", self.client.get("/customer-pos/new").data)
+
+        options = self.client.get("/customer-pos/options")
+        self.assertEqual(options.status_code, 200)
+        self.assertEqual(options.get_json()["customers"], [{"id": customer.id, "name": "PO Customer"}])
+        self.assertIn(item_id, [item["id"] for item in options.get_json()["items"]])
+
+        etag = {"If-None-Match": options.headers["ETag"]}
+        self.assertEqual(self.client.get("/customer-pos/options", headers=etag).status_code, 304)
+
+        customer.name = "PO Customer Ltd"
+        self.app_module.db.session.commit()
+        renamed = self.client.get("/customer-pos/options", headers=etag)
+        self.assertEqual(renamed.status_code, 200)
+        self.assertEqual(renamed.get_json()["customers"][0]["name"], "PO Customer Ltd")
+
+    def test_line_totals_and_balances_are_maintained(self):
+        from models import CustomerPurchaseOrder
+
+        self._post_po(self._create_customer(), self._default_item_id())
+
+        po = CustomerPurchaseOrder.query.one()
+        self.assertEqual([item.line_total for item in po.items], [Decimal("180.00"), Decimal("50.00")])
+        self.assertEqual(po.line_count, 2)
+        self.assertEqual(po.qty_balance_total, Decimal("3.500"))
+        self.assertEqual(po.grand_total, Decimal("240.00"))
+
+        po.items[1].qty_ordered = Decimal("3")
+        self.app_module.db.session.commit()
+        self.assertEqual(po.items[1].line_total, Decimal("99.99"))
+        self.assertEqual(po.subtotal_amount, Decimal("279.99"))
+
+    def test_list_pages_and_counts_by_status(self):
+        customer = self._create_customer()
+        item_id = self._default_item_id()
+        for action in ("draft", "confirm", "confirm"):
+            self._post_po(customer, item_id, action)
+
+        response = self.client.get("/customer-pos?per_page=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"3 orders found", response.data)
+        self.assertIn(b"Draft: 1", response.data)
+        self.assertIn(b"Confirmed: 2", response.data)
+        self.assertIn(b"Page 1 of 2", response.data)
+
+        response = self.client.get("/customer-pos?status=Confirmed&page=2&per_page=1")
+        self.assertIn(b"Page 2 of 2", response.data)
+
+    def test_list_rejects_unknown_status(self):
+        response = self.client.get("/customer-pos?status=Shipped")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b"Unknown status", response.data)
+
 
 if __name__ == "__main__":
     unittest.main()
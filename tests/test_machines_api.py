@@ -202,6 +202,53 @@ class MachineApiTestCase(unittest.TestCase):
         self.assertEqual(len(suppliers), 1)
         self.assertEqual(suppliers[0]["name"], "Rapid Repairs")
 
+    def test_idle_event_conflicts_with_archived_production_hours(self):
+        from datetime import date
+
+        from models import DailyProductionArchive
+
+        response = self.client.post(
+            "/api/machines/assets",
+            headers=self._auth_headers(self.pm_token),
+            json={"name": "Archived Press", "category": "Plant & Machines"},
+        )
+        self.assertEqual(response.status_code, 201)
+        asset_id = response.get_json()["id"]
+
+        self.app_module.db.session.add(
+            DailyProductionArchive(
+                asset_id=asset_id,
+                date=date(2024, 3, 10),
+                hour_tons=[None, None, None, None, None, None, None, None, 2.5],
+                total_tons=2.5,
+                productive_hours=1,
+            )
+        )
+        self.app_module.db.session.commit()
+
+        payload = {
+            "asset_id": asset_id,
+            "analysis_date": "2024-03-10",
+            "started_at": "08:15",
+            "ended_at": "08:45",
+            "reason": "Lubrication",
+        }
+        response = self.client.post(
+            "/api/machines/idle-events",
+            headers=self._auth_headers(self.mm_token),
+            json=payload,
+        )
+        self.assertEqual(response.status_code, 409, response.get_data(as_text=True))
+        self.assertEqual(response.get_json()["conflict"]["production_hour"]["hour_no"], 9)
+
+        payload.update(started_at="10:15", ended_at="10:45")
+        response = self.client.post(
+            "/api/machines/idle-events",
+            headers=self._auth_headers(self.mm_token),
+            json=payload,
+        )
+        self.assertEqual(response.status_code, 201, response.get_data(as_text=True))
+
     def test_idle_events_date_filter_includes_entire_day(self):
         asset_payload = {
             "name": "Laser Cutter",
@@ -329,6 +376,66 @@ class MachineApiTestCase(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.get_json()["code"], "MCH-0002")
 
+    def test_replacement_analytics_ranks_parts_by_projected_replacement(self):
+        headers = self._auth_headers(self.mm_token)
+        response = self.client.post(
+            "/api/machines/assets",
+            headers=self._auth_headers(self.pm_token),
+            json={"name": "Briquette Press", "category": "Plant & Machines"},
+        )
+        asset_id = response.get_json()["id"]
+
+        part_ids = {}
+        for name, number in (("Die", "P-001"), ("Belt", "P-002"), ("Filter", "P-003")):
+            response = self.client.post(
+                f"/api/machines/assets/{asset_id}/parts",
+                headers=headers,
+                json={"name": name, "part_number": number},
+            )
+            self.assertEqual(response.status_code, 201)
+            part_ids[name] = response.get_json()["id"]
+
+        replacements = {
+            "Die": ["2024-01-01", "2024-03-01", "2024-02-01"],
+            "Belt": ["2024-01-01", "2024-01-11"],
+            "Filter": ["2024-01-05"],
+        }
+        for name, dates in replacements.items():
+            for replaced_on in dates:
+                response = self.client.post(
+                    f"/api/machines/parts/{part_ids[name]}/replacements",
+                    headers=headers,
+                    json={"replaced_on": replaced_on},
+                )
+                self.assertEqual(response.status_code, 201)
+
+        response = self.client.get("/api/machines/parts/replacement-analytics", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        payload = response.get_json()
+        self.assertEqual(payload["pagination"]["total_rows"], 2)
+        belt, die = payload["rows"]
+        self.assertEqual(belt["part_name"], "Belt")
+        self.assertEqual(belt["mean_interval_days"], 10.0)
+        self.assertEqual(belt["projected_next_on"], "2024-01-21")
+        self.assertTrue(belt["overdue"])
+        self.assertEqual(die["replacement_count"], 3)
+        self.assertEqual(die["first_replaced_on"], "2024-01-01")
+        self.assertEqual(die["last_replaced_on"], "2024-03-01")
+        self.assertEqual(die["mean_interval_days"], 30.0)
+        self.assertEqual(die["projected_next_on"], "2024-03-31")
+
+        response = self.client.get(
+            f"/api/machines/parts/replacement-analytics?asset_id={asset_id}&page_size=1&page=2",
+            headers=headers,
+        )
+        self.assertEqual([row["part_name"] for row in response.get_json()["rows"]], ["Die"])
+
+        response = self.client.get(
+            "/api/machines/parts/replacement-analytics?horizon_days=abc",
+            headers=headers,
+        )
+        self.assertEqual(response.status_code, 400)
+
 
 if __name__ == "__main__":
     unittest.main()
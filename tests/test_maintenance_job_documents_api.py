@@ -0,0 +1,275 @@
+import importlib
+import io
+import os
+import sys
+import time
+import unittest
+import zipfile
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+
+class MaintenanceJobDocumentsTestCase(unittest.TestCase):
+    def setUp(self):
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        if "app" in sys.modules:
+            self.app_module = importlib.reload(sys.modules["app"])
+        else:
+            self.app_module = importlib.import_module("app")
+
+        self.app = self.app_module.create_app()
+        self.app.testing = True
+        self.app.config["MAIL_SUPPRESS_SEND"] = True
+        self.app.config["MAINTENANCE_PDF_WORKERS"] = 0
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.app_module.db.create_all()
+
+        User = self.app_module.User
+        RoleEnum = self.app_module.RoleEnum
+        self.user = User(name="Maint", email="maint@example.com", role=RoleEnum.maintenance_manager)
+        self.user.set_password("Password!1")
+        self.app_module.db.session.add(self.user)
+        self.app_module.db.session.commit()
+
+        self.client = self.app.test_client()
+        response = self.client.post(
+            "/api/auth/login",
+            json={"email": "maint@example.com", "password": "Password!1"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.token = response.get_json()["access_token"]
+
+    def tearDown(self):
+        self.app_module.db.session.remove()
+        self.app_module.db.drop_all()
+        self.ctx.pop()
+        os.environ.pop("DATABASE_URL", None)
+        if "app" in sys.modules:
+            del sys.modules["app"]
+
+    def _auth_headers(self):
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def _create_job(self, code="JOB-0001", job_date=None, status="SUBMITTED"):
+        from models import MaintenanceJob, MaintenanceMaterial
+
+        job = MaintenanceJob(
+            job_code=code,
+            job_date=job_date or date.today(),
+            title="Mechanical / Machine Issues",
+            status=status,
+            created_by_id=self.user.id,
+        )
+        job.materials.append(MaintenanceMaterial(material_name="Bearing", units="2 pcs", cost=Decimal("1500")))
+        self.app_module.db.session.add(job)
+        self.app_module.db.session.commit()
+        return job
+
+    def test_job_card_pdf_is_cached_until_job_changes(self):
+        from models import MaintenanceMaterial
+
+        job = self._create_job()
+
+        with patch(
+            "maintenance_pdf.render_pdf_bytes", return_value=b"%PDF-1.4 test"
+        ) as render_mock:
+            first = self.client.get(
+                f"/machines/maintenance-jobs/{job.id}/download-pdf",
+                headers=self._auth_headers(),
+            )
+            second = self.client.get(
+                f"/machines/maintenance-jobs/{job.id}/download-pdf",
+                headers=self._auth_headers(),
+            )
+
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(second.data, b"%PDF-1.4 test")
+            self.assertEqual(render_mock.call_count, 1)
+            self.assertIn("JOB-0001.pdf", first.headers["Content-Disposition"])
+
+            job.materials.append(MaintenanceMaterial(material_name="Belt", cost=Decimal("200")))
+            self.app_module.db.session.commit()
+
+            third = self.client.get(
+                f"/machines/maintenance-jobs/{job.id}/download-pdf",
+                headers=self._auth_headers(),
+            )
+            self.assertEqual(third.status_code, 200)
+            self.assertEqual(render_mock.call_count, 2)
+
+    def test_job_card_pdf_cache_tracks_related_rows_not_render_time(self):
+        from models import MaintenanceOutsourcedService, ServiceSupplier
+
+        supplier = ServiceSupplier(name="Lanka Engineering")
+        job = self._create_job()
+        job.outsourced_services.append(
+            MaintenanceOutsourcedService(
+                supplier=supplier,
+                service_date=date(2024, 5, 2),
+                service_description="Rewind motor",
+                cost=Decimal("900"),
+            )
+        )
+        self.app_module.db.session.commit()
+
+        with self.app.test_request_context():
+            from routes.maintenance_job_documents import _render_job_card_html
+
+            first_html = _render_job_card_html(job, {})
+            time.sleep(0.01)
+            self.assertEqual(_render_job_card_html(job, {}), first_html)
+
+        with patch(
+            "maintenance_pdf.render_pdf_bytes", return_value=b"%PDF-1.4 test"
+        ) as render_mock:
+            url = f"/machines/maintenance-jobs/{job.id}/download-pdf"
+            self.assertEqual(self.client.get(url, headers=self._auth_headers()).status_code, 200)
+            self.assertEqual(render_mock.call_count, 1)
+
+            supplier.name = "Lanka Engineering (Pvt) Ltd"
+            self.app_module.db.session.commit()
+
+            self.assertEqual(self.client.get(url, headers=self._auth_headers()).status_code, 200)
+            self.assertEqual(render_mock.call_count, 2)
+
+    def test_job_card_pdf_renders_inline_without_workers(self):
+        job = self._create_job()
+
+        response = self.client.get(
+            f"/machines/maintenance-jobs/{job.id}/download-pdf",
+            headers=self._auth_headers(),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/pdf")
+        self.assertTrue(response.data.startswith(b"%PDF"))
+
+    def test_missing_job_returns_not_found(self):
+        response = self.client.get(
+            "/machines/maintenance-jobs/999/download-pdf",
+            headers=self._auth_headers(),
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_streams_zip_of_filtered_job_cards(self):
+        self._create_job("JOB-0001", date(2024, 5, 2))
+        self._create_job("JOB-0002", date(2024, 5, 20), status="COMPLETED_VERIFIED")
+        self._create_job("JOB-0003", date(2024, 6, 1))
+
+        with patch("maintenance_pdf.render_pdf_bytes", return_value=b"%PDF-1.4 test"):
+            response = self.client.get(
+                "/machines/maintenance-jobs/export?start_date=2024-05-01&end_date=2024-05-31",
+                headers=self._auth_headers(),
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, "application/zip")
+            archive = zipfile.ZipFile(io.BytesIO(response.data))
+            self.assertEqual(sorted(archive.namelist()), ["JOB-0001.pdf", "JOB-0002.pdf"])
+
+            response = self.client.get(
+                "/machines/maintenance-jobs/export?start_date=2024-05-01&end_date=2024-05-31"
+                "&status=COMPLETED_VERIFIED",
+                headers=self._auth_headers(),
+            )
+            archive = zipfile.ZipFile(io.BytesIO(response.data))
+            self.assertEqual(archive.namelist(), ["JOB-0002.pdf"])
+
+    def test_export_rejects_invalid_dates(self):
+        response = self.client.get(
+            "/machines/maintenance-jobs/export?start_date=not-a-date",
+            headers=self._auth_headers(),
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_runs_in_background_for_large_ranges(self):
+        self.app.config["MAINTENANCE_EXPORT_SYNC_LIMIT"] = 1
+        self._create_job("JOB-0001", date(2024, 5, 2))
+        self._create_job("JOB-0002", date(2024, 5, 3))
+
+        with patch("maintenance_pdf.render_pdf_bytes", return_value=b"%PDF-1.4 test"):
+            response = self.client.get(
+                "/machines/maintenance-jobs/export?start_date=2024-05-01&end_date=2024-05-31",
+                headers=self._auth_headers(),
+            )
+            self.assertEqual(response.status_code, 202)
+            token = response.get_json()["token"]
+
+            status = None
+            for _ in range(100):
+                status = self.client.get(
+                    f"/machines/maintenance-jobs/exports/{token}",
+                    headers=self._auth_headers(),
+                ).get_json()
+                if status["status"] in {"completed", "failed"}:
+                    break
+                time.sleep(0.05)
+
+        self.assertEqual(status["status"], "completed")
+        self.assertEqual(status["progress"], {"done": 2, "total": 2})
+        download = self.client.get(status["download_url"], headers=self._auth_headers())
+        self.assertEqual(download.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(download.data))
+        self.assertEqual(sorted(archive.namelist()), ["JOB-0001.pdf", "JOB-0002.pdf"])
+
+    def _start_background_export(self):
+        self._create_job("JOB-0001", date(2024, 5, 2))
+        with patch("maintenance_pdf.render_pdf_bytes", return_value=b"%PDF-1.4 test"):
+            response = self.client.get(
+                "/machines/maintenance-jobs/export?start_date=2024-05-01&end_date=2024-05-31&background=1",
+                headers=self._auth_headers(),
+            )
+            self.assertEqual(response.status_code, 202)
+            token = response.get_json()["token"]
+            for _ in range(100):
+                status = self.client.get(
+                    f"/machines/maintenance-jobs/exports/{token}",
+                    headers=self._auth_headers(),
+                ).get_json()
+                if status["status"] in {"completed", "failed"}:
+                    break
+                time.sleep(0.05)
+        self.assertEqual(status["status"], "completed")
+        return token
+
+    def test_background_export_is_private_to_its_owner(self):
+        token = self._start_background_export()
+
+        User = self.app_module.User
+        other = User(name="Other", email="other@example.com", role=self.app_module.RoleEnum.maintenance_manager)
+        other.set_password("Password!1")
+        self.app_module.db.session.add(other)
+        self.app_module.db.session.commit()
+        login = self.client.post(
+            "/api/auth/login",
+            json={"email": "other@example.com", "password": "Password!1"},
+        )
+        other_headers = {"Authorization": f"Bearer {login.get_json()['access_token']}"}
+
+        status = self.client.get(f"/machines/maintenance-jobs/exports/{token}", headers=other_headers)
+        self.assertEqual(status.status_code, 404)
+        download = self.client.get(f"/machines/maintenance-jobs/exports/{token}/download", headers=other_headers)
+        self.assertEqual(download.status_code, 404)
+
+    def test_expired_background_exports_are_purged(self):
+        from datetime import timedelta
+
+        import background_jobs
+
+        token = self._start_background_export()
+        task = background_jobs.get_job(token)
+        self.assertTrue(task.artifact_path(".zip").exists())
+
+        self.assertEqual(background_jobs.purge_expired(self.app, timedelta(hours=1)), 0)
+        stale = time.time() - 2 * 3600
+        os.utime(task.status_path, (stale, stale))
+        self.assertEqual(background_jobs.purge_expired(self.app, timedelta(hours=1)), 1)
+        self.assertFalse(task.status_path.exists())
+        self.assertFalse(task.artifact_path(".zip").exists())
+        self.assertIsNone(background_jobs.get_job(token))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
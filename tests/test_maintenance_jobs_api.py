@@ -0,0 +1,240 @@
+import importlib
+import os
+import sys
+import unittest
+from datetime import date
+from decimal import Decimal
+
+
+class MaintenanceJobsApiTestCase(unittest.TestCase):
+    def setUp(self):
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        if "app" in sys.modules:
+            self.app_module = importlib.reload(sys.modules["app"])
+        else:
+            self.app_module = importlib.import_module("app")
+
+        self.app = self.app_module.create_app()
+        self.app.testing = True
+        self.app.config["MAIL_SUPPRESS_SEND"] = True
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.app_module.db.create_all()
+
+        User = self.app_module.User
+        RoleEnum = self.app_module.RoleEnum
+        self.user = User(name="Maint", email="maint@example.com", role=RoleEnum.maintenance_manager)
+        self.user.set_password("Password!1")
+        self.app_module.db.session.add(self.user)
+        self.app_module.db.session.commit()
+
+        self.client = self.app.test_client()
+        response = self.client.post(
+            "/api/auth/login",
+            json={"email": "maint@example.com", "password": "Password!1"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.token = response.get_json()["access_token"]
+
+    def tearDown(self):
+        self.app_module.db.session.remove()
+        self.app_module.db.drop_all()
+        self.ctx.pop()
+        os.environ.pop("DATABASE_URL", None)
+        if "app" in sys.modules:
+            del sys.modules["app"]
+
+    def _auth_headers(self):
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def _create_job(self, code, job_date, status="IN_PROGRESS", **extra):
+        from models import MaintenanceJob
+
+        job = MaintenanceJob(
+            job_code=code,
+            job_date=job_date,
+            title="Mechanical / Machine Issues",
+            status=status,
+            created_by_id=self.user.id,
+            **extra,
+        )
+        self.app_module.db.session.add(job)
+        self.app_module.db.session.commit()
+        return job
+
+    def test_cost_totals_follow_cost_line_changes(self):
+        from models import MaintenanceMaterial
+
+        job = self._create_job("JOB-0001", date(2024, 5, 2))
+        self.assertEqual(job.materials_cost, Decimal("0"))
+
+        response = self.client.patch(
+            f"/api/maintenance-jobs/{job.id}",
+            headers=self._auth_headers(),
+            json={
+                "materials": [
+                    {"material_name": "Bearing", "cost": "1500"},
+                    {"material_name": "Grease", "cost": "250.50"},
+                ]
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = response.get_json()
+        self.assertEqual(payload["materials_cost"], 1750.5)
+        self.assertEqual(payload["outsourced_cost"], 0)
+        self.assertEqual(payload["total_cost"], 1750.5)
+
+        material = MaintenanceMaterial.query.filter_by(material_name="Grease").one()
+        self.app_module.db.session.delete(material)
+        self.app_module.db.session.commit()
+        self.app_module.db.session.refresh(job)
+        self.assertEqual(job.materials_cost, Decimal("1500.00"))
+        self.assertEqual(job.total_cost, Decimal("1500.00"))
+
+    def test_list_returns_lightweight_rows_and_pagination(self):
+        from models import MaintenanceMaterial
+
+        for index in range(3):
+            job = self._create_job(f"JOB-000{index + 1}", date(2024, 5, index + 1))
+            job.materials.append(
+                MaintenanceMaterial(material_name="Belt", cost=Decimal(str(100 * (index + 1))))
+            )
+        self.app_module.db.session.commit()
+
+        response = self.client.get(
+            "/api/maintenance-jobs?page=1&page_size=2&sort_by=materials_cost&sort_dir=desc",
+            headers=self._auth_headers(),
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = response.get_json()
+        self.assertEqual(
+            payload["pagination"],
+            {"page": 1, "page_size": 2, "total_rows": 3, "total_pages": 2},
+        )
+        self.assertEqual([row["job_code"] for row in payload["rows"]], ["JOB-0003", "JOB-0002"])
+        first = payload["rows"][0]
+        self.assertEqual(first["materials_cost"], 300.0)
+        self.assertNotIn("materials", first)
+        self.assertNotIn("internal_staff_costs", first)
+
+        legacy = self.client.get(
+            "/api/maintenance-jobs?limit=2&offset=2&sort_by=job_date&sort_dir=asc",
+            headers=self._auth_headers(),
+        )
+        self.assertEqual(legacy.status_code, 200)
+        self.assertEqual([row["job_code"] for row in legacy.get_json()], ["JOB-0003"])
+
+        detail = self.client.get(f"/api/maintenance-jobs/{first['id']}", headers=self._auth_headers())
+        self.assertEqual(len(detail.get_json()["materials"]), 1)
+
+    def _seed_summary_data(self):
+        from models import (
+            MaintenanceInternalStaffCost,
+            MaintenanceMaterial,
+            MaintenanceOutsourcedService,
+            ServiceSupplier,
+            TeamMember,
+        )
+
+        supplier = ServiceSupplier(name="Lathe Works")
+        welder = TeamMember(reg_number="E023", name="Welder", join_date=date(2020, 1, 1))
+        fitter = TeamMember(reg_number="E010", name="Fitter", join_date=date(2020, 1, 1))
+        self.app_module.db.session.add_all([supplier, welder, fitter])
+
+        open_job = self._create_job(
+            "JOB-0001", date(2024, 5, 2), status="IN_PROGRESS", expected_completion=date(2024, 5, 5)
+        )
+        done_job = self._create_job("JOB-0002", date(2024, 5, 10), status="COMPLETED_VERIFIED")
+        self._create_job("JOB-0003", date(2024, 7, 1), status="SUBMITTED")
+
+        open_job.materials.append(MaintenanceMaterial(material_name="Bearing", cost=Decimal("1000")))
+        done_job.materials.append(MaintenanceMaterial(material_name="Belt", cost=Decimal("250")))
+        open_job.outsourced_services.append(
+            MaintenanceOutsourcedService(
+                supplier=supplier,
+                service_date=date(2024, 5, 3),
+                service_description="Shaft turning",
+                cost=Decimal("4000"),
+            )
+        )
+        open_job.internal_staff_costs.extend(
+            [
+                MaintenanceInternalStaffCost(
+                    employee=welder,
+                    service_date=date(2024, 5, 3),
+                    work_description="Welding",
+                    engaged_hours=Decimal("3"),
+                    cost=Decimal("900"),
+                ),
+                MaintenanceInternalStaffCost(
+                    employee=fitter,
+                    service_date=date(2024, 6, 1),
+                    work_description="Fitting",
+                    engaged_hours=Decimal("2"),
+                    cost=Decimal("400"),
+                ),
+            ]
+        )
+        self.app_module.db.session.commit()
+
+    def test_summary_aggregates_in_sql_without_details(self):
+        self._seed_summary_data()
+
+        response = self.client.get(
+            "/api/maintenance-jobs/summary?start_date=2024-05-01&end_date=2024-05-31",
+            headers=self._auth_headers(),
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = response.get_json()
+        self.assertEqual(
+            payload["jobs"], {"initiated": 2, "pending": 1, "completed": 1, "overdue": 1}
+        )
+        self.assertEqual(
+            payload["totals"],
+            {"material": 1250.0, "outsourced": 4000.0, "internal": 900.0, "grand": 6150.0},
+        )
+        self.assertEqual(payload["hours"], {"total": 3.0, "e023": 3.0, "other": 0.0})
+        self.assertEqual(
+            payload["available_range"], {"start_date": "2024-05-02", "end_date": "2024-07-01"}
+        )
+        self.assertNotIn("details", payload)
+
+        with_details = self.client.get(
+            "/api/maintenance-jobs/summary?start_date=2024-05-01&end_date=2024-05-31&include_details=1",
+            headers=self._auth_headers(),
+        ).get_json()
+        self.assertEqual(len(with_details["details"]["material"]), 2)
+        self.assertEqual(with_details["details"]["internal"][0]["employee_code"], "E023")
+
+    def test_summary_detail_endpoints_are_paginated(self):
+        self._seed_summary_data()
+
+        response = self.client.get(
+            "/api/maintenance-jobs/summary/details/material"
+            "?start_date=2024-05-01&end_date=2024-05-31&page=2&page_size=1",
+            headers=self._auth_headers(),
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = response.get_json()
+        self.assertEqual(
+            payload["pagination"],
+            {"page": 2, "page_size": 1, "total_rows": 2, "total_pages": 2},
+        )
+        self.assertEqual(payload["rows"][0]["job_code"], "JOB-0002")
+        self.assertEqual(payload["rows"][0]["cost"], 250.0)
+
+        outsourced = self.client.get(
+            "/api/maintenance-jobs/summary/details/outsourced?start_date=2024-05-01&end_date=2024-05-31",
+            headers=self._auth_headers(),
+        ).get_json()
+        self.assertEqual(outsourced["rows"][0]["supplier"], "Lathe Works")
+
+        missing = self.client.get(
+            "/api/maintenance-jobs/summary/details/unknown",
+            headers=self._auth_headers(),
+        )
+        self.assertEqual(missing.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
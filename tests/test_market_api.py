@@ -4,7 +4,16 @@ import sys
 import unittest
 from datetime import date
 
-from models import SalesActualEntry, TeamMember, TeamMemberStatus
+from models import (
+    Customer,
+    CustomerCategory,
+    CustomerCreditTerm,
+    CustomerTransportMode,
+    CustomerType,
+    SalesActualEntry,
+    TeamMember,
+    TeamMemberStatus,
+)
 
 
 class MarketApiTestCase(unittest.TestCase):
@@ -569,6 +578,104 @@ class MarketApiTestCase(unittest.TestCase):
         data = response.get_json()
         self.assertIn("already exists", data.get("msg", ""))
 
+    def _add_customer(self, name, transport_mode=CustomerTransportMode.samprox_lorry):
+        customer = Customer(
+            name=name,
+            category=CustomerCategory.industrial,
+            credit_term=CustomerCreditTerm.days30,
+            transport_mode=transport_mode,
+            customer_type=CustomerType.regular,
+            sales_coordinator_name="Alex",
+            sales_coordinator_phone="0710000000",
+            store_keeper_name="Sam",
+            store_keeper_phone="0711111111",
+            payment_coordinator_name="Chris",
+            payment_coordinator_phone="0712222222",
+            special_note="",
+        )
+        self.db.session.add(customer)
+        self.db.session.commit()
+        return customer
+
+    def test_transport_worklist_pages_pending_lorry_sales_with_counts(self):
+        lorry = self._add_customer("Lorry Customer")
+        other = self._add_customer("Second Lorry Customer")
+        pickup = self._add_customer("Pickup Customer", CustomerTransportMode.customer_lorry)
+        driver = self._create_team_member("DR-801", "Driver")
+        helper = self._create_team_member("HP-801", "Helper")
+
+        def add_sale(customer, day, **transport):
+            entry = self.SalesActualEntry(
+                customer_id=customer.id,
+                date=day,
+                amount=1000,
+                unit_price=500,
+                quantity_tons=2,
+                **transport,
+            )
+            self.db.session.add(entry)
+            return entry
+
+        add_sale(lorry, date(2024, 5, 1))
+        add_sale(lorry, date(2024, 5, 1), vehicle_number="  ")
+        add_sale(lorry, date(2024, 5, 2), vehicle_number="LI-1795", driver_id=driver.id)
+        add_sale(other, date(2024, 5, 2))
+        pickup_sale = add_sale(pickup, date(2024, 5, 2))
+        own_pickup = add_sale(lorry, date(2024, 5, 2), transport_mode_used="customer_lorry")
+        complete = add_sale(
+            lorry,
+            date(2024, 5, 3),
+            vehicle_number="LI-1795",
+            driver_id=driver.id,
+            helper1_id=helper.id,
+            mileage_km=12.5,
+        )
+        self.db.session.commit()
+        self.assertTrue(complete.transport_complete)
+        # Deliveries that did not use a Samprox lorry never need details.
+        self.assertTrue(pickup_sale.transport_complete)
+        self.assertTrue(own_pickup.transport_complete)
+
+        response = self.client.get(
+            "/api/market/sales/transport-worklist?limit=3", headers=self._auth_headers()
+        )
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        first_page = response.get_json()
+        self.assertEqual(first_page["total"], 4)
+        self.assertEqual(
+            [(row["customer_id"], row["count"]) for row in first_page["counts"]["customers"]],
+            [(lorry.id, 3), (other.id, 1)],
+        )
+        self.assertEqual(
+            first_page["counts"]["dates"],
+            [{"date": "2024-05-01", "count": 2}, {"date": "2024-05-02", "count": 2}],
+        )
+        self.assertEqual(len(first_page["entries"]), 3)
+        self.assertEqual(
+            first_page["entries"][2]["missing_fields"], ["helper1_id", "mileage_km"]
+        )
+        self.assertIsNotNone(first_page["next_cursor"])
+
+        response = self.client.get(
+            f"/api/market/sales/transport-worklist?limit=3&cursor={first_page['next_cursor']}",
+            headers=self._auth_headers(),
+        )
+        second_page = response.get_json()
+        self.assertEqual([row["customer_id"] for row in second_page["entries"]], [other.id])
+        self.assertIsNone(second_page["next_cursor"])
+
+        complete.mileage_km = None
+        self.db.session.commit()
+        self.assertFalse(complete.transport_complete)
+
+        response = self.client.get(
+            f"/api/market/sales/transport-worklist?customer_id={lorry.id}&date=2024-05-03",
+            headers=self._auth_headers(),
+        )
+        entries = response.get_json()["entries"]
+        self.assertEqual([row["id"] for row in entries], [complete.id])
+        self.assertEqual(entries[0]["missing_fields"], ["mileage_km"])
+
 
 
 if __name__ == "__main__":
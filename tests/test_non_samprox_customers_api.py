@@ -3,6 +3,7 @@ import importlib
 import io
 import os
 import sys
+import time
 import unittest
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -167,6 +168,45 @@ class NonSamproxCustomersApiTestCase(unittest.TestCase):
             exsol_second = self._create_customer(self.sales_token, company_id=self.exsol.id, customer_name="C")
             self.assertEqual(exsol_second["customer_code"], "E260002")
 
+    def test_prefixed_codes_come_from_reserved_blocks(self):
+        from models import CustomerCodeSequence
+
+        self.app.config["CUSTOMER_CODE_BLOCK_SIZE"] = 5
+        with patch("routes.non_samprox_customers._now_colombo") as mock_now:
+            mock_now.return_value = datetime(2026, 7, 1, tzinfo=ZoneInfo("Asia/Colombo"))
+            url = f"/api/non-samprox-customers/next-code?company_id={self.exsol.id}"
+            for _ in range(2):
+                resp = self.client.get(url, headers=self._auth(self.sales_token))
+                self.assertEqual(resp.get_json()["next_code"], "E260001")
+            self.assertEqual(CustomerCodeSequence.query.count(), 0)
+
+            codes = [
+                self._create_customer(self.sales_token, company_id=self.exsol.id, customer_name=name)["customer_code"]
+                for name in ("A", "B", "C")
+            ]
+            self.assertEqual(codes, ["E260001", "E260002", "E260003"])
+            sequence = CustomerCodeSequence.query.filter_by(company_id=self.exsol.id, year_yy="26").one()
+            self.assertEqual(sequence.last_number, 5)
+
+            resp = self.client.get(url, headers=self._auth(self.sales_token))
+            self.assertEqual(resp.get_json()["next_code"], "E260004")
+
+    def test_sequence_reservation_leaves_the_request_session_alone(self):
+        from models import CustomerCodeSequence, NonSamproxCustomer
+        from routes.non_samprox_customers import _reserve_sequence_numbers
+
+        db = self.app_module.db
+        db.session.add(
+            NonSamproxCustomer(customer_code="E269999", customer_name="Staged", company_id=self.exsol.id)
+        )
+        self.assertEqual(list(_reserve_sequence_numbers(self.exsol, "26", 3)), [1, 2, 3])
+        self.assertEqual(list(_reserve_sequence_numbers(self.exsol, "26", 2)), [4, 5])
+        db.session.rollback()
+
+        self.assertIsNone(NonSamproxCustomer.query.filter_by(customer_code="E269999").first())
+        sequence = CustomerCodeSequence.query.filter_by(company_id=self.exsol.id, year_yy="26").one()
+        self.assertEqual(sequence.last_number, 5)
+
     def _csv_bytes(self, rows):
         buffer = io.StringIO()
         writer = csv.DictWriter(
@@ -263,6 +303,39 @@ class NonSamproxCustomersApiTestCase(unittest.TestCase):
         self.assertEqual(payload["data"]["generated_codes_count"], 1)
         total = self.app_module.db.session.query(self.NonSamproxCustomer).count()
         self.assertEqual(total, 2)
+        sequence = models_module.CustomerCodeSequence.query.filter_by(company_id=self.exsol.id).one()
+        self.assertEqual(sequence.last_number, 1)
+
+    def test_bulk_import_regenerates_codes_taken_during_the_import(self):
+        from routes.non_samprox_customers import _current_year_suffix
+
+        taken = f"E{_current_year_suffix()}0001"
+        self.app_module.db.session.add(
+            self.NonSamproxCustomer(
+                customer_code=taken,
+                customer_name="Walk-in",
+                managed_by_user_id=self.sales.id,
+                company_id=self.exsol.id,
+            )
+        )
+        self.app_module.db.session.commit()
+
+        rows = [
+            {
+                "customer_code": "",
+                "customer_name": "Dealer A",
+                "area_code": "100",
+                "city": "Colombo",
+                "district": "Colombo",
+                "province": "Western",
+                "managed_by": str(self.sales.id),
+            }
+        ]
+        payload = self._bulk_import(rows)
+        self.assertEqual(payload["data"]["inserted_count"], 1)
+        self.assertEqual(payload["data"]["failed_count"], 0)
+        dealer = self.NonSamproxCustomer.query.filter_by(customer_name="Dealer A").one()
+        self.assertEqual(dealer.customer_code, f"E{_current_year_suffix()}0002")
 
     def test_bulk_import_partial_success_when_not_strict(self):
         rows = [
@@ -337,6 +410,110 @@ class NonSamproxCustomersApiTestCase(unittest.TestCase):
         total = self.app_module.db.session.query(self.NonSamproxCustomer).count()
         self.assertEqual(total, 1)
 
+    def test_list_supports_etag_revalidation(self):
+        self._create_customer(self.sales_token, customer_name="Alpha")
+        resp = self.client.get("/api/non-samprox-customers", headers=self._auth(self.sales_token))
+        self.assertEqual(resp.status_code, 200)
+        etag = resp.headers["ETag"]
+
+        headers = {**self._auth(self.sales_token), "If-None-Match": etag}
+        resp = self.client.get("/api/non-samprox-customers", headers=headers)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.headers["ETag"], etag)
+
+        self._create_customer(self.sales_token, customer_name="Beta")
+        resp = self.client.get("/api/non-samprox-customers", headers=headers)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.get_json()["data"]), 2)
+
+    def test_change_feed_pages_and_reports_deactivations(self):
+        created = [self._create_customer(self.sales_token, customer_name=name) for name in ("A", "B", "C")]
+
+        resp = self.client.get("/api/non-samprox-customers/changes?limit=2", headers=self._auth(self.sales_token))
+        first = resp.get_json()
+        self.assertEqual(len(first["data"]), 2)
+        self.assertIsNotNone(first["next_cursor"])
+
+        resp = self.client.get(
+            "/api/non-samprox-customers/changes",
+            query_string={"limit": 2, "cursor": first["next_cursor"]},
+            headers=self._auth(self.sales_token),
+        )
+        second = resp.get_json()
+        self.assertIsNone(second["next_cursor"])
+        self.assertEqual(
+            sorted(row["id"] for row in first["data"] + second["data"]), sorted(row["id"] for row in created)
+        )
+
+        resp = self.client.put(
+            f"/api/non-samprox-customers/{created[1]['id']}",
+            json={"is_active": False},
+            headers=self._auth(self.admin_token),
+        )
+        self.assertEqual(resp.status_code, 200, resp.get_data(as_text=True))
+
+        resp = self.client.get(
+            "/api/non-samprox-customers/changes",
+            query_string={"updated_since": first["synced_at"]},
+            headers=self._auth(self.sales_token),
+        )
+        delta = resp.get_json()
+        self.assertEqual(delta["data"], [])
+        self.assertEqual([row["id"] for row in delta["deleted"]], [created[1]["id"]])
+
+        resp = self.client.get(
+            "/api/non-samprox-customers/changes?cursor=bogus", headers=self._auth(self.sales_token)
+        )
+        self.assertEqual(resp.status_code, 400)
+
+    def test_bulk_import_runs_in_background_in_chunks(self):
+        self.app.config["DEALER_IMPORT_SYNC_LIMIT"] = 2
+        self.app.config["DEALER_IMPORT_CHUNK_SIZE"] = 2
+        rows = [
+            {
+                "customer_code": "",
+                "customer_name": f"Dealer {index}",
+                "area_code": "100",
+                "city": "Colombo",
+                "district": "Colombo",
+                "province": "Western",
+                "managed_by": self.sales.email,
+            }
+            for index in range(5)
+        ]
+        rows.append(dict(rows[0], customer_name="", managed_by="nobody"))
+
+        with patch("routes.non_samprox_customers._now_colombo") as mock_now:
+            mock_now.return_value = datetime(2026, 8, 1, tzinfo=ZoneInfo("Asia/Colombo"))
+            resp = self.client.post(
+                "/api/dealers/bulk-import",
+                data={"company_id": str(self.exsol.id), "file": (io.BytesIO(self._csv_bytes(rows)), "bulk.csv")},
+                content_type="multipart/form-data",
+                headers=self._auth(self.admin_token),
+            )
+            self.assertEqual(resp.status_code, 202, resp.get_data(as_text=True))
+            token = resp.get_json()["data"]["token"]
+
+            status = None
+            for _ in range(100):
+                status = self.client.get(
+                    f"/api/dealers/bulk-imports/{token}", headers=self._auth(self.admin_token)
+                ).get_json()["data"]
+                if status["status"] in {"completed", "failed"}:
+                    break
+                time.sleep(0.05)
+
+        self.assertEqual(status["status"], "completed", status)
+        self.assertEqual(status["progress"], {"done": 5, "total": 5})
+        result = status["result"]
+        self.assertEqual((result["inserted_count"], result["failed_count"]), (5, 1))
+        codes = sorted(c.customer_code for c in self.NonSamproxCustomer.query.all())
+        self.assertEqual(codes, [f"E26000{n}" for n in range(1, 6)])
+
+        report = self.client.get(status["error_report_url"], headers=self._auth(self.admin_token))
+        self.assertEqual(report.status_code, 200)
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(report.get_data(as_text=True))))), 1)
+
 
 if __name__ == "__main__":  # pragma: no cover - convenience
     unittest.main()
@@ -1,7 +1,9 @@
 import importlib
+import json
 import os
 import sys
 import unittest
+from unittest.mock import patch
 
 
 class ProductionApiTestCase(unittest.TestCase):
@@ -125,6 +127,149 @@ class ProductionApiTestCase(unittest.TestCase):
         total = data["total_quantity_tons"]
         self.assertAlmostEqual(total, 6.5)
 
+    def test_bulk_daily_production_upserts_full_day_grid(self):
+        first_asset = self._create_machine()
+        second_asset = self._create_machine()
+
+        response = self.client.post(
+            "/api/production/daily",
+            headers=self._auth_headers(self.pm_token),
+            json={"machine_code": first_asset["code"], "date": "2024-05-10", "hour_no": 2, "quantity_tons": 4},
+        )
+        self.assertEqual(response.status_code, 201)
+
+        grid = {
+            "date": "2024-05-10",
+            "machines": [
+                {
+                    "machine_code": first_asset["code"],
+                    "hours": [
+                        {"hour_no": hour, "quantity_tons": 1.5 if hour == 1 else 0}
+                        for hour in range(1, 25)
+                    ],
+                },
+                {
+                    "asset_id": second_asset["id"],
+                    "hours": [{"hour_no": 8, "quantity_tons": 2.25}],
+                },
+            ],
+        }
+        response = self.client.post(
+            "/api/production/daily/bulk",
+            headers=self._auth_headers(self.pm_token),
+            json=grid,
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["written"], 3)
+        first, second = data["machines"]
+        self.assertEqual(first["machine"]["code"], first_asset["code"])
+        self.assertAlmostEqual(first["total_quantity_tons"], 1.5)
+        hour_two = next(entry for entry in first["entries"] if entry["hour_no"] == 2)
+        self.assertIsNotNone(hour_two["id"])
+        self.assertAlmostEqual(hour_two["quantity_tons"], 0.0)
+        self.assertAlmostEqual(second["total_quantity_tons"], 2.25)
+
+        from models import DailyProductionEntry
+
+        self.assertEqual(DailyProductionEntry.query.count(), 3)
+
+        response = self.client.post(
+            "/api/machines/idle-events",
+            headers=self._auth_headers(self.pm_token),
+            json={
+                "asset_id": second_asset["id"],
+                "started_at": "2024-05-10T10:00:00",
+                "ended_at": "2024-05-10T11:00:00",
+            },
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post(
+            "/api/production/daily/bulk",
+            headers=self._auth_headers(self.pm_token),
+            json={
+                "date": "2024-05-10",
+                "machines": [
+                    {
+                        "asset_id": second_asset["id"],
+                        "hours": [
+                            {"hour_no": 8, "quantity_tons": 3},
+                            {"hour_no": 11, "quantity_tons": 1},
+                        ],
+                    }
+                ],
+            },
+        )
+        self.assertEqual(response.status_code, 409)
+        conflicts = response.get_json()["conflicts"]
+        self.assertEqual([item["hour"]["hour_no"] for item in conflicts], [11])
+        hour_eight = DailyProductionEntry.query.filter_by(asset_id=second_asset["id"], hour_no=8).one()
+        self.assertAlmostEqual(hour_eight.quantity_tons, 2.25)
+
+        response = self.client.post(
+            "/api/production/daily/bulk",
+            headers=self._auth_headers(self.pm_token),
+            json={"date": "2024-05-10", "machines": [{"asset_id": first_asset["id"], "hours": [{"hour_no": 25}]}]},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_production_stream_pushes_saved_hours(self):
+        asset = self._create_machine()
+        self.app.config["PRODUCTION_STREAM_HEARTBEAT_SECONDS"] = 0.1
+        self.app.config["PRODUCTION_STREAM_MAX_SECONDS"] = 5
+
+        response = self.client.get(
+            "/api/production/stream",
+            headers=self._auth_headers(self.mm_token),
+            buffered=False,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.mimetype.startswith("text/event-stream"))
+        frames = (chunk.decode() for chunk in response.response)
+        self.assertTrue(next(frames).startswith("retry:"))
+
+        self.app.config["PRODUCTION_STREAM_MAX_SUBSCRIBERS"] = 1
+        busy = self.client.get(
+            "/api/production/stream",
+            headers=self._auth_headers(self.mm_token),
+        )
+        self.assertEqual(busy.status_code, 503)
+        self.assertIn("Retry-After", busy.headers)
+
+        saved = self.client.post(
+            "/api/production/daily",
+            headers=self._auth_headers(self.pm_token),
+            json={
+                "machine_code": asset["code"],
+                "date": "2024-05-10",
+                "hour_no": 3,
+                "quantity_tons": 4.5,
+            },
+        )
+        self.assertEqual(saved.status_code, 201)
+
+        frame = next(frames)
+        while frame.startswith(":"):
+            frame = next(frames)
+        self.assertIn("event: production", frame)
+        payload = json.loads(frame.split("data: ", 1)[1])
+        self.assertEqual(payload["date"], "2024-05-10")
+        self.assertEqual(payload["machines"][0]["machine_code"], asset["code"])
+        self.assertEqual(
+            payload["machines"][0]["hours"],
+            [{"hour_no": 3, "quantity_tons": 4.5}],
+        )
+        response.close()
+
+        reopened = self.client.get(
+            "/api/production/stream",
+            headers=self._auth_headers(self.mm_token),
+            buffered=False,
+        )
+        self.assertEqual(reopened.status_code, 200)
+        reopened.close()
+
     def test_only_production_manager_can_record_output(self):
         asset = self._create_machine()
 
@@ -343,6 +488,168 @@ class ProductionApiTestCase(unittest.TestCase):
         self.assertAlmostEqual(created["forecast_hours"], 0.0)
         self.assertAlmostEqual(created["average_hourly_production"], 0.0)
 
+    def test_forecast_variance_is_holiday_aware_and_cached(self):
+        from datetime import date
+
+        from models import ProductionForecastEntry, TeamWorkCalendarDay
+
+        asset = self._create_machine()
+        db = self.app_module.db
+        db.session.add_all(
+            [
+                ProductionForecastEntry(asset_id=asset["id"], date=date(2024, 5, 10), forecast_tons=5),
+                ProductionForecastEntry(asset_id=asset["id"], date=date(2024, 5, 11), forecast_tons=5),
+                TeamWorkCalendarDay(date=date(2024, 5, 11), is_work_day=False, holiday_name="Shutdown"),
+                TeamWorkCalendarDay(date=date(2024, 5, 23), is_work_day=True),
+            ]
+        )
+        db.session.commit()
+
+        for day, hour_no, tons in (("2024-05-10", 1, 3), ("2024-05-10", 2, 1), ("2024-05-23", 9, 2)):
+            response = self.client.post(
+                "/api/production/daily",
+                headers=self._auth_headers(self.pm_token),
+                json={"machine_code": asset["code"], "date": day, "hour_no": hour_no, "quantity_tons": tons},
+            )
+            self.assertEqual(response.status_code, 201)
+
+        params = {"period": "2024-05", "machine_code": asset["code"]}
+        response = self.client.get(
+            "/api/production/forecast/variance",
+            headers=self._auth_headers(self.mm_token),
+            query_string=params,
+        )
+        self.assertEqual(response.status_code, 200)
+        machine = response.get_json()["machines"][0]
+        self.assertEqual(machine["machine"]["code"], asset["code"])
+        summary = machine["summary"]
+        # May 1 and 24 are public holidays, May 11 is a calendar shutdown and
+        # the May 23 holiday is overridden as a work day.
+        self.assertEqual(summary["work_days"], 28)
+        self.assertEqual(summary["work_days_remaining"], 0)
+        self.assertAlmostEqual(summary["forecast_month_tons"], 10.0)
+        self.assertAlmostEqual(summary["forecast_non_work_day_tons"], 5.0)
+        self.assertAlmostEqual(summary["adjusted_forecast_tons"], 5.0)
+        self.assertAlmostEqual(summary["actual_to_date_tons"], 6.0)
+        self.assertAlmostEqual(summary["variance_to_date_tons"], -4.0)
+        self.assertAlmostEqual(summary["projected_month_end_tons"], 6.0)
+        self.assertAlmostEqual(summary["projected_variance_tons"], 1.0)
+
+        days = {day["date"]: day for day in machine["days"]}
+        self.assertEqual(len(days), 31)
+        self.assertAlmostEqual(days["2024-05-10"]["variance_tons"], -1.0)
+        self.assertFalse(days["2024-05-11"]["is_work_day"])
+        self.assertEqual(days["2024-05-11"]["holiday_name"], "Shutdown")
+        self.assertAlmostEqual(days["2024-05-11"]["cumulative_variance_tons"], -6.0)
+        self.assertTrue(days["2024-05-23"]["is_work_day"])
+        self.assertFalse(days["2024-05-24"]["is_work_day"])
+        self.assertEqual(days["2024-05-24"]["holiday_name"], "Day after Vesak Full Moon Poya")
+
+        cache = self.app.extensions["production_variance_cache"]
+        self.assertEqual(len(cache), 1)
+
+        response = self.client.post(
+            "/api/production/daily",
+            headers=self._auth_headers(self.pm_token),
+            json={"machine_code": asset["code"], "date": "2024-05-10", "hour_no": 1, "quantity_tons": 5},
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            "/api/production/forecast/variance",
+            headers=self._auth_headers(self.mm_token),
+            query_string=params,
+        )
+        summary = response.get_json()["machines"][0]["summary"]
+        self.assertAlmostEqual(summary["actual_to_date_tons"], 8.0)
+        self.assertEqual(len(cache), 1)
+
+    def test_oee_combines_forecast_idle_and_output_per_shift(self):
+        from datetime import date
+
+        from models import ProductionForecastEntry
+
+        asset = self._create_machine()
+        db = self.app_module.db
+        db.session.add(
+            ProductionForecastEntry(
+                asset_id=asset["id"], date=date(2024, 5, 10), forecast_tons=14, forecast_hours=14
+            )
+        )
+        db.session.commit()
+
+        response = self.client.post(
+            "/api/machines/idle-events",
+            headers=self._auth_headers(self.pm_token),
+            json={"asset_id": asset["id"], "started_at": "2024-05-10T08:00:00", "ended_at": "2024-05-10T10:00:00"},
+        )
+        self.assertEqual(response.status_code, 201)
+        for hour_no, tons in ((12, 4), (15, 4), (21, 1.5)):
+            response = self.client.post(
+                "/api/production/daily",
+                headers=self._auth_headers(self.pm_token),
+                json={"machine_code": asset["code"], "date": "2024-05-10", "hour_no": hour_no, "quantity_tons": tons},
+            )
+            self.assertEqual(response.status_code, 201)
+
+        params = {"period": "2024-05", "machine_codes": asset["code"]}
+        response = self.client.get(
+            "/api/production/oee",
+            headers=self._auth_headers(self.mm_token),
+            query_string=params,
+        )
+        self.assertEqual(response.status_code, 200)
+        machine = response.get_json()["machines"][0]
+        day = {item["date"]: item for item in machine["days"]}["2024-05-10"]
+        self.assertEqual(len(machine["days"]), 31)
+        self.assertAlmostEqual(day["shifts"]["day"]["availability"], 600 / 720, places=3)
+        self.assertAlmostEqual(day["shifts"]["day"]["performance"], 0.8, places=3)
+        self.assertAlmostEqual(day["shifts"]["off"]["availability"], 1.0)
+        self.assertAlmostEqual(day["shifts"]["off"]["performance"], 0.75, places=3)
+        self.assertAlmostEqual(day["planned_hours"], 14.0)
+        self.assertAlmostEqual(day["run_hours"], 12.0)
+        self.assertAlmostEqual(day["oee"], (12 / 14) * (9.5 / 12), places=3)
+        self.assertEqual(day["quality"], 1.0)
+        self.assertEqual(machine["totals"]["planned_hours"], day["planned_hours"])
+        self.assertAlmostEqual(machine["totals"]["oee"], day["oee"], places=3)
+
+        cache = self.app.extensions["production_oee_cache"]
+        self.assertEqual(len(cache), 1)
+
+        with patch("oee._compute", wraps=self.app_module.oee._compute) as compute:
+            response = self.client.get(
+                "/api/production/oee",
+                headers=self._auth_headers(self.mm_token),
+                query_string={"start_date": "2024-05-08", "end_date": "2024-05-12", "machine_codes": asset["code"]},
+            )
+        self.assertEqual(response.status_code, 200)
+        compute.assert_not_called()
+        machine = response.get_json()["machines"][0]
+        self.assertEqual([item["date"] for item in machine["days"]][0], "2024-05-08")
+        self.assertEqual(len(machine["days"]), 5)
+        self.assertAlmostEqual(machine["totals"]["oee"], day["oee"], places=3)
+        self.assertEqual(len(cache), 1)
+
+        response = self.client.post(
+            "/api/production/daily",
+            headers=self._auth_headers(self.pm_token),
+            json={"machine_code": asset["code"], "date": "2024-05-10", "hour_no": 21, "quantity_tons": 2},
+        )
+        self.assertEqual(response.status_code, 200)
+        machine = self.client.get(
+            "/api/production/oee",
+            headers=self._auth_headers(self.mm_token),
+            query_string=params,
+        ).get_json()["machines"][0]
+        self.assertAlmostEqual(machine["totals"]["actual_tons"], 10.0)
+        self.assertAlmostEqual(machine["totals"]["performance"], 10 / 12, places=3)
+
+        response = self.client.get(
+            "/api/production/oee",
+            headers=self._auth_headers(self.mm_token),
+            query_string={"start_date": "2024-05-10"},
+        )
+        self.assertEqual(response.status_code, 400)
+
     def test_only_manager_can_save_forecast(self):
         asset = self._create_machine()
 
@@ -431,6 +738,83 @@ class ProductionApiTestCase(unittest.TestCase):
         self.assertIn("MCH-0001", data["machine_codes"])
         self.assertIn("MCH-0002", data["machine_codes"])
 
+    def test_archived_months_stay_readable_and_editable(self):
+        from datetime import date
+
+        import production_history
+        from models import DailyProductionArchive, DailyProductionEntry
+
+        asset = self._create_machine()
+
+        def record_output(day, hour_no, quantity):
+            response = self.client.post(
+                "/api/production/daily",
+                headers=self._auth_headers(self.pm_token),
+                json={
+                    "machine_code": asset["code"],
+                    "date": day,
+                    "hour_no": hour_no,
+                    "quantity_tons": quantity,
+                },
+            )
+            self.assertIn(response.status_code, (200, 201))
+
+        record_output("2024-05-10", 1, 3.5)
+        record_output("2024-05-10", 2, 0.0)
+        record_output("2024-05-11", 4, 2.0)
+        record_output("2024-06-01", 1, 1.0)
+
+        with self.assertRaises(ValueError):
+            production_history.archive_month(date(2024, 6, 1), today=date(2024, 6, 20))
+        result = production_history.archive_month(date(2024, 5, 1), today=date(2024, 7, 1))
+        self.app_module.db.session.commit()
+        self.assertEqual(result, {"period": "2024-05", "days": 2, "hour_rows": 3})
+
+        self.assertEqual(
+            DailyProductionEntry.query.filter(DailyProductionEntry.date < date(2024, 6, 1)).count(), 0
+        )
+        archive = DailyProductionArchive.query.filter_by(date=date(2024, 5, 10)).one()
+        self.assertEqual(archive.hour_tons[:3], [3.5, 0.0, None])
+        self.assertAlmostEqual(archive.total_tons, 3.5)
+        self.assertEqual(archive.productive_hours, 1)
+
+        response = self.client.get(
+            "/api/production/daily",
+            headers=self._auth_headers(self.pm_token),
+            query_string={"machine_code": asset["code"], "date": "2024-05-10"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(response.get_json()["total_quantity_tons"], 3.5)
+
+        response = self.client.get(
+            "/api/production/monthly/summary",
+            headers=self._auth_headers(self.pm_token),
+            query_string={"period": "2024-05"},
+        )
+        self.assertAlmostEqual(response.get_json()["total_production"], 5.5)
+
+        response = self.client.get(
+            "/api/production/monthly/hourly-pulse",
+            headers=self._auth_headers(self.pm_token),
+            query_string={"start_date": "2024-05-10", "end_date": "2024-05-11"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(response.get_json()["total_production"], 5.5)
+
+        record_output("2024-05-10", 2, 1.5)
+        self.assertIsNone(DailyProductionArchive.query.filter_by(date=date(2024, 5, 10)).first())
+        self.assertEqual(DailyProductionEntry.query.filter_by(date=date(2024, 5, 10)).count(), 2)
+        response = self.client.get(
+            "/api/production/monthly/summary",
+            headers=self._auth_headers(self.pm_token),
+            query_string={"period": "2024-05"},
+        )
+        self.assertAlmostEqual(response.get_json()["total_production"], 7.0)
+
+        results = production_history.archive_closed_months(date(2024, 7, 1), today=date(2024, 7, 1))
+        self.assertEqual([result["period"] for result in results], ["2024-05", "2024-06"])
+        self.assertEqual(DailyProductionEntry.query.count(), 0)
+
     def test_monthly_summary_excludes_blocked_machines_from_totals(self):
         first_asset = self._create_machine()
         second_asset = self._create_machine()
@@ -601,6 +985,33 @@ class ProductionApiTestCase(unittest.TestCase):
         self.assertEqual(data["peak"]["hour"], 5)
         self.assertAlmostEqual(data["peak"]["total_tons"], 5.5)
 
+        columnar = self.client.get(
+            "/api/production/monthly/hourly-pulse",
+            headers=self._auth_headers(self.pm_token),
+            query_string={"start_date": "2024-05-01", "end_date": "2024-05-02", "format": "columnar"},
+        ).get_json()
+        self.assertEqual(columnar["format"], "columnar")
+        self.assertNotIn("hourly_totals", columnar)
+        self.assertEqual(columnar["hours"], 48)
+        columns = columnar["columns"]
+        self.assertEqual(columns["step_seconds"], 3600)
+        # 2024-05-01 00:00 Asia/Colombo (UTC+05:30)
+        self.assertEqual(columns["start_epoch"], 1714501800)
+        self.assertEqual(columns["machine_fields"][first_asset["code"]], "MCH1")
+        self.assertEqual(len(columns["machines"]["MCH1"]), 48)
+        self.assertAlmostEqual(columns["machines"]["MCH1"][0], 1.0)
+        self.assertAlmostEqual(columns["machines"]["MCH2"][24 + 4], 3.5)
+        self.assertAlmostEqual(columns["total_tons"][24 + 4], 5.5)
+        self.assertEqual(columnar["peak"], data["peak"])
+        self.assertAlmostEqual(columnar["total_production"], data["total_production"])
+
+        invalid_format = self.client.get(
+            "/api/production/monthly/hourly-pulse",
+            headers=self._auth_headers(self.pm_token),
+            query_string={"period": "2024-05", "format": "csv"},
+        )
+        self.assertEqual(invalid_format.status_code, 400)
+
         invalid_missing = self.client.get(
             "/api/production/monthly/hourly-pulse",
             headers=self._auth_headers(self.pm_token),
@@ -620,6 +1031,42 @@ class ProductionApiTestCase(unittest.TestCase):
         )
 
 
+    def test_hourly_pulse_overlays_merged_idle_minutes(self):
+        first_asset = self._create_machine()
+        second_asset = self._create_machine()
+
+        for asset, started_at, ended_at in (
+            (first_asset, "2024-05-02T10:00:00", "2024-05-02T11:30:00"),
+            (first_asset, "2024-05-02T11:00:00", "2024-05-02T12:00:00"),
+            (second_asset, "2024-05-02T10:30:00", "2024-05-02T11:00:00"),
+            (second_asset, "2024-05-01T23:30:00", "2024-05-02T00:15:00"),
+        ):
+            response = self.client.post(
+                "/api/machines/idle-events",
+                headers=self._auth_headers(self.pm_token),
+                json={"asset_id": asset["id"], "started_at": started_at, "ended_at": ended_at},
+            )
+            self.assertEqual(response.status_code, 201)
+
+        response = self.client.get(
+            "/api/production/monthly/hourly-pulse",
+            headers=self._auth_headers(self.pm_token),
+            query_string={"start_date": "2024-05-02", "end_date": "2024-05-02"},
+        )
+        self.assertEqual(response.status_code, 200)
+        idle = {item["hour"]: item["idle_minutes"] for item in response.get_json()["hourly_totals"]}
+        self.assertAlmostEqual(idle[1], 15.0)
+        self.assertAlmostEqual(idle[11], 90.0)
+        self.assertAlmostEqual(idle[12], 60.0)
+        self.assertAlmostEqual(sum(idle.values()), 165.0)
+
+        columns = self.client.get(
+            "/api/production/monthly/hourly-pulse",
+            headers=self._auth_headers(self.pm_token),
+            query_string={"start_date": "2024-05-02", "end_date": "2024-05-02", "format": "columnar"},
+        ).get_json()["columns"]
+        self.assertEqual(columns["idle_minutes"], [idle[hour] for hour in range(1, 25)])
+
     def test_monthly_idle_summary_accounts_for_shift_hours(self):
         first_asset = self._create_machine()
         second_asset = self._create_machine()
@@ -817,6 +1264,110 @@ class ProductionApiTestCase(unittest.TestCase):
 
         self.assertAlmostEqual(data["total_idle_hours"], 6.0)
 
+    def test_idle_rollups_upsert_shared_buckets(self):
+        from datetime import datetime
+
+        from sqlalchemy import event
+
+        from models import MachineIdleEvent, MachineIdleRollup
+
+        asset = self._create_machine()
+        db = self.app_module.db
+        statements = []
+
+        def capture(_conn, _cursor, statement, *_args):
+            if "machine_idle_rollup" in statement and not statement.startswith("DELETE"):
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            for start_hour in (8, 10):
+                db.session.add(
+                    MachineIdleEvent(
+                        asset_id=asset["id"],
+                        started_at=datetime(2024, 5, 1, start_hour, 0),
+                        ended_at=datetime(2024, 5, 1, start_hour, 30),
+                        reason="Machine",
+                    )
+                )
+                db.session.commit()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+
+        rows = MachineIdleRollup.query.filter_by(asset_id=asset["id"]).all()
+        self.assertEqual([(row.shift, row.idle_minutes) for row in rows], [("day", 60.0)])
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(all("ON CONFLICT" in statement for statement in statements))
+
+    def test_idle_rollups_follow_event_changes_and_open_events(self):
+        from datetime import datetime, timedelta
+
+        from models import MachineIdleEvent, MachineIdleRollup
+
+        asset = self._create_machine()
+        response = self.client.post(
+            "/api/machines/idle-events",
+            headers=self._auth_headers(self.pm_token),
+            json={
+                "asset_id": asset["id"],
+                "started_at": "2024-05-01T18:00:00",
+                "ended_at": "2024-05-02T08:00:00",
+                "reason": "Machine",
+                "secondary_reason": "Power trip",
+            },
+        )
+        self.assertEqual(response.status_code, 201)
+
+        buckets = {
+            (row.day.isoformat(), row.shift): row.idle_minutes
+            for row in MachineIdleRollup.query.filter_by(asset_id=asset["id"]).all()
+        }
+        self.assertEqual(
+            buckets,
+            {
+                ("2024-05-01", "day"): 60.0,
+                ("2024-05-01", "off"): 300.0,
+                ("2024-05-02", "off"): 420.0,
+                ("2024-05-02", "day"): 60.0,
+            },
+        )
+
+        event = self.app_module.db.session.get(MachineIdleEvent, response.get_json()["id"])
+        event.ended_at = datetime(2024, 5, 2, 9, 30)
+        event.secondary_reason = "Feeder jam"
+        self.app_module.db.session.commit()
+
+        pareto = self.client.get(
+            "/api/production/monthly/idle-secondary-pareto",
+            headers=self._auth_headers(self.pm_token),
+            query_string={"period": "2024-05", "machine_codes": asset["code"]},
+        ).get_json()
+        self.assertEqual([item["label"] for item in pareto["reasons"]], ["Feeder jam"])
+        self.assertAlmostEqual(pareto["total_idle_hours"], 3.5)
+
+        self.app_module.db.session.delete(event)
+        self.app_module.db.session.commit()
+        self.assertEqual(MachineIdleRollup.query.filter_by(asset_id=asset["id"]).count(), 0)
+
+        today = datetime.utcnow().date()
+        open_start = datetime.combine(today, datetime.min.time()) + timedelta(hours=7)
+        self.app_module.db.session.add(
+            MachineIdleEvent(asset_id=asset["id"], started_at=open_start, reason="Material")
+        )
+        self.app_module.db.session.commit()
+        self.assertEqual(MachineIdleRollup.query.filter_by(asset_id=asset["id"]).count(), 0)
+
+        summary = self.client.get(
+            "/api/production/monthly/idle-summary",
+            headers=self._auth_headers(self.pm_token),
+            query_string={"period": today.strftime("%Y-%m"), "machine_codes": asset["code"]},
+        ).get_json()
+        today_entry = next(item for item in summary["day_entries"] if item["date"] == today.isoformat())
+        expected_minutes = min(max((datetime.utcnow() - open_start).total_seconds() / 60, 0), 11 * 60)
+        self.assertAlmostEqual(
+            today_entry["machines"][asset["code"]]["idle_hours"], expected_minutes / 60, delta=0.05
+        )
+
     def test_idle_summary_uses_forecast_hours_when_no_events(self):
         asset = self._create_machine()
 
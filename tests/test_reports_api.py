@@ -246,6 +246,33 @@ class ReportsApiTestCase(unittest.TestCase):
             ],
         )
 
+        gamma = Customer(name="Gamma Traders", **customer_kwargs)
+        self.app_module.db.session.add(gamma)
+        self.app_module.db.session.commit()
+
+        response = self.client.get(
+            "/api/reports/customer-sales",
+            headers=self._auth_headers(),
+            query_string={"year": 2024, "month": 5, "page": 1, "page_size": 1},
+        )
+        data = response.get_json()
+        self.assertEqual([item["customer_name"] for item in data["customers"]], ["ACME Corp"])
+        self.assertEqual(data["pagination"]["total_rows"], 2)
+        self.assertEqual(data["pagination"]["total_pages"], 2)
+
+        response = self.client.get(
+            "/api/reports/customer-sales",
+            headers=self._auth_headers(),
+            query_string={"year": 2024, "month": 5, "page": 2, "page_size": 2, "include_empty": "true"},
+        )
+        data = response.get_json()
+        self.assertEqual(data["pagination"]["total_rows"], 3)
+        self.assertEqual(len(data["customers"]), 1)
+        gamma_report = data["customers"][0]
+        self.assertEqual(gamma_report["customer_name"], "Gamma Traders")
+        self.assertEqual(gamma_report["dates"], [])
+        self.assertEqual(gamma_report["monthly_actual_total"], 0.0)
+
     def test_sales_summary_returns_monthly_snapshots(self):
         Customer = self.app_module.Customer
         CustomerCategory = self.app_module.CustomerCategory
@@ -355,6 +382,96 @@ class ReportsApiTestCase(unittest.TestCase):
         self.assertAlmostEqual(top_customer["quantity_tons"], 200.0)
         self.assertAlmostEqual(top_customer["sales_value"], 2000.0)
 
+        # Rollups follow edits and deletes; sales after as_of stay out.
+        db = self.app_module.db
+        entries[0].amount = 1500.0
+        entries[0].date = date(2024, 3, 4)
+        db.session.delete(entries[4])
+        db.session.add(
+            SalesActualEntry(
+                customer_id=acme.id,
+                date=date(2024, 3, 25),
+                amount=900.0,
+                unit_price=10.0,
+                quantity_tons=90.0,
+            )
+        )
+        db.session.commit()
+
+        data = self.client.get(
+            "/api/reports/sales-summary",
+            headers=self._auth_headers(),
+            query_string={"as_of": "2024-03-21"},
+        ).get_json()
+        ytd = data["year_to_date"]
+        self.assertEqual(ytd["monthly_values"][:3], [0.0, 500.0, 2800.0])
+        self.assertAlmostEqual(ytd["sales_value"], 3300.0)
+        self.assertEqual(data["month_to_date"]["daily_values"][3], 1500.0)
+        self.assertEqual(data["month_to_date"]["daily_values"][9], 0.0)
+        self.assertEqual(data["top_customer"]["name"], "ACME Corp")
+        self.assertAlmostEqual(data["top_customer"]["sales_value"], 2100.0)
+
+        from models import SalesRollup
+
+        january = SalesRollup.query.filter_by(grain="month", period_start=date(2024, 1, 1)).all()
+        self.assertEqual(january, [])
+
+    def test_sales_rollup_upserts_new_buckets(self):
+        from sqlalchemy import event
+
+        from models import SalesRollup
+
+        Customer = self.app_module.Customer
+        SalesActualEntry = self.app_module.SalesActualEntry
+        db = self.app_module.db
+
+        customer = Customer(
+            name="ACME Corp",
+            category=self.app_module.CustomerCategory.plantation,
+            credit_term=self.app_module.CustomerCreditTerm.cash,
+            transport_mode=self.app_module.CustomerTransportMode.samprox_lorry,
+            customer_type=self.app_module.CustomerType.regular,
+            sales_coordinator_name="Alex",
+            sales_coordinator_phone="0710000000",
+            store_keeper_name="Sam",
+            store_keeper_phone="0711111111",
+            payment_coordinator_name="Chris",
+            payment_coordinator_phone="0712222222",
+            special_note="Key account",
+        )
+        db.session.add(customer)
+        db.session.commit()
+
+        statements = []
+
+        def capture(_conn, _cursor, statement, *_args):
+            if "sales_rollup" in statement and not statement.startswith(("DELETE", "SELECT")):
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            for amount in (100.0, 250.0):
+                db.session.add(
+                    SalesActualEntry(
+                        customer_id=customer.id,
+                        date=date(2024, 5, 2),
+                        amount=amount,
+                        unit_price=10.0,
+                        quantity_tons=amount / 10.0,
+                    )
+                )
+                db.session.commit()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+
+        rollups = {
+            row.grain: (row.amount, row.quantity_tons, row.entry_count)
+            for row in SalesRollup.query.filter_by(customer_id=customer.id).all()
+        }
+        self.assertEqual(rollups, {"day": (350.0, 35.0, 2), "month": (350.0, 35.0, 2)})
+        self.assertTrue(statements)
+        self.assertTrue(all("ON CONFLICT" in statement for statement in statements))
+
     def test_monthly_sales_summary_groups_top_customers(self):
         Customer = self.app_module.Customer
         CustomerCategory = self.app_module.CustomerCategory
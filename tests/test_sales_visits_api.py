@@ -164,6 +164,142 @@ class SalesVisitsApiTestCase(unittest.TestCase):
         self.assertTrue(data["ok"])
         self.assertGreaterEqual(len(data["data"]), 2)
 
+    def test_geohash_index_supports_prefix_like_on_postgresql(self):
+        from sqlalchemy.dialects import postgresql
+        from sqlalchemy.schema import CreateIndex
+
+        from models import CustomerLocation
+
+        ddl = str(
+            CreateIndex(
+                next(
+                    index
+                    for index in CustomerLocation.__table__.indexes
+                    if index.name == "ix_customer_locations_geohash"
+                )
+            ).compile(dialect=postgresql.dialect())
+        )
+        self.assertIn("varchar_pattern_ops", ddl)
+
+    def test_customer_locations_drive_gps_matching(self):
+        import geo_index
+        from models import Company, CustomerLocation, NonSamproxCustomer
+
+        company = Company(key="exsol-engineering", name="Exsol Engineering (Pvt) Ltd", company_code_prefix="E")
+        self.app_module.db.session.add(company)
+        self.app_module.db.session.flush()
+        own = NonSamproxCustomer(
+            customer_code="E260001", customer_name="Own Dealer", managed_by_user_id=self.sales.id, company_id=company.id
+        )
+        other = NonSamproxCustomer(
+            customer_code="E260002", customer_name="Other Dealer", managed_by_user_id=self.other_sales.id, company_id=company.id
+        )
+        self.app_module.db.session.add_all([own, other])
+        self.app_module.db.session.commit()
+        own_id, other_id = str(own.id), str(other.id)
+
+        # An accurate check-in pins a dealer that has no location yet.
+        visit = self._create_visit(self.sales_token, non_samprox_customer_id=own_id)
+        resp = self.client.post(
+            f"/api/sales-visits/{visit['id']}/check-in",
+            json={"lat": 6.9, "lng": 79.86, "accuracy_m": 20},
+            headers=self._auth(self.sales_token),
+        )
+        self.assertEqual(resp.status_code, 200, resp.get_data(as_text=True))
+        self.assertIsNone(resp.get_json()["data"]["matched_customer"])
+        pinned = CustomerLocation.query.filter_by(non_samprox_customer_id=own.id).one()
+        self.assertEqual(pinned.source, CustomerLocation.SOURCE_CHECK_IN)
+        self.assertEqual(pinned.geohash, geo_index.encode(6.9, 79.86))
+
+        resp = self.client.put(
+            "/api/sales-visits/customer-locations",
+            json={"non_samprox_customer_id": other_id, "lat": 6.9005, "lng": 79.86},
+            headers=self._auth(self.admin_token),
+        )
+        self.assertEqual(resp.status_code, 200, resp.get_data(as_text=True))
+        self.assertEqual(resp.get_json()["data"]["source"], "manual")
+
+        resp = self.client.get(
+            "/api/sales-visits/nearby?lat=6.9&lng=79.86&radius=500", headers=self._auth(self.admin_token)
+        )
+        rows = resp.get_json()["data"]
+        self.assertEqual([row["non_samprox_customer_id"] for row in rows], [own_id, other_id])
+        self.assertEqual(rows[0]["distance_m"], 0)
+        self.assertAlmostEqual(rows[1]["distance_m"], 56, delta=2)
+
+        # Sales reps only see Samprox customers and their own dealers.
+        resp = self.client.get(
+            "/api/sales-visits/nearby?lat=6.9&lng=79.86&radius=500", headers=self._auth(self.sales_token)
+        )
+        self.assertEqual([row["name"] for row in resp.get_json()["data"]], ["Own Dealer"])
+
+        resp = self.client.get("/api/sales-visits/nearby?lat=95&lng=79.86", headers=self._auth(self.sales_token))
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.get(
+            "/api/sales-visits/nearby?lat=6.9&lng=79.86&radius=50000", headers=self._auth(self.sales_token)
+        )
+        self.assertEqual(resp.status_code, 400)
+
+        visit = self._create_visit(self.sales_token, non_samprox_customer_id=own_id)
+        resp = self.client.post(
+            f"/api/sales-visits/{visit['id']}/check-in",
+            json={"lat": 6.9005, "lng": 79.86},
+            headers=self._auth(self.sales_token),
+        )
+        data = resp.get_json()["data"]
+        self.assertFalse(data["gps_mismatch"])
+        self.assertEqual(data["matched_customer"]["name"], "Own Dealer")
+
+        visit = self._create_visit(self.sales_token, non_samprox_customer_id=own_id)
+        resp = self.client.post(
+            f"/api/sales-visits/{visit['id']}/check-in",
+            json={"lat": 6.903, "lng": 79.86, "accuracy_m": 10},
+            headers=self._auth(self.sales_token),
+        )
+        data = resp.get_json()["data"]
+        self.assertTrue(data["gps_mismatch"])
+        self.assertAlmostEqual(data["distance_from_customer_m"], 334, delta=3)
+        self.assertIsNone(data["matched_customer"])
+        self.assertEqual(CustomerLocation.query.count(), 2)
+
+    def test_list_visits_keyset_pages_and_delta_sync(self):
+        created = [self._create_visit(self.sales_token, prospect_name=f"Prospect {i}") for i in range(3)]
+        expected = sorted((v["visit_date"], v["visit_no"]) for v in created)[::-1]
+
+        resp = self.client.get("/api/sales-visits?limit=2", headers=self._auth(self.sales_token))
+        first = resp.get_json()
+        self.assertEqual([(v["visit_date"], v["visit_no"]) for v in first["data"]], expected[:2])
+        self.assertIsNotNone(first["next_cursor"])
+
+        resp = self.client.get(
+            f"/api/sales-visits?limit=2&cursor={first['next_cursor']}", headers=self._auth(self.sales_token)
+        )
+        second = resp.get_json()
+        self.assertEqual([(v["visit_date"], v["visit_no"]) for v in second["data"]], expected[2:])
+        self.assertIsNone(second["next_cursor"])
+
+        resp = self.client.get(
+            "/api/sales-visits",
+            query_string={"updated_since": first["synced_at"]},
+            headers=self._auth(self.sales_token),
+        )
+        self.assertEqual(resp.get_json()["data"], [])
+
+        self.client.put(
+            f"/api/sales-visits/{created[1]['id']}",
+            json={"remarks": "Follow up"},
+            headers=self._auth(self.admin_token),
+        )
+        resp = self.client.get(
+            "/api/sales-visits",
+            query_string={"updated_since": first["synced_at"]},
+            headers=self._auth(self.sales_token),
+        )
+        self.assertEqual([v["id"] for v in resp.get_json()["data"]], [created[1]["id"]])
+
+        resp = self.client.get("/api/sales-visits?cursor=not-a-cursor", headers=self._auth(self.sales_token))
+        self.assertEqual(resp.status_code, 400)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,182 @@
+import importlib
+import os
+import sys
+import unittest
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+
+class SystemStatusApiTestCase(unittest.TestCase):
+    def setUp(self):
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        if "app" in sys.modules:
+            self.app_module = importlib.reload(sys.modules["app"])
+        else:
+            self.app_module = importlib.import_module("app")
+
+        self.app = self.app_module.create_app()
+        self.app.testing = True
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.app_module.db.create_all()
+
+        self.client = self.app.test_client()
+        User = self.app_module.User
+        RoleEnum = self.app_module.RoleEnum
+
+        user = User(name="Admin", email="admin@example.com", role=RoleEnum.admin)
+        user.set_password("Password!1")
+        self.app_module.db.session.add(user)
+        self.app_module.db.session.commit()
+
+        response = self.client.post(
+            "/api/auth/login",
+            json={"email": "admin@example.com", "password": "Password!1"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.token = response.get_json()["access_token"]
+
+    def tearDown(self):
+        self.app_module.db.session.remove()
+        self.app_module.db.drop_all()
+        self.ctx.pop()
+        os.environ.pop("DATABASE_URL", None)
+        if "app" in sys.modules:
+            del sys.modules["app"]
+
+    def _status(self):
+        response = self.client.get(
+            "/api/system/status",
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_status_counts_activity_and_caches_briefly(self):
+        from models import DailyProductionEntry, MachineAsset, MachineIdleEvent
+
+        db = self.app_module.db
+        today = datetime.now(tz=ZoneInfo("Asia/Colombo")).date()
+        yesterday = today - timedelta(days=1)
+
+        asset = MachineAsset(code="MCH-0001", name="Press")
+        db.session.add(asset)
+        db.session.flush()
+        db.session.add_all(
+            [
+                DailyProductionEntry(asset_id=asset.id, date=today, hour_no=1, quantity_tons=2.0),
+                MachineIdleEvent(
+                    asset_id=asset.id,
+                    started_at=datetime.combine(yesterday, time(23, 0)),
+                    ended_at=datetime.combine(today, time(1, 0)),
+                    reason="Power cut",
+                ),
+            ]
+        )
+        db.session.commit()
+
+        data = self._status()
+        self.assertEqual(data["daily_production_entry"], "OK (no activity yesterday)")
+        self.assertEqual(data["machine_idle_event"], "OK")
+
+        db.session.add(
+            DailyProductionEntry(asset_id=asset.id, date=yesterday, hour_no=1, quantity_tons=1.0)
+        )
+        db.session.commit()
+        self.assertEqual(self._status()["daily_production_entry"], "OK (no activity yesterday)")
+
+        self.app.config["SYSTEM_STATUS_CACHE_SECONDS"] = 0
+        self.assertEqual(self._status()["daily_production_entry"], "OK")
+
+    def test_activity_ledger_tracks_writes_and_reports_missing_days(self):
+        from datetime import date
+
+        from models import DailyActivity, DailyProductionEntry, MachineAsset, MachineIdleEvent
+
+        db = self.app_module.db
+        asset = MachineAsset(code="MCH-0001", name="Press")
+        db.session.add(asset)
+        db.session.flush()
+        first = DailyProductionEntry(asset_id=asset.id, date=date(2024, 5, 1), hour_no=1, quantity_tons=2.0)
+        second = DailyProductionEntry(asset_id=asset.id, date=date(2024, 5, 1), hour_no=2, quantity_tons=1.0)
+        event = MachineIdleEvent(
+            asset_id=asset.id,
+            started_at=datetime(2024, 5, 2, 8, 0),
+            ended_at=datetime(2024, 5, 2, 9, 0),
+            reason="Maintenance",
+        )
+        db.session.add_all([first, second, event])
+        db.session.commit()
+
+        event.ended_at = datetime(2024, 5, 3, 9, 0)
+        db.session.delete(second)
+        db.session.commit()
+
+        ledger = {(row.day, row.source): row.row_count for row in DailyActivity.query.all()}
+        self.assertEqual(ledger[(date(2024, 5, 1), "production")], 1)
+        self.assertEqual(ledger[(date(2024, 5, 2), "idle")], 1)
+        self.assertEqual(ledger[(date(2024, 5, 3), "idle")], 1)
+
+        response = self.client.get(
+            "/api/system/activity",
+            headers={"Authorization": f"Bearer {self.token}"},
+            query_string={
+                "start_date": "2024-05-01",
+                "end_date": "2024-05-03",
+                "sources": "production,idle",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["sources"], ["production", "idle"])
+        self.assertEqual(
+            [day["missing"] for day in data["days"]],
+            [["idle"], ["production"], ["production"]],
+        )
+        self.assertEqual(data["days"][0]["counts"], {"production": 1, "idle": 0})
+        self.assertEqual(data["missing_days"], {"production": 2, "idle": 1})
+
+        response = self.client.get(
+            "/api/system/activity",
+            headers={"Authorization": f"Bearer {self.token}"},
+            query_string={"start_date": "2024-05-01", "end_date": "2024-05-03", "sources": "payroll"},
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(
+            "/api/system/activity",
+            headers={"Authorization": f"Bearer {self.token}"},
+            query_string={"start_date": "2023-01-01", "end_date": "2024-05-03"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+    def test_activity_ledger_upserts_first_write_of_a_day(self):
+        from datetime import date
+
+        from sqlalchemy import event
+
+        from models import DailyActivity
+
+        db = self.app_module.db
+        statements = []
+
+        def capture(_conn, _cursor, statement, *_args):
+            if "daily_activity" in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            for _ in range(2):
+                DailyActivity.apply(db.session.connection(), {(date(2024, 5, 1), "sales"): 1})
+            db.session.commit()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+
+        rows = DailyActivity.query.filter_by(source="sales").all()
+        self.assertEqual([row.row_count for row in rows], [2])
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(all("ON CONFLICT" in statement for statement in statements))
+
+
+if __name__ == "__main__":
+    unittest.main()
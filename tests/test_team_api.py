@@ -1,8 +1,10 @@
+import io
 import importlib
 import os
 import sys
 import unittest
 
+from openpyxl import load_workbook
 from sqlalchemy import text
 
 
@@ -790,6 +792,199 @@ class TeamApiTestCase(unittest.TestCase):
         data = response.get_json()
         self.assertIn("days", data)
 
+    def _seed_pay_sheet_activity(self):
+        from datetime import date, datetime
+        from decimal import Decimal
+
+        from models import (
+            Customer,
+            CustomerCategory,
+            CustomerCreditTerm,
+            CustomerTransportMode,
+            CustomerType,
+            MaterialItem,
+            MRNHeader,
+            MRNLine,
+            SalesActualEntry,
+            TeamMember,
+        )
+
+        db = self.app_module.db
+        sarath = TeamMember(reg_number="E011", name="Sarath", join_date=date(2020, 1, 1))
+        amal = TeamMember(reg_number="E101", name="Amal", join_date=date(2020, 1, 1))
+        bimal = TeamMember(reg_number="E102", name="Bimal", join_date=date(2020, 1, 1))
+        driver = TeamMember(reg_number="E103", name="Driver", join_date=date(2020, 1, 1))
+        customer = Customer(
+            name="ACME Corp",
+            category=CustomerCategory.plantation,
+            credit_term=CustomerCreditTerm.cash,
+            transport_mode=CustomerTransportMode.samprox_lorry,
+            customer_type=CustomerType.regular,
+            sales_coordinator_name="Alex",
+            sales_coordinator_phone="0710000000",
+            store_keeper_name="Sam",
+            store_keeper_phone="0711111111",
+            payment_coordinator_name="Chris",
+            payment_coordinator_phone="0712222222",
+            special_note="Key account",
+        )
+        wood = MaterialItem(name="Wood Shaving")
+        db.session.add_all([sarath, amal, bimal, driver, customer, wood])
+        db.session.flush()
+
+        def sale(day, quantity, loaders=(), vehicle=None, driver_id=None, helpers=()):
+            loaders = list(loaders) + [None] * (3 - len(loaders))
+            helpers = list(helpers) + [None] * (2 - len(helpers))
+            return SalesActualEntry(
+                customer_id=customer.id,
+                date=date(2024, 5, day),
+                amount=quantity * 1000,
+                quantity_tons=quantity,
+                loader1_id=loaders[0],
+                loader2_id=loaders[1],
+                loader3_id=loaders[2],
+                vehicle_number=vehicle,
+                driver_id=driver_id,
+                helper1_id=helpers[0],
+                helper2_id=helpers[1],
+            )
+
+        db.session.add_all(
+            [
+                sale(2, 30.0, loaders=(sarath.id, amal.id, sarath.id), vehicle="li-1795", driver_id=driver.id, helpers=(amal.id,)),
+                sale(2, 12.5, loaders=(amal.id, bimal.id, sarath.id), vehicle="LI-1795", driver_id=driver.id, helpers=(amal.id, bimal.id)),
+                sale(3, 7.25, loaders=(bimal.id,), vehicle="LB-3237", driver_id=driver.id, helpers=(bimal.id, bimal.id)),
+                sale(4, 0.0, loaders=(amal.id,), vehicle="LB-3237", driver_id=driver.id, helpers=(amal.id,)),
+                sale(5, 9.0, loaders=(sarath.id,), vehicle="XX-0001", driver_id=driver.id, helpers=(amal.id,)),
+                sale(31, 4.0, loaders=(amal.id,)),
+                SalesActualEntry(
+                    customer_id=customer.id, date=date(2024, 6, 1), amount=1.0, quantity_tons=100.0, loader1_id=amal.id
+                ),
+            ]
+        )
+
+        def mrn(number, day, created_hour, driver_id, helpers, lines):
+            header = MRNHeader(
+                mrn_no=f"MRN-{number}",
+                date=date(2024, 5, day),
+                vehicle_no="LI-1795",
+                qty_ton=Decimal(str(sum(lines))),
+                amount=Decimal("0"),
+                weighing_slip_no=f"WS-{number}",
+                weigh_in_time=datetime(2024, 5, day, created_hour),
+                weigh_out_time=datetime(2024, 5, day, created_hour, 30),
+                security_officer_name="Guard",
+                authorized_person_name="Boss",
+                driver_id=driver_id,
+                helper1_id=helpers[0] if helpers else None,
+                helper2_id=helpers[1] if len(helpers) > 1 else None,
+                created_at=datetime(2024, 5, day, created_hour),
+            )
+            db.session.add(header)
+            db.session.flush()
+            for index, quantity in enumerate(lines):
+                db.session.add(
+                    MRNLine(
+                        mrn_id=header.id,
+                        item_id=wood.id,
+                        first_weight_kg=Decimal("10000"),
+                        second_weight_kg=Decimal("5000"),
+                        qty_ton=Decimal(str(quantity)),
+                        unit_price=Decimal("0"),
+                        approved_unit_price=Decimal("0"),
+                        amount=Decimal("0"),
+                        created_at=datetime(2024, 5, day, created_hour, index),
+                    )
+                )
+
+        mrn(1, 2, 9, driver.id, [amal.id], [4.0, 1.5])
+        mrn(2, 6, 8, driver.id, [amal.id, bimal.id], [2.0])
+        mrn(3, 6, 10, driver.id, [bimal.id], [3.5])
+        db.session.commit()
+        return {"sarath": sarath.id, "amal": amal.id, "bimal": bimal.id, "driver": driver.id}
+
+    def test_loading_pay_slab_applies_at_exact_boundary(self):
+        from datetime import date
+
+        from models import SalesActualEntry, TeamMember
+
+        ids = self._seed_pay_sheet_activity()
+        db = self.app_module.db
+        sarath = db.session.get(TeamMember, ids["sarath"])
+        customer_id = SalesActualEntry.query.first().customer_id
+        # 25.00 t in total, which sums to 24.999999999999996 as floats.
+        for quantity in (1.24, 3.53, 1.07, 0.72, 0.9, 5.26, 4.83, 5.06, 2.37, 0.02):
+            db.session.add(
+                SalesActualEntry(
+                    customer_id=customer_id,
+                    date=date(2024, 7, 10),
+                    amount=quantity * 1000,
+                    quantity_tons=quantity,
+                    loader1_id=sarath.id,
+                )
+            )
+        db.session.commit()
+
+        response = self.client.get(
+            "/api/team/loading-pay?month=7&year=2024",
+            headers=self._auth_headers(self.admin_token),
+        )
+        self.assertEqual(response.status_code, 200)
+        records = response.get_json()["records"]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["loadingQuantity"], 25000.0)
+        self.assertEqual(records[0]["loadingPay"], 7500.0)
+
+    def test_pay_sheets_aggregate_loaders_and_vehicle_crews(self):
+        ids = self._seed_pay_sheet_activity()
+        headers = self._auth_headers(self.admin_token)
+
+        response = self.client.get("/api/team/loading-pay?month=5&year=2024", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        loading = {
+            record["teamMemberId"]: (record["loadingQuantity"], record["loadingPay"])
+            for record in response.get_json()["records"]
+        }
+        self.assertEqual(
+            loading,
+            {
+                ids["amal"]: (23166.67, 4633.33),
+                ids["bimal"]: (11416.67, 2283.33),
+                ids["sarath"]: (28166.67, 7500.0),
+            },
+        )
+
+        response = self.client.get("/api/team/transport-pay?month=5&year=2024", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        transport = {
+            record["teamMemberId"]: (
+                record["woodShavingQuantity"],
+                record["briquetteQuantity"],
+                record["driverPayment"],
+                record["helperPayment"],
+                record["extraPayment"],
+                record["totalPayment"],
+            )
+            for record in response.get_json()["records"]
+        }
+        self.assertEqual(
+            transport,
+            {
+                ids["amal"]: (7.5, 42.5, 0.0, 12500.0, 250.0, 12750.0),
+                ids["bimal"]: (5.5, 19.75, 0.0, 9500.0, 250.0, 9750.0),
+                ids["driver"]: (11.0, 49.75, 16000.0, 0.0, 0.0, 16000.0),
+            },
+        )
+
+        response = self.client.get(
+            "/api/team/transport-pay/export?month=5&year=2024", headers=headers
+        )
+        self.assertEqual(response.status_code, 200)
+        sheet = load_workbook(io.BytesIO(response.data)).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0][:2], ("Reg No", "Name"))
+        self.assertEqual([row[-1] for row in rows[1:]], [12750, 9750, 16000])
+
 
 if __name__ == "__main__":
     unittest.main()